@@ -25,6 +25,9 @@ python manage.py migrate --noinput
 echo "🎨 Collecte des fichiers statiques..."
 python manage.py collectstatic --noinput
 
+echo "📘 Précalcul du schéma OpenAPI..."
+python manage.py build_schema
+
 echo "♻️ Redémarrage de Gunicorn & Nginx..."
 sudo systemctl restart gunicorn_rapapp.service
 sudo systemctl reload nginx
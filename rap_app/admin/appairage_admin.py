@@ -1,9 +1,11 @@
 from django.contrib import admin, messages
+from django.db import transaction
 from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 
 from ..models import Appairage, HistoriqueAppairage
-from ..models.appairage import AppairageStatut, AppairageActivite
+from ..models.appairage import AppairageStatut, AppairageActivite, batch_candidat_snapshots
+from ..utils.bulk_writer import ecritures_groupees
 
 
 # ───────────────────────────────────────────────
@@ -113,11 +115,12 @@ class AppairageAdmin(admin.ModelAdmin):
     # ───────────────────────────────
     def _bulk_set_statut(self, request, queryset: QuerySet[Appairage], new_statut: str):
         updated = 0
-        for a in queryset:
-            if a.statut != new_statut:
-                a.statut = new_statut
-                a.save(user=request.user)
-                updated += 1
+        with transaction.atomic(), batch_candidat_snapshots(user=request.user), ecritures_groupees():
+            for a in queryset:
+                if a.statut != new_statut:
+                    a.statut = new_statut
+                    a.save(user=request.user)
+                    updated += 1
         if updated:
             self.message_user(
                 request,
@@ -127,6 +130,12 @@ class AppairageAdmin(admin.ModelAdmin):
         else:
             self.message_user(request, _("Aucun changement effectué."), level=messages.INFO)
 
+    def delete_queryset(self, request, queryset):
+        """Suppression de masse via delete() du modèle, snapshots candidats recalculés en lot."""
+        with transaction.atomic(), batch_candidat_snapshots(user=request.user):
+            for appairage in queryset.select_related("candidat", "partenaire"):
+                appairage.delete()
+
     # ───────────────────────────────
     # Définition des actions rapides
     # ───────────────────────────────
@@ -172,10 +181,11 @@ class AppairageAdmin(admin.ModelAdmin):
     @admin.action(description="📦 Archiver les appairages sélectionnés")
     def act_archiver(self, request, queryset):
         updated = 0
-        for app in queryset:
-            if app.activite != AppairageActivite.ARCHIVE:
-                app.archiver(user=request.user)
-                updated += 1
+        with transaction.atomic(), batch_candidat_snapshots(user=request.user), ecritures_groupees():
+            for app in queryset:
+                if app.activite != AppairageActivite.ARCHIVE:
+                    app.archiver(user=request.user)
+                    updated += 1
         if updated:
             self.message_user(
                 request,
@@ -188,10 +198,11 @@ class AppairageAdmin(admin.ModelAdmin):
     @admin.action(description="♻️ Désarchiver les appairages sélectionnés")
     def act_desarchiver(self, request, queryset):
         updated = 0
-        for app in queryset:
-            if app.activite != AppairageActivite.ACTIF:
-                app.desarchiver(user=request.user)
-                updated += 1
+        with transaction.atomic(), batch_candidat_snapshots(user=request.user), ecritures_groupees():
+            for app in queryset:
+                if app.activite != AppairageActivite.ACTIF:
+                    app.desarchiver(user=request.user)
+                    updated += 1
         if updated:
             self.message_user(
                 request,
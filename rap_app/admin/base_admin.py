@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.timezone import localtime
 
+from ..utils.cache_utils import invalidate_model_caches
+
 
 class BaseAdminMixin(admin.ModelAdmin):
     """
@@ -41,9 +43,11 @@ class BaseAdminMixin(admin.ModelAdmin):
     @admin.action(description="🔒 Désactiver les objets sélectionnés")
     def desactiver(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_model_caches(queryset.model)
         self.message_user(request, f"{updated} objet(s) désactivé(s).")
 
     @admin.action(description="✅ Réactiver les objets sélectionnés")
     def activer(self, request, queryset):
         updated = queryset.update(is_active=True)
+        invalidate_model_caches(queryset.model)
         self.message_user(request, f"{updated} objet(s) réactivé(s).")
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 
 from ..models.cvtheque import CVTheque
+from ..utils.cache_utils import invalidate_model_caches
 
 
 @admin.register(CVTheque)
@@ -129,11 +130,13 @@ class CVThequeAdmin(admin.ModelAdmin):
     @admin.action(description="Rendre public les documents sélectionnés")
     def marquer_public(self, request, queryset):
         count = queryset.update(est_public=True)
+        invalidate_model_caches(CVTheque)
         self.message_user(request, f"{count} documents rendus publics.")
 
     @admin.action(description="Rendre privé les documents sélectionnés")
     def marquer_prive(self, request, queryset):
         count = queryset.update(est_public=False)
+        invalidate_model_caches(CVTheque)
         self.message_user(request, f"{count} documents rendus privés.")
 
     # ----------------------------
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.timezone import localtime
 from ..models.documents import Document
+from ..utils.cache_utils import invalidate_model_caches
 
 
 @admin.register(Document)
@@ -99,11 +100,13 @@ class DocumentAdmin(admin.ModelAdmin):
     @admin.action(description="✅ Activer les documents sélectionnés")
     def activer_documents(self, request, queryset):
         updated = queryset.update(is_active=True)
+        invalidate_model_caches(Document)
         self.message_user(request, f"{updated} document(s) activé(s).")
 
     @admin.action(description="🚫 Désactiver les documents sélectionnés")
     def desactiver_documents(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_model_caches(Document)
         self.message_user(request, f"{updated} document(s) désactivé(s).")
 
     def save_model(self, request, obj, form, change):
@@ -1,10 +1,12 @@
 import logging
 from django.contrib import admin, messages
+from django.db import transaction
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 from ..models.formations import Formation, HistoriqueFormation, Activite
+from ..utils.bulk_writer import ecritures_groupees
 
 logger = logging.getLogger("application.formation")
 
@@ -275,19 +277,21 @@ class FormationAdmin(admin.ModelAdmin):
     @admin.action(description=_("🗃️ Archiver les formations sélectionnées"))
     def action_archiver(self, request, queryset):
         count = 0
-        for formation in queryset:
-            if formation.activite != Activite.ARCHIVEE:
-                formation.archiver(user=request.user, commentaire="Archivage via admin Django")
-                count += 1
+        with transaction.atomic(), ecritures_groupees():
+            for formation in queryset:
+                if formation.activite != Activite.ARCHIVEE:
+                    formation.archiver(user=request.user, commentaire="Archivage via admin Django")
+                    count += 1
         self.message_user(request, _(f"{count} formation(s) archivée(s)."), messages.SUCCESS)
 
     @admin.action(description=_("♻️ Désarchiver les formations sélectionnées"))
     def action_desarchiver(self, request, queryset):
         count = 0
-        for formation in queryset:
-            if formation.activite != Activite.ACTIVE:
-                formation.desarchiver(user=request.user, commentaire="Restauration via admin Django")
-                count += 1
+        with transaction.atomic(), ecritures_groupees():
+            for formation in queryset:
+                if formation.activite != Activite.ACTIVE:
+                    formation.desarchiver(user=request.user, commentaire="Restauration via admin Django")
+                    count += 1
         self.message_user(request, _(f"{count} formation(s) restaurée(s)."), messages.SUCCESS)
 
     @admin.action(description=_("📄 Dupliquer les formations sélectionnées"))
@@ -12,6 +12,7 @@ from django.utils.translation import gettext_lazy as _
 # Adapte ces imports à ton app si besoin
 from rap_app.models.prospection import Prospection
 from rap_app.models.prospection_comments import ProspectionComment
+from rap_app.utils.cache_utils import invalidate_model_caches
 
 
 # ───────────────────────────────────────────────────────────────
@@ -22,24 +23,20 @@ class DepartementListFilter(admin.SimpleListFilter):
     parameter_name = "departement"
 
     def lookups(self, request, model_admin) -> Iterable[Tuple[str, str]]:
-        # Récupère les 2 premiers chars du code postal des centres liés
-        qs = Prospection.objects.filter(comments__isnull=False).values_list(
-            "centre__code_postal", flat=True
+        # Codes département (indexés) des centres liés
+        codes = (
+            Prospection.objects.filter(comments__isnull=False)
+            .exclude(centre__departement_code="")
+            .values_list("centre__departement_code", flat=True)
+            .distinct()
         )
-        codes = set()
-        for cp in qs:
-            if not cp:
-                continue
-            code = str(cp).strip()[:2]
-            if code:
-                codes.add(code)
-        return sorted((c, c) for c in codes)
+        return sorted((c, c) for c in set(codes) if c)
 
     def queryset(self, request, queryset: QuerySet[ProspectionComment]):
         val = self.value()
         if not val:
             return queryset
-        return queryset.filter(prospection__centre__code_postal__startswith=str(val)[:2])
+        return queryset.filter(prospection__centre__departement_code=str(val)[:2])
 
 
 # ───────────────────────────────────────────────────────────────
@@ -126,11 +123,13 @@ class ProspectionCommentAdmin(admin.ModelAdmin):
     @admin.action(description=_("Marquer comme interne"))
     def mark_as_internal(self, request, queryset: QuerySet[ProspectionComment]):
         updated = queryset.update(is_internal=True)
+        invalidate_model_caches(ProspectionComment)
         self.message_user(request, _("%(n)d commentaire(s) marqué(s) interne.") % {"n": updated})
 
     @admin.action(description=_("Marquer comme externe"))
     def mark_as_external(self, request, queryset: QuerySet[ProspectionComment]):
         updated = queryset.update(is_internal=False)
+        invalidate_model_caches(ProspectionComment)
         self.message_user(request, _("%(n)d commentaire(s) marqué(s) externe.") % {"n": updated})
 
     # ── created_by auto (si champ présent sur BaseModel)
@@ -1,5 +1,6 @@
 # rap_app/api/api_urls.py
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
@@ -18,6 +19,8 @@ from .viewsets.stats_viewsets.candidats_stats_viewsets import CandidatStatsViewS
 from .viewsets.stats_viewsets.prospection_stats_viewsets import ProspectionStatsViewSet
 from .viewsets.stats_viewsets.formation_stats_viewsets import FormationStatsViewSet
 from .viewsets.stats_viewsets.appairage_comment_stats_viewset import AppairageCommentaireStatsViewSet
+from .viewsets.stats_viewsets.vae_stats_viewsets import VAEStatsViewSet
+from .viewsets.stats_viewsets.dashboard_viewset import DashboardViewSet
 
 from .viewsets.appairage_viewsets import AppairageViewSet
 from .viewsets.appairage_commentaires_viewset import CommentaireAppairageViewSet
@@ -44,6 +47,7 @@ from .viewsets.jury_viewsets import SuiviJuryViewSet
 from .viewsets.vae_viewsets import VAEViewSet
 
 from .viewsets.me_viewsets import MeAPIView, RoleChoicesView
+from .viewsets.monitoring_viewsets import DbConnectionMetricsView, SqlProfilingReportView
 
 from .viewsets.prepa_viewset import PrepaViewSet
 from .viewsets.declic_viewset import DeclicViewSet
@@ -85,6 +89,8 @@ router.register(r'appairage-stats', AppairageStatsViewSet, basename='appairage-s
 router.register(r'commentaire-stats', CommentaireStatsViewSet, basename='commentaire-stats')
 router.register(r'prospection-comment-stats', ProspectionCommentStatsViewSet, basename='prospection-comment-stats')
 router.register(r'appairage-commentaire-stats', AppairageCommentaireStatsViewSet, basename='appairage-commentaire-stats')
+router.register(r'vae-stats', VAEStatsViewSet, basename='vae-stats')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
 # === FIX 🔥 — pas de path("") !
 urlpatterns = [
@@ -96,7 +102,18 @@ urlpatterns = [
     path("search/", SearchView.as_view(), name="search"),
     path("me/", MeAPIView.as_view(), name="me"),
     path("roles/", RoleChoicesView.as_view(), name="roles"),
+    path("monitoring/db/", DbConnectionMetricsView.as_view(), name="monitoring-db"),
+    path("monitoring/sql/", SqlProfilingReportView.as_view(), name="monitoring-sql"),
 ]
 
+# Profil ASGI : versions async des vues I/O (mêmes URL, déclarées avant le router)
+if getattr(settings, "ASYNC_VIEWS", False):
+    from .async_views import dashboard_view, search_view
+
+    urlpatterns = [
+        path("search/", search_view, name="search"),
+        path("dashboard/", dashboard_view, name="dashboard-list"),
+    ] + [p for p in urlpatterns if p.name != "search"]
+
 # Ajout DIRECT du router DRF
 urlpatterns += router.urls
@@ -0,0 +1,113 @@
+# rap_app/api/async_views.py
+
+"""
+⚡ Vues async (profil ASGI, `ASYNC_VIEWS=True`).
+
+DRF 3.14 n'a pas de vues async : ces points d'entrée sont des vues Django
+`async def` qui réutilisent le cycle DRF de la vue sync équivalente
+(authentification JWT, permissions, throttling, gestion d'erreurs, rendu)
+via `run_drf`, puis attendent leurs sous-tâches I/O sans bloquer la boucle :
+
+- `/api/search/`    : les 7 ressources interrogées en parallèle ;
+- `/api/dashboard/` : les widgets de stats en parallèle.
+
+Mêmes URL, mêmes paramètres et même payload que les vues sync ; le travail
+ORM reste synchrone, exécuté dans l'exécuteur avec une connexion DB par
+thread (recyclée selon CONN_MAX_AGE). Les téléchargements n'ont pas besoin
+de vue dédiée : en ASGI, `serve_file` diffuse par un itérateur async.
+"""
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponseNotAllowed
+from rest_framework.response import Response
+
+from ..utils.profiling import profile_thread
+from .viewsets.search_viewset import SearchView, paginate_section
+from .viewsets.stats_viewsets.dashboard_viewset import DashboardViewSet
+
+
+async def run_drf(view_class, request, handler, **initkwargs):
+    """
+    Exécute `handler(view, drf_request)` (coroutine) dans le cycle d'une vue DRF :
+    `initial()` (auth, permissions, throttles) puis `finalize_response()`.
+    """
+    view = view_class(**initkwargs)
+    view.args, view.kwargs = (), {}
+    view.request = drf_request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    view.format_kwarg = None
+    try:
+        await sync_to_async(view.initial)(drf_request)
+        response = await handler(view, drf_request)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+    response = view.finalize_response(drf_request, response)
+    return response.render()
+
+
+def _in_worker_thread(func, *args):
+    """
+    Dans un thread de l'exécuteur : connexion propre avant et après, profil
+    SQL de la requête (`sync_to_async` propage les variables de contexte).
+    """
+    close_old_connections()
+    try:
+        with profile_thread():
+            return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def _gather(func, jobs, concurrent: bool):
+    """`func(*job)` pour chaque job : en parallèle, ou en série dans le thread de la requête."""
+    if concurrent and len(jobs) > 1:
+        run = sync_to_async(_in_worker_thread, thread_sensitive=False)
+        return await asyncio.gather(*(run(func, *job) for job in jobs))
+    return await sync_to_async(lambda: [func(*job) for job in jobs])()
+
+
+# ────────────────────────────────────────────────────────────
+# 🔍 Recherche globale
+# ────────────────────────────────────────────────────────────
+async def _search(view, request):
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"error": "Paramètre 'q' requis"}, status=400)
+
+    sections = view.search_sections(request, query)  # querysets paresseux, sans I/O
+    results = await _gather(
+        paginate_section,
+        [(request, qs, serializer_class) for qs, serializer_class in sections.values()],
+        getattr(settings, "ASYNC_VIEWS_CONCURRENT", True),
+    )
+    return Response(dict(zip(sections, results)))
+
+
+async def search_view(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return await run_drf(SearchView, request, _search)
+
+
+# ────────────────────────────────────────────────────────────
+# 🧩 Tableau de bord groupé
+# ────────────────────────────────────────────────────────────
+async def _dashboard(view, request):
+    start = time.perf_counter()
+    prepared = view.prepare_jobs(request)
+    if isinstance(prepared, Response):
+        return prepared
+    widgets, jobs = prepared
+    results = await _gather(view._run_widget, jobs, getattr(settings, "DASHBOARD_CONCURRENT", False))
+    return view.bundle_response(widgets, results, start)
+
+
+async def dashboard_view(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return await run_drf(DashboardViewSet, request, _dashboard, action_map={"get": "list"})
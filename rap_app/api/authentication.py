@@ -0,0 +1,131 @@
+# rap_app/api/authentication.py
+
+"""
+🔐 Authentification JWT sans requête base sur le chemin chaud.
+
+- Le périmètre de l'utilisateur (id, actif, rôle, drapeaux staff/superuser,
+  IDs de centres) est mis en cache quelques secondes — jamais l'instance
+  complète (mot de passe, e-mail…) — sous une clé versionnée par
+  utilisateur : toute modification du compte ou de ses centres change la
+  version (immédiatement et au commit) → l'entrée n'est plus lue.
+- Sur un succès de cache, l'utilisateur est reconstruit avec ces seuls
+  champs ; les autres sont différés (chargés à la demande par Django).
+- Optionnellement (settings.JWT_TRUST_SCOPE_CLAIMS), les requêtes de lecture
+  sont servies depuis les claims signés du jeton (rôle, centres…), tant que
+  la version portée par le jeton est toujours la version courante.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from ..utils.cache_utils import bump_cache_version, get_cache_versions, user_cache_namespace
+
+AUTH_USER_KEY = "rap_app:auth_user:{}:{}"
+DEFAULT_AUTH_USER_TIMEOUT = 60
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Claims recopiés dans le jeton à l'émission (cf. EmailTokenObtainPairSerializer).
+# Périmètre uniquement : un JWT est signé, pas chiffré — aucune donnée
+# d'identité (e-mail, nom…) n'y figure.
+SCOPE_CLAIM_FIELDS = ("role", "is_superuser", "is_staff")
+
+# Champs mis en cache (en plus des IDs de centres)
+CACHED_USER_FIELDS = ("id", "is_active", "role", "is_staff", "is_superuser")
+
+
+def auth_user_cache_timeout() -> int:
+    return int(getattr(settings, "AUTH_USER_CACHE_TIMEOUT", DEFAULT_AUTH_USER_TIMEOUT))
+
+
+def current_user_version(user_id) -> int:
+    return get_cache_versions(user_cache_namespace(user_id))[0]
+
+
+def scope_claims_for(user) -> dict:
+    """
+    Claims de périmètre à signer dans le jeton.
+    `uv` (version utilisateur) n'est jamais 0 : une version absente du cache
+    (éviction, redémarrage) ne peut donc pas valider un ancien jeton.
+    """
+    version = current_user_version(user.pk) or bump_cache_version(user_cache_namespace(user.pk))
+    claims = {field: getattr(user, field, None) for field in SCOPE_CLAIM_FIELDS}
+    claims["centres"] = user.get_centre_ids()
+    claims["uv"] = version
+    return claims
+
+
+def user_cache_payload(user) -> dict:
+    """Sous-ensemble non sensible de l'utilisateur conservé en cache."""
+    payload = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+    payload["centres"] = tuple(user.centres.values_list("id", flat=True))
+    return payload
+
+
+def _deferred_user(values: dict):
+    """Instance aux seuls champs `values` (les autres différés), sans requête."""
+    model = get_user_model()
+    # from_db attend les valeurs dans l'ordre des champs du modèle
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db("default", names, [values[name] for name in names])
+
+
+def user_from_cache_payload(payload):
+    """Instance aux champs différés (hors `CACHED_USER_FIELDS`), sans requête."""
+    user = _deferred_user({field: payload[field] for field in CACHED_USER_FIELDS})
+    user._cached_centre_ids = tuple(payload["centres"])
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication dont `get_user()` ne touche la base qu'en cas d'absence du cache."""
+
+    def authenticate(self, request):
+        self._safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = current_user_version(user_id)
+
+        if getattr(settings, "JWT_TRUST_SCOPE_CLAIMS", False) and getattr(self, "_safe_method", False):
+            user = self.get_user_from_claims(validated_token, user_id, version)
+            if user is not None:
+                return user
+
+        key = AUTH_USER_KEY.format(user_id, version)
+        payload = cache.get(key)
+        if payload is None:
+            user = super().get_user(validated_token)  # contrôles actif / révocation faits ici
+            payload = user_cache_payload(user)
+            user._cached_centre_ids = payload["centres"]
+            cache.set(key, payload, auth_user_cache_timeout())
+            return user
+
+        # Pas de contrôle de révocation ici : un changement de mot de passe
+        # sauvegarde l'utilisateur, donc change la version et écarte l'entrée.
+        if api_settings.CHECK_USER_IS_ACTIVE and not payload["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user_from_cache_payload(payload)
+
+    def get_user_from_claims(self, validated_token, user_id, version):
+        """
+        Utilisateur reconstruit depuis les claims signés (aucune requête).
+        Réservé aux méthodes sûres : l'instance n'a pas tous les champs et
+        ne doit jamais être sauvegardée.
+        """
+        if not version or validated_token.get("uv") != version or "centres" not in validated_token:
+            return None
+        values = {field: validated_token.get(field) for field in SCOPE_CLAIM_FIELDS}
+        user = _deferred_user({**values, "id": user_id, "is_active": True})
+        user._cached_centre_ids = tuple(validated_token.get("centres") or ())
+        user._from_token_claims = True
+        return user
@@ -1,5 +1,13 @@
-from typing import Optional, Tuple
-from django.db.models import Q, QuerySet
+import hashlib
+from typing import Callable, Iterable, Optional, Tuple
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max, Q, QuerySet
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..utils.cache_utils import build_cache_key, get_cache_versions, get_or_build, user_scope_key
 
 
 class StaffCentresScopeMixin:
@@ -12,10 +20,13 @@ class StaffCentresScopeMixin:
 
     Personnalisation par ViewSet :
       - centre_lookups: chemins vers l'ID centre (ex: ("centre_id",) ou ("formation__centre_id",))
-      - departement_lookups: chemins vers un champ "code postal" ou "code departement"
-                             (ex: ("centre__code_postal",) ou ("centre__departement_code",))
+      - departement_lookups: chemins vers un champ "code departement" indexé (→ `IN`)
+                             ou "code postal" (→ préfixe `STARTSWITH`, non indexable)
+                             (ex: ("centre__departement_code",) ou ("partenaire__zip_code",))
       - departement_code_len: longueur du préfixe à matcher (défaut 2 → "92", "75", ...)
 
+    `DISTINCT` n'est ajouté que si un chemin traverse une relation multiple.
+
     Récupération du périmètre staff :
       - Centres : via M2M `user.centres` (par défaut)
       - Départements : via `departements_codes` ou `departements` (user ou user.profile)
@@ -23,7 +34,7 @@ class StaffCentresScopeMixin:
 
     # ---- config par défaut (override dans les ViewSets si nécessaire) ----
     centre_lookups: Tuple[str, ...] = ("centre_id",)
-    departement_lookups: Tuple[str, ...] = ("centre__code_postal",)
+    departement_lookups: Tuple[str, ...] = ("centre__departement_code",)
     departement_code_len: int = 2
 
     staff_centres_attr: str = "centres"
@@ -52,6 +63,8 @@ class StaffCentresScopeMixin:
         if self._is_admin_like(u):
             return None
         if self._is_staff_or_read(u):
+            if self.staff_centres_attr == "centres" and hasattr(u, "get_centre_ids"):
+                return u.get_centre_ids()
             centres_rel = getattr(u, self.staff_centres_attr, None)
             if hasattr(centres_rel, "values_list"):
                 return list(centres_rel.values_list("id", flat=True))
@@ -109,10 +122,25 @@ class StaffCentresScopeMixin:
 
         return []
 
+    @staticmethod
+    def _traverses_many(model, path: str) -> bool:
+        """True si le chemin ORM passe par une relation *-to-many (doublons possibles)."""
+        for name in path.split("__"):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+            if field.many_to_many or field.one_to_many:
+                return True
+            if not field.is_relation:
+                return False
+            model = field.related_model
+        return False
+
     def scope_queryset_to_centres(self, qs: QuerySet):
         """
         Applique le scope staff/staff_read:
-          (centre_lookups IN centre_ids) OR (departement_lookups STARTSWITH dep_code)
+          (centre_lookups IN centre_ids) OR (departement_lookups IN dep_codes)
         """
         ids = self._user_centre_ids()
         dep_codes = self._user_departement_codes()
@@ -125,21 +153,26 @@ class StaffCentresScopeMixin:
             return qs.none()
 
         q = Q()
+        paths = []
 
         if ids:
-            q_centres = Q()
             for path in self.centre_lookups:
-                q_centres |= Q(**{f"{path}__in": ids})
-            q |= q_centres
+                q |= Q(**{f"{path}__in": ids})
+                paths.append(path)
 
         if dep_codes:
-            q_deps = Q()
             for path in self.departement_lookups:
-                for code in dep_codes:
-                    q_deps |= Q(**{f"{path}__startswith": code})
-            q |= q_deps
-
-        return qs.filter(q).distinct()
+                if path.endswith("departement_code"):
+                    q |= Q(**{f"{path}__in": dep_codes})
+                else:
+                    for code in dep_codes:
+                        q |= Q(**{f"{path}__startswith": code})
+                paths.append(path)
+
+        qs = qs.filter(q)
+        if any(self._traverses_many(qs.model, path) for path in paths):
+            qs = qs.distinct()
+        return qs
 
     # hook DRF
     def get_queryset(self):
@@ -196,4 +229,153 @@ class UserVisibilityScopeMixin:
 
     def get_queryset(self):
         base = super().get_queryset()
-        return self.scope_queryset_to_user_visibility(base)
\ No newline at end of file
+        return self.scope_queryset_to_user_visibility(base)
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match du client contient `etag` (comparaison faible)."""
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class CachedOptionsMixin:
+    """
+    Met en cache les endpoints « options / meta » (listes déroulantes) par
+    périmètre utilisateur, avec ETag et réponse 304.
+
+    - `depends_on` : namespaces invalidés à chaque save()/delete() des modèles
+      concernés (noms de classes, ex. ("Formation", "Centre", "Statut")) via
+      `BaseModel.invalidate_caches()`.
+    - Même périmètre (admin / mêmes centres staff) → même entrée de cache.
+    - `per_user=True` si le payload dépend de l'utilisateur lui-même (owner…).
+    """
+
+    def cached_options_response(
+        self,
+        request,
+        name: str,
+        builder: Callable[[], dict],
+        depends_on: Iterable[str],
+        per_user: bool = False,
+    ):
+        scope = user_scope_key(request.user, per_user=per_user)
+        params = tuple(sorted((k, tuple(v)) for k, v in request.query_params.lists()))
+        key = build_cache_key(f"{self.__class__.__name__}.{name}", tuple(depends_on), scope, params)
+
+        user_id = getattr(request.user, "pk", None)
+        etag = 'W/"%s"' % hashlib.md5(f"{key}:{user_id}".encode("utf-8")).hexdigest()
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data, hit = get_or_build(key, builder)
+        headers["X-Cache"] = "HIT" if hit else "MISS"
+        return Response(data, headers=headers)
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel (ETag faible + Last-Modified) pour `list` et `retrieve`.
+
+    Les validateurs sont calculés avec un seul agrégat (max(updated_at), count)
+    sur le queryset filtré, combiné au périmètre, à l'utilisateur, aux paramètres
+    de requête et aux versions de cache partagées des modèles affichés.
+    Si le client a déjà la bonne version (If-None-Match), on répond 304
+    **avant** toute sérialisation — y compris quand le ViewSet redéfinit `list`.
+    If-Modified-Since est ignoré : Last-Modified est à la seconde près, deux
+    écritures dans la même seconde le laisseraient inchangé (l'ETag, lui, change).
+
+    Personnalisation par ViewSet :
+      - conditional_depends_on : modèles liés dont le payload affiche des champs
+        (ex. ("Centre", "Statut")) ; le modèle du ViewSet est toujours inclus.
+      - conditional_cache_control : en-tête Cache-Control de la ressource.
+      - conditional_updated_field : champ de fraîcheur (défaut "updated_at").
+    """
+
+    conditional_actions = ("list", "retrieve")
+    conditional_depends_on: Tuple[str, ...] = ()
+    conditional_cache_control = "private, no-cache"
+    conditional_updated_field = "updated_at"
+
+    def initial(self, request, *args, **kwargs):
+        self._conditional_validators = None
+        super().initial(request, *args, **kwargs)
+
+        if request.method not in ("GET", "HEAD") or getattr(self, "action", None) not in self.conditional_actions:
+            return
+
+        validators = self.get_conditional_validators(request, *args, **kwargs)
+        if validators is None:
+            return
+        self._conditional_validators = validators
+
+        if self.is_not_modified(request, *validators):
+            # dispatch() résout le handler après initial() : on court-circuite la vue
+            setattr(self, request.method.lower(), self._not_modified_response)
+
+    def get_conditional_validators(self, request, *args, **kwargs):
+        """Retourne (etag, last_modified) ou None si la ressource ne s'y prête pas."""
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        try:
+            model._meta.get_field(self.conditional_updated_field)
+        except FieldDoesNotExist:
+            return None
+
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            if lookup_url_kwarg not in kwargs:
+                return None
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+
+        agg = queryset.order_by().aggregate(
+            last=Max(self.conditional_updated_field),
+            n=Count("pk"),
+        )
+        if self.action == "retrieve" and not agg["n"]:
+            return None  # 404 géré par la vue
+
+        namespaces = (model.__name__,) + tuple(self.conditional_depends_on)
+        raw = repr((
+            model._meta.label,
+            self.action,
+            agg["last"],
+            agg["n"],
+            get_cache_versions(*namespaces),
+            user_scope_key(request.user),
+            getattr(request.user, "pk", None),
+            tuple(sorted((k, tuple(v)) for k, v in request.query_params.lists())),
+            getattr(request, "accepted_media_type", None),
+            timezone.localdate(),  # filtres/badges relatifs à la date du jour
+        ))
+        etag = 'W/"%s"' % hashlib.md5(raw.encode("utf-8")).hexdigest()
+        return etag, agg["last"]
+
+    def is_not_modified(self, request, etag, last_modified) -> bool:
+        return bool(request.META.get("HTTP_IF_NONE_MATCH")) and etag_matches(request, etag)
+
+    def _not_modified_response(self, request, *args, **kwargs):
+        return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_conditional_validators", None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+            response["Cache-Control"] = self.conditional_cache_control
+        return response
@@ -1,6 +1,6 @@
 # rap_app/api/paginations.py
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 class RapAppPagination(PageNumberPagination):
@@ -23,3 +23,30 @@ class RapAppPagination(PageNumberPagination):
             }
         })
 
+
+
+class RelanceCursorPagination(CursorPagination):
+    """
+    Pagination par curseur de la liste de relances : pas de COUNT, coût
+    constant quelle que soit la page (parcours de l'index owner/relance_prevue).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('relance_prevue', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        # Tri imposé (celui de l'index) : ignore l'OrderingFilter de la vue
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        return Response({
+            "success": True,
+            "message": "Liste des relances.",
+            "data": {
+                "page_size": self.page_size,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        })
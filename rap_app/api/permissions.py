@@ -65,6 +65,13 @@ class IsAdmin(BasePermission):
         return request.user.is_authenticated and request.user.is_staff_or_admin()
 
 
+class IsAdminLikeOnly(BasePermission):
+    message = "Accès réservé aux admins ou superadmins."
+
+    def has_permission(self, request, view):
+        return is_admin_like(request.user)
+
+
 class ReadWriteAdminReadStaff(BasePermission):
     """
     Lecture autorisée aux staff et staff_read.
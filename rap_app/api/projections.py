@@ -0,0 +1,179 @@
+# rap_app/api/projections.py
+
+"""
+⚡ Projections de lecture pour les listes volumineuses.
+
+Une projection déclare une seule fois la forme d'une ligne de sortie :
+  - `Col("chemin")`          : colonne (ou relation `a__b`) lue par `values()`
+  - `Expr(expression)`       : valeur calculée par la base (annotation)
+  - `Computed(fn, *chemins)` : valeur dérivée en Python de la ligne brute
+
+Elle est compilée en un seul `values()` — ni instance de modèle ni serializer —
+et produit des dicts prêts pour `FastJSONRenderer`.
+
+Les serializers DRF restent la référence pour l'écriture et le détail : chaque
+projection reproduit champ pour champ le serializer de liste qu'elle remplace,
+y compris les clés absentes quand une relation est nulle (`SkipField` DRF).
+"""
+
+from django.utils.encoding import force_str
+from rest_framework import serializers
+
+# Valeur sentinelle : la clé est omise de la ligne (parité avec SkipField).
+SKIP = object()
+
+_DATE = serializers.DateField()
+_DATETIME = serializers.DateTimeField()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🔁 Conversions (identiques aux champs DRF)
+# ─────────────────────────────────────────────────────────────────────────────
+def as_date(value):
+    return None if value is None else _DATE.to_representation(value)
+
+
+def as_datetime(value):
+    return None if value is None else _DATETIME.to_representation(value)
+
+
+def as_float(value):
+    return None if value is None else float(value)
+
+
+def display(model, field_name: str):
+    """Équivalent vectorisé de `get_<champ>_display()`."""
+    choices = dict(model._meta.get_field(field_name).flatchoices)
+
+    def label(value):
+        return force_str(choices.get(value, value), strings_only=True)
+
+    return label
+
+
+def user_label(row, path: str):
+    """`str(user)` (username ou email) sans charger l'utilisateur."""
+    if row[path] is None:
+        return None
+    return row[f"{path}__username"] or row[f"{path}__email"]
+
+
+def user_columns(path: str) -> tuple:
+    return (path, f"{path}__username", f"{path}__email")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🧱 Déclarations
+# ─────────────────────────────────────────────────────────────────────────────
+class Col:
+    """
+    Colonne lue telle quelle. `requires` liste les relations qui doivent
+    exister pour que la clé soit émise (sinon elle est omise).
+    """
+
+    def __init__(self, path=None, to=None, requires=()):
+        self.path = path
+        self.to = to
+        self.requires = tuple(requires)
+
+
+class Expr:
+    """Expression annotée (agrégat, Case/When, Coalesce, Subquery…)."""
+
+    def __init__(self, expression, to=None):
+        self.expression = expression
+        self.to = to
+
+
+class Computed:
+    """Valeur calculée en Python à partir des colonnes `paths` de la ligne brute."""
+
+    def __init__(self, func, *paths):
+        self.func = func
+        self.paths = paths
+
+
+def _col_getter(key, to, requires):
+    def get(row):
+        for rel in requires:
+            if row[rel] is None:
+                return SKIP
+        value = row[key]
+        return to(value) if to is not None and value is not None else value
+
+    return get
+
+
+def _compile(fields: dict):
+    columns, annotations, getters = [], {}, []
+
+    def need(path):
+        if path not in columns:
+            columns.append(path)
+
+    for name, spec in fields.items():
+        if isinstance(spec, Col):
+            path = spec.path or name
+            need(path)
+            for rel in spec.requires:
+                need(rel)
+            getters.append((name, _col_getter(path, spec.to, spec.requires)))
+        elif isinstance(spec, Expr):
+            alias = f"p_{name}"
+            annotations[alias] = spec.expression
+            getters.append((name, _col_getter(alias, spec.to, ())))
+        elif isinstance(spec, Computed):
+            for path in spec.paths:
+                need(path)
+            getters.append((name, spec.func))
+        else:
+            raise TypeError(f"Champ de projection invalide : {name!r}")
+
+    return tuple(columns), annotations, tuple(getters)
+
+
+class Projection:
+    """
+    Base des projections : sous-classer et déclarer `fields` (dict ordonné
+    nom de sortie → Col / Expr / Computed). La compilation a lieu une fois,
+    à la définition de la classe.
+    """
+
+    fields: dict = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._columns, cls._annotations, cls._getters = _compile(cls.fields)
+
+    @classmethod
+    def queryset(cls, queryset):
+        """Queryset filtré/trié → queryset `values()` de la projection."""
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if cls._annotations:
+            queryset = queryset.annotate(**cls._annotations)
+        return queryset.values(*cls._columns, *cls._annotations)
+
+    @classmethod
+    def rows(cls, raw_rows) -> list:
+        getters = cls._getters
+        out = []
+        for raw in raw_rows:
+            item = {}
+            for name, get in getters:
+                value = get(raw)
+                if value is not SKIP:
+                    item[name] = value
+            out.append(item)
+        return out
+
+
+def paginate_projection(view, queryset, projection):
+    """
+    Pagine la projection avec le paginateur de la vue.
+    Retourne (lignes, paginé) ; sans pagination, toutes les lignes.
+    """
+    values_qs = projection.queryset(queryset)
+    page = view.paginate_queryset(values_qs)
+    if page is None:
+        return projection.rows(values_qs), False
+    return projection.rows(page), True
@@ -0,0 +1,34 @@
+# rap_app/api/renderers.py
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:  # dépendance optionnelle : sans elle, rendu JSON standard de DRF
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ⚡ Rendu JSON via orjson (sérialisation en C, nettement plus rapide sur
+    les grosses listes).
+
+    La sortie reste celle de `JSONRenderer` : dates, Decimal, chaînes
+    traduites… passent par l'encodeur DRF. Retombe sur `JSONRenderer` si
+    orjson est absent, si une indentation est demandée (`; indent=`) ou si
+    orjson refuse une valeur (entier hors 64 bits, etc.).
+    """
+
+    _encoder = encoders.JSONEncoder()
+    _options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=self._encoder.default, option=self._options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
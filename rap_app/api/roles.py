@@ -100,6 +100,8 @@ def staff_centre_ids(u):
         return None
     if is_staff_like(u) or is_prepa_staff(u) or is_declic_staff(u):
         try:
+            if hasattr(u, "get_centre_ids"):
+                return u.get_centre_ids()  # ✅ instantané du cache d'authentification si présent
             return list(u.centres.values_list("id", flat=True))
         except Exception:
             return []
@@ -0,0 +1,205 @@
+# rap_app/api/schema_cache.py
+
+"""
+📘 Schéma OpenAPI précalculé.
+
+La génération drf-spectacular (introspection de tous les ViewSets /
+serializers, exemples `extend_schema`, hooks) coûte plusieurs secondes :
+elle est faite une fois par version du code, puis servie telle quelle.
+
+- Version du code : `SCHEMA_CODE_VERSION` (ex. SHA git posé par le déploiement)
+  ou, à défaut, empreinte des sources `rap_app/` et `rap_app_project/`
+  (chemin, taille, mtime) + réglages SPECTACULAR + version de drf-spectacular.
+- Artefacts : `SCHEMA_CACHE_DIR/openapi-<version>.{yaml,json}` et leurs `.gz`,
+  écrits par `manage.py build_schema` (déploiement) ou au premier appel.
+  Partagés entre workers, gardés en mémoire ensuite.
+- `/api/schema/` : même contrat que `SpectacularAPIView` (YAML par défaut,
+  JSON via `?format=json` ou `Accept`), avec `ETag` / 304 et gzip précompressé.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views import View
+
+logger = logging.getLogger("application.api")
+
+FORMATS = {
+    "yaml": "application/vnd.oai.openapi; charset=utf-8",
+    "json": "application/vnd.oai.openapi+json; charset=utf-8",
+}
+
+_lock = threading.Lock()
+_artifacts: dict = {}
+_code_version = None
+
+
+@dataclass(frozen=True)
+class SchemaArtifact:
+    version: str
+    fmt: str
+    body: bytes
+    gzipped: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}-{self.fmt}"'
+
+
+# ────────────────────────────────────────────────────────────
+# 🔖 Version du code
+# ────────────────────────────────────────────────────────────
+def code_version() -> str:
+    """Identifiant court de la version du code (calculé une fois par process)."""
+    global _code_version
+    if _code_version is None:
+        explicit = getattr(settings, "SCHEMA_CODE_VERSION", "")
+        if explicit:
+            _code_version = explicit[:40]
+        else:
+            import drf_spectacular
+
+            digest = hashlib.sha256()
+            digest.update(drf_spectacular.__version__.encode())
+            digest.update(json.dumps(settings.SPECTACULAR_SETTINGS, sort_keys=True, default=str).encode())
+            app_dir = Path(__file__).resolve().parent.parent
+            project_dir = Path(settings.BASE_DIR) / "rap_app_project"
+            for root in (app_dir, project_dir):
+                for path in sorted(root.rglob("*.py")):
+                    if "tests" in path.parts or "migrations" in path.parts:
+                        continue
+                    stat = path.stat()
+                    digest.update(f"{path.relative_to(root.parent)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+            _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def _cache_dir() -> Path:
+    return Path(getattr(settings, "SCHEMA_CACHE_DIR", Path(settings.BASE_DIR) / "cache" / "openapi"))
+
+
+# ────────────────────────────────────────────────────────────
+# 🏗️ Génération / lecture des artefacts
+# ────────────────────────────────────────────────────────────
+def generate_schema() -> dict:
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def _render(schema: dict) -> dict:
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    return {
+        "yaml": OpenApiYamlRenderer().render(schema),
+        "json": OpenApiJsonRenderer().render(schema),
+    }
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)  # lecteurs concurrents : ancien ou nouveau fichier, jamais partiel
+
+
+def build_artifacts(version: str = None) -> dict:
+    """Génère et écrit les artefacts de `version` ; retourne {format: SchemaArtifact}."""
+    version = version or code_version()
+    directory = _cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    built = {}
+    for fmt, body in _render(generate_schema()).items():
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        path = directory / f"openapi-{version}.{fmt}"
+        _write_atomic(path, body)
+        _write_atomic(path.with_name(path.name + ".gz"), gz)
+        built[fmt] = SchemaArtifact(version, fmt, body, gz)
+    logger.info("[Schema] artefacts OpenAPI générés (version %s)", version)
+    return built
+
+
+def _read_artifacts(version: str):
+    directory = _cache_dir()
+    try:
+        return {
+            fmt: SchemaArtifact(
+                version,
+                fmt,
+                (directory / f"openapi-{version}.{fmt}").read_bytes(),
+                (directory / f"openapi-{version}.{fmt}.gz").read_bytes(),
+            )
+            for fmt in FORMATS
+        }
+    except FileNotFoundError:
+        return None
+
+
+def get_artifact(fmt: str) -> SchemaArtifact:
+    """Artefact de la version courante : mémoire → disque → génération (une seule fois)."""
+    version = code_version()
+    artifacts = _artifacts.get(version)
+    if artifacts is None:
+        with _lock:
+            artifacts = _artifacts.get(version)
+            if artifacts is None:
+                artifacts = _read_artifacts(version) or build_artifacts(version)
+                _artifacts.clear()
+                _artifacts[version] = artifacts
+    return artifacts[fmt]
+
+
+def prune_artifacts(keep: str = None) -> int:
+    """Supprime les artefacts des autres versions ; retourne le nombre de fichiers effacés."""
+    keep = keep or code_version()
+    removed = 0
+    directory = _cache_dir()
+    if not directory.is_dir():
+        return 0
+    for path in directory.glob("openapi-*"):
+        if not path.name.startswith(f"openapi-{keep}."):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+# ────────────────────────────────────────────────────────────
+# 🌐 Vue
+# ────────────────────────────────────────────────────────────
+def _wanted_format(request) -> str:
+    fmt = request.GET.get("format", "")
+    if fmt in FORMATS:
+        return fmt
+    accept = request.META.get("HTTP_ACCEPT", "")
+    return "json" if "json" in accept and "yaml" not in accept else "yaml"
+
+
+class CachedSchemaView(View):
+    """GET /api/schema/ : artefact précalculé, ETag + gzip (remplace SpectacularAPIView)."""
+
+    http_method_names = ["get", "head"]
+
+    def get(self, request, *args, **kwargs):
+        artifact = get_artifact(_wanted_format(request))
+        if artifact.etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        elif "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+            response = HttpResponse(artifact.gzipped, content_type=FORMATS[artifact.fmt])
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(artifact.body, content_type=FORMATS[artifact.fmt])
+        response["ETag"] = artifact.etag
+        response["Cache-Control"] = "public, no-cache"  # revalidation systématique (304)
+        response["Vary"] = "Accept, Accept-Encoding"
+        title = settings.SPECTACULAR_SETTINGS.get("TITLE", "schema")
+        response["Content-Disposition"] = f'inline; filename="{title}.{artifact.fmt}"'
+        return response
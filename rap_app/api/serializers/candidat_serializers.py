@@ -16,6 +16,8 @@ from ...models.candidat import (
     NIVEAU_CHOICES,
 )
 from ...models.appairage import Appairage  # ✅ pour type hints/queries
+from ...utils import refdata
+from ..projections import SKIP, Col, Computed, Projection
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -835,3 +837,41 @@ class CandidatLiteSerializer(serializers.ModelSerializer):
             "compte_utilisateur_id",
             "compte_utilisateur",
         ]
+
+
+def _lite_ref_nom(name, column):
+    def get(row):
+        if row["formation"] is None or row[column] is None:
+            return SKIP
+        return (refdata.lookup(name, row[column]) or {}).get("nom")
+
+    return get
+
+
+class CandidatLiteProjection(Projection):
+    """⚡ Lecture rapide de `?lite=1` : même sortie que `CandidatLiteSerializer`."""
+
+    fields = {
+        "id": Col(),
+        "nom": Col(),
+        "prenom": Col(),
+        "formation_nom": Col("formation__nom", requires=("formation",)),
+        "formation_num_offre": Col("formation__num_offre", requires=("formation",)),
+        "formation_type_offre": Computed(
+            _lite_ref_nom("TypeOffre", "formation__type_offre"), "formation", "formation__type_offre"
+        ),
+        "centre_nom": Computed(_lite_ref_nom("Centre", "formation__centre"), "formation", "formation__centre"),
+        "compte_utilisateur_id": Col("compte_utilisateur", requires=("compte_utilisateur",)),
+        "compte_utilisateur": Computed(
+            lambda r: {
+                "id": r["compte_utilisateur"],
+                "role": r["compte_utilisateur__role"],
+                "is_active": r["compte_utilisateur__is_active"],
+            }
+            if r["compte_utilisateur"] is not None
+            else None,
+            "compte_utilisateur",
+            "compte_utilisateur__role",
+            "compte_utilisateur__is_active",
+        ),
+    }
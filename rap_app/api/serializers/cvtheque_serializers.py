@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from ...models.cvtheque import CVTheque
 from ...models.candidat import Candidat
+from ...services.apercus import etag_apercu
 
 
 # ----------------------------------------------------------
@@ -35,6 +36,7 @@ class CVThequeBaseSerializer(serializers.ModelSerializer):
     # 🔐 URLs sécurisées
     download_url = serializers.SerializerMethodField()
     preview_url = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
 
     # Champs formation
     formation_nom = serializers.SerializerMethodField()
@@ -56,6 +58,15 @@ class CVThequeBaseSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return request.build_absolute_uri(f"/api/cvtheque/{obj.id}/preview/")
 
+    # -------------------------------
+    # Miniature (None tant qu'elle n'est pas générée)
+    # -------------------------------
+    def get_thumbnail(self, obj):
+        if not obj.apercu:
+            return None
+        request = self.context.get("request")
+        return request.build_absolute_uri(f"/api/cvtheque/{obj.id}/thumbnail/?v={etag_apercu(obj.sha256)[:12]}")
+
     # -------------------------------
     # Infos formation
     # -------------------------------
@@ -82,6 +93,10 @@ class CVThequeBaseSerializer(serializers.ModelSerializer):
 # 🔹 LIST SERIALIZER
 # ----------------------------------------------------------
 class CVThequeListSerializer(CVThequeBaseSerializer):
+    # Renseignés uniquement pour une recherche ?q= (sinon null)
+    pertinence = serializers.SerializerMethodField()
+    extrait = serializers.SerializerMethodField()
+
     class Meta:
         model = CVTheque
         fields = [
@@ -94,6 +109,8 @@ class CVThequeListSerializer(CVThequeBaseSerializer):
             "taille",
             "preview_url",     # preview sécurisé
             "download_url",    # download sécurisé
+            "thumbnail",       # miniature 1re page
+            "nb_pages",
             "candidat",
 
             # Formation
@@ -101,8 +118,19 @@ class CVThequeListSerializer(CVThequeBaseSerializer):
             "formation_centre",
             "formation_type_offre",
             "formation_num_offre",
+
+            # Recherche plein texte
+            "pertinence",
+            "extrait",
         ]
 
+    def get_pertinence(self, obj) -> float | None:
+        value = getattr(obj, "pertinence", None)
+        return round(value, 4) if value is not None else None
+
+    def get_extrait(self, obj) -> str | None:
+        return getattr(obj, "extrait", None)
+
 
 # ----------------------------------------------------------
 # 🔹 DETAIL SERIALIZER
@@ -126,6 +154,9 @@ class CVThequeDetailSerializer(CVThequeBaseSerializer):
             "taille",
             "preview_url",     # preview sécurisé
             "download_url",    # download sécurisé
+            "thumbnail",       # miniature 1re page
+            "nb_pages",
+            "texte_source",    # origine du texte indexé (pdf / docx / ocr / vide)
             "candidat",
 
             # Formation enrichie
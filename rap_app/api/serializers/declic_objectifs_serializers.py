@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_serializer
+from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
 
 from ...models.centres import Centre
 from ...models.declic import ObjectifDeclic
@@ -10,7 +10,7 @@ from ...models.declic import ObjectifDeclic
 # -------------------------------------------------------------------
 @extend_schema_serializer(
     examples=[
-        {"id": 1, "nom": "Centre de Lille", "departement": "59", "code_postal": "59000"}
+        OpenApiExample("Exemple", value={"id": 1, "nom": "Centre de Lille", "departement": "59", "code_postal": "59000"})
     ]
 )
 class CentreLightSerializer(serializers.ModelSerializer):
@@ -26,7 +26,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
 # -------------------------------------------------------------------
 @extend_schema_serializer(
     examples=[
-        {
+        OpenApiExample("Exemple", value={
             "id": 12,
             "centre": {
                 "id": 3,
@@ -49,7 +49,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
                 "presents": 72,
                 "adhesions": 47,
             },
-        }
+        })
     ]
 )
 class ObjectifDeclicSerializer(serializers.ModelSerializer):
@@ -1,6 +1,6 @@
 # rap_app/api/serializers/declic_serializers.py
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_serializer
+from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
 
 from ...models.centres import Centre
 from ...models.declic import Declic
@@ -10,12 +10,12 @@ from ...models.declic import Declic
 # 🔹 CENTRE
 # -------------------------------------------------------------------
 @extend_schema_serializer(
-    examples=[{
+    examples=[OpenApiExample("Exemple", value={
         "id": 1,
         "nom": "Centre de Lille",
         "departement": "59",
         "code_postal": "59000",
-    }]
+    })]
 )
 class CentreLightSerializer(serializers.ModelSerializer):
     class Meta:
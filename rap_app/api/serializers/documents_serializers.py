@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 
 from ...models.documents import Document, validate_file_extension
 from ...models.formations import Formation
+from ...services.apercus import etag_apercu
 
 
 @extend_schema_serializer(
@@ -40,6 +41,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     extension = serializers.CharField(read_only=True)
     icon_class = serializers.CharField(read_only=True)
     download_url = serializers.CharField(read_only=True)
+    thumbnail = serializers.SerializerMethodField()
     created_by = serializers.CharField(source="created_by.username", read_only=True)
     is_viewable_in_browser = serializers.BooleanField(read_only=True)
 
@@ -72,6 +74,15 @@ class DocumentSerializer(serializers.ModelSerializer):
             }
         return None
 
+    @extend_schema_field(str)
+    def get_thumbnail(self, obj):
+        """URL de la miniature de la 1re page (None tant qu'elle n'est pas générée)."""
+        if not obj.apercu:
+            return None
+        url = f"/api/documents/{obj.id}/thumbnail/?v={etag_apercu(obj.sha256)[:12]}"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
     class Meta:
         model = Document
         fields = [
@@ -79,6 +90,7 @@ class DocumentSerializer(serializers.ModelSerializer):
             "type_document_display", "taille_fichier", "taille_readable",
             "mime_type", "extension", "icon_class", "download_url",
             "formation", "created_at", "created_by", "updated_at", "is_viewable_in_browser",
+            "thumbnail", "nb_pages",
 
             # Champs enrichis
             "formation_nom", "formation_num_offre", "formation_start_date",
@@ -87,7 +99,7 @@ class DocumentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             "id", "type_document_display", "taille_readable", "extension", "icon_class",
-            "download_url", "mime_type", "taille_fichier", "created_at", "created_by",
+            "download_url", "thumbnail", "nb_pages", "mime_type", "taille_fichier", "created_at", "created_by",
             "is_viewable_in_browser", "formation_nom", "formation_num_offre",
             "formation_start_date", "formation_end_date", "formation_centre_nom",
             "formation_type_offre_libelle", "formation_statut"
@@ -87,10 +87,10 @@ from drf_spectacular.utils import extend_schema_serializer
 
 @extend_schema_serializer(
     examples=[
-        {
+        OpenApiExample("Exemple", value={
             "value": "job_dating",
             "label": "Job dating"
-        }
+        })
     ]
 )
 class EvenementChoiceSerializer(serializers.Serializer):
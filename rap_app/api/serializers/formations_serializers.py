@@ -3,6 +3,7 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, OpenApiExample, extend_schema_field
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
+from django.db.models import F
 
 from ..serializers.centres_serializers import CentreSerializer
 
@@ -18,12 +19,62 @@ from ..serializers.prospection_serializers import ProspectionSerializer
 
 from ..serializers.types_offre_serializers import TypeOffreSerializer
 
-from ...models.formations import Formation
+from ...models.formations import Activite, Formation
+from ...utils import refdata
+from ..projections import Col, Computed, Expr, Projection, as_date, as_float
 from ...models.commentaires import Commentaire
 from ...models.documents import Document
 from ...models.evenements import Evenement
 
 logger = logging.getLogger("application.api.formation")
+
+# ------------------------------------------
+# 📚 Référentiels (centre / statut / type d'offre) sans jointure
+# ------------------------------------------
+def centre_ref(obj):
+    row = refdata.get_centre(obj.centre_id)
+    if row is not None:
+        return {"id": row["id"], "nom": row["nom"]}
+    return {"id": obj.centre.id, "nom": obj.centre.nom} if obj.centre else None
+
+
+def statut_ref(obj):
+    row = refdata.get_statut(obj.statut_id)
+    if row is not None:
+        return {"id": row["id"], "nom": row["nom"], "libelle": row["libelle"], "couleur": row["couleur"]}
+    if obj.statut:
+        return {
+            "id": obj.statut.id,
+            "nom": obj.statut.nom,
+            "libelle": obj.statut.get_nom_display(),
+            "couleur": obj.statut.couleur,
+        }
+    return None
+
+
+def type_offre_ref(obj):
+    row = refdata.get_type_offre(obj.type_offre_id)
+    if row is not None:
+        return {"id": row["id"], "nom": row["nom"], "libelle": row["libelle"], "couleur": row["couleur"]}
+    if obj.type_offre:
+        return {
+            "id": obj.type_offre.id,
+            "nom": obj.type_offre.nom,
+            "libelle": str(obj.type_offre),
+            "couleur": obj.type_offre.couleur,
+        }
+    return None
+
+
+def taux_badge(taux):
+    if taux is None:
+        return "default"
+    if taux >= 70:
+        return "badge-success"
+    if taux >= 40:
+        return "badge-warning"
+    return "badge-danger"
+
  
 @extend_schema_serializer(
     examples=[
@@ -126,51 +177,81 @@ class FormationListSerializer(serializers.Serializer):
 
     @extend_schema_field(str)
     def get_transformation_badge(self, obj):
-        taux = self.get_taux_transformation(obj)
-        if taux is None:
-            return "default"
-        if taux >= 70:
-            return "badge-success"
-        if taux >= 40:
-            return "badge-warning"
-        return "badge-danger"
+        return taux_badge(self.get_taux_transformation(obj))
 
     @extend_schema_field(str)
     def get_saturation_badge(self, obj):
-        taux = obj.saturation
-        if taux is None:
-            return "default"
-        if taux >= 70:
-            return "badge-success"
-        if taux >= 40:
-            return "badge-warning"
-        return "badge-danger"
+        return taux_badge(obj.saturation)
 
     @extend_schema_field(str)
     def get_centre(self, obj):
-        return {"id": obj.centre.id, "nom": obj.centre.nom} if obj.centre else None
+        return centre_ref(obj)
 
     @extend_schema_field(str)
     def get_statut(self, obj):
-        if obj.statut:
-            return {
-                "id": obj.statut.id,
-                "nom": obj.statut.nom,
-                "libelle": obj.statut.get_nom_display(),
-                "couleur": obj.statut.couleur,
-            }
-        return None
+        return statut_ref(obj)
 
     @extend_schema_field(str)
     def get_type_offre(self, obj):
-        if obj.type_offre:
-            return {
-                "id": obj.type_offre.id,
-                "nom": obj.type_offre.nom,
-                "libelle": str(obj.type_offre),
-                "couleur": obj.type_offre.couleur,
-            }
-        return None
+        return type_offre_ref(obj)
+
+
+def _ref_getter(name, column, keys):
+    def get(row):
+        ref = refdata.lookup(name, row[column])
+        return {k: ref[k] for k in keys} if ref is not None else None
+
+    return get
+
+
+def _taux_transformation(row):
+    if row["nombre_candidats"]:
+        inscrits = (row["inscrits_crif"] or 0) + (row["inscrits_mp"] or 0)
+        return round((inscrits / row["nombre_candidats"]) * 100)
+    return None
+
+
+class FormationListProjection(Projection):
+    """⚡ Lecture rapide de la liste : même sortie que `FormationListSerializer`."""
+
+    fields = {
+        "id": Col(),
+        "est_archivee": Computed(lambda r: r["activite"] == Activite.ARCHIVEE, "activite"),
+        "activite": Col(),
+        "nom": Col(),
+        "num_offre": Col(),
+        "start_date": Col(to=as_date),
+        "end_date": Col(to=as_date),
+        "saturation": Col(to=as_float),
+        "saturation_badge": Computed(lambda r: taux_badge(r["saturation"]), "saturation"),
+        "centre": Computed(_ref_getter("Centre", "centre", ("id", "nom")), "centre"),
+        "statut": Computed(_ref_getter("Statut", "statut", ("id", "nom", "libelle", "couleur")), "statut"),
+        "type_offre": Computed(
+            _ref_getter("TypeOffre", "type_offre", ("id", "nom", "libelle", "couleur")), "type_offre"
+        ),
+        "inscrits_crif": Col(),
+        "inscrits_mp": Col(),
+        "prevus_crif": Col(),
+        "prevus_mp": Col(),
+        "cap": Col(),
+        "nombre_candidats": Col(),
+        "nombre_entretiens": Col(),
+        "intitule_diplome": Col(),
+        "code_diplome": Col(),
+        "code_rncp": Col(),
+        "total_heures": Col(),
+        "heures_distanciel": Col(),
+        "inscrits_total": Expr(F("inscrits_crif") + F("inscrits_mp")),
+        "prevus_total": Expr(F("prevus_crif") + F("prevus_mp")),
+        "places_restantes": Computed(
+            lambda r: max(0, (r["prevus_crif"] + r["prevus_mp"]) - (r["inscrits_crif"] + r["inscrits_mp"])),
+            "prevus_crif", "prevus_mp", "inscrits_crif", "inscrits_mp",
+        ),
+        "taux_transformation": Computed(_taux_transformation, "nombre_candidats", "inscrits_crif", "inscrits_mp"),
+        "transformation_badge": Computed(
+            lambda r: taux_badge(_taux_transformation(r)), "nombre_candidats", "inscrits_crif", "inscrits_mp"
+        ),
+    }
 
 
 @extend_schema_serializer(
@@ -354,29 +435,15 @@ class FormationDetailSerializer(serializers.Serializer):
 
     @extend_schema_field(dict)
     def get_centre(self, obj):
-        return {"id": obj.centre.id, "nom": obj.centre.nom} if obj.centre else None
+        return centre_ref(obj)
 
     @extend_schema_field(dict)
     def get_statut(self, obj):
-        if obj.statut:
-            return {
-                "id": obj.statut.id,
-                "nom": obj.statut.nom,
-                "libelle": obj.statut.get_nom_display(),
-                "couleur": obj.statut.couleur,
-            }
-        return None
+        return statut_ref(obj)
 
     @extend_schema_field(dict)
     def get_type_offre(self, obj):
-        if obj.type_offre:
-            return {
-                "id": obj.type_offre.id,
-                "nom": obj.type_offre.nom,
-                "libelle": str(obj.type_offre),
-                "couleur": obj.type_offre.couleur,
-            }
-        return None
+        return type_offre_ref(obj)
 
     # ------------------------------------------
     # 🔹 Validation et persistence
@@ -1,6 +1,6 @@
 # rap_app/api/serializers/prepa_objectifs_serializers.py
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_serializer
+from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
 
 from ...models.centres import Centre
 from ...models.prepa import ObjectifPrepa, Prepa
@@ -11,7 +11,7 @@ from ...models.prepa import ObjectifPrepa, Prepa
 # -------------------------------------------------------------------
 @extend_schema_serializer(
     examples=[
-        {"id": 1, "nom": "Centre de Lille", "departement": "59", "code_postal": "59000"}
+        OpenApiExample("Exemple", value={"id": 1, "nom": "Centre de Lille", "departement": "59", "code_postal": "59000"})
     ]
 )
 class CentreLightSerializer(serializers.ModelSerializer):
@@ -27,7 +27,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
 # -------------------------------------------------------------------
 @extend_schema_serializer(
     examples=[
-        {
+        OpenApiExample("Exemple", value={
             "id": 12,
             "centre": {
                 "id": 3,
@@ -50,7 +50,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
                 "presents": 72,
                 "adhesions": 47,
             },
-        }
+        })
     ]
 )
 class ObjectifPrepaSerializer(serializers.ModelSerializer):
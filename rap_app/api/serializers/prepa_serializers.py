@@ -1,6 +1,6 @@
 # rap_app/api/serializers/prepa_serializers.py
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field, extend_schema_serializer
+from drf_spectacular.utils import extend_schema_field, extend_schema_serializer, OpenApiExample
 
 from ...models.centres import Centre
 from ...models.prepa import Prepa
@@ -10,10 +10,10 @@ from ...models.prepa import Prepa
 # 🔹 CENTRE (résumé)
 # -------------------------------------------------------------------
 @extend_schema_serializer(
-    examples=[{
+    examples=[OpenApiExample("Exemple", value={
         "id": 1, "nom": "Centre de Lille",
         "departement": "59", "code_postal": "59000"
-    }]
+    })]
 )
 class CentreLightSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour représenter un centre."""
@@ -28,7 +28,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
 # -------------------------------------------------------------------
 @extend_schema_serializer(
     examples=[
-        {
+        OpenApiExample("Exemple", value={
             "id": 45,
             "type_prepa": "info_collective",
             "type_prepa_display": "Information collective",
@@ -49,7 +49,7 @@ class CentreLightSerializer(serializers.ModelSerializer):
             "taux_presence_info": 83.3,
             "taux_presence_atelier": None,
             "taux_presence_global": 83.3,
-        }
+        })
     ]
 )
 class PrepaSerializer(serializers.ModelSerializer):
@@ -10,6 +10,18 @@ from ..serializers.prospection_comment_serializers import ProspectionCommentSeri
 
 from ...models.formations import Formation
 from ...models.prospection import Prospection, ProspectionChoices, HistoriqueProspection
+from ...utils import refdata
+from ..projections import (
+    SKIP,
+    Col,
+    Computed,
+    Projection,
+    as_date,
+    as_datetime,
+    display,
+    user_columns,
+    user_label,
+)
 
 
 # ---------------------------------------------------------------------
@@ -302,6 +314,125 @@ class ProspectionListSerializer(BaseProspectionSerializer):
         fields = ProspectionSerializer.Meta.fields
 
 
+def _ref_nom(name, column, skip_if_null=False):
+    def get(row):
+        if row[column] is None:
+            return SKIP if skip_if_null else None
+        return (refdata.lookup(name, row[column]) or {}).get("nom")
+
+    return get
+
+
+def _relance_necessaire(row):
+    return bool(
+        row["activite"] == Prospection.ACTIVITE_ACTIVE
+        and row["relance_prevue"]
+        and row["relance_prevue"] <= timezone.now().date()
+    )
+
+
+def _places_disponibles(row):
+    if row["formation"] is None:
+        return None
+    prevus = row["formation__prevus_crif"] + row["formation__prevus_mp"]
+    inscrits = row["formation__inscrits_crif"] + row["formation__inscrits_mp"]
+    return max(0, prevus - inscrits)
+
+
+def _with_display(field):
+    label = display(Prospection, field)
+    return Computed(lambda r: label(r[field]), field)
+
+
+class ProspectionListProjection(Projection):
+    """
+    ⚡ Lecture rapide de la liste : même sortie que `ProspectionListSerializer`
+    (le queryset doit porter les annotations `last_comment*` / `comments_count`).
+    """
+
+    fields = {
+        "id": Col(),
+        "partenaire": Col(),
+        "partenaire_nom": Col("partenaire__nom", requires=("partenaire",)),
+        "formation": Col(),
+        "formation_nom": Col("formation__nom", requires=("formation",)),
+        "centre": Col(),
+        "centre_nom": Computed(_ref_nom("Centre", "centre", skip_if_null=True), "centre"),
+        "num_offre": Col("formation__num_offre", requires=("formation",)),
+        "date_prospection": Col(to=as_datetime),
+        "type_prospection": Col(),
+        "type_prospection_display": _with_display("type_prospection"),
+        "motif": Col(),
+        "motif_display": _with_display("motif"),
+        "statut": Col(),
+        "statut_display": _with_display("statut"),
+        "objectif": Col(),
+        "objectif_display": _with_display("objectif"),
+        "commentaire": Col(),
+        "relance_prevue": Col(to=as_date),
+        "moyen_contact": Col(),
+        "moyen_contact_display": _with_display("moyen_contact"),
+        "activite": Col(),
+        "activite_display": _with_display("activite"),
+        "is_active": Computed(lambda r: r["activite"] == Prospection.ACTIVITE_ACTIVE, "activite"),
+        "relance_necessaire": Computed(_relance_necessaire, "activite", "relance_prevue"),
+        "created_by": Computed(lambda r: user_label(r, "created_by"), *user_columns("created_by")),
+        "created_at": Col(to=as_datetime),
+        "updated_at": Col(to=as_datetime),
+        "owner": Col(),
+        "owner_username": Computed(lambda r: user_label(r, "owner"), *user_columns("owner")),
+        "last_comment": Col(),
+        "last_comment_at": Col(to=as_datetime),
+        "last_comment_id": Col(),
+        "comments_count": Col(),
+        "partenaire_ville": Col("partenaire__city"),
+        "partenaire_tel": Col("partenaire__contact_telephone"),
+        "partenaire_email": Col("partenaire__contact_email"),
+        "formation_date_debut": Col("formation__start_date", to=as_date),
+        "formation_date_fin": Col("formation__end_date", to=as_date),
+        "type_offre_display": Computed(_ref_nom("TypeOffre", "formation__type_offre"), "formation__type_offre"),
+        "formation_statut_display": Computed(_ref_nom("Statut", "formation__statut"), "formation__statut"),
+        "places_disponibles": Computed(
+            _places_disponibles,
+            "formation",
+            "formation__prevus_crif",
+            "formation__prevus_mp",
+            "formation__inscrits_crif",
+            "formation__inscrits_mp",
+        ),
+    }
+
+
+def _jours_retard(row):
+    return (timezone.localdate() - row["relance_prevue"]).days
+
+
+class RelanceProjection(Projection):
+    """
+    📅 Ligne de la liste de relances : juste ce qu'il faut pour rappeler
+    le partenaire (pas d'annotation de commentaires).
+    """
+
+    fields = {
+        "id": Col(),
+        "relance_prevue": Col(to=as_date),
+        "jours_retard": Computed(_jours_retard, "relance_prevue"),
+        "statut": Col(),
+        "statut_display": _with_display("statut"),
+        "objectif_display": _with_display("objectif"),
+        "moyen_contact": Col(),
+        "moyen_contact_display": _with_display("moyen_contact"),
+        "owner": Col(),
+        "partenaire": Col(),
+        "partenaire_nom": Col("partenaire__nom"),
+        "partenaire_tel": Col("partenaire__contact_telephone"),
+        "partenaire_email": Col("partenaire__contact_email"),
+        "formation": Col(),
+        "formation_nom": Col("formation__nom"),
+        "centre_nom": Computed(_ref_nom("Centre", "centre"), "centre"),
+    }
+
+
 class ProspectionDetailSerializer(ProspectionSerializer):
     commentaires = ProspectionCommentSerializer(many=True, read_only=True, source="comments")
 
@@ -327,6 +458,21 @@ class ChangerStatutSerializer(serializers.Serializer):
         return data
 
 
+class ChangerStatutLotSerializer(ChangerStatutSerializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        help_text="Identifiants des prospections à modifier",
+    )
+
+    def validate(self, data):
+        data = super().validate(data)
+        data.pop("prochain_contact", None)
+        data["ids"] = list(dict.fromkeys(data["ids"]))
+        return data
+
+
 class EnumChoiceSerializer(serializers.Serializer):
     value = serializers.CharField(help_text="Valeur brute utilisée en base")
     label = serializers.CharField(help_text="Libellé affiché (traduction)")
@@ -0,0 +1,269 @@
+# rap_app/api/stats_engine.py
+
+"""
+📊 Moteur de statistiques déclaratif (une requête par tableau de bord).
+
+Un ViewSet de stats déclare une seule fois :
+  - ses métriques   : `Metric(field, filter=Q(...), distinct=..., agg="count"|"sum")`
+  - ses dimensions  : `Dimension(key, expression=..., columns=(...), label=...)`
+
+`StatsQuery.run(queryset, sets)` compile le queryset filtré (périmètre,
+filtres, jointures des libellés) en une sous-requête, puis en un seul
+`GROUP BY GROUPING SETS ((), (dim1), (dim2), …)` sur PostgreSQL — ou un
+`WITH … UNION ALL` équivalent (toujours une seule requête) sur les autres
+moteurs. Un aller-retour renvoie totaux, répartitions par dimension et
+tops (tri en Python des lignes déjà agrégées).
+
+Les colonnes de libellé (`columns`) sont fonctionnellement dépendantes de la
+clé (nom du centre pour `centre_id`…) : elles sont lues par `MAX()` dans
+chaque ensemble, sans requête de libellés séparée.
+
+Jointures démultipliantes (relation inverse / M2M dans une métrique, une
+dimension ou un filtre) : la sous-requête compte alors plusieurs lignes par
+objet. Elle numérote ces lignes (`ROW_NUMBER() OVER (PARTITION BY pk)`) et
+les métriques non distinctes (`count`, `sum`, `avg`) ne lisent que la
+première : un champ de l'objet lui-même n'est compté qu'une fois. Les
+métriques portant sur un objet lié doivent être `distinct=True`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Optional, Union
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+
+
+@dataclass(frozen=True)
+class Metric:
+    """
+    Agrégat calculé pour chaque ensemble (`COUNT`, `SUM`, `AVG`, `MIN`, `MAX`, filtrable).
+    `field` : chemin ORM ou expression évaluée par ligne (ex. `F("a") + F("b")`).
+    """
+
+    field: Any = "pk"
+    filter: Optional[Q] = None
+    distinct: bool = False
+    agg: str = "count"
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """
+    Axe de regroupement.
+
+    - key        : nom de la clé dans les lignes de sortie (ex. "centre_id")
+    - expression : expression ORM de la clé (défaut : `F(key)`)
+    - columns    : champs ORM renvoyés tels quels avec la clé (ex. "centre__nom")
+    - label      : nom de colonne, dict de choices ou callable(ligne) → libellé
+    - fallback   : format du libellé quand la colonne est vide (ex. "Centre #{}")
+    """
+
+    key: str
+    expression: Any = None
+    columns: tuple = ()
+    label: Union[str, dict, Callable, None] = None
+    fallback: str = "—"
+
+    def group_label(self, row: dict):
+        key = row[self.key]
+        if callable(self.label):
+            return self.label(row)
+        if isinstance(self.label, dict):
+            return self.label.get(key, key) or "—"
+        if isinstance(self.label, str):
+            if row.get(self.label):
+                return row[self.label]
+            return self.fallback.format(key) if key is not None else "—"
+        return key if key not in (None, "") else "—"
+
+
+class StatsResult:
+    def __init__(self, totals: dict, groups: dict):
+        self.totals = totals
+        self.groups = groups
+
+    def top(self, dimension: str, metric: str, n: int = 10, *, skip_null: bool = False) -> list[dict]:
+        """Top-N d'une dimension selon une métrique (lignes déjà agrégées)."""
+        rows = self.groups.get(dimension, [])
+        if skip_null:
+            rows = [r for r in rows if r["group_key"] is not None]
+        return sorted(rows, key=lambda r: r[metric] or 0, reverse=True)[:n]
+
+
+def _sort_key(row):
+    key = row["group_key"]
+    return (key is None, key if key is not None else 0)
+
+
+def _number(value, agg: str):
+    if value is None:
+        # Moyenne / min / max d'un ensemble vide : pas de valeur (≠ 0)
+        return None if agg in ("avg", "min", "max") else 0
+    if agg == "count":
+        return int(value)
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _fans_out(query) -> bool:
+    """Vrai si une jointure (relation inverse, M2M) donne plusieurs lignes par objet."""
+    for join in query.alias_map.values():
+        field = getattr(join, "join_field", None)
+        if field is not None and (getattr(field, "one_to_many", False) or getattr(field, "many_to_many", False)):
+            return True
+    return False
+
+
+class StatsQuery:
+    """Métriques × dimensions déclarées une fois ; `run()` = une requête SQL."""
+
+    def __init__(self, metrics: dict[str, Metric], dimensions: dict[str, Dimension]):
+        self.metrics = metrics
+        self.dimensions = dimensions
+
+    # ────────────────────────────────────────────────────────────
+    # Compilation
+    # ────────────────────────────────────────────────────────────
+    def _inner(self, queryset, metrics: dict[str, Metric], dims: list[str]):
+        """Sous-requête : une ligne par objet, colonnes nommées `st_*`."""
+        cols = {"st_pk": F("pk")}
+        fields: dict[str, str] = {}
+        metric_sql = []
+        for i, (name, metric) in enumerate(metrics.items()):
+            col = fields.get(metric.field)
+            if col is None:
+                col = fields[metric.field] = f"st_f{len(fields)}"
+                cols[col] = F(metric.field) if isinstance(metric.field, str) else metric.field
+            flag = None
+            if metric.filter:  # Q() vide = pas de filtre
+                flag = f"st_w{i}"
+                cols[flag] = Case(When(metric.filter, then=Value(1)), default=Value(0), output_field=IntegerField())
+            metric_sql.append((name, metric, col, flag))
+
+        dim_cols = []
+        for j, name in enumerate(dims):
+            dim = self.dimensions[name]
+            key_col = f"st_k{j}"
+            cols[key_col] = dim.expression if dim.expression is not None else F(dim.key)
+            extra = []
+            for c, path in enumerate(dim.columns):
+                cols[f"st_c{j}_{c}"] = F(path)
+                extra.append(f"st_c{j}_{c}")
+            dim_cols.append((name, key_col, extra))
+
+        inner = queryset.order_by().values(**cols)
+        # Numérotation des lignes seulement si une métrique non distincte la lit
+        fan_out = _fans_out(inner.query) and any(
+            not m.distinct and m.agg in ("count", "sum", "avg") for m in metrics.values()
+        )
+        if fan_out:
+            inner = inner.annotate(st_n=Window(RowNumber(), partition_by=[F("pk")], order_by=F("pk").asc()))
+        return inner, metric_sql, dim_cols, fan_out
+
+    @staticmethod
+    def _aggregate(qn, metric: Metric, col: str, flag: Optional[str], fan_out: bool) -> str:
+        conditions = [] if flag is None else [f"{qn(flag)} = 1"]
+        if fan_out and not metric.distinct and metric.agg in ("count", "sum", "avg"):
+            conditions.append(f"{qn('st_n')} = 1")
+        value = qn(col) if not conditions else f"CASE WHEN {' AND '.join(conditions)} THEN {qn(col)} END"
+        if metric.agg == "sum":
+            return f"COALESCE(SUM({value}), 0)"
+        if metric.agg in ("avg", "min", "max"):
+            return f"{metric.agg.upper()}({value})"
+        return f"COUNT({'DISTINCT ' if metric.distinct else ''}{value})"
+
+    # ────────────────────────────────────────────────────────────
+    # Exécution
+    # ────────────────────────────────────────────────────────────
+    def run(self, queryset, sets: Iterable[str] = (), *, only: Optional[Iterable[str]] = None) -> StatsResult:
+        """
+        Totaux + un ensemble par dimension de `sets`. `only` restreint les
+        métriques calculées (ex. un top qui n'a besoin que d'un compteur :
+        les jointures des autres métriques ne sont alors pas ajoutées).
+        """
+        dims = list(sets)
+        metrics = self.metrics if only is None else {name: self.metrics[name] for name in only}
+        inner, metric_sql, dim_cols, fan_out = self._inner(queryset, metrics, dims)
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+
+        try:
+            inner_sql, params = inner.query.get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            return self._empty(metrics, dims)
+
+        aggregates = [self._aggregate(qn, m, col, flag, fan_out) for _, m, col, flag in metric_sql]
+
+        if connection.vendor == "postgresql":
+            select = [f"GROUPING({qn(key)})" for _, key, _ in dim_cols]
+            for _, key, extra in dim_cols:
+                select.append(qn(key))
+                select += [f"MAX({qn(c)})" for c in extra]
+            sets_sql = ", ".join(["()"] + [f"({qn(key)})" for _, key, _ in dim_cols])
+            sql = (
+                f"SELECT {', '.join(select + aggregates)} FROM ({inner_sql}) AS st "
+                f"GROUP BY GROUPING SETS ({sets_sql})"
+            )
+        else:
+            parts = []
+            for current in [None] + list(range(len(dim_cols))):
+                select = [str(int(j != current)) for j in range(len(dim_cols))]
+                for j, (_, key, extra) in enumerate(dim_cols):
+                    if j == current:
+                        select.append(qn(key))
+                        select += [f"MAX({qn(c)})" for c in extra]
+                    else:
+                        select += ["NULL"] * (1 + len(extra))
+                group = f" GROUP BY {qn(dim_cols[current][1])}" if current is not None else ""
+                parts.append(f"SELECT {', '.join(select + aggregates)} FROM st{group}")
+            sql = f"WITH st AS ({inner_sql}) " + " UNION ALL ".join(parts)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return self._parse(rows, dims, dim_cols, metric_sql)
+
+    def _metrics(self, values, metric_sql) -> dict:
+        return {name: _number(v, m.agg) for (name, m, _, _), v in zip(metric_sql, values)}
+
+    @staticmethod
+    def _totals(metrics: dict[str, Metric]) -> dict:
+        return {name: _number(None, m.agg) for name, m in metrics.items()}
+
+    def _empty(self, metrics, dims) -> StatsResult:
+        return StatsResult(self._totals(metrics), {name: [] for name in dims})
+
+    def _parse(self, rows, dims, dim_cols, metric_sql) -> StatsResult:
+        n = len(dim_cols)
+        totals = None
+        groups = {name: [] for name in dims}
+        for row in rows:
+            flags, pos = row[:n], n
+            values = {}
+            for name, _, extra in dim_cols:
+                values[name] = row[pos:pos + 1 + len(extra)]
+                pos += 1 + len(extra)
+            metrics = self._metrics(row[pos:], metric_sql)
+
+            grouped = [j for j, g in enumerate(flags) if not g]
+            if not grouped:
+                totals = metrics
+                continue
+            name = dim_cols[grouped[0]][0]
+            dim = self.dimensions[name]
+            out = {dim.key: values[name][0]}
+            out.update(zip(dim.columns, values[name][1:]))
+            out.update(metrics)
+            out["group_key"] = out[dim.key]
+            out["group_label"] = dim.group_label(out)
+            groups[name].append(out)
+
+        for name in groups:
+            groups[name].sort(key=_sort_key)
+        return StatsResult(totals or self._totals({name: m for name, m, _, _ in metric_sql}), groups)
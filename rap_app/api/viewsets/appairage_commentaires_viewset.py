@@ -81,7 +81,7 @@ class CommentaireAppairageViewSet(viewsets.ModelViewSet):
         elif is_staff_like(u) and not is_admin_like(u):
             centre_ids = staff_centre_ids(u) or []
             if centre_ids:
-                qs = qs.filter(appairage__formation__centre_id__in=centre_ids).distinct()
+                qs = qs.filter(appairage__centre_id__in=centre_ids)
 
         # 🔹 Filtre "est_archive"
         qp = self.request.query_params
@@ -97,7 +97,7 @@ class AppairageViewSet(viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _scope_qs_to_user_centres(self, qs):
@@ -113,10 +113,11 @@ class AppairageViewSet(viewsets.ModelViewSet):
             return qs
 
         if centre_ids:
+            # Relations simples uniquement (centre dénormalisé) : pas de DISTINCT
             return qs.filter(
-                Q(formation__centre_id__in=centre_ids)
+                Q(centre_id__in=centre_ids)
                 | Q(candidat__formation__centre_id__in=centre_ids)
-            ).distinct()
+            )
 
         return qs.none()
 
@@ -127,7 +128,7 @@ class AppairageViewSet(viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return
         if is_staff_or_staffread(user):
-            allowed = set(user.centres.values_list("id", flat=True))
+            allowed = set(user.get_centre_ids())
             if getattr(formation, "centre_id", None) not in allowed:
                 raise PermissionDenied("Formation hors de votre périmètre (centre).")
 
@@ -49,13 +49,14 @@ from ..serializers.atelier_tre_serializers import (
     AtelierTRESerializer,
     AtelierTREMetaSerializer,
 )
+from ..mixins import CachedOptionsMixin
 from ..permissions import IsStaffOrAbove, is_staff_or_staffread
 from ..paginations import RapAppPagination
 
 logger = logging.getLogger(__name__)
 
 
-class AtelierTREViewSet(viewsets.ModelViewSet):
+class AtelierTREViewSet(CachedOptionsMixin, viewsets.ModelViewSet):
     """
     CRUD minimal des ateliers TRE (M2M direct pour les candidats).
     Accès réservé au staff (lecture/écriture).
@@ -95,7 +96,7 @@ class AtelierTREViewSet(viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user):  # ✅ inclut staff_read
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _scope_qs_to_user_centres(self, qs):
@@ -129,7 +130,7 @@ class AtelierTREViewSet(viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return
         if is_staff_or_staffread(user):  # ✅ inclut staff_read
-            allowed = set(user.centres.values_list("id", flat=True))
+            allowed = set(user.get_centre_ids())
             if getattr(centre, "id", None) not in allowed:
                 raise PermissionDenied("Centre hors de votre périmètre.")
 
@@ -181,8 +182,12 @@ class AtelierTREViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="meta", url_name="meta", permission_classes=[IsStaffOrAbove])
     def meta(self, request):
         # instancier avec un "instance={}" pour forcer la représentation complète
-        ser = AtelierTREMetaSerializer(instance={}, context={"request": request})
-        return Response(ser.data)
+        return self.cached_options_response(
+            request,
+            "meta",
+            lambda: dict(AtelierTREMetaSerializer(instance={}, context={"request": request}).data),
+            depends_on=("Centre", "Candidat"),
+        )
 
     # --- Actions candidats (ajout/retrait sans remplacer toute la liste) ------
 
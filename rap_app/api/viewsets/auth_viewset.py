@@ -4,6 +4,8 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from django.contrib.auth import get_user_model
 
+from ..authentication import scope_claims_for
+
 User = get_user_model()
 
 
@@ -17,6 +19,14 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
         attrs['username'] = attrs.get('email')  # ✅ remplace "username" par "email"
         return super().validate(attrs)
 
+    @classmethod
+    def get_token(cls, user):
+        """Ajoute les claims de périmètre (rôle, centres, version) au jeton signé."""
+        token = super().get_token(user)
+        for claim, value in scope_claims_for(user).items():
+            token[claim] = value
+        return token
+
 
 class EmailTokenRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
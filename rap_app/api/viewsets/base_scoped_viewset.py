@@ -1,10 +1,11 @@
 from rest_framework import viewsets
-from ..mixins import StaffCentresScopeMixin, UserVisibilityScopeMixin
+from ..mixins import ConditionalGetMixin, StaffCentresScopeMixin, UserVisibilityScopeMixin
 from ..permissions import IsStaffReadOrAbove
 from ..paginations import RapAppPagination
 
 
 class BaseScopedViewSet(
+    ConditionalGetMixin,
     StaffCentresScopeMixin,
     UserVisibilityScopeMixin,
     viewsets.ModelViewSet,
@@ -23,6 +24,7 @@ class BaseScopedViewSet(
       - serializer_class
       - centre_lookups / departement_lookups si la relation centre est indirecte
       - user_visibility_lookups si l’objet est lié à un utilisateur autrement que par created_by
+      - conditional_depends_on / conditional_cache_control (GET conditionnel, cf. ConditionalGetMixin)
     """
 
     # 🔹 Permissions globales
@@ -33,6 +35,6 @@ class BaseScopedViewSet(
 
     # 🔹 Config par défaut des mixins
     centre_lookups = ("centre_id",)
-    departement_lookups = ("centre__code_postal",)
+    departement_lookups = ("centre__departement_code",)
     user_visibility_lookups = ("created_by",)
     include_staff = False  # staff/staff_read sont gérés par StaffCentresScopeMixin
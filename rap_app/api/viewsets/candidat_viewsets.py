@@ -46,15 +46,19 @@ from ...models.formations import Formation
 # ✅ imports serializers
 from ..serializers.candidat_serializers import (
     CandidatLiteSerializer,
+    CandidatLiteProjection,
     CandidatSerializer,
     CandidatListSerializer,
     CandidatCreateUpdateSerializer,
     CandidatQueryParamsSerializer,  # pour valider/normaliser les query params
 )
 
+from ..mixins import CachedOptionsMixin
 from ..permissions import IsStaffOrAbove
+from ..projections import paginate_projection
 from ..paginations import RapAppPagination
 from ...utils.filters import CandidatFilter
+from ...utils.cache_utils import invalidate_model_caches
 
 # ✅ logger dédié
 logger = logging.getLogger("rap_app.candidats")
@@ -120,7 +124,7 @@ def _build_candidat_meta(user=None) -> dict:
         ],
     }
 
-class CandidatViewSet(viewsets.ModelViewSet):
+class CandidatViewSet(CachedOptionsMixin, viewsets.ModelViewSet):
     permission_classes = [IsStaffOrAbove]
     pagination_class = RapAppPagination
 
@@ -220,7 +224,7 @@ class CandidatViewSet(viewsets.ModelViewSet):
         if is_admin_like(user):
             return
         if is_staff_or_staffread(user):
-            allowed = set(user.centres.values_list("id", flat=True))
+            allowed = set(user.get_centre_ids())
             if getattr(formation, "centre_id", None) not in allowed:
                 raise PermissionDenied("Formation hors de votre périmètre (centre).")
         # ---------- queryset de base + annotations ----------
@@ -293,6 +297,11 @@ class CandidatViewSet(viewsets.ModelViewSet):
         filtered_qs = self.filter_queryset(base_qs)
         self._log_filters(request, base_qs, filtered_qs)
 
+        # ⚡ ?lite=1 : projection values() (pas d'instances ni de prefetch)
+        if request.query_params.get("lite") == "1":
+            rows, paginated = paginate_projection(self, filtered_qs, CandidatLiteProjection)
+            return self.get_paginated_response(rows) if paginated else Response(rows)
+
         return super().list(request, *args, **kwargs)
 
     # ---------- serializer + context ----------
@@ -358,6 +367,7 @@ class CandidatViewSet(viewsets.ModelViewSet):
         if new_form:
             # 🔄 Bulk update quand on peut (plus rapide)
             qs.update(formation=new_form, centre_id=new_form.centre_id)
+            invalidate_model_caches(Prospection)
         else:
             # 🔄 Pas de formation : pour chaque prospection, centre = partenaire.default_centre (si présent)
             for p in qs.select_related("partenaire"):
@@ -415,9 +425,12 @@ class CandidatViewSet(viewsets.ModelViewSet):
     )
     def meta(self, request):
         logger.debug("ℹ️ /candidats/meta called")
-        data = _build_candidat_meta(request.user)  # ✅ scope staff
-        logger.debug("ℹ️ /candidats/meta keys=%s", list(data.keys()))
-        return Response(data)
+        return self.cached_options_response(
+            request,
+            "meta",
+            lambda: _build_candidat_meta(request.user),  # ✅ scope staff
+            depends_on=("Centre", "Formation"),
+        )
 
     
     # ---------- Actions Exports----------
@@ -12,6 +12,7 @@ from django.db.models import Q
 
 from ..serializers.centres_serializers import CentreConstantsSerializer, CentreSerializer
 from ...models.centres import Centre
+from ..mixins import ConditionalGetMixin
 from ..permissions import ReadWriteAdminReadStaff
 from ..paginations import RapAppPagination
 from ...models.logs import LogUtilisateur
@@ -25,7 +26,7 @@ from ...models.logs import LogUtilisateur
     partial_update=extend_schema(summary="Mettre à jour partiellement un centre", tags=["Centres"]),
     destroy=extend_schema(summary="Supprimer un centre", tags=["Centres"]),
 )
-class CentreViewSet(viewsets.ModelViewSet):
+class CentreViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API REST pour gérer les centres.
 
@@ -68,6 +69,9 @@ class CentreViewSet(viewsets.ModelViewSet):
     ]
     ordering = ["nom"]
 
+    # 🔁 GET conditionnel (ETag / 304)
+    conditional_cache_control = "private, no-cache"
+
     def get_queryset(self):
         """
         Renvoie la liste des centres visibles selon le rôle de l'utilisateur.
@@ -82,7 +86,7 @@ class CentreViewSet(viewsets.ModelViewSet):
         if role.startswith("staff") and not user.is_superuser:
             try:
                 # ⚠️ suppose que user.centres est une M2M
-                return qs.filter(id__in=user.centres.values_list("id", flat=True))
+                return qs.filter(id__in=user.get_centre_ids())
             except Exception:
                 # si pas de relation centres sur le user -> aucun centre
                 return qs.none()
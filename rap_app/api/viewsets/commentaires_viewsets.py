@@ -31,10 +31,11 @@ from ...api.serializers.commentaires_serializers import (
 )
 from ...models.commentaires import Commentaire
 from ...models.logs import LogUtilisateur
+from ..mixins import CachedOptionsMixin, ConditionalGetMixin
 from ..roles import is_admin_like, is_staff_or_staffread, staff_centre_ids
 
 
-class CommentaireViewSet(viewsets.ModelViewSet):
+class CommentaireViewSet(ConditionalGetMixin, CachedOptionsMixin, viewsets.ModelViewSet):
     """
     💬 Gestion des commentaires liés aux formations.
     """
@@ -54,6 +55,9 @@ class CommentaireViewSet(viewsets.ModelViewSet):
     pagination_class = RapAppPagination
     permission_classes = [IsStaffOrAbove]
 
+    # 🔁 GET conditionnel : le payload affiche la formation (centre, statut, type d'offre) et l'auteur
+    conditional_depends_on = ("Formation", "Centre", "Statut", "TypeOffre", "CustomUser")
+
     # ------------------------------------------------------------------
     # 🔒 Vérification d'accès à une formation
     # ------------------------------------------------------------------
@@ -87,6 +91,14 @@ class CommentaireViewSet(viewsets.ModelViewSet):
     @extend_schema(summary="Récupérer les options de filtres pour les commentaires")
     @action(detail=False, methods=["get"], url_path="filter-options")
     def filter_options(self, request):
+        return self.cached_options_response(
+            request,
+            "filter-options",
+            lambda: self._build_filter_options(request),
+            depends_on=("Commentaire", "Formation", "Centre", "TypeOffre", "CustomUser"),
+        )
+
+    def _build_filter_options(self, request):
         """
         Retourne les options disponibles pour le panneau de filtres :
         - Centres accessibles (selon droits et commentaires existants)
@@ -160,11 +172,11 @@ class CommentaireViewSet(viewsets.ModelViewSet):
             "statuts": commentaire_statuts,
         }
 
-        return Response({
+        return {
             "success": True,
             "message": "Options de filtres récupérées avec succès.",
             "data": data,
-        })
+        }
 
     # ------------------------------------------------------------------
     # 🔒 Scope par rôle utilisateur
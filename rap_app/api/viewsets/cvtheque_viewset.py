@@ -1,24 +1,26 @@
 # rap_app/api/viewsets/cvtheque_viewset.py
 
-import mimetypes
-import urllib.parse
-import os
 from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import FileResponse
+from django.db.models import Count, F
 from rest_framework.decorators import action
 from drf_spectacular.utils import (
     extend_schema,
     extend_schema_view,
+    OpenApiParameter,
     OpenApiResponse,
     OpenApiTypes,
 )
 
 from ...models.cvtheque import CVTheque
 from ...api.paginations import RapAppPagination
+from ..mixins import CachedOptionsMixin
+from ...utils.file_delivery import THUMBNAIL_CACHE_CONTROL, serve_file
+from ...services import cv_texte
+from ...services.apercus import etag_apercu
 from ..permissions import CanAccessCVTheque
 from ...api.roles import (
     is_admin_like,
@@ -57,12 +59,45 @@ class CVThequeFilterSet(django_filters.FilterSet):
         ]
 
 
+# =====================================================================
+# 🔎 RECHERCHE PLEIN TEXTE (?q=)
+# =====================================================================
+class CVTexteSearchFilter(filters.BaseFilterBackend):
+    """
+    `?q=` : titre, mots-clés et texte extrait des CV (tsvector + trigramme
+    sous PostgreSQL). Appliqué après le périmètre et les autres filtres ;
+    tri par pertinence sauf `?ordering=` explicite.
+    """
+
+    param = "q"
+
+    def get_query(self, request):
+        return request.query_params.get(self.param, "").strip()[:200]
+
+    def filter_queryset(self, request, queryset, view):
+        q = self.get_query(request)
+        if not q:
+            return queryset
+        queryset = cv_texte.filtrer(queryset, q)
+        if not request.query_params.get("ordering"):
+            queryset = queryset.order_by(F("pertinence").desc(nulls_last=True), "-date_depot")
+        return queryset
+
+
 # =====================================================================
 # 🔥 VIEWSET COMPLET — VERSION OPTIMISÉE
 # =====================================================================
 @extend_schema_view(
     list=extend_schema(
         summary="📑 Liste des documents CVThèque",
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description="Recherche plein texte (titre, mots-clés, contenu du CV) : "
+                "résultats triés par pertinence, avec `extrait` surligné (<mark>).",
+            ),
+        ],
         responses={200: OpenApiResponse(response=CVThequeListSerializer)},
         tags=["CVThèque"],
     ),
@@ -72,9 +107,9 @@ class CVThequeFilterSet(django_filters.FilterSet):
         tags=["CVThèque"],
     ),
 )
-class CVThequeViewSet(viewsets.ModelViewSet):
+class CVThequeViewSet(CachedOptionsMixin, viewsets.ModelViewSet):
 
-    queryset = CVTheque.objects.select_related(
+    queryset = CVTheque.objects.defer("texte", "recherche").select_related(
         "candidat",
         "candidat__formation",
         "candidat__formation__centre",
@@ -90,6 +125,7 @@ class CVThequeViewSet(viewsets.ModelViewSet):
         DjangoFilterBackend,
         filters.SearchFilter,
         filters.OrderingFilter,
+        CVTexteSearchFilter,  # après OrderingFilter : tri par pertinence
     ]
     filterset_class = CVThequeFilterSet
 
@@ -109,6 +145,33 @@ class CVThequeViewSet(viewsets.ModelViewSet):
     ordering_fields = ["date_depot", "document_type", "titre"]
     ordering = ["-date_depot"]
 
+    # Colonnes chargées pour la liste (cf. CVThequeListSerializer)
+    LIST_ONLY_FIELDS = (
+        "id",
+        "titre",
+        "document_type",
+        "date_depot",
+        "est_public",
+        "fichier",
+        "sha256",
+        "apercu",
+        "nb_pages",
+        "candidat__id",
+        "candidat__nom",
+        "candidat__prenom",
+        "candidat__email",
+        "candidat__telephone",
+        "candidat__ville",
+        "candidat__code_postal",
+        "candidat__statut",
+        "candidat__cv_statut",
+        "candidat__formation__id",
+        "candidat__formation__nom",
+        "candidat__formation__num_offre",
+        "candidat__formation__centre__nom",
+        "candidat__formation__type_offre__nom",
+    )
+
     # =================================================================
     # 🔥 GET_QUERYSET — OPTIMISÉ & SANS BUG
     # =================================================================
@@ -120,6 +183,17 @@ class CVThequeViewSet(viewsets.ModelViewSet):
         if getattr(self, "action", None) in ["preview", "download"]:
             return qs
 
+        # Liste : projection sur les seules colonnes sérialisées
+        if getattr(self, "action", None) == "list":
+            qs = (
+                qs.select_related(None)
+                .select_related(
+                    "candidat__formation__centre",
+                    "candidat__formation__type_offre",
+                )
+                .only(*self.LIST_ONLY_FIELDS)
+            )
+
         # Admin / superadmin : accès complet
         if is_admin_like(user):
             return qs
@@ -130,7 +204,7 @@ class CVThequeViewSet(viewsets.ModelViewSet):
 
         # Staff + staff_read : filtré par centres
         if is_staff_like(user) or is_staff_or_staffread(user):
-            centre_ids = list(user.centres.values_list("id", flat=True))
+            centre_ids = user.get_centre_ids()
             if centre_ids:
                 return qs.filter(candidat__formation__centre_id__in=centre_ids)
             return qs.none()
@@ -138,6 +212,16 @@ class CVThequeViewSet(viewsets.ModelViewSet):
         # Autres : rien
         return qs.none()
 
+    def paginate_queryset(self, queryset):
+        """Extraits surlignés calculés pour la seule page renvoyée (?q=)."""
+        page = super().paginate_queryset(queryset)
+        q = CVTexteSearchFilter().get_query(self.request)
+        if page is not None and q:
+            found = cv_texte.extraits([obj.pk for obj in page], q, using=queryset.db)
+            for obj in page:
+                obj.extrait = found.get(obj.pk)
+        return page
+
     # =================================================================
     # 🔧 SERIALIZERS
     # =================================================================
@@ -149,79 +233,84 @@ class CVThequeViewSet(viewsets.ModelViewSet):
         return CVThequeWriteSerializer
 
     # =================================================================
-    # 🎛️ FILTRES DYNAMIQUES
+    # 🎛️ FACETTES (endpoint dédié, mis en cache par périmètre)
     # =================================================================
     def _get_filter_values(self, qs):
-
-        formations = qs.values(
-            "candidat__formation_id",
-            "candidat__formation__nom",
-            "candidat__formation__centre__nom",
-            "candidat__formation__type_offre__nom",
-            "candidat__formation__statut__nom",
-        ).distinct()
-
-        centres = qs.values(
-            "candidat__formation__centre_id",
-            "candidat__formation__centre__nom",
-        ).distinct()
-
-        type_offres = qs.values(
-            "candidat__formation__type_offre_id",
-            "candidat__formation__type_offre__nom",
-        ).distinct()
-
-        statuts = qs.values(
-            "candidat__formation__statut_id",
-            "candidat__formation__statut__nom",
-        ).distinct()
+        """
+        Une seule requête groupée par formation : centre / type d'offre / statut
+        se déduisent de la formation, les listes sont reconstruites en Python.
+        """
+        rows = (
+            qs.order_by()
+            .values(
+                "candidat__formation_id",
+                "candidat__formation__nom",
+                "candidat__formation__num_offre",
+                "candidat__formation__centre_id",
+                "candidat__formation__centre__nom",
+                "candidat__formation__type_offre_id",
+                "candidat__formation__type_offre__nom",
+                "candidat__formation__statut_id",
+                "candidat__formation__statut__nom",
+            )
+            .annotate(nb_documents=Count("id"))
+        )
+
+        formations, centres, type_offres, statuts = [], {}, {}, {}
+        for r in rows:
+            if r["candidat__formation_id"] is None:
+                continue
+            formations.append({
+                "id": r["candidat__formation_id"],
+                "nom": r["candidat__formation__nom"],
+                "num_offre": r["candidat__formation__num_offre"],
+                "centre": r["candidat__formation__centre__nom"],
+                "type_offre": r["candidat__formation__type_offre__nom"],
+                "statut": r["candidat__formation__statut__nom"],
+                "count": r["nb_documents"],
+            })
+            for bucket, key in (
+                (centres, "centre"),
+                (type_offres, "type_offre"),
+                (statuts, "statut"),
+            ):
+                value = r[f"candidat__formation__{key}_id"]
+                if value is None:
+                    continue
+                entry = bucket.setdefault(
+                    value, {"value": value, "label": r[f"candidat__formation__{key}__nom"], "count": 0}
+                )
+                entry["count"] += r["nb_documents"]
+
+        def by_label(items):
+            return sorted(items, key=lambda x: (x.get("label") or x.get("nom") or "").lower())
 
         return {
             "document_types": [
                 {"value": key, "label": label} for key, label in CVTheque.DOCUMENT_TYPES
             ],
-            "centres": [
-                {"value": c["candidat__formation__centre_id"], "label": c["candidat__formation__centre__nom"]}
-                for c in centres
-            ],
-            "formations": [
-                {
-                    "id": f["candidat__formation_id"],
-                    "nom": f["candidat__formation__nom"],
-                    "centre": f["candidat__formation__centre__nom"],
-                    "type_offre": f["candidat__formation__type_offre__nom"],
-                    "statut": f["candidat__formation__statut__nom"],
-                }
-                for f in formations
-            ],
-            "type_offres": [
-                {"value": t["candidat__formation__type_offre_id"], "label": t["candidat__formation__type_offre__nom"]}
-                for t in type_offres
-            ],
-            "statuts_formation": [
-                {"value": s["candidat__formation__statut_id"], "label": s["candidat__formation__statut__nom"]}
-                for s in statuts
-            ],
-        }
-
-    # =================================================================
-    # 📄 LIST
-    # =================================================================
-    def list(self, request, *args, **kwargs):
-        qs = self.filter_queryset(self.get_queryset())
-
-        page = self.paginate_queryset(qs)
-        serializer = self.get_serializer(page or qs, many=True)
-
-        data = {
-            "results": serializer.data,
-            "filters": self._get_filter_values(qs),
+            "centres": by_label(centres.values()),
+            "formations": by_label(formations),
+            "type_offres": by_label(type_offres.values()),
+            "statuts_formation": by_label(statuts.values()),
         }
 
-        if page:
-            return self.get_paginated_response(data)
-
-        return Response(data)
+    @extend_schema(
+        summary="🎛️ Facettes de filtres de la CVThèque (centres, formations, types, statuts)",
+        tags=["CVThèque"],
+    )
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        return self.cached_options_response(
+            request,
+            "facets",
+            lambda: {
+                "success": True,
+                "message": "Facettes CVThèque récupérées avec succès.",
+                "data": self._get_filter_values(self.filter_queryset(self.get_queryset())),
+            },
+            depends_on=("CVTheque", "Candidat", "Formation", "Centre", "TypeOffre", "Statut"),
+        )
 
     # =================================================================
     # 📥 DOWNLOAD  (OK)
@@ -240,19 +329,11 @@ class CVThequeViewSet(viewsets.ModelViewSet):
                             status=status.HTTP_404_NOT_FOUND)
 
         try:
-            file = obj.fichier.open("rb")
+            return serve_file(request, obj.fichier, filename=obj.titre or obj.fichier.name, sha256=obj.sha256)
         except FileNotFoundError:
             return Response({"success": False, "message": "Fichier introuvable."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        mime_type, _ = mimetypes.guess_type(obj.fichier.name)
-        response = FileResponse(file, content_type=mime_type or "application/octet-stream")
-
-        filename = urllib.parse.quote(obj.titre or obj.fichier.name)
-        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{filename}"
-
-        return response
-
     # =================================================================
     # 👁️ PREVIEW (OK – FIX 404)
     # =================================================================
@@ -270,16 +351,51 @@ class CVThequeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if not os.path.exists(obj.fichier.path):
+        try:
+            return serve_file(
+                request,
+                obj.fichier,
+                filename=obj.titre or obj.fichier.name,
+                content_type="application/pdf",
+                disposition="inline",
+                sha256=obj.sha256,
+            )
+        except FileNotFoundError:
             return Response(
                 {"success": False, "message": "Fichier introuvable sur le serveur."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        file = obj.fichier.open("rb")
-        response = FileResponse(file, content_type="application/pdf")
+    # =================================================================
+    # 🖼️ THUMBNAIL (miniature 1re page, générée en arrière-plan)
+    # =================================================================
+    @extend_schema(
+        summary="🖼️ Miniature de la première page",
+        responses={200: OpenApiResponse(response=OpenApiTypes.BINARY)},
+        tags=["CVThèque"],
+    )
+    @action(detail=True, methods=["get"], url_path="thumbnail")
+    def thumbnail(self, request, pk=None):
+        obj = self.get_object()
 
-        filename = urllib.parse.quote(obj.titre or obj.fichier.name)
-        response["Content-Disposition"] = f"inline; filename*=UTF-8''{filename}"
+        if not obj.apercu:
+            return Response(
+                {"success": False, "message": "Aperçu non disponible."},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        return response
+        try:
+            return serve_file(
+                request,
+                obj.apercu,
+                filename=f"{obj.titre or obj.pk}.jpg",
+                content_type="image/jpeg",
+                disposition="inline",
+                sha256=etag_apercu(obj.sha256),
+                cache_control=THUMBNAIL_CACHE_CONTROL,
+            )
+        except FileNotFoundError:
+            return Response(
+                {"success": False, "message": "Aperçu introuvable sur le serveur."},
+                status=status.HTTP_404_NOT_FOUND
+            )
@@ -78,7 +78,7 @@ class ObjectifDeclicViewSet(viewsets.ModelViewSet):
             return list(centres.values_list("id", flat=True)) if centres else []
         if is_staff_or_staffread(user):
             try:
-                return list(user.centres.values_list("id", flat=True))
+                return user.get_centre_ids()
             except Exception:
                 return []
         return []
@@ -121,8 +121,8 @@ class ObjectifDeclicViewSet(viewsets.ModelViewSet):
         if centre_id:
             qs = qs.filter(centre_id=centre_id)
         if departement:
-            # on reste sur le préfixe CP (comme avant), cohérent avec le front
-            qs = qs.filter(centre__code_postal__startswith=departement)
+            # préfixe CP (comme avant), lu sur la colonne indexée
+            qs = qs.filter(centre__departement_code=str(departement).strip()[:2])
 
         return qs.order_by("-annee", "centre__nom")
 
@@ -158,11 +158,7 @@ class DeclicViewSet(ScopeMixin, viewsets.ModelViewSet):
             qs = qs.filter(type_declic=type_declic)
 
         if departement:
-            departement = str(departement)
-            qs = qs.filter(
-                Q(centre__departement__startswith=departement)
-                | Q(centre__code_postal__startswith=departement)
-            )
+            qs = qs.filter(centre__departement_code=str(departement).strip()[:2])
 
         if date_min:
             qs = qs.filter(date_declic__gte=date_min)
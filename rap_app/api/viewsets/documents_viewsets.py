@@ -1,8 +1,6 @@
 import csv
 import logging
-import mimetypes
-import urllib.parse
-from django.http import HttpResponse, FileResponse
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -20,6 +18,9 @@ from ...api.serializers.documents_serializers import (
     DocumentSerializer,
     TypeDocumentChoiceSerializer,
 )
+from ..mixins import CachedOptionsMixin, ConditionalGetMixin
+from ...utils.file_delivery import THUMBNAIL_CACHE_CONTROL, serve_file
+from ...services.apercus import etag_apercu
 from ...api.paginations import RapAppPagination
 from ...api.permissions import IsStaffOrAbove, is_staff_or_staffread  # ✅ staff/admin/superadmin only
 
@@ -37,7 +38,7 @@ class DocumentFilter(django_filters.FilterSet):
 
 
 @extend_schema(tags=["Documents"])
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(ConditionalGetMixin, CachedOptionsMixin, viewsets.ModelViewSet):
     """
     📎 ViewSet complet pour gérer les documents liés aux formations.
 
@@ -56,6 +57,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsStaffOrAbove]
     pagination_class = RapAppPagination
 
+    # 🔁 GET conditionnel : le payload affiche la formation (centre, statut, type d'offre) et l'auteur
+    conditional_depends_on = ("Formation", "Centre", "Statut", "TypeOffre", "CustomUser")
+
     filter_backends = [DjangoFilterBackend]
     filterset_class = DocumentFilter
 
@@ -70,7 +74,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
             return None
         if is_staff_or_staffread(user):
             # nécessite le M2M user.centres (déjà ajouté)
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _scope_qs_to_user_centres(self, qs):
@@ -91,7 +95,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return
         if is_staff_or_staffread(user):
-            allowed = set(user.centres.values_list("id", flat=True))
+            allowed = set(user.get_centre_ids())
             if getattr(formation, "centre_id", None) not in allowed:
                 raise PermissionDenied("Formation hors de votre périmètre (centre).")
 
@@ -314,6 +318,14 @@ class DocumentViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"], url_path="filtres")
     def get_filtres(self, request):
+        return self.cached_options_response(
+            request,
+            "filtres",
+            lambda: self._build_get_filtres(request),
+            depends_on=("Document", "Formation", "Centre", "Statut", "TypeOffre"),
+        )
+
+    def _build_get_filtres(self, request):
         """
         Renvoie les options de filtres disponibles pour les documents.
         ⚠️ Affiche uniquement les centres/statuts/types/formations liés à au moins un document,
@@ -348,7 +360,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
             .distinct() \
             .order_by("formation__nom")
 
-        return Response({
+        return {
             "success": True,
             "message": "Filtres documents récupérés avec succès",
             "data": {
@@ -367,9 +379,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     for f in formations
                 ],
             }
-        })
-
-
+        }
 
     @extend_schema(
         summary="⬇️ Télécharger un document",
@@ -380,7 +390,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
     def download(self, request, pk=None):
         """
         Téléchargement direct du fichier associé au document.
-        Retourne une vraie réponse fichier (FileResponse) avec les bons headers HTTP.
+        Contrôle d'accès ici, transfert délégué au serveur frontal si configuré
+        (`FILE_DELIVERY_BACKEND`), sinon streaming avec `Range` / `ETag`.
         """
         doc = self.get_object()
 
@@ -391,29 +402,47 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # 📂 Ouvre le fichier en lecture binaire
+        # 📤 Réponse fichier (X-Accel-Redirect / X-Sendfile / streaming)
         try:
-            file_handle = doc.fichier.open("rb")
+            return serve_file(
+                request,
+                doc.fichier,
+                filename=doc.nom_fichier or doc.fichier.name,
+                content_type=doc.mime_type,
+                sha256=doc.sha256,
+            )
         except FileNotFoundError:
             return Response(
                 {"success": False, "message": "Fichier introuvable sur le serveur."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # 🧠 Détermine le type MIME
-        mime_type, _ = mimetypes.guess_type(doc.fichier.name)
-        mime_type = mime_type or "application/octet-stream"
-
-        # 📤 Crée la réponse
-        response = FileResponse(file_handle, content_type=mime_type)
-
-        # 🔠 Encode proprement le nom du fichier pour tous les navigateurs
-        filename = urllib.parse.quote(doc.nom_fichier or doc.fichier.name)
-        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{filename}"
-
-        # 🚫 Évite la mise en cache pour les fichiers sensibles
-        response["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response["Pragma"] = "no-cache"
-        response["Expires"] = "0"
-
-        return response
+    @extend_schema(
+        summary="🖼️ Miniature de la première page",
+        description="Image JPEG générée en arrière-plan après l'enregistrement du fichier (404 tant qu'elle n'existe pas).",
+        responses={200: OpenApiResponse(response=OpenApiTypes.BINARY)},
+    )
+    @action(detail=True, methods=["get"], url_path="thumbnail")
+    def thumbnail(self, request, pk=None):
+        """Miniature adressée par contenu : cache client longue durée (`?v=` change avec le fichier)."""
+        doc = self.get_object()
+        if not doc.apercu:
+            return Response(
+                {"success": False, "message": "Aperçu non disponible."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        try:
+            return serve_file(
+                request,
+                doc.apercu,
+                filename=f"{doc.nom_fichier or doc.pk}.jpg",
+                content_type="image/jpeg",
+                disposition="inline",
+                sha256=etag_apercu(doc.sha256),
+                cache_control=THUMBNAIL_CACHE_CONTROL,
+            )
+        except FileNotFoundError:
+            return Response(
+                {"success": False, "message": "Aperçu introuvable sur le serveur."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
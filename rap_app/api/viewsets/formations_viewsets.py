@@ -42,6 +42,8 @@ from rest_framework.views import APIView
 
 
 
+from ..mixins import CachedOptionsMixin, ConditionalGetMixin
+from ..projections import paginate_projection
 from ..roles import is_admin_like, is_staff_or_staffread, staff_centre_ids
 
 from ...models.statut import Statut
@@ -49,9 +51,11 @@ from ...models.types_offre import TypeOffre
 from ...models.formations import Formation
 from ...api.paginations import RapAppPagination
 from ...api.permissions import IsStaffOrAbove, UserVisibilityScopeMixin
+from ...utils.db import stream_queryset
 from ...api.serializers.formations_serializers import (
     FormationCreateSerializer,
     FormationListSerializer,
+    FormationListProjection,
     FormationDetailSerializer,
 )
 
@@ -83,7 +87,7 @@ class FormationSearchFilter(filters.SearchFilter):
     search_param = "texte"   # ex: ?texte=Responsable
     
 @extend_schema(tags=["Formations"])
-class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
+class FormationViewSet(ConditionalGetMixin, CachedOptionsMixin, UserVisibilityScopeMixin, viewsets.ModelViewSet):
     """
     📚 ViewSet pour gérer les formations.
     Accès :
@@ -95,6 +99,11 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
     permission_classes = [IsStaffOrAbove]
     pagination_class = RapAppPagination
 
+    # 🔁 GET conditionnel : la liste affiche centre / statut / type d'offre
+    # (le détail agrège commentaires, documents, événements… → non concerné)
+    conditional_actions = ("list",)
+    conditional_depends_on = ("Centre", "Statut", "TypeOffre")
+
     # ⬇️ remplace SearchFilter par FormationSearchFilter (texte)
     filter_backends = [
             DjangoFilterBackend,
@@ -356,17 +365,16 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
             except Exception as e:
                 logger.warning(f"Tri ignoré (paramètre invalide '{tri}') : {e}")
 
-        # 📄 Pagination + sérialisation (une seule fois, après tous les filtres)
-        page = self.paginate_queryset(qs)
-        serializer = self.get_serializer(page or qs, many=True)
+        # 📄 Pagination + projection values() (une seule fois, après tous les filtres)
+        results, paginated = paginate_projection(self, qs, FormationListProjection)
 
-        if page is not None:
+        if paginated:
             return Response({
                 "success": True,
                 "message": "Liste paginée des formations",
                 "data": {
                     "count": self.paginator.page.paginator.count,
-                    "results": serializer.data,
+                    "results": results,
                 },
             })
 
@@ -374,8 +382,8 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
             "success": True,
             "message": "Liste complète des formations",
             "data": {
-                "count": len(serializer.data),
-                "results": serializer.data,
+                "count": len(results),
+                "results": results,
             },
         })
 
@@ -385,6 +393,14 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
     @extend_schema(summary="Filtres disponibles (centres, statuts, types d’offre, activités, périodes à venir)")
     @action(detail=False, methods=["get"])
     def filtres(self, request):
+        return self.cached_options_response(
+            request,
+            "filtres",
+            lambda: self._build_filtres(request),
+            depends_on=("Formation", "Centre", "Statut", "TypeOffre"),
+        )
+
+    def _build_filtres(self, request):
         user = request.user
         ref_complet = str(request.query_params.get("ref_complet", "")).lower() in {"1", "true", "yes", "on"}
 
@@ -444,20 +460,16 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
             {"code": "archivee", "libelle": "Archivée"},
         ]
 
-        return Response(
-            {
-                "success": True,
-                "data": {
-                    "centres": centres,
-                    "statuts": statuts,
-                    "type_offres": type_offres,
-                    "activites": activites,
-                    "periodes_a_venir": periodes_a_venir,
-                },
-            }
-        )
-
-
+        return {
+            "success": True,
+            "data": {
+                "centres": centres,
+                "statuts": statuts,
+                "type_offres": type_offres,
+                "activites": activites,
+                "periodes_a_venir": periodes_a_venir,
+            },
+        }
 
     @extend_schema(summary="Obtenir l'historique d'une formation")
     @action(detail=True, methods=["get"])
@@ -824,7 +836,7 @@ class FormationViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
         odd_fill = PatternFill("solid", fgColor="FAFBFD")
         numeric_cols = list(range(10, 21)) + [23, 24, 25, 32, 33]
 
-        for i, f in enumerate(qs, start=1):
+        for i, f in enumerate(stream_queryset(qs), start=1):
             # 🔹 Dernier commentaire
             dernier_commentaire = ""
             if hasattr(f, "get_commentaires"):
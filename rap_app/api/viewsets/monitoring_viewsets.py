@@ -0,0 +1,79 @@
+# rap_app/api/viewsets/monitoring_viewsets.py
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..permissions import IsAdminLikeOnly
+from ...utils import profiling
+from ...utils.db import get_connection_metrics
+
+
+class DbConnectionMetricsView(APIView):
+    """
+    📊 Métriques de connexions DB du worker qui répond :
+    connexions ouvertes / réutilisées, paramètres CONN_MAX_AGE / health checks.
+
+    ⚠️ Chaque worker gunicorn a ses propres compteurs (interroger plusieurs fois
+    pour couvrir les différents PID).
+    """
+
+    permission_classes = [IsAdminLikeOnly]
+
+    @extend_schema(
+        summary="Métriques de connexions base de données (worker courant)",
+        tags=["Monitoring"],
+    )
+    def get(self, request):
+        return Response(
+            {
+                "success": True,
+                "message": "Métriques de connexions du worker courant.",
+                "data": get_connection_metrics(),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class SqlProfilingReportView(APIView):
+    """
+    🔬 Classement des endpoints mesurés par le middleware de profilage SQL.
+
+    Paramètres :
+      - source : `memory` (tampon du worker courant, défaut) ou `file` (JSONL, tous workers)
+      - order  : `p95` (défaut), `duplicates` (N+1) ou `queries`
+      - limit  : nombre de lignes (défaut 50)
+    """
+
+    permission_classes = [IsAdminLikeOnly]
+
+    @extend_schema(
+        summary="Classement des endpoints par p95 / requêtes dupliquées",
+        tags=["Monitoring"],
+        parameters=[
+            OpenApiParameter("source", str, description="memory | file"),
+            OpenApiParameter("order", str, description="p95 | duplicates | queries"),
+            OpenApiParameter("limit", int, description="Nombre de lignes (défaut 50)"),
+        ],
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = max(1, min(int(params.get("limit", 50)), 500))
+        except (TypeError, ValueError):
+            limit = 50
+
+        entries = profiling.load_entries(source=params.get("source", "memory"))
+        return Response(
+            {
+                "success": True,
+                "message": "Rapport de profilage SQL.",
+                "data": {
+                    "enabled": profiling.get_config()["ENABLED"],
+                    "samples": len(entries),
+                    "results": profiling.build_report(entries, order_by=params.get("order", "p95"), limit=limit),
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
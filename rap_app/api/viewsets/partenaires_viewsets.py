@@ -18,8 +18,11 @@ from openpyxl.utils import get_column_letter
 from openpyxl.styles import PatternFill, Font, Alignment
 from openpyxl.drawing.image import Image as XLImage
 
+from ..mixins import CachedOptionsMixin, ConditionalGetMixin
 from ...api.permissions import IsOwnerOrStaffOrAbove, UserVisibilityScopeMixin, is_staff_or_staffread
+from ...models.appairage import Appairage
 from ...models.partenaires import Partenaire
+from ...models.prospection import Prospection
 from ...models.logs import LogUtilisateur
 from ..serializers.partenaires_serializers import PartenaireChoicesResponseSerializer, PartenaireSerializer
 
@@ -148,8 +151,10 @@ class InlinePartenaireFilter(FilterSet):
         responses={204: OpenApiResponse(description="Suppression réussie")}
     ),
 )
-class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
+class PartenaireViewSet(ConditionalGetMixin, CachedOptionsMixin, UserVisibilityScopeMixin, viewsets.ModelViewSet):
     serializer_class = PartenaireSerializer
+    # 🔁 GET conditionnel : centre, auteur et compteurs (prospections, appairages)
+    conditional_depends_on = ("Centre", "CustomUser", "Prospection", "Appairage")
     # ✅ utilise la permission locale pour autoriser la lecture des partenaires attribués via prospection
     permission_classes = [PartenaireAccessPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -187,7 +192,7 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
         if self._is_admin_like(user):
             return None  # accès global
         if is_staff_or_staffread(user):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []  # non-staff
 
     def _scoped_for_user(self, qs, user):
@@ -208,13 +213,13 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
         if not centre_ids:
             return qs.filter(created_by=user)
 
-        # Scoping principal
-        scoped = qs.filter(
-            Q(appairages__formation__centre_id__in=centre_ids)
-            | Q(prospections__formation__centre_id__in=centre_ids)
-            | Q(default_centre_id__in=centre_ids)
-            | Q(created_by=user)
-        ).distinct()
+        # Scoping principal — semi-jointures `IN (SELECT partenaire_id …)` : pas de DISTINCT
+        appairages = Appairage.objects.filter(centre_id__in=centre_ids).values("partenaire_id")
+        prospections = Prospection.objects.filter(
+            formation__centre_id__in=centre_ids, partenaire__isnull=False
+        ).values("partenaire_id")
+        linked = Q(pk__in=appairages) | Q(pk__in=prospections)
+        scoped = qs.filter(linked | Q(default_centre_id__in=centre_ids) | Q(created_by=user))
 
         # 🧩 Debug optionnel (protégé même si DEBUG n’existe pas)
         if getattr(settings, "DEBUG", False):
@@ -226,12 +231,7 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
 
         # 🔒 Exclut explicitement les partenaires sans centre,
         # sauf s’ils ont été créés par le staff lui-même
-        return scoped.exclude(
-            Q(default_centre_id__isnull=True)
-            & ~Q(created_by=user)
-            & ~Q(appairages__formation__centre_id__in=centre_ids)
-            & ~Q(prospections__formation__centre_id__in=centre_ids)
-        ).distinct()
+        return scoped.exclude(Q(default_centre_id__isnull=True) & ~Q(created_by=user) & ~linked)
 
 
     def _user_can_access_partenaire(self, partenaire, user) -> bool:
@@ -241,11 +241,11 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
         if not is_staff_or_staffread(user):
             # non-staff : déjà géré par permission/queryset
             return True
-        centre_ids = set(user.centres.values_list("id", flat=True))
+        centre_ids = set(user.get_centre_ids())
         if not centre_ids:
             return partenaire.created_by_id == user.id
         linked = (
-            partenaire.appairages.filter(formation__centre_id__in=centre_ids).exists()
+            partenaire.appairages.filter(centre_id__in=centre_ids).exists()
             or partenaire.prospections.filter(formation__centre_id__in=centre_ids).exists()
             or (partenaire.default_centre_id in centre_ids)
         )
@@ -313,6 +313,14 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
     @extend_schema(summary="🔽 Filtres disponibles pour les partenaires", tags=["Partenaires"])
     @action(detail=False, methods=["get"], url_path="filter-options")
     def filter_options(self, request):
+        return self.cached_options_response(
+            request,
+            "filter-options",
+            lambda: self._build_filter_options(request),
+            depends_on=("Partenaire", "Centre", "CustomUser"),
+        )
+
+    def _build_filter_options(self, request):
         """
         Options de filtre basées sur le queryset **déjà scopé** de l'utilisateur.
         """
@@ -342,7 +350,7 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
               .distinct()
         )
 
-        return Response({
+        return {
             "cities": [{"value": v, "label": v} for v in villes],
             "secteurs": [{"value": s, "label": s} for s in secteurs],
             "users": [
@@ -356,7 +364,7 @@ class PartenaireViewSet(UserVisibilityScopeMixin, viewsets.ModelViewSet):
                 {"id": c["default_centre_id"], "nom": c["default_centre__nom"]}
                 for c in centres
             ],
-        })
+        }
 
     # -------------------- CRUD --------------------
 
@@ -61,7 +61,7 @@ class ObjectifPrepaViewSet(viewsets.ModelViewSet):
             return list(centres.values_list("id", flat=True)) if centres else []
         if is_staff_or_staffread(user):
             try:
-                return list(user.centres.values_list("id", flat=True))
+                return user.get_centre_ids()
             except Exception:
                 return []
         return []
@@ -105,7 +105,7 @@ class ObjectifPrepaViewSet(viewsets.ModelViewSet):
         if centre_id:
             qs = qs.filter(centre_id=centre_id)
         if departement:
-            qs = qs.filter(centre__code_postal__startswith=departement)
+            qs = qs.filter(centre__departement_code=str(departement).strip()[:2])
 
         return qs.order_by("-annee", "centre__nom")
 
@@ -142,8 +142,7 @@ class PrepaViewSet(viewsets.ModelViewSet):
             qs = qs.filter(type_prepa__in=type_prepa_list)
 
         if departement:
-            departement = str(departement).strip()
-            qs = qs.filter(centre__code_postal__startswith=departement)
+            qs = qs.filter(centre__departement_code=str(departement).strip()[:2])
 
         if date_min:
             qs = qs.filter(date_prepa__gte=date_min)
@@ -39,6 +39,8 @@ from openpyxl.drawing.image import Image as XLImage
 from rest_framework.decorators import action
 from drf_spectacular.utils import extend_schema
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import PermissionDenied
 
 from ...models.prospection_comments import ProspectionComment
@@ -46,17 +48,25 @@ from ...models.formations import Formation
 from ...utils.filters import ProspectionFilterSet
 from ...models.partenaires import Partenaire
 from ...models.custom_user import CustomUser
-from ...api.paginations import RapAppPagination
+from ...api.paginations import RapAppPagination, RelanceCursorPagination
 from ...models.prospection import Prospection, ProspectionChoices
 from ..serializers.prospection_serializers import (
+    ChangerStatutLotSerializer,
     ProspectionChoiceListSerializer,
     ProspectionListSerializer,
+    ProspectionListProjection,
     ProspectionSerializer,
     ProspectionDetailSerializer,
+    RelanceProjection,
 )
 from ...models.logs import LogUtilisateur
 from ...models.candidat import Candidat
+from ..mixins import CachedOptionsMixin, ConditionalGetMixin
 from ..permissions import CanAccessProspectionComment, IsOwnerOrStaffOrAbove
+from ..projections import paginate_projection
+from ...services import prospection_transitions as transitions
+from ...services.prospection_transitions import CHAMPS_TRANSITION
+from ...utils.bulk_writer import BulkWriter
 from ...api.roles import (
     is_admin_like,
     is_staff_or_staffread,
@@ -182,7 +192,7 @@ class CandidatReadMinimalSerializer(serializers.ModelSerializer):
     update=extend_schema(summary="✏️ Modifier une prospection", tags=["Prospections"]),
     destroy=extend_schema(summary="🗑️ Annuler une prospection", tags=["Prospections"]),
 )
-class ProspectionViewSet(viewsets.ModelViewSet):
+class ProspectionViewSet(ConditionalGetMixin, CachedOptionsMixin, viewsets.ModelViewSet):
     queryset = Prospection.objects.select_related(
         "partenaire",
         "formation",
@@ -192,6 +202,11 @@ class ProspectionViewSet(viewsets.ModelViewSet):
     )
     permission_classes = [IsOwnerOrStaffOrAbove]  # ✅ protège les opérations objet
     pagination_class = RapAppPagination
+
+    # 🔁 GET conditionnel : partenaire, formation, owner et dernier commentaire visible
+    conditional_depends_on = (
+        "Partenaire", "Formation", "Centre", "Statut", "TypeOffre", "CustomUser", "ProspectionComment",
+    )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = ProspectionFilterSet
     ordering_fields = ["created_at", "date_prospection", "owner__username", "last_comment_at", "comments_count"]
@@ -237,7 +252,7 @@ class ProspectionViewSet(viewsets.ModelViewSet):
         if is_admin_like(user):
             return
         if is_staff_or_staffread(user):
-            allowed = set(user.centres.values_list("id", flat=True))
+            allowed = set(user.get_centre_ids())
             if formation.centre_id not in allowed:
                 raise PermissionDenied("Formation hors de votre périmètre (centres).")
 
@@ -265,16 +280,21 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             # Par défaut : on ne montre que les actives
             qs = qs.filter(activite=Prospection.ACTIVITE_ACTIVE)
 
-        # Debug utile (à garder ou supprimer)
-        ids = list(qs.values_list("id", flat=True))
-        (f"[DEBUG get_queryset] action={getattr(self, 'action', '?')} activite={activite_param} ids={ids}")
-
         return qs
 
 
 
     @action(detail=False, methods=["get"], url_path="filtres")
     def get_filters(self, request):
+        return self.cached_options_response(
+            request,
+            "filtres",
+            lambda: self._build_get_filters(request),
+            depends_on=("Prospection", "Formation", "Partenaire", "Centre", "Statut", "TypeOffre", "CustomUser"),
+            per_user=True,
+        )
+
+    def _build_get_filters(self, request):
         """
         Renvoie des listes d'options pour construire l’UI de filtres,
         basées sur le queryset **déjà scopé** (centres/roles).
@@ -319,34 +339,32 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             .distinct()
         )
 
-        return Response(
-            {
-                "data": {
-                    "formations": formations,
-                    "partenaires": to_choice(partenaires),
-                    "owners": to_choice(owners, label_attr="username"),
-                    "statut": ProspectionChoices.get_statut_choices() if hasattr(ProspectionChoices, "get_statut_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_STATUS_CHOICES", [])],
-                    "objectif": ProspectionChoices.get_objectif_choices() if hasattr(ProspectionChoices, "get_objectif_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_OBJECTIF_CHOICES", [])],
-                    "motif": ProspectionChoices.get_motif_choices() if hasattr(ProspectionChoices, "get_motif_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_MOTIF_CHOICES", [])],
-                    "type_prospection": ProspectionChoices.get_type_choices() if hasattr(ProspectionChoices, "get_type_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "TYPE_PROSPECTION_CHOICES", [])],
-                    "moyen_contact": ProspectionChoices.get_moyen_contact_choices() if hasattr(ProspectionChoices, "get_moyen_contact_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "MOYEN_CONTACT_CHOICES", [])],
-                    "formation_type_offre": [
-                        {"value": row["type_offre_id"], "label": row["type_offre__nom"]}
-                        for row in type_offres
-                    ],
-                    "formation_statut": [
-                        {"value": row["statut_id"], "label": row["statut__nom"]}
-                        for row in statuts
-                    ],
-                    "centres": [
-                        {"value": row["centre_id"], "label": row["centre__nom"]}
-                        for row in centres
-                    ],
-                    "user_role": getattr(request.user, "role", None),
-                }
+        return {
+            "data": {
+                "formations": formations,
+                "partenaires": to_choice(partenaires),
+                "owners": to_choice(owners, label_attr="username"),
+                "statut": ProspectionChoices.get_statut_choices() if hasattr(ProspectionChoices, "get_statut_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_STATUS_CHOICES", [])],
+                "objectif": ProspectionChoices.get_objectif_choices() if hasattr(ProspectionChoices, "get_objectif_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_OBJECTIF_CHOICES", [])],
+                "motif": ProspectionChoices.get_motif_choices() if hasattr(ProspectionChoices, "get_motif_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "PROSPECTION_MOTIF_CHOICES", [])],
+                "type_prospection": ProspectionChoices.get_type_choices() if hasattr(ProspectionChoices, "get_type_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "TYPE_PROSPECTION_CHOICES", [])],
+                "moyen_contact": ProspectionChoices.get_moyen_contact_choices() if hasattr(ProspectionChoices, "get_moyen_contact_choices") else [{"value": k, "label": str(v)} for k, v in getattr(ProspectionChoices, "MOYEN_CONTACT_CHOICES", [])],
+                "formation_type_offre": [
+                    {"value": row["type_offre_id"], "label": row["type_offre__nom"]}
+                    for row in type_offres
+                ],
+                "formation_statut": [
+                    {"value": row["statut_id"], "label": row["statut__nom"]}
+                    for row in statuts
+                ],
+                "centres": [
+                    {"value": row["centre_id"], "label": row["centre__nom"]}
+                    for row in centres
+                ],
+                "user_role": getattr(request.user, "role", None),
             }
-        )
-    
+        }
+
     @action(detail=True, methods=["post"], url_path="archiver")
     @extend_schema(
         summary="🗃 Archiver une prospection",
@@ -461,17 +479,20 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             user,
             f"Création d’une prospection (owner={instance.owner or '—'})"
         )
-    def perform_update(self, serializer):
+    def _resolve_affectation(self, instance, validated_data):
+        """
+        (owner, formation, centre_id) à enregistrer pour une mise à jour,
+        selon les droits de l'utilisateur courant.
+        """
         user = self.request.user
-        instance = serializer.instance
 
         # 🧩 Cas 1 — candidat : restrictions fortes
         if hasattr(user, "is_candidat_or_stagiaire") and user.is_candidat_or_stagiaire():
             # Interdit de changer formation ou owner
-            new_form = serializer.validated_data.get("formation")
+            new_form = validated_data.get("formation")
             if new_form and new_form != instance.formation:
                 raise PermissionDenied("Vous n’avez pas le droit de modifier la formation associée.")
-            if "owner" in serializer.validated_data and serializer.validated_data["owner"] != instance.owner:
+            if "owner" in validated_data and validated_data["owner"] != instance.owner:
                 raise PermissionDenied("Vous n’avez pas le droit de modifier le responsable (owner).")
 
             data_owner = instance.owner
@@ -479,7 +500,7 @@ class ProspectionViewSet(viewsets.ModelViewSet):
 
         # 🧩 Cas 2 — staff/admin
         else:
-            new_owner = serializer.validated_data.get("owner", instance.owner)
+            new_owner = validated_data.get("owner", instance.owner)
             owner_changed = (new_owner is not None and new_owner.pk != instance.owner_id)
 
             # Si on change d’owner → la formation suit celle du candidat (s’il en a une)
@@ -488,10 +509,10 @@ class ProspectionViewSet(viewsets.ModelViewSet):
                 if owner_form:
                     data_formation = owner_form
                 else:
-                    data_formation = serializer.validated_data.get("formation", instance.formation)
+                    data_formation = validated_data.get("formation", instance.formation)
             else:
                 # Si pas de changement d’owner → on peut modifier librement la formation
-                data_formation = serializer.validated_data.get("formation", instance.formation)
+                data_formation = validated_data.get("formation", instance.formation)
 
             # Vérification périmètre formation (staff non admin)
             self._ensure_staff_can_use_formation(user, data_formation)
@@ -499,7 +520,7 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             data_owner = new_owner
 
         # 🔁 recalcul du centre en fonction de la formation ou du partenaire
-        partenaire = serializer.validated_data.get("partenaire", instance.partenaire)
+        partenaire = validated_data.get("partenaire", instance.partenaire)
         if data_formation:
             centre_id = data_formation.centre_id
         elif partenaire:
@@ -507,6 +528,13 @@ class ProspectionViewSet(viewsets.ModelViewSet):
         else:
             centre_id = instance.centre_id
 
+        return data_owner, data_formation, centre_id
+
+    def perform_update(self, serializer):
+        user = self.request.user
+        instance = serializer.instance
+        data_owner, data_formation, centre_id = self._resolve_affectation(instance, serializer.validated_data)
+
         # 💾 Sauvegarde finale
         instance = serializer.save(
             updated_by=user,
@@ -525,17 +553,16 @@ class ProspectionViewSet(viewsets.ModelViewSet):
     # ---------- DRF actions ----------
     def list(self, request, *args, **kwargs):
         qs = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            paginated_response = self.get_paginated_response(serializer.data)
+        # ⚡ projection values() : même sortie que ProspectionListSerializer
+        rows, paginated = paginate_projection(self, qs, ProspectionListProjection)
+        if paginated:
+            paginated_response = self.get_paginated_response(rows)
             paginated_response.data["success"] = True
             paginated_response.data["message"] = "Liste paginée des prospections."
             return paginated_response
 
-        serializer = self.get_serializer(qs, many=True)
         return Response(
-            {"success": True, "message": "Liste des prospections.", "data": serializer.data},
+            {"success": True, "message": "Liste des prospections.", "data": rows},
             status=status.HTTP_200_OK,
         )
 
@@ -602,7 +629,8 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             "Permet de modifier le statut ET tout autre champ éditable de la prospection en une seule requête. "
             "Supporte l’alias `prochain_contact` (équivalent à `relance_prevue`). "
             "Si `relance_prevue` est renseigné et que le statut n’est pas terminal, "
-            "la cohérence statut ↔ relance sera appliquée lors de l’enregistrement."
+            "la cohérence statut ↔ relance est appliquée. Le changement, le commentaire "
+            "et une entrée d’historique consolidée sont écrits dans une seule transaction."
         ),
         tags=["Prospections"],
         request=ProspectionSerializer,
@@ -610,80 +638,36 @@ class ProspectionViewSet(viewsets.ModelViewSet):
     )
     def changer_statut(self, request, pk=None):
         instance = self.get_object()
-
         ancien_statut = instance.statut
 
-        allowed_keys = {
-            "partenaire",
-            "formation",
-            "owner",
-            "date_prospection",
-            "type_prospection",
-            "motif",
-            "statut",
-            "objectif",
-            "commentaire",
-            "relance_prevue",
-            "moyen_contact",
-        }
-
-        incoming = {k: v for k, v in request.data.items() if k in allowed_keys or k == "prochain_contact"}
+        incoming = {k: v for k, v in request.data.items() if k in CHAMPS_TRANSITION or k in ("commentaire", "prochain_contact")}
 
         if "relance_prevue" not in incoming and "prochain_contact" in incoming:
             incoming["relance_prevue"] = incoming.pop("prochain_contact")
-
-        moyen_contact_provided = "moyen_contact" in incoming
-        moyen_contact_value = incoming.pop("moyen_contact", None) if moyen_contact_provided else None
-        commentaire_payload = incoming.get("commentaire") or request.data.get("commentaire") or ""
+        incoming.pop("prochain_contact", None)
 
         serializer = self.get_serializer(instance, data=incoming, partial=True, context={"request": request})
         serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
-        # ⚠️ si la formation change, re-vérifier le périmètre staff
-        new_form = serializer.validated_data.get("formation", instance.formation)
-        self._ensure_staff_can_use_formation(request.user, new_form)
-
-        self.perform_update(serializer)
-
-        if moyen_contact_provided and hasattr(instance, "moyen_contact"):
-            instance.refresh_from_db()
-            if instance.moyen_contact != moyen_contact_value:
-                instance.moyen_contact = moyen_contact_value
-                if hasattr(instance, "updated_by"):
-                    instance.updated_by = request.user
-                    instance.save(update_fields=["moyen_contact", "updated_by"])
-                else:
-                    instance.save(update_fields=["moyen_contact"])
-
-        instance.refresh_from_db()
-        nouveau_statut = instance.statut
-        relance_prevue_finale = getattr(instance, "relance_prevue", None)
-
-        if commentaire_payload:
-            ProspectionComment.objects.create(
-                prospection=instance,
-                body=commentaire_payload,
-                is_internal=False,
-                created_by=request.user,
-            )
+        changes = {k: v for k, v in data.items() if k in CHAMPS_TRANSITION}
+        if {"owner", "formation", "partenaire"} & set(data):
+            changes["owner"], changes["formation"], _ = self._resolve_affectation(instance, data)
+        else:
+            self._ensure_staff_can_use_formation(request.user, instance.formation)
 
-        if hasattr(instance, "creer_historique"):
-            instance.creer_historique(
-                ancien_statut=ancien_statut,
-                nouveau_statut=nouveau_statut,
-                type_prospection=instance.type_prospection,
-                commentaire=commentaire_payload,
-                resultat="Mise à jour via changer-statut",
-                moyen_contact=moyen_contact_value if moyen_contact_provided else None,
-                user=request.user,
-                prochain_contact=relance_prevue_finale,
+        try:
+            transitions.changer_statut(
+                instance, changes, user=request.user, commentaire=data.get("commentaire") or ""
             )
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(getattr(e, "message_dict", None) or e.messages)
 
         LogUtilisateur.log_action(
             instance,
             LogUtilisateur.ACTION_UPDATE,
             request.user,
-            f"Mise à jour via changer-statut : {ancien_statut} → {nouveau_statut}"
+            f"Mise à jour via changer-statut : {ancien_statut} → {instance.statut}"
         )
 
         return Response(
@@ -694,6 +678,102 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=["post"], url_path="changer-statut-lot")
+    @extend_schema(
+        summary="🔄 Changer le statut de plusieurs prospections",
+        description=(
+            "Applique le même statut (et éventuellement relance, moyen de contact, commentaire) "
+            "à une liste de prospections. Tout ou rien : si une prospection est invalide, "
+            "aucune n’est modifiée. Réservé au staff."
+        ),
+        tags=["Prospections"],
+        request=ChangerStatutLotSerializer,
+        responses={200: OpenApiResponse(description="Nombre de prospections mises à jour")},
+    )
+    def changer_statut_lot(self, request):
+        if not (is_admin_like(request.user) or is_staff_or_staffread(request.user)):
+            raise PermissionDenied("Action réservée au staff.")
+
+        serializer = ChangerStatutLotSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        ids = data["ids"]
+        queryset = self._scoped_for_user(Prospection.objects.filter(pk__in=ids), request.user)
+        changes = {k: data[k] for k in ("statut", "relance_prevue", "moyen_contact") if k in data}
+
+        try:
+            prospections = transitions.changer_statut_lot(
+                queryset, changes, user=request.user, commentaire=data.get("commentaire") or ""
+            )
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(getattr(e, "message_dict", None) or e.messages)
+
+        trouves = {p.pk for p in prospections}
+        content_type = ContentType.objects.get_for_model(Prospection)
+        with BulkWriter(LogUtilisateur) as writer:
+            writer.extend(
+                LogUtilisateur(
+                    content_type=content_type,
+                    object_id=p.pk,
+                    action=LogUtilisateur.ACTION_UPDATE,
+                    details=f"Changement de statut en lot : {p.statut}",
+                    created_by=request.user,
+                )
+                for p in prospections
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": f"{len(trouves)} prospection(s) mise(s) à jour.",
+                "data": {
+                    "updated": sorted(trouves),
+                    "not_found": sorted(set(ids) - trouves),
+                },
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="relances")
+    @extend_schema(
+        summary="📅 Relances dues (du jour et en retard)",
+        description=(
+            "Prospections actives non terminées dont la relance est échue, pour l’utilisateur courant "
+            "(ou `owner` pour le staff, dans son périmètre). Pagination par curseur, tri par date de relance."
+        ),
+        parameters=[
+            OpenApiParameter("horizon", int, description="Inclure les relances des N prochains jours (0–30, défaut 0)"),
+            OpenApiParameter("owner", int, description="Responsable (staff / admin uniquement)"),
+        ],
+        tags=["Prospections"],
+    )
+    def relances(self, request):
+        user = request.user
+        try:
+            horizon = min(max(int(request.query_params.get("horizon", 0)), 0), 30)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({"horizon": "Entier attendu."})
+
+        jour = dj_timezone.localdate() + datetime.timedelta(days=horizon)
+        qs = Prospection.custom.relances_dues(jour)
+
+        try:
+            owner_id = int(request.query_params.get("owner") or user.pk)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({"owner": "Identifiant attendu."})
+
+        if owner_id != user.pk:
+            if not (is_admin_like(user) or is_staff_or_staffread(user)):
+                raise PermissionDenied("Vous ne pouvez consulter que vos propres relances.")
+            qs = qs.filter(owner_id=owner_id)
+            if not is_admin_like(user):
+                qs = qs.filter(formation__centre_id__in=staff_centre_ids(user) or [])
+        else:
+            qs = qs.filter(owner=user)
+
+        paginator = RelanceCursorPagination()
+        page = paginator.paginate_queryset(RelanceProjection.queryset(qs), request, view=self)
+        return paginator.get_paginated_response(RelanceProjection.rows(page))
 
     @action(detail=False, methods=["get"], url_path="choices")
     @extend_schema(
@@ -702,6 +782,15 @@ class ProspectionViewSet(viewsets.ModelViewSet):
         responses={200: OpenApiResponse(response=ProspectionChoiceListSerializer)},
     )
     def get_choices(self, request):
+        return self.cached_options_response(
+            request,
+            "choices",
+            lambda: self._build_get_choices(request),
+            depends_on=("Prospection", "Partenaire", "CustomUser"),
+            per_user=True,
+        )
+
+    def _build_get_choices(self, request):
         def fmt(choices):
             return [{"value": k, "label": str(l)} for k, l in choices]
 
@@ -721,28 +810,25 @@ class ProspectionViewSet(viewsets.ModelViewSet):
             for p in Partenaire.objects.filter(id__in=partenaire_ids,).order_by("nom")
         ]
 
-        return Response(
-            {
-                "success": True,
-                "message": "Choix disponibles pour les prospections",
-                "data": {
-                    "statut": fmt(getattr(ProspectionChoices, "PROSPECTION_STATUS_CHOICES", [])),
-                    "objectif": fmt(getattr(ProspectionChoices, "PROSPECTION_OBJECTIF_CHOICES", [])),
-                    "motif": fmt(getattr(ProspectionChoices, "PROSPECTION_MOTIF_CHOICES", [])),
-                    "type_prospection": fmt(getattr(ProspectionChoices, "TYPE_PROSPECTION_CHOICES", [])),
-                    "moyen_contact": fmt(getattr(ProspectionChoices, "MOYEN_CONTACT_CHOICES", [])),
-                    "owners": owners,
-                    "partenaires": partenaires,
-                    "user_role": user_role,
-                    # 🆕 Ajout ici :
-                    "current_user": {
-                        "id": request.user.id,
-                        "username": getattr(request.user, "get_full_name", lambda: None)() or request.user.username,
-                    },
+        return {
+            "success": True,
+            "message": "Choix disponibles pour les prospections",
+            "data": {
+                "statut": fmt(getattr(ProspectionChoices, "PROSPECTION_STATUS_CHOICES", [])),
+                "objectif": fmt(getattr(ProspectionChoices, "PROSPECTION_OBJECTIF_CHOICES", [])),
+                "motif": fmt(getattr(ProspectionChoices, "PROSPECTION_MOTIF_CHOICES", [])),
+                "type_prospection": fmt(getattr(ProspectionChoices, "TYPE_PROSPECTION_CHOICES", [])),
+                "moyen_contact": fmt(getattr(ProspectionChoices, "MOYEN_CONTACT_CHOICES", [])),
+                "owners": owners,
+                "partenaires": partenaires,
+                "user_role": user_role,
+                # 🆕 Ajout ici :
+                "current_user": {
+                    "id": request.user.id,
+                    "username": getattr(request.user, "get_full_name", lambda: None)() or request.user.username,
                 },
-            }
-        )
-
+            },
+        }
 
     @extend_schema(summary="Exporter les prospections au format XLSX")
     @action(detail=False, methods=["get", "post"], url_path="export-xlsx")
@@ -28,6 +28,13 @@ class SmallPagination(PageNumberPagination):
     page_query_param = "page"
 
 
+def paginate_section(request, qs, serializer_class):
+    """Une ressource de la recherche : page courante sérialisée (count, next, results…)."""
+    paginator = SmallPagination()
+    page = paginator.paginate_queryset(qs, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data).data
+
+
 @extend_schema(
     summary="🔍 Recherche globale",
     description="""
@@ -83,18 +90,22 @@ class SearchView(APIView):
         if not query:
             return Response({"error": "Paramètre 'q' requis"}, status=400)
 
+        return Response({
+            key: paginate_section(request, qs, serializer_class)
+            for key, (qs, serializer_class) in self.search_sections(request, query).items()
+        })
+
+    @staticmethod
+    def search_sections(request, query: str) -> dict:
+        """
+        Querysets et serializers de chaque ressource, dans l'ordre de la réponse.
+        Partagé avec la vue async (`api/async_views.py`), qui les évalue en parallèle.
+        """
         # Filtres secondaires sur les formations
         filtre_type = request.query_params.get("type_offre")
         filtre_statut = request.query_params.get("statut")
         filtre_centre = request.query_params.get("centre")
 
-        response = {}
-
-        def paginate_and_serialize(qs, serializer_class):
-            paginator = SmallPagination()
-            page = paginator.paginate_queryset(qs, request)
-            return paginator.get_paginated_response(serializer_class(page, many=True).data).data
-
         # Formations (avec filtres)
         formations = Formation.objects.filter(
             Q(nom__icontains=query) | Q(num_offre__icontains=query)
@@ -106,50 +117,31 @@ class SearchView(APIView):
         if filtre_centre:
             formations = formations.filter(centre_id=filtre_centre)
 
-        response["formations"] = paginate_and_serialize(formations, FormationListSerializer)
-
-        # Commentaires
-        response["commentaires"] = paginate_and_serialize(
-            Commentaire.objects.filter(Q(contenu__icontains=query)),
-            CommentaireSerializer
-        )
-
-        # Centres
-        response["centres"] = paginate_and_serialize(
-            Centre.objects.filter(Q(nom__icontains=query)),
-            CentreSerializer
-        )
-
-        # Utilisateurs
-        response["utilisateurs"] = paginate_and_serialize(
-            CustomUser.objects.filter(
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(username__icontains=query)
+        return {
+            "formations": (formations, FormationListSerializer),
+            # Commentaires
+            "commentaires": (Commentaire.objects.filter(Q(contenu__icontains=query)), CommentaireSerializer),
+            # Centres
+            "centres": (Centre.objects.filter(Q(nom__icontains=query)), CentreSerializer),
+            # Utilisateurs
+            "utilisateurs": (
+                CustomUser.objects.filter(
+                    Q(first_name__icontains=query) |
+                    Q(last_name__icontains=query) |
+                    Q(username__icontains=query)
+                ),
+                UserSerializer,
             ),
-            UserSerializer
-        )
-
-        # Types d’offre : nom technique ou "autre"
-        response["types_offre"] = paginate_and_serialize(
-            TypeOffre.objects.filter(
-                Q(nom__icontains=query) | Q(autre__icontains=query)
+            # Types d’offre : nom technique ou "autre"
+            "types_offre": (
+                TypeOffre.objects.filter(Q(nom__icontains=query) | Q(autre__icontains=query)),
+                TypeOffreSerializer,
             ),
-            TypeOffreSerializer
-        )
-
-        # Statuts : clé ou description_autre
-        response["statuts"] = paginate_and_serialize(
-            Statut.objects.filter(
-                Q(nom__icontains=query) | Q(description_autre__icontains=query)
+            # Statuts : clé ou description_autre
+            "statuts": (
+                Statut.objects.filter(Q(nom__icontains=query) | Q(description_autre__icontains=query)),
+                StatutSerializer,
             ),
-            StatutSerializer
-        )
-
-        # Partenaires
-        response["partenaires"] = paginate_and_serialize(
-            Partenaire.objects.filter(Q(nom__icontains=query)),
-            PartenaireSerializer
-        )
-
-        return Response(response)
+            # Partenaires
+            "partenaires": (Partenaire.objects.filter(Q(nom__icontains=query)), PartenaireSerializer),
+        }
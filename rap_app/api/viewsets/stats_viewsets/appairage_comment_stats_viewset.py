@@ -4,8 +4,8 @@ from rap_app.api.serializers.base_serializers import EmptySerializer
 
 from typing import Literal, Optional
 
-from django.db.models import Count, Q, Value
-from django.db.models.functions import Coalesce, Substr
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.dateparse import parse_date
 from django.utils import timezone
 
@@ -17,6 +17,7 @@ from rest_framework.response import Response
 from ...permissions import IsStaffOrAbove, is_staff_or_staffread
 
 from ....models.commentaires_appairage import CommentaireAppairage
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 
 try:
@@ -41,9 +42,54 @@ GroupKey = Literal[
 ]
 
 
+def _formation_label(row) -> str:
+    return (
+        f"{row.get('appairage__formation__nom') or '—'} "
+        f"(#{row.get('appairage__formation__num_offre') or '?'}, "
+        f"{row.get('appairage__formation__type_offre__nom') or '?'})"
+    )
+
+
+# Métriques et dimensions déclarées une fois (list / grouped)
+APPAIRAGE_COMMENT_STATS = StatsQuery(
+    metrics={
+        "total": Metric("id"),
+        "distinct_appairages": Metric("appairage", distinct=True),
+        "distinct_auteurs": Metric("created_by", distinct=True),
+    },
+    dimensions={
+        "centre": Dimension(
+            "appairage__formation__centre_id", columns=("appairage__formation__centre__nom",),
+            label="appairage__formation__centre__nom",
+        ),
+        "departement": Dimension(
+            "departement",
+            expression=Coalesce(NullIf(F("appairage__centre__departement_code"), Value("")), Value("NA")),
+        ),
+        "formation": Dimension(
+            "appairage__formation_id",
+            columns=(
+                "appairage__formation__nom",
+                "appairage__formation__type_offre__nom",
+                "appairage__formation__num_offre",
+            ),
+            label=_formation_label,
+        ),
+        "partenaire": Dimension(
+            "appairage__partenaire_id", columns=("appairage__partenaire__nom",),
+            label="appairage__partenaire__nom",
+        ),
+        "statut_snapshot": Dimension("statut_snapshot"),
+        "appairage": Dimension("appairage_id", label=lambda row: f"Appairage #{row['appairage_id']}"),
+        # Répartition par auteur (list)
+        "auteur": Dimension("created_by"),
+    },
+)
+
+
 class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     serializer_class = EmptySerializer
-    """KPIs & agrégats sur **Commentaires d’appairage**."""
+    """KPIs & agrégats sur **Commentaires d’appairage** (une requête par endpoint)."""
 
     permission_classes = [IsStaffOrAbove]
 
@@ -59,7 +105,7 @@ class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewS
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
 
@@ -97,13 +143,10 @@ class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewS
                 return qs.none()
             q = Q()
             if centre_ids:
-                q |= Q(appairage__formation__centre_id__in=centre_ids)
+                q |= Q(appairage__centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(appairage__formation__centre__code_postal__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(appairage__centre__departement_code__in=dep_codes)
+            return qs.filter(q)
         return qs
 
     # ───────────────────────────────
@@ -132,9 +175,9 @@ class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewS
             qs = qs.filter(created_at__date__lte=dto)
 
         if p.get("centre"):
-            qs = qs.filter(appairage__formation__centre_id=p["centre"])
+            qs = qs.filter(appairage__centre_id=p["centre"])
         if p.get("departement"):
-            qs = qs.filter(appairage__formation__centre__code_postal__startswith=str(p["departement"])[:2])
+            qs = qs.filter(appairage__centre__departement_code=str(p["departement"])[:2])
         if p.get("formation"):
             qs = qs.filter(appairage__formation_id=p["formation"])
         if p.get("partenaire"):
@@ -149,14 +192,17 @@ class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewS
     def list(self, request, *args, **kwargs):
         qs = self._apply_common_filters(self.get_queryset())
 
-        agg = qs.aggregate(
-            total=Count("id"),
-            distinct_appairages=Count("appairage", distinct=True),
-            distinct_auteurs=Count("created_by", distinct=True),
-        )
+        stats = APPAIRAGE_COMMENT_STATS.run(qs, ["statut_snapshot", "auteur"])  # KPIs + répartitions : 1 requête
+        agg = stats.totals
 
-        by_statut = list(qs.values("statut_snapshot").annotate(count=Count("id")).order_by("statut_snapshot"))
-        by_auteur = list(qs.values("created_by").annotate(count=Count("id")).order_by("-count"))
+        by_statut = [
+            {"statut_snapshot": r["statut_snapshot"], "count": r["total"]}
+            for r in stats.groups["statut_snapshot"]
+        ]
+        by_auteur = [
+            {"created_by": r["created_by"], "count": r["total"]}
+            for r in sorted(stats.groups["auteur"], key=lambda r: -r["total"])
+        ]
 
         payload = {
             "kpis": {k: int(v or 0) for k, v in agg.items()},
@@ -221,52 +267,5 @@ class AppairageCommentaireStatsViewSet(RestrictToUserOwnedQueryset, GenericViewS
             return Response({"detail": "Paramètre 'by' invalide."}, status=400)
 
         qs = self._apply_common_filters(self.get_queryset())
-        qs = qs.annotate(
-            departement=Coalesce(Substr("appairage__formation__centre__code_postal", 1, 2), Value("NA"))
-        )
-
-        group_fields_map = {
-            "centre": ["appairage__formation__centre_id", "appairage__formation__centre__nom"],
-            "departement": ["departement"],
-            "formation": ["appairage__formation_id", "appairage__formation__nom", 
-            "appairage__formation__type_offre__nom", "appairage__formation__num_offre"
-            ],
-            
-            "partenaire": ["appairage__partenaire_id", "appairage__partenaire__nom"],
-            "statut_snapshot": ["statut_snapshot"],
-            "appairage": ["appairage_id"],
-        }
-
-        rows = list(
-            qs.values(*group_fields_map[by]).annotate(
-                total=Count("id"),
-                distinct_appairages=Count("appairage", distinct=True),
-                distinct_auteurs=Count("created_by", distinct=True),
-            ).order_by(*group_fields_map[by])
-        )
-
-        for r in rows:
-            if by == "centre":
-                r["group_key"] = r.get("appairage__formation__centre_id")
-                r["group_label"] = r.get("appairage__formation__centre__nom") or "—"
-            elif by == "departement":
-                r["group_key"] = r.get("departement")
-                r["group_label"] = r.get("departement") or "—"
-            elif by == "formation":
-                r["group_key"] = r.get("appairage__formation_id")
-                r["group_label"] = r.get("appairage__formation__nom") or "—"
-                r["group_label"] = (
-                    f"{r.get('appairage__formation__nom') or '—'} "
-                    f"(#{r.get('appairage__formation__num_offre') or '?'}, "
-                    f"{r.get('appairage__formation__type_offre__nom') or '?'})"
-                )
-            elif by == "partenaire":
-                r["group_key"] = r.get("appairage__partenaire_id")
-                r["group_label"] = r.get("appairage__partenaire__nom") or "—"
-            elif by == "statut_snapshot":
-                r["group_key"] = r.get("statut_snapshot")
-                r["group_label"] = r.get("statut_snapshot") or "—"
-            elif by == "appairage":
-                r["group_key"] = r.get("appairage_id")
-                r["group_label"] = f"Appairage #{r.get('appairage_id')}"
-        return Response({"group_by": by, "results": rows})
\ No newline at end of file
+        rows = APPAIRAGE_COMMENT_STATS.run(qs, [by]).groups[by]
+        return Response({"group_by": by, "results": rows})
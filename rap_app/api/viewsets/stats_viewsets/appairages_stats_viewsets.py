@@ -5,8 +5,8 @@ from typing import Dict, Optional, List, Literal
 import logging
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from django.db.models import Count, Q, QuerySet, Value
-from django.db.models.functions import Substr, Coalesce
+from django.db.models import F, Q, QuerySet, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.dateparse import parse_date
 
 from rest_framework.permissions import IsAuthenticated
@@ -16,6 +16,7 @@ from rest_framework.response import Response
 
 from ....models.appairage import Appairage, AppairageActivite, AppairageStatut
 from ...permissions import IsStaffOrAbove, is_staff_or_staffread
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,41 @@ def _to_int_or_none(val) -> Optional[int]:
         return None
 
 
+# Métriques et dimensions déclarées une fois (list / grouped / tops)
+APPAIRAGE_STATS = StatsQuery(
+    metrics={
+        "appairages_total": Metric("id", distinct=True),
+        "nb_candidats": Metric("candidat", distinct=True),
+        "nb_partenaires": Metric("partenaire", distinct=True),
+        "nb_formations": Metric("formation", distinct=True),
+        **{
+            _safe_status_key(code): Metric("id", filter=Q(statut=code), distinct=True)
+            for code, _ in AppairageStatut.choices
+        },
+    },
+    dimensions={
+        "centre": Dimension(
+            "formation__centre_id", columns=("formation__centre__nom",),
+            label="formation__centre__nom", fallback="Centre #{}",
+        ),
+        # Code département (indexé) du partenaire
+        "departement": Dimension(
+            "departement",
+            expression=Coalesce(NullIf(F("partenaire__departement_code"), Value("")), Value("—")),
+        ),
+        "statut": Dimension("statut", label=dict(AppairageStatut.choices)),
+        "formation": Dimension(
+            "formation_id", columns=("formation__nom", "formation__centre__nom"),
+            label="formation__nom", fallback="Formation #{}",
+        ),
+        "partenaire": Dimension(
+            "partenaire_id", columns=("partenaire__nom",),
+            label="partenaire__nom", fallback="Partenaire #{}",
+        ),
+    },
+)
+
+
 class AppairageStatsViewSet(GenericViewSet):
     serializer_class = EmptySerializer
     """
@@ -42,6 +78,8 @@ class AppairageStatsViewSet(GenericViewSet):
     GET /appairage-stats/                  → KPIs globaux (résumé)
     GET /appairage-stats/grouped/?by=...   → groupés par centre|departement|statut|formation|partenaire
     GET /appairage-stats/tops/             → tops partenaires / formations
+
+    Chaque endpoint = une seule requête (`APPAIRAGE_STATS`, GROUPING SETS).
     """
     permission_classes = [IsStaffOrAbove]
 
@@ -59,7 +97,7 @@ class AppairageStatsViewSet(GenericViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
 
@@ -105,17 +143,13 @@ class AppairageStatsViewSet(GenericViewSet):
             if not centre_ids and not dep_codes:
                 return qs.none()
 
+            # Colonnes dénormalisées et indexées : IN simples, aucune jointure démultipliante
             q = Q()
             if centre_ids:
-                q |= Q(formation__centre_id__in=centre_ids)
+                q |= Q(centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(
-                        formation__centre__code_postal__startswith=code
-                    ) | Q(partenaire__zip_code__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(centre__departement_code__in=dep_codes) | Q(partenaire__departement_code__in=dep_codes)
+            return qs.filter(q)
 
         return qs.none()
 
@@ -147,15 +181,15 @@ class AppairageStatsViewSet(GenericViewSet):
         if dto:
             qs = qs.filter(date_appairage__date__lte=dto)
 
-        # Centre (via formation.centre)
+        # Centre (dénormalisé depuis formation.centre)
         centre = _to_int_or_none(p.get("centre"))
         if centre is not None:
-            qs = qs.filter(formation__centre_id=centre)
+            qs = qs.filter(centre_id=centre)
 
-        # Département (via partenaire.zip_code -> 2 premiers chiffres)
+        # Département (code indexé du partenaire)
         departement = p.get("departement")
         if departement:
-            qs = qs.filter(partenaire__zip_code__startswith=str(departement)[:2])
+            qs = qs.filter(partenaire__departement_code=str(departement)[:2])
 
         # Formation / Partenaire
         formation = _to_int_or_none(p.get("formation"))
@@ -205,27 +239,18 @@ class AppairageStatsViewSet(GenericViewSet):
     def list(self, request, *args, **kwargs):
         qs = self._apply_common_filters(self.get_queryset())
 
-        # KPIs distincts (1 requête)
-        agg = qs.aggregate(
-            appairages_total=Count("id", distinct=True),
-            nb_candidats_distincts=Count("candidat", distinct=True),
-            nb_partenaires_distincts=Count("partenaire", distinct=True),
-            nb_formations_distinctes=Count("formation", distinct=True),
-        )
-
-        # Comptes par statut (sécurisé avec distinct)
-        raw_counts = dict(
-            qs.values("statut").annotate(c=Count("id", distinct=True)).values_list("statut", "c")
-        )
+        # KPIs + comptes par statut : une seule requête
+        stats = APPAIRAGE_STATS.run(qs, ["statut"])
+        totals = stats.totals
+        raw_counts = {r["statut"]: r["appairages_total"] for r in stats.groups["statut"]}
         status_map: Dict[str, int] = {
             _safe_status_key(code): int(raw_counts.get(code, 0))
             for code, _ in AppairageStatut.choices
         }
 
         # Taux de transformation = appairage_ok / total
-        total = int(agg.get("appairages_total") or 0)
-        ok = int(status_map.get("appairage_ok") or 0)
-        taux_transformation = self._pct(ok, total)
+        total = totals["appairages_total"]
+        taux_transformation = self._pct(status_map.get("appairage_ok"), total)
 
         # Répartition par statut (tableau code/label/count)
         statut_labels = dict(AppairageStatut.choices)
@@ -234,8 +259,14 @@ class AppairageStatsViewSet(GenericViewSet):
             for code, _ in AppairageStatut.choices
         ]
 
+        kpis = {
+            "appairages_total": total,
+            "nb_candidats_distincts": totals["nb_candidats"],
+            "nb_partenaires_distincts": totals["nb_partenaires"],
+            "nb_formations_distinctes": totals["nb_formations"],
+        }
         payload = {
-            "kpis": {**{k: int(v or 0) for k, v in agg.items()}, "statuts": status_map, "taux_transformation": taux_transformation},
+            "kpis": {**kpis, "statuts": status_map, "taux_transformation": taux_transformation},
             "repartition": {"par_statut": by_statut},
             "filters_echo": {k: v for k, v in request.query_params.items()},
         }
@@ -257,74 +288,19 @@ class AppairageStatsViewSet(GenericViewSet):
     @action(detail=False, methods=["GET"], url_path="grouped")
     def grouped(self, request):
         by: GroupKey = (request.query_params.get("by") or "centre").lower()  # défaut utile
-        allowed = {"centre", "departement", "statut", "formation", "partenaire"}
+        allowed = set(APPAIRAGE_STATS.dimensions)
         if by not in allowed:
             return Response({"detail": f"'by' doit être dans {sorted(allowed)}"}, status=400)
 
         qs = self._apply_common_filters(self.get_queryset())
+        results = APPAIRAGE_STATS.run(qs, [by]).groups[by]
 
-        # pré-annotation departement (2 premiers chiffres du CP partenaire)
-        qs = qs.annotate(departement=Coalesce(Substr("partenaire__zip_code", 1, 2), Value("—")))
-
-        # Champs de groupage
-        group_fields_map = {
-            "centre": ["formation__centre_id", "formation__centre__nom"],
-            "departement": ["departement"],
-            "statut": ["statut"],
-            "formation": ["formation_id", "formation__nom", "formation__centre__nom"],
-            "partenaire": ["partenaire_id", "partenaire__nom"],
-        }
-        group_fields = group_fields_map[by]
-
-        # Annotations par statut (sécurisé avec distinct)
-        status_annots = {
-            _safe_status_key(code): Count("id", filter=Q(statut=code), distinct=True)
-            for code, _ in AppairageStatut.choices
-        }
-
-        rows = list(
-            qs.values(*group_fields).annotate(
-                appairages_total=Count("id", distinct=True),
-                nb_candidats=Count("candidat", distinct=True),
-                nb_partenaires=Count("partenaire", distinct=True),
-                nb_formations=Count("formation", distinct=True),
-                **status_annots,
-            ).order_by(*group_fields)
-        )
-
-        # Post-traitement : group_key / group_label + taux_transformation
-        results = []
-        for r in rows:
-            out = dict(r)
-
-            if by == "centre":
-                out["group_key"] = r.get("formation__centre_id")
-                out["group_label"] = r.get("formation__centre__nom") or (
-                    f"Centre #{r.get('formation__centre_id')}" if r.get("formation__centre_id") is not None else "—"
-                )
+        for out in results:
+            if by == "statut":
+                out["group_key"] = _safe_status_key(out["statut"] or "")
             elif by == "departement":
-                out["group_key"] = r.get("departement") or "—"
-                out["group_label"] = out["group_key"]
-            elif by == "statut":
-                raw = r.get("statut") or ""
-                out["group_key"] = _safe_status_key(raw)
-                out["group_label"] = dict(AppairageStatut.choices).get(raw, raw) or "—"
-            elif by == "formation":
-                out["group_key"] = r.get("formation_id")
-                out["group_label"] = r.get("formation__nom") or (
-                    f"Formation #{r.get('formation_id')}" if r.get("formation_id") is not None else "—"
-                )
-            elif by == "partenaire":
-                out["group_key"] = r.get("partenaire_id")
-                out["group_label"] = r.get("partenaire__nom") or (
-                    f"Partenaire #{r.get('partenaire_id')}" if r.get("partenaire_id") is not None else "—"
-                )
-
-            total = int(out.get("appairages_total") or 0)
-            ok = int(out.get("appairage_ok") or 0)  # ← annotation safe ci-dessus
-            out["taux_transformation"] = self._pct(ok, total)
-
-            results.append(out)
+                out["group_key"] = out["departement"] or "—"
+            out["taux_transformation"] = self._pct(out.get("appairage_ok"), out["appairages_total"])
 
         return Response({
             "group_by": by,
@@ -348,25 +324,16 @@ class AppairageStatsViewSet(GenericViewSet):
     @action(detail=False, methods=["GET"], url_path="tops")
     def tops(self, request):
         qs = self._apply_common_filters(self.get_queryset())
+        stats = APPAIRAGE_STATS.run(qs, ["partenaire", "formation"])  # les deux tops : 1 requête
 
-        def _top(qs: QuerySet, id_field: str, label_field: str, label_fallback_prefix: str):
-            rows = list(
-                qs.values(id_field, label_field)
-                .annotate(cnt=Count("id", distinct=True))
-                .order_by("-cnt")[:10]
-            )
-            out = []
-            for r in rows:
-                _id = r.get(id_field)
-                _nom = r.get(label_field) or f"{label_fallback_prefix} #{_id}"
-                out.append({"id": _id, "nom": _nom, "count": r["cnt"]})
-            return out
-
-        top_partenaires = _top(qs, "partenaire_id", "partenaire__nom", "Partenaire")
-        top_formations = _top(qs, "formation_id", "formation__nom", "Formation")
+        def _top(dimension: str):
+            return [
+                {"id": r["group_key"], "nom": r["group_label"], "count": r["appairages_total"]}
+                for r in stats.top(dimension, "appairages_total")
+            ]
 
         return Response({
-            "top_partenaires": top_partenaires,
-            "top_formations": top_formations,
+            "top_partenaires": _top("partenaire"),
+            "top_formations": _top("formation"),
             "filters_echo": {k: v for k, v in request.query_params.items()},
-        })
\ No newline at end of file
+        })
@@ -1,18 +1,18 @@
 from __future__ import annotations
 
 from ...serializers.base_serializers import EmptySerializer
-from datetime import datetime
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Optional
 
-from django.db.models import Count, Q, Sum, Case, When, IntegerField, Value
-from django.db.models.functions import Substr, Coalesce
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.dateparse import parse_date
 from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from ...permissions import IsStaffOrAbove, is_staff_or_staffread
-from ....models.atelier_tre import AtelierTRE, AtelierTREPresence, PresenceStatut
+from ....models.atelier_tre import AtelierTRE, PresenceStatut
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 
 def _parse_date(value: str | None):
@@ -31,12 +31,44 @@ def _to_int_or_none(v) -> Optional[int]:
         return None
 
 
+# Statut de présence → clé des lignes `grouped`
+PRESENCE_METRICS = {
+    PresenceStatut.INCONNU: "inconnu",
+    PresenceStatut.PRESENT: "present",
+    PresenceStatut.ABSENT: "absent",
+    PresenceStatut.EXCUSE: "excuse",
+}
+
+# Présences et inscrits comptés en DISTINCT : les deux jointures (candidats M2M,
+# présences) se multiplient entre elles dans la sous-requête.
+ATELIER_TRE_STATS = StatsQuery(
+    metrics={
+        "nb_ateliers": Metric("id", distinct=True),
+        "candidats_uniques": Metric("candidats", distinct=True),
+        "presences_total": Metric("presences__id", distinct=True),
+        **{
+            code: Metric("presences__id", distinct=True, filter=Q(presences__statut=code))
+            for code in PRESENCE_METRICS
+        },
+    },
+    dimensions={
+        "centre": Dimension("centre_id", columns=("centre__nom",), label="centre__nom", fallback="Centre #{}"),
+        "departement": Dimension(
+            "departement", expression=Coalesce(NullIf(F("centre__departement_code"), Value("")), Value("NA")),
+        ),
+        "type_atelier": Dimension("type_atelier", label=dict(AtelierTRE.TypeAtelier.choices)),
+    },
+)
+
+
 class AtelierTREStatsViewSet(viewsets.ViewSet):
     serializer_class = EmptySerializer
     """
     /api/ateliertre-stats/           -> overview
     /api/ateliertre-stats/grouped/   -> groupé par centre|departement|type_atelier
     /api/ateliertre-stats/tops/      -> tops (types & centres)
+
+    Chaque endpoint = une seule requête (`ATELIER_TRE_STATS`).
     """
     permission_classes = [IsStaffOrAbove]
 
@@ -53,7 +85,7 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> List[str]:
@@ -94,11 +126,8 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
             if centre_ids:
                 q |= Q(centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(centre__code_postal__startswith=str(code)[:2])
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(centre__departement_code__in=[str(code)[:2] for code in dep_codes])
+            return qs.filter(q)
         return qs.none()
 
     def get_base_queryset(self):
@@ -124,36 +153,21 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
         if centre_id is not None:
             qs = qs.filter(centre_id=centre_id)
         if departement:
-            qs = qs.filter(centre__code_postal__startswith=departement)
+            qs = qs.filter(centre__departement_code=departement)
         if type_atelier:
             qs = qs.filter(type_atelier=type_atelier)
         return qs
 
-    def _presence_counts_for_qs(self, qs):
-        pres_qs = AtelierTREPresence.objects.filter(atelier__in=qs)
-        total = pres_qs.count()
-        by_status = dict(pres_qs.values_list("statut").annotate(c=Count("id", distinct=True)))
-        norm = {
-            PresenceStatut.INCONNU: by_status.get(PresenceStatut.INCONNU, 0),
-            PresenceStatut.PRESENT: by_status.get(PresenceStatut.PRESENT, 0),
-            PresenceStatut.ABSENT: by_status.get(PresenceStatut.ABSENT, 0),
-            PresenceStatut.EXCUSE: by_status.get(PresenceStatut.EXCUSE, 0),
-        }
-        return total, norm
-
     # ─────────────────────────────────────────────────────────────
     # Overview (list)
     # ─────────────────────────────────────────────────────────────
     def list(self, request, *args, **kwargs):
         qs = self._apply_filters(self.get_base_queryset(), request)
-        nb_ateliers = qs.count()
-
-        from rap_app.models.candidat import Candidat
-        nb_candidats_uniques = Candidat.objects.filter(ateliers_tre__in=qs).distinct().count()
+        stats = ATELIER_TRE_STATS.run(qs, ["type_atelier"])  # KPIs + types + présences : 1 requête
+        totals = stats.totals
 
-        inscrits_total = qs.aggregate(total=Count("candidats", distinct=True))["total"] or 0
-        type_map = dict(qs.values_list("type_atelier").annotate(c=Count("id", distinct=True)))
-        pres_total, pres_map = self._presence_counts_for_qs(qs)
+        type_map = {r["type_atelier"]: r["nb_ateliers"] for r in stats.groups["type_atelier"]}
+        pres_map = {code: totals[code] for code in PRESENCE_METRICS}
 
         # 🔢 Ajout du taux de présence global
         denom = (
@@ -167,11 +181,11 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
 
         data = {
             "kpis": {
-                "nb_ateliers": nb_ateliers,
-                "nb_candidats_uniques": nb_candidats_uniques,
-                "inscrits_total": inscrits_total,
+                "nb_ateliers": totals["nb_ateliers"],
+                "nb_candidats_uniques": totals["candidats_uniques"],
+                "inscrits_total": totals["candidats_uniques"],
                 "ateliers": type_map,
-                "presences_total": pres_total,
+                "presences_total": totals["presences_total"],
                 "presences": pres_map,
                 "taux_presence": taux_presence,  # ✅ ajouté
             },
@@ -189,56 +203,17 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
             return Response({"detail": "Paramètre 'by' invalide."}, status=400)
 
         qs = self._apply_filters(self.get_base_queryset(), request)
-
-        if by == "centre":
-            group_fields: Tuple[str, ...] = ("centre_id", "centre__nom")
-        elif by == "departement":
-            qs = qs.annotate(departement=Coalesce(Substr("centre__code_postal", 1, 2), Value("NA")))
-            group_fields = ("departement",)
-        else:
-            group_fields = ("type_atelier",)
-
-        present = Sum(Case(When(presences__statut=PresenceStatut.PRESENT, then=1), default=0, output_field=IntegerField()))
-        absent = Sum(Case(When(presences__statut=PresenceStatut.ABSENT, then=1), default=0, output_field=IntegerField()))
-        excuse = Sum(Case(When(presences__statut=PresenceStatut.EXCUSE, then=1), default=0, output_field=IntegerField()))
-        inconnu = Sum(Case(When(presences__statut=PresenceStatut.INCONNU, then=1), default=0, output_field=IntegerField()))
-
-        base = (
-            qs.values(*group_fields)
-              .annotate(
-                  nb_ateliers=Count("id", distinct=True),
-                  candidats_uniques=Count("candidats", distinct=True),
-                  presences_total=Count("presences", distinct=True),
-                  present=present,
-                  absent=absent,
-                  excuse=excuse,
-                  inconnu=inconnu,
-              )
-              .order_by(*group_fields)
-        )
+        rows = ATELIER_TRE_STATS.run(qs, [by]).groups[by]
 
         results: List[Dict[str, Any]] = []
-        for row in base:
-            if by == "centre":
-                group_key = row.get("centre_id")
-                group_label = row.get("centre__nom") or (f"Centre #{group_key}" if group_key else "—")
-            elif by == "departement":
-                group_key = row.get("departement")
-                group_label = group_key or "—"
-            else:
-                group_key = row.get("type_atelier")
-                group_label = dict(AtelierTRE.TypeAtelier.choices).get(group_key, group_key or "—")
+        for row in rows:
+            for code, key in PRESENCE_METRICS.items():
+                row[key] = row.pop(code)
 
             # 🔢 Ajout du taux de présence par groupe
-            denom = (row["present"] or 0) + (row["absent"] or 0) + (row["excuse"] or 0)
-            taux_presence = round((row["present"] / denom * 100.0), 1) if denom > 0 else None
-
-            results.append({
-                "group_key": group_key,
-                "group_label": group_label,
-                **row,
-                "taux_presence": taux_presence,  # ✅ ajouté
-            })
+            denom = row["present"] + row["absent"] + row["excuse"]
+            row["taux_presence"] = round((row["present"] / denom * 100.0), 1) if denom > 0 else None  # ✅ ajouté
+            results.append(row)
 
         return Response({
             "by": by,
@@ -252,21 +227,15 @@ class AtelierTREStatsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["GET"], url_path="tops")
     def tops(self, request, *args, **kwargs):
         qs = self._apply_filters(self.get_base_queryset(), request)
+        stats = ATELIER_TRE_STATS.run(qs, ["type_atelier", "centre"], only=["nb_ateliers"])  # 1 requête
 
-        top_types_qs = qs.values("type_atelier").annotate(count=Count("id", distinct=True)).order_by("-count")[:10]
         top_types = [
-            {
-                "type_atelier": r["type_atelier"],
-                "label": dict(AtelierTRE.TypeAtelier.choices).get(r["type_atelier"], r["type_atelier"]),
-                "count": r["count"],
-            }
-            for r in top_types_qs
+            {"type_atelier": r["type_atelier"], "label": r["group_label"], "count": r["nb_ateliers"]}
+            for r in stats.top("type_atelier", "nb_ateliers")
         ]
-
-        top_centres_qs = qs.values("centre_id", "centre__nom").annotate(count=Count("id", distinct=True)).order_by("-count")[:10]
         top_centres = [
-            {"id": r["centre_id"], "nom": r["centre__nom"] or f"Centre #{r['centre_id']}", "count": r["count"]}
-            for r in top_centres_qs
+            {"id": r["centre_id"], "nom": r["centre__nom"] or f"Centre #{r['centre_id']}", "count": r["nb_ateliers"]}
+            for r in stats.top("centre", "nb_ateliers")
         ]
 
         return Response({
@@ -9,8 +9,8 @@ import logging
 from typing import Iterable, Literal, Optional
 
 from django.db import models
-from django.db.models import Count, Q, Value
-from django.db.models.functions import Coalesce, Substr
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.dateparse import parse_date
 
 from rest_framework.viewsets import GenericViewSet
@@ -36,6 +36,8 @@ except Exception:  # pragma: no cover
 
 # ⚠️ adaptez l'import à votre arborescence
 from ....models.candidat import Candidat
+from ....utils import refdata
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 
 GroupKey = Literal[
@@ -63,6 +65,122 @@ def _poei_poec_values() -> list[str]:
     ]
 
 
+def _formation_label(row) -> str:
+    nom, num = row.get("formation__nom"), row.get("formation__num_offre")
+    if nom and num:
+        return f"{nom} ({num})"
+    return nom or (f"Formation #{row['formation_id']}" if row.get("formation_id") is not None else "—")
+
+
+def _responsable_label(row) -> str:
+    gid = row.get("responsable_placement_id")
+    if gid is None:
+        return "—"
+    full = (
+        f"{(row.get('responsable_placement__first_name') or '').strip()} "
+        f"{(row.get('responsable_placement__last_name') or '').strip()}"
+    ).strip()
+    return (
+        full
+        or row.get("responsable_placement__email")
+        or row.get("responsable_placement__username")
+        or f"User #{gid}"
+    )
+
+
+def _compte(q: Optional[Q] = None) -> Metric:
+    return Metric("id", filter=q, distinct=True)
+
+
+def _appairages(statut: Optional[str] = None) -> Metric:
+    return Metric("appairages__id", filter=Q(appairages__statut=statut) if statut else None, distinct=True)
+
+
+# Métriques et dimensions déclarées une fois (list / grouped). Jointures
+# appairages + ateliers TRE : tous les compteurs sont distincts.
+CANDIDAT_STATS = StatsQuery(
+    metrics={
+        "total": _compte(),
+        "entretien_ok": _compte(Q(entretien_done=True)),
+        "test_ok": _compte(Q(test_is_ok=True)),
+        "gespers": _compte(Q(inscrit_gespers=True)),
+        "admissibles": _compte(Q(admissible=True)),
+        "en_formation": _compte(Q(statut=Candidat.StatutCandidat.EN_FORMATION)),
+        "en_appairage": _compte(Q(statut=Candidat.StatutCandidat.EN_APPAIRAGE)),
+        "en_accompagnement": _compte(Q(statut=Candidat.StatutCandidat.EN_ACCOMPAGNEMENT)),
+
+        # ⭐️ nouveaux compteurs
+        "rqth_count": _compte(Q(rqth=True)),
+        "osia_count": _compte(Q(numero_osia__isnull=False) & ~Q(numero_osia="")),
+        "cv_renseigne": _compte(Q(cv_statut__isnull=False) & ~Q(cv_statut="")),
+        "courrier_rentree_count": _compte(Q(courrier_rentree=True)),
+
+        # 🆕 Ateliers TRE — nombre d'ateliers distincts impliquant ≥1 candidat du groupe
+        "ateliers_tre_total": Metric("ateliers_tre", distinct=True),
+
+        # contrats (POEI/POEC fusionnés)
+        "contrat_apprentissage": _compte(Q(type_contrat=Candidat.TypeContrat.APPRENTISSAGE)),
+        "contrat_professionnalisation": _compte(Q(type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION)),
+        "contrat_poei_poec": _compte(Q(type_contrat__in=_poei_poec_values())),
+        "contrat_sans": _compte(Q(type_contrat=Candidat.TypeContrat.SANS_CONTRAT)),
+        "contrat_crif": _compte(Q(type_contrat=Candidat.TypeContrat.CRIF)),
+        "contrat_autre": _compte(Q(type_contrat=Candidat.TypeContrat.AUTRE)),
+
+        # appairages (relation inverse)
+        "appairages_total": _appairages(),
+        "app_transmis": _appairages("transmis"),
+        "app_en_attente": _appairages("en_attente"),
+        "app_accepte": _appairages("accepte"),
+        "app_refuse": _appairages("refuse"),
+        "app_annule": _appairages("annule"),
+        "app_a_faire": _appairages("a_faire"),
+        "app_contrat_a_signer": _appairages("contrat a signer"),
+        "app_contrat_en_attente": _appairages("contrat en attente"),
+        "app_appairage_ok": _appairages("appairage ok"),
+    },
+    dimensions={
+        "centre": Dimension(
+            "formation__centre_id", columns=("formation__centre__nom",),
+            label="formation__centre__nom", fallback="Centre #{}",
+        ),
+        "departement": Dimension(
+            "departement",
+            expression=Coalesce(NullIf(F("formation__centre__departement_code"), Value("")), Value("NA")),
+        ),
+        "formation": Dimension("formation_id", columns=("formation__nom", "formation__num_offre"), label=_formation_label),
+        "statut": Dimension("statut"),
+        "type_contrat": Dimension("type_contrat"),
+        "cv_statut": Dimension("cv_statut"),
+        "resultat_placement": Dimension("resultat_placement"),
+        "contrat_signe": Dimension("contrat_signe"),
+        "responsable": Dimension(
+            "responsable_placement_id",
+            columns=(
+                "responsable_placement__first_name",
+                "responsable_placement__last_name",
+                "responsable_placement__email",
+                "responsable_placement__username",
+            ),
+            label=_responsable_label,
+        ),
+        "entreprise": Dimension(
+            "entreprise_placement_id", columns=("entreprise_placement__nom",),
+            label="entreprise_placement__nom", fallback="Entreprise #{}",
+        ),
+    },
+)
+APPAIRAGE_METRICS = tuple(name for name in CANDIDAT_STATS.metrics if name.startswith("app"))
+OVERVIEW_METRICS = tuple(name for name in CANDIDAT_STATS.metrics if name != "rqth_count")
+GROUPED_METRICS = tuple(name for name in CANDIDAT_STATS.metrics if name != "en_accompagnement")
+# Répartitions de l'overview : clé de sortie → dimension
+REPARTITIONS = {
+    "par_statut": "statut",
+    "par_type_contrat": "type_contrat",
+    "par_cv": "cv_statut",
+    "par_resultat": "resultat_placement",
+}
+
+
 class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     serializer_class = EmptySerializer
     """
@@ -87,7 +205,7 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
 
@@ -119,7 +237,7 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         """
         Périmètre :
           - admin/superadmin → global
-          - staff → via formation.centre IN centres utilisateur OU formation.centre.code_postal ^ dep
+          - staff → via formation.centre IN centres utilisateur OU formation.centre.departement_code IN deps
                     (fallback: candidat.code_postal ^ dep pour ceux sans formation)
           - non staff → pas de restriction (ou gérée par RestrictToUserOwnedQueryset)
         """
@@ -141,12 +259,11 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             if centre_ids:
                 q |= Q(formation__centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
+                q |= Q(formation__centre__departement_code__in=dep_codes)
                 for code in dep_codes:
-                    q_dep |= Q(formation__centre__code_postal__startswith=code) | Q(code_postal__startswith=code)
-                q |= q_dep
+                    q |= Q(code_postal__startswith=code)
 
-            return qs.filter(q).distinct()
+            return qs.filter(q)
 
         return qs
 
@@ -221,7 +338,7 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if p.get("departement"):
             dep = str(p.get("departement"))[:2]
             qs = qs.filter(
-                Q(formation__centre__code_postal__startswith=dep) | Q(code_postal__startswith=dep)
+                Q(formation__centre__departement_code=dep) | Q(code_postal__startswith=dep)
             )
 
         if p.get("statut"):
@@ -275,6 +392,11 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if not ids_list:
             return {}
 
+        # 📚 Référentiels (centre / statut / type d'offre) : cache local, sans requête
+        labels = refdata.label_map(model, ids_list)
+        if labels is not None:
+            return labels
+
         # cas particulier: utilisateur → full_name || email || username
         if getattr(model, "__name__", "") in {"User", "CustomUser"}:
             rows = model.objects.filter(pk__in=ids_list).values("pk", "first_name", "last_name", "email", "username")
@@ -297,63 +419,17 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     def list(self, request, *args, **kwargs):
         qs = self._apply_common_filters(self.get_queryset())
 
-        # KPI candidats
-        kpis = qs.aggregate(
-            total=Count("id", distinct=True),
-            entretien_ok=Count("id", filter=Q(entretien_done=True), distinct=True),
-            test_ok=Count("id", filter=Q(test_is_ok=True), distinct=True),
-            gespers=Count("id", filter=Q(inscrit_gespers=True), distinct=True),
-            admissibles=Count("id", filter=Q(admissible=True), distinct=True),
-            en_formation=Count("id", filter=Q(statut=Candidat.StatutCandidat.EN_FORMATION), distinct=True),
-            en_appairage=Count("id", filter=Q(statut=Candidat.StatutCandidat.EN_APPAIRAGE), distinct=True),
-            en_accompagnement=Count("id", filter=Q(statut=Candidat.StatutCandidat.EN_ACCOMPAGNEMENT), distinct=True),
-
-            # ⭐️ nouveaux compteurs
-            osia_count=Count("id", filter=Q(numero_osia__isnull=False) & ~Q(numero_osia=""), distinct=True),
-            cv_renseigne=Count("id", filter=Q(cv_statut__isnull=False) & ~Q(cv_statut=""), distinct=True),
-            courrier_rentree_count=Count("id", filter=Q(courrier_rentree=True), distinct=True),
-
-            # 🆕 Ateliers TRE — nombre d'ateliers distincts impliquant ≥1 candidat du périmètre
-            ateliers_tre_total=Count("ateliers_tre", distinct=True),
-
-            # contrats (POEI/POEC fusionnés)
-            contrat_apprentissage=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.APPRENTISSAGE), distinct=True),
-            contrat_professionnalisation=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION), distinct=True),
-            contrat_poei_poec=Count("id", filter=Q(type_contrat__in=_poei_poec_values()), distinct=True),
-            contrat_sans=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.SANS_CONTRAT), distinct=True),
-            contrat_crif=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.CRIF), distinct=True),
-            contrat_autre=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.AUTRE), distinct=True),
-        )
-
-        # KPI appairages (via relation inverse)
-        app = qs.aggregate(
-            appairages_total=Count("appairages", distinct=True),
-            app_transmis=Count("appairages", filter=Q(appairages__statut="transmis"), distinct=True),
-            app_en_attente=Count("appairages", filter=Q(appairages__statut="en_attente"), distinct=True),
-            app_accepte=Count("appairages", filter=Q(appairages__statut="accepte"), distinct=True),
-            app_refuse=Count("appairages", filter=Q(appairages__statut="refuse"), distinct=True),
-            app_annule=Count("appairages", filter=Q(appairages__statut="annule"), distinct=True),
-            app_a_faire=Count("appairages", filter=Q(appairages__statut="a_faire"), distinct=True),
-            app_contrat_a_signer=Count("appairages", filter=Q(appairages__statut="contrat a signer"), distinct=True),
-            app_contrat_en_attente=Count("appairages", filter=Q(appairages__statut="contrat en attente"), distinct=True),
-            app_appairage_ok=Count("appairages", filter=Q(appairages__statut="appairage ok"), distinct=True),
-        )
+        # KPI candidats + appairages + répartitions : une requête
+        stats = CANDIDAT_STATS.run(qs, REPARTITIONS.values(), only=OVERVIEW_METRICS)
+        totals = stats.totals
 
-        # Répartitions principales
-        rep_statut = list(qs.values("statut").annotate(count=Count("id", distinct=True)).order_by("statut"))
-        rep_type_contrat = list(qs.values("type_contrat").annotate(count=Count("id", distinct=True)).order_by("type_contrat"))
-        rep_cv = list(qs.values("cv_statut").annotate(count=Count("id", distinct=True)).order_by("cv_statut"))
-        rep_resultat = list(qs.values("resultat_placement").annotate(count=Count("id", distinct=True)).order_by("resultat_placement"))
+        def _repartition(dimension: str):
+            return [{dimension: r[dimension], "count": r["total"]} for r in stats.groups[dimension]]
 
         payload = {
-            "kpis": {k: int(v or 0) for k, v in kpis.items()},
-            "appairages": {k: int(v or 0) for k, v in app.items()},
-            "repartition": {
-                "par_statut": rep_statut,
-                "par_type_contrat": rep_type_contrat,
-                "par_cv": rep_cv,
-                "par_resultat": rep_resultat,
-            },
+            "kpis": {k: totals[k] for k in OVERVIEW_METRICS if k not in APPAIRAGE_METRICS},
+            "appairages": {k: totals[k] for k in APPAIRAGE_METRICS},
+            "repartition": {key: _repartition(dimension) for key, dimension in REPARTITIONS.items()},
             "filters_echo": {k: v for k, v in request.query_params.items()},
         }
         logger.debug("CandidatStats overview computed (total=%s)", payload["kpis"]["total"])
@@ -365,132 +441,11 @@ class CandidatStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     @action(detail=False, methods=["GET"], url_path="grouped")
     def grouped(self, request):
         by: GroupKey = (request.query_params.get("by") or "centre").lower()  # type: ignore[assignment]
-        if by not in {
-            "centre",
-            "departement",
-            "formation",
-            "statut",
-            "type_contrat",
-            "cv_statut",
-            "resultat_placement",
-            "contrat_signe",
-            "responsable",
-            "entreprise",
-        }:
+        if by not in CANDIDAT_STATS.dimensions:
             return Response({"detail": "Paramètre 'by' invalide."}, status=400)
 
-        qs = self._apply_common_filters(self.get_queryset()).annotate(
-            departement=Coalesce(Substr("formation__centre__code_postal", 1, 2), Value("NA"))
-        )
-
-        group_fields_map = {
-        "centre": ["formation__centre_id", "formation__centre__nom", "formation__num_offre"],
-        "departement": ["departement"],
-        "formation": ["formation_id", "formation__nom", "formation__num_offre"],
-        "statut": ["statut"],
-        "type_contrat": ["type_contrat"],
-        "cv_statut": ["cv_statut"],
-        "resultat_placement": ["resultat_placement"],
-        "contrat_signe": ["contrat_signe"],
-        "responsable": ["responsable_placement_id"],
-        "entreprise": ["entreprise_placement_id", "entreprise_placement__nom"],
-    }
-
-        fields = group_fields_map[by]
-
-        rows = list(
-            qs.values(*fields).annotate(
-                total=Count("id", distinct=True),
-                entretien_ok=Count("id", filter=Q(entretien_done=True), distinct=True),
-                test_ok=Count("id", filter=Q(test_is_ok=True), distinct=True),
-                gespers=Count("id", filter=Q(inscrit_gespers=True), distinct=True),
-                admissibles=Count("id", filter=Q(admissible=True), distinct=True),
-                en_formation=Count("id", filter=Q(statut=Candidat.StatutCandidat.EN_FORMATION), distinct=True),
-                en_appairage=Count("id", filter=Q(statut=Candidat.StatutCandidat.EN_APPAIRAGE), distinct=True),
-
-                # ⭐️ nouveaux compteurs (groupés)
-                rqth_count=Count("id", filter=Q(rqth=True), distinct=True),
-                osia_count=Count("id", filter=Q(numero_osia__isnull=False) & ~Q(numero_osia=""), distinct=True),
-                cv_renseigne=Count("id", filter=Q(cv_statut__isnull=False) & ~Q(cv_statut=""), distinct=True),
-                courrier_rentree_count=Count("id", filter=Q(courrier_rentree=True), distinct=True),
-
-                # 🆕 Ateliers TRE — nombre d'ateliers distincts impliquant ≥1 candidat du groupe
-                ateliers_tre_total=Count("ateliers_tre", distinct=True),
-
-                # contrats (POEI/POEC fusionnés)
-                contrat_apprentissage=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.APPRENTISSAGE), distinct=True),
-                contrat_professionnalisation=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION), distinct=True),
-                contrat_poei_poec=Count("id", filter=Q(type_contrat__in=_poei_poec_values()), distinct=True),
-                contrat_sans=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.SANS_CONTRAT), distinct=True),
-                contrat_autre=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.AUTRE), distinct=True),
-                contrat_crif=Count("id", filter=Q(type_contrat=Candidat.TypeContrat.CRIF), distinct=True),
-
-
-                # appairages (distinct pour éviter les doublons)
-                appairages_total=Count("appairages", distinct=True),
-                app_transmis=Count("appairages", filter=Q(appairages__statut="transmis"), distinct=True),
-                app_en_attente=Count("appairages", filter=Q(appairages__statut="en_attente"), distinct=True),
-                app_accepte=Count("appairages", filter=Q(appairages__statut="accepte"), distinct=True),
-                app_refuse=Count("appairages", filter=Q(appairages__statut="refuse"), distinct=True),
-                app_annule=Count("appairages", filter=Q(appairages__statut="annule"), distinct=True),
-                app_a_faire=Count("appairages", filter=Q(appairages__statut="a_faire"), distinct=True),
-                app_contrat_a_signer=Count("appairages", filter=Q(appairages__statut="contrat a signer"), distinct=True),
-                app_contrat_en_attente=Count("appairages", filter=Q(appairages__statut="contrat en attente"), distinct=True),
-                app_appairage_ok=Count("appairages", filter=Q(appairages__statut="appairage ok"), distinct=True),
-            ).order_by(*fields)
-        )
-
-        # group_key / group_label
-        if by == "centre":
-            for r in rows:
-                r["group_key"] = r.get("formation__centre_id")
-                r["group_label"] = r.get("formation__centre__nom") or (
-                    f"Centre #{r.get('formation__centre_id')}" if r.get('formation__centre_id') is not None else "—"
-                )
-        elif by == "departement":
-            for r in rows:
-                r["group_key"] = r.get("departement")
-                r["group_label"] = r.get("departement") or "—"
-        elif by == "formation":
-            for r in rows:
-                r["group_key"] = r.get("formation_id")
-                num = r.get("formation__num_offre")
-                nom = r.get("formation__nom")
-                if nom and num:
-                    r["group_label"] = f"{nom} ({num})"
-                else:
-                    r["group_label"] = nom or (
-                        f"Formation #{r.get('formation_id')}" if r.get("formation_id") is not None else "—"
-                    )
-
-        elif by in {"statut", "type_contrat", "cv_statut", "resultat_placement", "contrat_signe"}:
-            key = fields[0]
-            for r in rows:
-                gid = r.get(key)
-                r["group_key"] = gid
-                r["group_label"] = gid or "—"
-        elif by == "responsable":
-            from django.contrib.auth import get_user_model
-            ids = [r.get("responsable_placement_id") for r in rows if r.get("responsable_placement_id") is not None]
-            if ids:
-                User = get_user_model()
-                raw = User.objects.filter(pk__in=ids).values("pk", "first_name", "last_name", "email", "username")
-                label = {}
-                for u in raw:
-                    full = f"{(u.get('first_name') or '').strip()} {(u.get('last_name') or '').strip()}".strip()
-                    label[u["pk"]] = full or u.get("email") or u.get("username") or f"User #{u['pk']}"
-            else:
-                label = {}
-            for r in rows:
-                gid = r.get("responsable_placement_id")
-                r["group_key"] = gid
-                r["group_label"] = label.get(gid, f"User #{gid}" if gid is not None else "—")
-        elif by == "entreprise":
-            for r in rows:
-                r["group_key"] = r.get("entreprise_placement_id")
-                r["group_label"] = r.get("entreprise_placement__nom") or (
-                    f"Entreprise #{r.get('entreprise_placement_id')}" if r.get("entreprise_placement_id") is not None else "—"
-                )
+        qs = self._apply_common_filters(self.get_queryset())
+        rows = CANDIDAT_STATS.run(qs, [by], only=GROUPED_METRICS).groups[by]
 
         logger.debug("CandidatStats grouped by %s → %d lignes", by, len(rows))
-        return Response({"group_by": by, "results": rows})
\ No newline at end of file
+        return Response({"group_by": by, "results": rows})
@@ -5,9 +5,8 @@ from ...serializers.base_serializers import EmptySerializer
 from datetime import timedelta
 from typing import Dict, List, Optional
 
-from django.db import models
-from django.db.models import Q, Count, Avg, Value, F
-from django.db.models.functions import Substr, Coalesce
+from django.db.models import Q, Value, F
+from django.db.models.functions import Coalesce, NullIf
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 
@@ -24,6 +23,60 @@ except Exception:  # pragma: no cover
 
 # ⚠️ adapte l'import à ton arborescence
 from ....models.commentaires import Commentaire
+from ...stats_engine import Dimension, Metric, StatsQuery
+
+
+def _auteur_label(row) -> str:
+    rid = row.get("created_by_id")
+    fn = (row.get("created_by__first_name") or "").strip()
+    ln = (row.get("created_by__last_name") or "").strip()
+    full = f"{fn} {ln}".strip()
+    fallback = row.get("created_by__email") or row.get("created_by__username")
+    return full or fallback or (f"Utilisateur #{rid}" if rid is not None else "—")
+
+
+COMMENTAIRE_DIMENSIONS = {
+    "centre": Dimension(
+        "formation__centre_id", columns=("formation__centre__nom",),
+        label="formation__centre__nom", fallback="Centre #{}",
+    ),
+    "departement": Dimension(
+        "departement",
+        expression=Coalesce(NullIf(F("formation__centre__departement_code"), Value("")), Value("NA")),
+    ),
+    "formation": Dimension(
+        "formation_id",
+        columns=("formation__nom", "formation__num_offre", "formation__type_offre", "formation__type_offre__nom"),
+        label="formation__nom", fallback="Formation #{}",
+    ),
+    "auteur": Dimension(
+        "created_by_id",
+        columns=("created_by__first_name", "created_by__last_name", "created_by__email", "created_by__username"),
+        label=_auteur_label,
+    ),
+}
+
+
+# Métriques par groupe (les compteurs distincts / `edited` restent propres à l'overview)
+GROUPED_METRICS = ("total", "avec_saturation", "avg_saturation", "min_saturation", "max_saturation", "recent_7d")
+
+
+def _commentaire_stats(seven_days_ago) -> StatsQuery:
+    """Métriques commentaires (list / grouped / tops) ; `recent_7d` dépend de l'instant de la requête."""
+    return StatsQuery(
+        metrics={
+            "total": Metric("id"),
+            "avec_saturation": Metric("id", filter=Q(saturation__isnull=False)),
+            "avg_saturation": Metric("saturation", agg="avg"),
+            "min_saturation": Metric("saturation", agg="min"),
+            "max_saturation": Metric("saturation", agg="max"),
+            "recent_7d": Metric("id", filter=Q(created_at__gte=seven_days_ago)),
+            "nb_formations": Metric("formation", distinct=True),
+            "nb_auteurs": Metric("created_by", distinct=True),
+            "edited": Metric("id", filter=Q(updated_at__gt=F("created_at"))),
+        },
+        dimensions=COMMENTAIRE_DIMENSIONS,
+    )
 
 
 class CommentaireStatsViewSet(viewsets.ViewSet):
@@ -32,6 +85,8 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
     /api/commentaire-stats/             -> overview
     /api/commentaire-stats/grouped/     -> groupé par centre|departement|formation|auteur
     /api/commentaire-stats/tops/        -> tops formations / auteurs
+
+    overview / grouped / tops = une seule requête chacun (`_commentaire_stats`).
     """
     permission_classes = [IsStaffOrAbove]
 
@@ -81,7 +136,7 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> list[str]:
@@ -130,11 +185,8 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
             if centre_ids:
                 q |= Q(formation__centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(formation__centre__code_postal__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(formation__centre__departement_code__in=dep_codes)
+            return qs.filter(q)
 
         # non-staff
         return qs
@@ -158,7 +210,7 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
             qs = qs.filter(formation__centre_id=p.get("centre"))
         if p.get("departement"):
             dep = str(p.get("departement"))[:2]
-            qs = qs.filter(formation__centre__code_postal__startswith=dep)
+            qs = qs.filter(formation__centre__departement_code=dep)
 
         if p.get("auteur"):
             qs = qs.filter(created_by_id=p.get("auteur"))
@@ -193,30 +245,19 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
         qs = self._apply_filters(self._base_qs(request), request)
 
         seven_days_ago = timezone.now() - timedelta(days=7)
-
-        agg = qs.aggregate(
-            total=Count("id"),
-            avec_saturation=Count("id", filter=Q(saturation__isnull=False)),
-            avg_saturation=Avg("saturation"),
-            min_saturation=models.Min("saturation"),
-            max_saturation=models.Max("saturation"),
-            nb_formations=Count("formation", distinct=True),
-            nb_auteurs=Count("created_by", distinct=True),
-            recent_7d=Count("id", filter=Q(created_at__gte=seven_days_ago)),
-            edited=Count("id", filter=Q(updated_at__gt=F("created_at"))),
-        )
+        agg = _commentaire_stats(seven_days_ago).run(qs).totals
 
         data = {
             "kpis": {
-                "total": int(agg.get("total") or 0),
-                "avec_saturation": int(agg.get("avec_saturation") or 0),
-                "avg_saturation": round(float(agg["avg_saturation"]), 2) if agg.get("avg_saturation") is not None else None,
-                "min_saturation": int(agg["min_saturation"]) if agg.get("min_saturation") is not None else None,
-                "max_saturation": int(agg["max_saturation"]) if agg.get("max_saturation") is not None else None,
-                "nb_formations": int(agg.get("nb_formations") or 0),
-                "nb_auteurs": int(agg.get("nb_auteurs") or 0),
-                "recent_7d": int(agg.get("recent_7d") or 0),
-                "edited": int(agg.get("edited") or 0),
+                "total": agg["total"],
+                "avec_saturation": agg["avec_saturation"],
+                "avg_saturation": round(agg["avg_saturation"], 2) if agg["avg_saturation"] is not None else None,
+                "min_saturation": int(agg["min_saturation"]) if agg["min_saturation"] is not None else None,
+                "max_saturation": int(agg["max_saturation"]) if agg["max_saturation"] is not None else None,
+                "nb_formations": agg["nb_formations"],
+                "nb_auteurs": agg["nb_auteurs"],
+                "recent_7d": agg["recent_7d"],
+                "edited": agg["edited"],
             },
             "filters_echo": {k: v for k, v in request.query_params.items()},
         }
@@ -235,79 +276,18 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
         base = self._apply_filters(self._base_qs(request), request)
 
         seven_days_ago = timezone.now() - timedelta(days=7)
+        rows = _commentaire_stats(seven_days_ago).run(base, [by], only=GROUPED_METRICS).groups[by]
 
-        # departement annotate
-        qs = base.annotate(
-            departement=Coalesce(Substr("formation__centre__code_postal", 1, 2), Value("NA"))
-        )
-
-        group_fields: List[str] = []
-        if by == "centre":
-            group_fields = ["formation__centre_id", "formation__centre__nom"]
-        elif by == "departement":
-            group_fields = ["departement"]
-        elif by == "formation":
-            group_fields = [
-                "formation_id",
-                "formation__nom",
-                "formation__num_offre",
-                "formation__type_offre",
-                "formation__type_offre__nom",
-            ]
-        elif by == "auteur":
-            group_fields = [
-                "created_by_id",
-                "created_by__first_name",
-                "created_by__last_name",
-                "created_by__email",
-                "created_by__username",
-            ]
-
-        rows = list(
-            qs.values(*group_fields).annotate(
-                total=Count("id"),
-                avec_saturation=Count("id", filter=Q(saturation__isnull=False)),
-                avg_saturation=Avg("saturation"),
-                min_saturation=models.Min("saturation"),
-                max_saturation=models.Max("saturation"),
-                recent_7d=Count("id", filter=Q(created_at__gte=seven_days_ago)),
-            ).order_by(*group_fields)
-        )
-
-        # group_key / group_label
         results: List[Dict] = []
-        for r in rows:
-            out = dict(r)
-            if by == "centre":
-                out["group_key"] = r.get("formation__centre_id")
-                out["group_label"] = r.get("formation__centre__nom") or (
-                    f"Centre #{r.get('formation__centre_id')}" if r.get("formation__centre_id") is not None else "—"
-                )
-            elif by == "departement":
-                out["group_key"] = r.get("departement")
-                out["group_label"] = r.get("departement") or "—"
-            elif by == "formation":
-                out["group_key"] = r.get("formation_id")
-                out["formation_nom"] = r.get("formation__nom")
-                out["group_label"] = r.get("formation__nom") or (
-                    f"Formation #{r.get('formation_id')}" if r.get("formation_id") is not None else "—"
-                )
+        for out in rows:
+            if by == "formation":
                 # ✅ Infos complémentaires
-                out["num_offre"] = r.get("formation__num_offre")
-                out["type_offre_id"] = r.get("formation__type_offre")       # ID brut
-                out["type_offre_nom"] = r.get("formation__type_offre__nom") # Nom lisible
-            elif by == "auteur":
-                rid = r.get("created_by_id")
-                fn = (r.get("created_by__first_name") or "").strip()
-                ln = (r.get("created_by__last_name") or "").strip()
-                full = f"{fn} {ln}".strip()
-                fallback = r.get("created_by__email") or r.get("created_by__username")
-                out["group_key"] = rid
-                out["group_label"] = full or fallback or (f"Utilisateur #{rid}" if rid is not None else "—")
+                out["formation_nom"] = out.get("formation__nom")
+                out["num_offre"] = out.get("formation__num_offre")
+                out["type_offre_id"] = out.get("formation__type_offre")       # ID brut
+                out["type_offre_nom"] = out.get("formation__type_offre__nom") # Nom lisible
 
             # normalise numériques
-            for k in ("total", "avec_saturation", "recent_7d"):
-                out[k] = int(out.get(k) or 0)
             for k in ("avg_saturation", "min_saturation", "max_saturation"):
                 v = out.get(k)
                 out[k] = round(float(v), 2) if v is not None else None
@@ -327,39 +307,32 @@ class CommentaireStatsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def tops(self, request):
         qs = self._apply_filters(self._base_qs(request), request)
+        seven_days_ago = timezone.now() - timedelta(days=7)
+        stats = _commentaire_stats(seven_days_ago).run(qs, ["formation", "auteur"], only=["total"])  # 1 requête
 
         # Formations les plus commentées
-        top_formations = list(
-            qs.values("formation_id", "formation__nom")
-            .annotate(cnt=Count("id"))
-            .order_by("-cnt", "formation__nom")[:10]
-        )
+        top_formations = sorted(stats.groups["formation"], key=lambda r: (-r["total"], r["formation__nom"] or ""))[:10]
         top_formations = [
             {
                 "id": r["formation_id"],
                 "nom": r["formation__nom"] or (f"Formation #{r['formation_id']}" if r["formation_id"] is not None else "—"),
-                "count": r["cnt"],
+                "count": r["total"],
             }
             for r in top_formations
         ]
 
         # Auteurs les plus actifs
-        top_auteurs = list(
-            qs.values("created_by_id", "created_by__first_name", "created_by__last_name", "created_by__email", "created_by__username")
-            .annotate(cnt=Count("id"))
-            .order_by("-cnt")[:10]
-        )
         def _label(u):
             full = f"{(u.get('created_by__first_name') or '').strip()} {(u.get('created_by__last_name') or '').strip()}".strip()
             return full or u.get("created_by__email") or u.get("created_by__username") or (f"User #{u['created_by_id']}" if u["created_by_id"] is not None else "—")
 
         top_auteurs = [
-            {"id": r["created_by_id"], "nom": _label(r), "count": r["cnt"]}
-            for r in top_auteurs
+            {"id": r["created_by_id"], "nom": _label(r), "count": r["total"]}
+            for r in stats.top("auteur", "total")
         ]
 
         return Response({
             "top_formations": top_formations,
             "top_auteurs": top_auteurs,
             "filters_echo": {k: v for k, v in request.query_params.items()},
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,237 @@
+# rap_app/api/viewsets/stats_viewsets/dashboard_viewset.py
+
+"""
+🧩 Tableau de bord groupé : plusieurs widgets de stats en un seul appel.
+
+GET /api/dashboard/?widgets=formations,candidats,appairages.grouped&date_from=…&centre=…
+
+- Chaque widget = une action GET d'un ViewSet de stats existant
+  (`<widget>` → `list`, `<widget>.<action>` → action de liste, ex. `grouped`).
+- Les filtres (tous les paramètres sauf `widgets` / `refresh`) sont transmis
+  tels quels à chaque widget : mêmes permissions, même périmètre, même payload
+  que les endpoints unitaires.
+- Exécution en série par défaut ; `DASHBOARD_CONCURRENT=True` → pool de threads
+  (`DASHBOARD_WORKERS`), chaque thread ayant sa propre connexion DB.
+- Résultat de chaque widget mis en cache par périmètre utilisateur et versions
+  des modèles lus (`DASHBOARD_CACHE_TIMEOUT`, `refresh=1` pour l'ignorer).
+
+Réponse : {"widgets": {nom: {status, data, duration_ms, cache}}, "duration_ms"}.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import QueryDict
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from ....utils.cache_utils import build_cache_key, user_scope_key
+from ....utils.profiling import profile_thread
+from ...permissions import IsStaffOrAbove
+from ...serializers.base_serializers import EmptySerializer
+from .appairages_stats_viewsets import AppairageStatsViewSet
+from .atelier_tre_stats_viewset import AtelierTREStatsViewSet
+from .candidats_stats_viewsets import CandidatStatsViewSet
+from .commentaires_stats_viewsets import CommentaireStatsViewSet
+from .formation_stats_viewsets import FormationStatsViewSet
+from .partenaires_stats_viewsets import PartenaireStatsViewSet
+from .prospection_stats_viewsets import ProspectionStatsViewSet
+
+logger = logging.getLogger("application.dashboard")
+
+RESERVED_PARAMS = ("widgets", "refresh")
+WIDGET_ERROR_DETAIL = "Erreur interne lors du calcul du widget."
+
+_executor = None
+
+
+@dataclass(frozen=True)
+class Widget:
+    """ViewSet de stats exposé au tableau de bord + namespaces de cache lus."""
+
+    viewset: type
+    depends_on: tuple = ()
+
+
+WIDGETS = {
+    "formations": Widget(FormationStatsViewSet, ("Formation", "Centre", "TypeOffre", "Statut")),
+    "candidats": Widget(CandidatStatsViewSet, ("Candidat", "Formation", "Centre")),
+    "appairages": Widget(AppairageStatsViewSet, ("Appairage", "Formation", "Partenaire", "Centre")),
+    "prospections": Widget(ProspectionStatsViewSet, ("Prospection", "Centre", "Partenaire")),
+    "partenaires": Widget(
+        PartenaireStatsViewSet, ("Partenaire", "Prospection", "Appairage", "Centre")
+    ),
+    "commentaires": Widget(CommentaireStatsViewSet, ("Commentaire", "Formation", "Centre")),
+    "ateliers_tre": Widget(AtelierTREStatsViewSet, ("AtelierTRE", "AtelierTREPresence", "Centre")),
+}
+
+DEFAULT_WIDGETS = tuple(WIDGETS)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "DASHBOARD_WORKERS", 4),
+            thread_name_prefix="dashboard",
+        )
+    return _executor
+
+
+def _list_actions(viewset) -> set:
+    """Actions GET de liste exposables (`list` + @action(detail=False))."""
+    actions = {"list"} if hasattr(viewset, "list") else set()
+    for extra in viewset.get_extra_actions():
+        if not extra.detail and "get" in extra.mapping:
+            actions.add(extra.__name__)
+    return actions
+
+
+def parse_widgets(raw) -> list[tuple[str, Widget, str]]:
+    """`"formations,appairages.grouped"` → [(nom, widget, action)] ; ValueError si inconnu."""
+    names = [n.strip() for n in (raw or "").split(",") if n.strip()] or list(DEFAULT_WIDGETS)
+    parsed = []
+    for name in dict.fromkeys(names):  # dédoublonne en gardant l'ordre
+        key, _, action = name.partition(".")
+        widget = WIDGETS.get(key)
+        action = action or "list"
+        if widget is None or action not in _list_actions(widget.viewset):
+            raise ValueError(name)
+        parsed.append((name, widget, action))
+    return parsed
+
+
+class DashboardViewSet(GenericViewSet):
+    serializer_class = EmptySerializer
+    permission_classes = [IsStaffOrAbove]
+
+    # ────────────────────────────────────────────────────────────
+    # Exécution d'un widget
+    # ────────────────────────────────────────────────────────────
+    def _sub_request(self, request, params: QueryDict):
+        """Requête GET dérivée : mêmes en-têtes, utilisateur déjà authentifié."""
+        sub = copy.copy(request._request)
+        sub.method = "GET"
+        sub.GET = params
+        sub.META = {**request.META, "QUERY_STRING": params.urlencode()}
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        return sub
+
+    def _call(self, request, widget: Widget, action: str, params: QueryDict) -> tuple[int, object]:
+        view = widget.viewset.as_view({"get": action})
+        response = view(self._sub_request(request, params))
+        return response.status_code, getattr(response, "data", None)
+
+    def _run_widget(self, request, name: str, widget: Widget, action: str, params: QueryDict, refresh: bool):
+        start = time.perf_counter()
+        key = build_cache_key(
+            f"dashboard.{name}",
+            widget.depends_on,
+            user_scope_key(request.user),
+            tuple(sorted((k, tuple(v)) for k, v in params.lists())),
+        )
+        cache_state = "bypass" if refresh else "miss"
+        cached = None if refresh else cache.get(key)
+
+        if cached is not None:
+            code, data, cache_state = status.HTTP_200_OK, cached, "hit"
+        else:
+            try:
+                code, data = self._call(request, widget, action, params)
+            except Exception:
+                # Détail dans les logs uniquement (le message d'exception peut contenir du SQL, des données…)
+                logger.exception("[Dashboard] widget %s en erreur", name)
+                code, data = status.HTTP_500_INTERNAL_SERVER_ERROR, {"detail": WIDGET_ERROR_DETAIL}
+            if code == status.HTTP_200_OK:
+                cache.set(key, data, getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60))
+            else:
+                cache_state = "off"
+
+        return {
+            "status": code,
+            "data": data,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "cache": cache_state,
+        }
+
+    def _run_in_thread(self, *args):
+        """
+        Dans un thread du pool : connexion propre, recyclée selon CONN_MAX_AGE,
+        et profil SQL de la requête (contexte copié à la soumission).
+        """
+        close_old_connections()
+        try:
+            with profile_thread():
+                return self._run_widget(*args)
+        finally:
+            close_old_connections()
+
+    # ────────────────────────────────────────────────────────────
+    # GET /dashboard/
+    # ────────────────────────────────────────────────────────────
+    @extend_schema(
+        summary="Tableau de bord groupé (widgets de stats en un appel)",
+        parameters=[
+            OpenApiParameter(
+                "widgets", str, description=(
+                    "Liste séparée par des virgules : " + ", ".join(WIDGETS)
+                    + " (suffixe `.grouped`, `.tops`… pour une action de liste). Défaut : tous."
+                ),
+            ),
+            OpenApiParameter("refresh", bool, description="Ignore le cache des widgets"),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        start = time.perf_counter()
+        prepared = self.prepare_jobs(request)
+        if isinstance(prepared, Response):
+            return prepared
+        widgets, jobs = prepared
+
+        if getattr(settings, "DASHBOARD_CONCURRENT", False) and len(jobs) > 1:
+            # Un contexte copié par job : variables de la requête (utilisateur courant, profil SQL…)
+            futures = [
+                _get_executor().submit(contextvars.copy_context().run, self._run_in_thread, *job) for job in jobs
+            ]
+            results = [f.result() for f in futures]
+        else:
+            results = [self._run_widget(*job) for job in jobs]
+        return self.bundle_response(widgets, results, start)
+
+    # ────────────────────────────────────────────────────────────
+    # Étapes partagées avec la vue async (`api/async_views.py`)
+    # ────────────────────────────────────────────────────────────
+    def prepare_jobs(self, request):
+        """(widgets, jobs) à exécuter, ou Response 400 si un widget est inconnu."""
+        try:
+            widgets = parse_widgets(request.query_params.get("widgets"))
+        except ValueError as e:
+            return Response({"detail": f"Widget inconnu : {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = request.query_params.copy()
+        for reserved in RESERVED_PARAMS:
+            params.pop(reserved, None)
+        params._mutable = False
+        refresh = str(request.query_params.get("refresh", "")).lower() in ("1", "true", "yes", "on")
+
+        jobs = [(request, name, widget, action, params, refresh) for name, widget, action in widgets]
+        return widgets, jobs
+
+    @staticmethod
+    def bundle_response(widgets, results, start: float) -> Response:
+        return Response({
+            "widgets": {name: result for (name, _, _), result in zip(widgets, results)},
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
@@ -1,5 +1,4 @@
-from django.db.models import Sum, F, Value
-from django.db.models.functions import Substr, Coalesce
+from django.db.models import Sum
 from django.utils.timezone import localdate
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -25,6 +24,22 @@ from ....models.declic import Declic, ObjectifDeclic
 from ...permissions import IsDeclicStaffOrAbove
 from ...paginations import RapAppPagination
 from ...serializers.base_serializers import EmptySerializer
+from ...stats_engine import Dimension, Metric, StatsQuery
+
+
+# Cumuls des séances (grouped / resume) ; les objectifs restent une requête à part
+DECLIC_STATS = StatsQuery(
+    metrics={
+        "nb_inscrits_declic": Metric("nb_inscrits_declic", agg="sum"),
+        "nb_presents_declic": Metric("nb_presents_declic", agg="sum"),
+        "nb_absents_declic": Metric("nb_absents_declic", agg="sum"),
+    },
+    dimensions={
+        "centre": Dimension("centre_id", columns=("centre__nom",), label="centre__nom"),
+        "departement": Dimension("centre__departement_code"),
+        "type_declic": Dimension("type_declic"),
+    },
+)
 
 
 @extend_schema(tags=["Déclic - Statistiques"])
@@ -53,17 +68,16 @@ class DeclicStatsViewSet(viewsets.ReadOnlyModelViewSet):
         else:
             centre_ids = list(getattr(user, "staff_centre_ids", []) or [])
 
-            departements = {
-                (c.code_postal or "")[:2]
-                for c in getattr(user, "centres", []).all()
-            } if hasattr(user, "centres") and user.centres.exists() else set()
+            departements = set(
+                user.centres.exclude(departement_code="").values_list("departement_code", flat=True)
+            ) if hasattr(user, "centres") else set()
 
             if centre_param:
                 qs = qs.filter(centre_id=centre_param)
             elif centre_ids:
                 qs = qs.filter(centre_id__in=centre_ids)
             elif departements:
-                qs = qs.filter(centre__code_postal__startswith=tuple(departements))
+                qs = qs.filter(centre__departement_code__in=departements)
             else:
                 return Declic.objects.none()
 
@@ -82,35 +96,15 @@ class DeclicStatsViewSet(viewsets.ReadOnlyModelViewSet):
         by = request.query_params.get("by", "centre")
         qs = self._filtered_qs(request)
 
-        if by == "centre":
-            qs = qs.annotate(
-                group_key=F("centre__nom"),
-                centre_id_ref=F("centre__id"),
-            )
-            group_fields = ["centre_id_ref", "group_key"]
-
-        elif by == "departement":
-            qs = qs.annotate(
-                group_key=Substr(Coalesce("centre__code_postal", Value("")), 1, 2)
-            )
-            group_fields = ["group_key"]
-
-        elif by == "type_declic":
-            qs = qs.annotate(group_key=F("type_declic"))
-            group_fields = ["group_key"]
-
-        else:
+        if by not in DECLIC_STATS.dimensions:
             return Response({"detail": "Paramètre 'by' invalide"}, status=400)
 
-        data = (
-            qs.values(*group_fields)
-            .annotate(
-                nb_inscrits_declic=Sum("nb_inscrits_declic"),
-                nb_presents_declic=Sum("nb_presents_declic"),
-                nb_absents_declic=Sum("nb_absents_declic"),
-            )
-            .order_by("group_key")
-        )
+        data = DECLIC_STATS.run(qs, [by]).groups[by]
+        if by == "centre":
+            # Clé d'affichage = nom du centre (tri alphabétique)
+            for d in data:
+                d["group_key"] = d["centre__nom"]
+            data.sort(key=lambda d: (d["group_key"] is None, d["group_key"] or ""))
 
         results = []
         for d in data:
@@ -129,7 +123,7 @@ class DeclicStatsViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
             results.append({
-                "id": d.get("centre_id_ref"),
+                "id": d.get("centre_id"),
                 "group_key": d["group_key"],
                 "nb_inscrits_declic": insc,
                 "nb_presents_declic": pres,
@@ -158,15 +152,11 @@ class DeclicStatsViewSet(viewsets.ReadOnlyModelViewSet):
 
         qs = self._filtered_qs(request)
 
-        agg = qs.aggregate(
-            inscrits=Sum("nb_inscrits_declic"),
-            presents=Sum("nb_presents_declic"),
-            absents=Sum("nb_absents_declic"),
-        )
+        agg = DECLIC_STATS.run(qs).totals
 
-        inscrits = agg["inscrits"] or 0
-        pres = agg["presents"] or 0
-        absn = agg["absents"] or 0
+        inscrits = agg["nb_inscrits_declic"]
+        pres = agg["nb_presents_declic"]
+        absn = agg["nb_absents_declic"]
 
         taux_presence = (
             round(pres / (pres + absn) * 100, 1)
@@ -10,8 +10,8 @@ from ...serializers.base_serializers import EmptySerializer
 from typing import Literal, Iterable, Optional
 
 from django.db import models
-from django.db.models import Count, Sum, F, Q, Value
-from django.db.models.functions import Coalesce, Substr, Greatest, NullIf
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -20,8 +20,8 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models.functions import Substr
 
+from ...mixins import CachedOptionsMixin
 from ...permissions import IsStaffOrAbove, is_staff_or_staffread
 
 try:
@@ -39,14 +39,119 @@ except Exception:  # pragma: no cover
 # ⚠️ Ajustez les imports selon votre arborescence réelle
 from ....models.formations import Formation
 from ....models.candidat import Candidat
-from ....models.appairage import Appairage, AppairageStatut  # ← NEW
+from ....models.appairage import AppairageStatut
+from ....utils import refdata
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 GroupKey = Literal["formation", "centre", "departement", "type_offre", "statut"]
 
+# Clé de sortie → statut d'appairage
+APPAIRAGE_STATUTS = {
+    "transmis": AppairageStatut.TRANSMIS,
+    "en_attente": AppairageStatut.EN_ATTENTE,
+    "accepte": AppairageStatut.ACCEPTE,
+    "refuse": AppairageStatut.REFUSE,
+    "annule": AppairageStatut.ANNULE,
+    "a_faire": AppairageStatut.A_FAIRE,
+    "contrat_a_signer": AppairageStatut.CONTRAT_A_SIGNER,
+    "contrat_en_attente": AppairageStatut.CONTRAT_EN_ATTENTE,
+    "appairage_ok": AppairageStatut.APPAIRAGE_OK,
+}
+
+FORMATION_DIMENSIONS = {
+    "formation": Dimension("id", columns=("nom", "centre__nom", "num_offre"), label="nom", fallback="Formation #{}"),
+    "centre": Dimension("centre_id", columns=("centre__nom",), label="centre__nom", fallback="Centre #{}"),
+    "departement": Dimension(
+        "departement", expression=Coalesce(NullIf(F("centre__departement_code"), Value("")), Value("NA")),
+    ),
+    "type_offre": Dimension(
+        "type_offre_id", columns=("type_offre__nom",), label="type_offre__nom", fallback="Type Offre #{}",
+    ),
+    "statut": Dimension("statut_id", columns=("statut__nom",), label="statut__nom", fallback="Statut #{}"),
+}
+
+
+def _candidats(q: Optional[Q] = None) -> Metric:
+    return Metric("candidats__id", filter=q, distinct=True)
+
+
+def _formation_stats(today) -> StatsQuery:
+    """
+    Métriques formations (list / grouped). Les jointures candidats × appairages
+    démultiplient les lignes : les sommes de places / inscrits ne lisent qu'une
+    ligne par formation (cf. `stats_engine`), les compteurs liés sont distincts.
+    """
+    return StatsQuery(
+        metrics={
+            # --- États des formations ---
+            "nb_formations": Metric("id", distinct=True),
+            "nb_actives": Metric("id", filter=Q(start_date__lte=today, end_date__gte=today), distinct=True),
+            "nb_a_venir": Metric("id", filter=Q(start_date__gt=today), distinct=True),
+            "nb_terminees": Metric("id", filter=Q(end_date__lt=today), distinct=True),
+            "nb_annulees": Metric("id", filter=Q(statut__nom__icontains="annul"), distinct=True),
+            "nb_archivees": Metric("id", filter=Q(activite="archivee"), distinct=True),
+
+            # --- Agrégats places/inscriptions ---
+            "total_places_crif": Metric("prevus_crif", agg="sum"),
+            "total_places_mp": Metric("prevus_mp", agg="sum"),
+            "total_inscrits_crif": Metric("inscrits_crif", agg="sum"),
+            "total_inscrits_mp": Metric("inscrits_mp", agg="sum"),
+            "total_dispo_crif": Metric(Greatest(F("prevus_crif") - F("inscrits_crif"), Value(0)), agg="sum"),
+            "total_dispo_mp": Metric(Greatest(F("prevus_mp") - F("inscrits_mp"), Value(0)), agg="sum"),
+            "entrees_formation": Metric("entree_formation", agg="sum"),
+
+            # ----- Candidats
+            "nb_candidats": _candidats(),
+            "nb_entretien_ok": _candidats(Q(candidats__entretien_done=True)),
+            "nb_test_ok": _candidats(Q(candidats__test_is_ok=True)),
+            "nb_inscrits_gespers": _candidats(Q(candidats__inscrit_gespers=True)),
+            "nb_entrees_formation": _candidats(
+                Q(candidats__statut=Candidat.StatutCandidat.EN_FORMATION) | Q(candidats__date_rentree__isnull=False)
+            ),
+            # ── Contrats par type
+            "nb_contrats_apprentissage": _candidats(Q(candidats__type_contrat=Candidat.TypeContrat.APPRENTISSAGE)),
+            "nb_contrats_professionnalisation": _candidats(
+                Q(candidats__type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION)
+            ),
+            "nb_contrats_poei_poec": _candidats(Q(candidats__type_contrat=Candidat.TypeContrat.POEI_POEC)),
+            "nb_contrats_autres": _candidats(
+                Q(candidats__type_contrat__in=[Candidat.TypeContrat.AUTRE, Candidat.TypeContrat.SANS_CONTRAT])
+            ),
+            "nb_admissibles": _candidats(Q(candidats__admissible=True)),
+
+            # ----- Appairages par statut
+            "app_total": Metric("appairages__id", distinct=True),
+            **{
+                f"app_{code}": Metric("appairages__id", filter=Q(appairages__statut=statut), distinct=True)
+                for code, statut in APPAIRAGE_STATUTS.items()
+            },
+        },
+        dimensions=FORMATION_DIMENSIONS,
+    )
 
-class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
+
+# Champs de l'overview (kpis) repris tels quels des totaux
+BASE_METRICS = (
+    "nb_formations", "nb_actives", "nb_a_venir", "nb_terminees", "nb_annulees", "nb_archivees",
+    "total_places_crif", "total_places_mp", "total_inscrits_crif", "total_inscrits_mp",
+    "total_places", "total_inscrits", "total_dispo_crif", "total_dispo_mp",
+)
+CANDIDAT_METRICS = (
+    "nb_candidats", "nb_entretien_ok", "nb_test_ok", "nb_inscrits_gespers", "nb_entrees_formation",
+    "nb_contrats_apprentissage", "nb_contrats_professionnalisation", "nb_contrats_poei_poec",
+    "nb_contrats_autres", "nb_admissibles",
+)
+# Les compteurs annulées / archivées restent propres à l'overview
+OVERVIEW_ONLY = ("nb_annulees", "nb_archivees")
+
+
+class FormationStatsViewSet(CachedOptionsMixin, RestrictToUserOwnedQueryset, GenericViewSet):
     serializer_class = EmptySerializer
-    """Vue d’agrégats/KPI sur **Formation** (JSON only)."""
+    """
+    Vue d’agrégats/KPI sur **Formation** (JSON only).
+    overview / grouped = une requête (`_formation_stats`) ; tops = 3 listes ORM
+    triées par formation (pas d'agrégat à factoriser).
+    """
 
     permission_classes = [IsStaffOrAbove]
 
@@ -64,7 +169,7 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> list[str]:
@@ -113,12 +218,9 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             if centre_ids:
                 q |= Q(centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(centre__code_postal__startswith=code)
-                q |= q_dep
+                q |= Q(centre__departement_code__in=dep_codes)
 
-            return qs.filter(q).distinct()
+            return qs.filter(q)
 
         return qs
 
@@ -170,7 +272,7 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if centre_id:
             qs = qs.filter(centre_id=centre_id)
         if dep:
-            qs = qs.filter(centre__code_postal__startswith=str(dep)[:2])
+            qs = qs.filter(centre__departement_code=str(dep)[:2])
         if type_offre_id:
             qs = qs.filter(type_offre_id=type_offre_id)
         if statut_id:
@@ -183,35 +285,6 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             return 0.0
         return round(float(num) * 100.0 / float(den), 2)
 
-    def _base_metrics(self, qs):
-        today = timezone.now().date()
-        agg = qs.aggregate(
-            nb_formations=Count("id"),
-            nb_actives=Count("id", filter=Q(start_date__lte=today, end_date__gte=today)),
-            nb_a_venir=Count("id", filter=Q(start_date__gt=today)),
-            nb_terminees=Count("id", filter=Q(end_date__lt=today)),
-
-            total_places_crif=Coalesce(Sum("prevus_crif"), Value(0)),
-            total_places_mp=Coalesce(Sum("prevus_mp"), Value(0)),
-            total_inscrits_crif=Coalesce(Sum("inscrits_crif"), Value(0)),
-            total_inscrits_mp=Coalesce(Sum("inscrits_mp"), Value(0)),
-
-            total_places=Coalesce(Sum(F("prevus_crif") + F("prevus_mp")), Value(0)),
-            total_inscrits=Coalesce(Sum(F("inscrits_crif") + F("inscrits_mp")), Value(0)),
-
-            total_dispo_crif=Coalesce(Sum(Greatest(F("prevus_crif") - F("inscrits_crif"), Value(0))), Value(0)),
-            total_dispo_mp=Coalesce(Sum(Greatest(F("prevus_mp") - F("inscrits_mp"), Value(0))), Value(0)),
-        )
-        agg["total_disponibles"] = int(agg["total_dispo_crif"]) + int(agg["total_dispo_mp"])
-        agg["taux_saturation"] = self._pct(agg["total_inscrits"], agg["total_places"])
-        agg["repartition_financeur"] = {
-            "crif": int(agg["total_inscrits_crif"]),
-            "mp": int(agg["total_inscrits_mp"]),
-            "crif_pct": self._pct(agg["total_inscrits_crif"], agg["total_inscrits"]),
-            "mp_pct": self._pct(agg["total_inscrits_mp"], agg["total_inscrits"]),
-        }
-        return agg
-
     @staticmethod
     def _guess_label_field(model: type[models.Model]) -> Optional[str]:
         preferred = {"nom", "name", "label", "libelle", "libellé", "titre"}
@@ -229,6 +302,11 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         ids_list = [i for i in ids if i is not None]
         if not ids_list:
             return {}
+
+        # 📚 Référentiels (centre / statut / type d'offre) : cache local, sans requête
+        labels = refdata.label_map(model, ids_list)
+        if labels is not None:
+            return labels
         label_field = self._guess_label_field(model)
         if label_field:
             rows = model.objects.filter(pk__in=ids_list).values_list("pk", label_field)
@@ -251,82 +329,22 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
 )
     def list(self, request, *args, **kwargs):
         qs = self._apply_common_filters(self.get_queryset())
-        base = self._base_metrics(qs)
-
-        # Entrées formation (champ Formation)
-        entree_total = qs.aggregate(x=Coalesce(Sum("entree_formation"), Value(0)))["x"]
-
-        # ----- Candidats (scopés aux formations du qs)
-        cand_qs = Candidat.objects.filter(formation__in=qs)
-        cand_agg = cand_qs.aggregate(
-            nb_candidats=Count("id", distinct=True),
-            nb_entretien_ok=Count("id", filter=Q(entretien_done=True), distinct=True),
-            nb_test_ok=Count("id", filter=Q(test_is_ok=True), distinct=True),
-            nb_inscrits_gespers=Count("id", filter=Q(inscrit_gespers=True), distinct=True),
-            nb_entrees_formation=Count(
-                "id",
-                filter=Q(statut=Candidat.StatutCandidat.EN_FORMATION) | Q(date_rentree__isnull=False),
-                distinct=True,
-            ),
-            # ── Contrats par type
-            nb_contrats_apprentissage=Count(
-                "id",
-                filter=Q(type_contrat=Candidat.TypeContrat.APPRENTISSAGE),
-                distinct=True,
-            ),
-            nb_contrats_professionnalisation=Count(
-                "id",
-                filter=Q(type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION),
-                distinct=True,
-            ),
-            nb_contrats_poei_poec=Count(
-                "id",
-                filter=Q(type_contrat=Candidat.TypeContrat.POEI_POEC),
-                distinct=True,
-            ),
-            nb_contrats_autres=Count(
-                "id",
-                filter=Q(type_contrat__in=[Candidat.TypeContrat.AUTRE, Candidat.TypeContrat.SANS_CONTRAT]),
-                distinct=True,
-            ),
-            nb_admissibles=Count("id", filter=Q(admissible=True), distinct=True),
-        )
-        cand = {k: int(v or 0) for k, v in cand_agg.items()}
-
-        # ----- Appairages (scopés aux formations du qs)
-        app_qs = Appairage.objects.filter(formation__in=qs)
-        app_agg = app_qs.aggregate(
-            total=Count("id", distinct=True),
-            transmis=Count("id", filter=Q(statut=AppairageStatut.TRANSMIS), distinct=True),
-            en_attente=Count("id", filter=Q(statut=AppairageStatut.EN_ATTENTE), distinct=True),
-            accepte=Count("id", filter=Q(statut=AppairageStatut.ACCEPTE), distinct=True),
-            refuse=Count("id", filter=Q(statut=AppairageStatut.REFUSE), distinct=True),
-            annule=Count("id", filter=Q(statut=AppairageStatut.ANNULE), distinct=True),
-            a_faire=Count("id", filter=Q(statut=AppairageStatut.A_FAIRE), distinct=True),
-            contrat_a_signer=Count("id", filter=Q(statut=AppairageStatut.CONTRAT_A_SIGNER), distinct=True),
-            contrat_en_attente=Count("id", filter=Q(statut=AppairageStatut.CONTRAT_EN_ATTENTE), distinct=True),
-            appairage_ok=Count("id", filter=Q(statut=AppairageStatut.APPAIRAGE_OK), distinct=True),
-        )
-        appairages = {
-            "total": int(app_agg["total"] or 0),
-            "par_statut": {k: int(app_agg.get(k) or 0) for k in [
-                "transmis", "en_attente", "accepte", "refuse", "annule",
-                "a_faire", "contrat_a_signer", "contrat_en_attente", "appairage_ok"
-            ]},
-        }
+        # Formations + candidats + appairages : une requête
+        totals = _formation_stats(timezone.now().date()).run(qs).totals
+        base = self._finalize(dict(totals))
 
         payload = {
             "kpis": {
-                **{
-                    k: int(v) if isinstance(v, int) else v
-                    for k, v in base.items()
-                    if k not in {"repartition_financeur", "taux_saturation"}
-                },
+                **{k: base[k] for k in BASE_METRICS},
+                "total_disponibles": base["total_disponibles"],
                 "taux_saturation": base["taux_saturation"],
                 "repartition_financeur": base["repartition_financeur"],
-                "entrees_formation": int(entree_total or 0),
-                "candidats": cand,
-                "appairages": appairages,
+                "entrees_formation": totals["entrees_formation"],
+                "candidats": {k: totals[k] for k in CANDIDAT_METRICS},
+                "appairages": {
+                    "total": totals["app_total"],
+                    "par_statut": {code: totals[f"app_{code}"] for code in APPAIRAGE_STATUTS},
+                },
             },
             "filters_echo": {k: v for k, v in request.query_params.items()},
         }
@@ -354,122 +372,11 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             return Response({"detail": "Paramètre 'by' invalide."}, status=400)
 
         qs = self._apply_common_filters(self.get_queryset())
-        today = timezone.now().date()
-
-        qs = qs.annotate(
-            departement=Coalesce(Substr("centre__code_postal", 1, 2), Value("NA")),
-        )
-
-        # ✅ Ajout de centre__nom et num_offre quand by="formation"
-        group_fields = {
-            "formation": ["id", "nom", "centre__nom", "num_offre"],
-            "centre": ["centre_id", "centre__nom"],
-            "departement": ["departement"],
-            "type_offre": ["type_offre_id"],
-            "statut": ["statut_id"],
-        }[by]
-        qs = qs.distinct()
-
-        rows = list(
-            qs.values(*group_fields).annotate(
-                nb_formations=Count("id", distinct=True),
-                nb_actives=Count("id", filter=Q(start_date__lte=today, end_date__gte=today), distinct=True),
-                nb_a_venir=Count("id", filter=Q(start_date__gt=today), distinct=True),
-                nb_terminees=Count("id", filter=Q(end_date__lt=today), distinct=True),
-
-
-                total_places=Coalesce(Sum(F("prevus_crif") + F("prevus_mp")), Value(0)),
-                total_places_crif=Coalesce(Sum("prevus_crif"), Value(0)),
-                total_places_mp=Coalesce(Sum("prevus_mp"), Value(0)),
-
-                total_inscrits=Coalesce(Sum(F("inscrits_crif") + F("inscrits_mp")), Value(0)),
-                total_inscrits_crif=Coalesce(Sum("inscrits_crif"), Value(0)),
-                total_inscrits_mp=Coalesce(Sum("inscrits_mp"), Value(0)),
-
-                total_dispo_crif=Coalesce(Sum(Greatest(F("prevus_crif") - F("inscrits_crif"), Value(0))), Value(0)),
-                total_dispo_mp=Coalesce(Sum(Greatest(F("prevus_mp") - F("inscrits_mp"), Value(0))), Value(0)),
-
-                entrees_formation=Coalesce(Sum("entree_formation"), Value(0)),
-
-                # ----- Candidats
-                nb_candidats=Count("candidats", distinct=True),
-                nb_entretien_ok=Count("candidats", filter=Q(candidats__entretien_done=True), distinct=True),
-                nb_test_ok=Count("candidats", filter=Q(candidats__test_is_ok=True), distinct=True),
-                nb_inscrits_gespers=Count("candidats", filter=Q(candidats__inscrit_gespers=True), distinct=True),
-                nb_entrees_formation=Count(
-                    "candidats",
-                    filter=Q(candidats__statut=Candidat.StatutCandidat.EN_FORMATION) | Q(candidats__date_rentree__isnull=False),
-                    distinct=True,
-                ),
-                # ── Contrats par type (groupés)
-                nb_contrats_apprentissage=Count(
-                    "candidats",
-                    filter=Q(candidats__type_contrat=Candidat.TypeContrat.APPRENTISSAGE),
-                    distinct=True,
-                ),
-                nb_contrats_professionnalisation=Count(
-                    "candidats",
-                    filter=Q(candidats__type_contrat=Candidat.TypeContrat.PROFESSIONNALISATION),
-                    distinct=True,
-                ),
-                nb_contrats_poei_poec=Count(
-                    "candidats",
-                    filter=Q(candidats__type_contrat=Candidat.TypeContrat.POEI_POEC),
-                    distinct=True,
-                ),
-                nb_contrats_autres=Count(
-                    "candidats",
-                    filter=Q(candidats__type_contrat__in=[Candidat.TypeContrat.AUTRE, Candidat.TypeContrat.SANS_CONTRAT]),
-                    distinct=True,
-                ),
-                nb_admissibles=Count("candidats", filter=Q(candidats__admissible=True), distinct=True),
-
-                # ----- Appairages par statut
-                app_total=Count("appairages", distinct=True),
-                app_transmis=Count("appairages", filter=Q(appairages__statut=AppairageStatut.TRANSMIS), distinct=True),
-                app_en_attente=Count("appairages", filter=Q(appairages__statut=AppairageStatut.EN_ATTENTE), distinct=True),
-                app_accepte=Count("appairages", filter=Q(appairages__statut=AppairageStatut.ACCEPTE), distinct=True),
-                app_refuse=Count("appairages", filter=Q(appairages__statut=AppairageStatut.REFUSE), distinct=True),
-                app_annule=Count("appairages", filter=Q(appairages__statut=AppairageStatut.ANNULE), distinct=True),
-                app_a_faire=Count("appairages", filter=Q(appairages__statut=AppairageStatut.A_FAIRE), distinct=True),
-                app_contrat_a_signer=Count("appairages", filter=Q(appairages__statut=AppairageStatut.CONTRAT_A_SIGNER), distinct=True),
-                app_contrat_en_attente=Count("appairages", filter=Q(appairages__statut=AppairageStatut.CONTRAT_EN_ATTENTE), distinct=True),
-                app_appairage_ok=Count("appairages", filter=Q(appairages__statut=AppairageStatut.APPAIRAGE_OK), distinct=True),
-            ).order_by(*group_fields)
-        )
-
+        stats = _formation_stats(timezone.now().date())
+        only = [name for name in stats.metrics if name not in OVERVIEW_ONLY]
+        rows = stats.run(qs, [by], only=only).groups[by]
         for r in rows:
-            r["total_disponibles"] = int(r["total_dispo_crif"]) + int(r["total_dispo_mp"])
-            r["taux_saturation"] = self._pct(r["total_inscrits"], r["total_places"])
-            r["repartition_financeur"] = {
-                "crif": int(r["total_inscrits_crif"]),
-                "mp": int(r["total_inscrits_mp"]),
-                "crif_pct": self._pct(r["total_inscrits_crif"], r["total_inscrits"]),
-                "mp_pct": self._pct(r["total_inscrits_mp"], r["total_inscrits"]),
-            }
-
-        # Labels
-        if by == "formation":
-            for r in rows:
-                r["group_key"] = r.get("id")
-                r["group_label"] = r.get("nom") or (f"Formation #{r.get('id')}" if r.get("id") is not None else "—")
-        elif by == "centre":
-            for r in rows:
-                r["group_key"] = r.get("centre_id")
-                r["group_label"] = r.get("centre__nom") or (f"Centre #{r.get('centre_id')}" if r.get("centre_id") is not None else "—")
-        elif by == "departement":
-            for r in rows:
-                r["group_key"] = r.get("departement")
-                r["group_label"] = r.get("departement") or "—"
-        elif by in {"type_offre", "statut"}:
-            fk_field = Formation._meta.get_field(by)
-            model = fk_field.remote_field.model  # type: ignore[attr-defined]
-            ids = [r.get(f"{by}_id") for r in rows if r.get(f"{by}_id") is not None]
-            label_map = self._fk_label_map(model, ids)
-            for r in rows:
-                gid = r.get(f"{by}_id")
-                r["group_key"] = gid
-                r["group_label"] = label_map.get(gid, f"{by.replace('_', ' ').title()} #{gid}" if gid is not None else "—")
+            self._finalize(r)
 
         return Response({"group_by": by, "results": rows})
 
@@ -537,35 +444,10 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     # Metrics
     # ────────────────────────────────────────────────────────────
 
-    def _base_metrics(self, qs):
-        today = timezone.now().date()
-        agg = qs.aggregate(
-            # --- États des formations ---
-            nb_formations=Count("id"),
-            nb_actives=Count("id", filter=Q(start_date__lte=today, end_date__gte=today)),  # ← utilisé par le front
-            nb_a_venir=Count("id", filter=Q(start_date__gt=today)),
-            nb_terminees=Count("id", filter=Q(end_date__lt=today)),
-            nb_annulees=Count("id", filter=Q(statut__nom__icontains="annul")),
-            nb_archivees=Count("id", filter=Q(activite="archivee")),
-
-            # --- Agrégats places/inscriptions ---
-            total_places_crif=Coalesce(Sum("prevus_crif"), Value(0)),
-            total_places_mp=Coalesce(Sum("prevus_mp"), Value(0)),
-            total_inscrits_crif=Coalesce(Sum("inscrits_crif"), Value(0)),
-            total_inscrits_mp=Coalesce(Sum("inscrits_mp"), Value(0)),
-
-            total_places=Coalesce(Sum(F("prevus_crif") + F("prevus_mp")), Value(0)),
-            total_inscrits=Coalesce(Sum(F("inscrits_crif") + F("inscrits_mp")), Value(0)),
-
-            total_dispo_crif=Coalesce(
-                Sum(Greatest(F("prevus_crif") - F("inscrits_crif"), Value(0))), Value(0)
-            ),
-            total_dispo_mp=Coalesce(
-                Sum(Greatest(F("prevus_mp") - F("inscrits_mp"), Value(0))), Value(0)
-            ),
-        )
-
-        # --- Post-traitements ---
+    def _finalize(self, agg: dict) -> dict:
+        """Totaux dérivés (places, inscrits, disponibles, saturation, financeurs)."""
+        agg["total_places"] = agg["total_places_crif"] + agg["total_places_mp"]
+        agg["total_inscrits"] = agg["total_inscrits_crif"] + agg["total_inscrits_mp"]
         agg["total_disponibles"] = int(agg["total_dispo_crif"]) + int(agg["total_dispo_mp"])
         agg["taux_saturation"] = self._pct(agg["total_inscrits"], agg["total_places"])
         agg["repartition_financeur"] = {
@@ -584,56 +466,54 @@ class FormationStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     def filter_options(self, request):
         """Retourne les dictionnaires pour les filtres (centres, types d'offre, statuts, départements)."""
         try:
-            user = request.user
-
-            # 🔐 Déterminer le périmètre du staff
-            if self._is_admin_like(user):
-                qs_centre = Centre.objects.filter(is_active=True)
-            elif is_staff_or_staffread(user):
-                centre_ids = self._staff_centre_ids(user) or []
-                dep_codes = self._staff_departement_codes(user) or []
-
-                q = Q()
-                if centre_ids:
-                    q |= Q(id__in=centre_ids)
-                if dep_codes:
-                    for code in dep_codes:
-                        q |= Q(code_postal__startswith=code)
-                qs_centre = Centre.objects.filter(is_active=True).filter(q)
-            else:
-                # Non staff → aucun centre visible
-                qs_centre = Centre.objects.none()
-
-            qs_centre = qs_centre.order_by("nom")
-            qs_type = TypeOffre.objects.filter(is_active=True).order_by("nom")
-            qs_statut = Statut.objects.filter(is_active=True).order_by("nom")
-
-            # 🧠 Extraction des départements visibles
-            departements = (
-                qs_centre.exclude(code_postal__isnull=True)
-                .exclude(code_postal__exact="")
-                .annotate(
-                    dep=Substr(
-                        Coalesce("code_postal", Value("")),
-                        1,
-                        2,
-                        output_field=models.CharField(),
-                    )
-                )
-                .values_list("dep", flat=True)
-                .distinct()
-                .order_by("dep")
+            return self.cached_options_response(
+                request,
+                "filter-options",
+                lambda: self._build_filter_options(request),
+                depends_on=("Centre", "TypeOffre", "Statut"),
             )
 
-            data = {
-                "centresById": {str(c.id): c.nom for c in qs_centre},
-                "typeOffreById": {str(t.id): t.nom for t in qs_type},
-                "statutById": {str(s.id): s.nom for s in qs_statut},
-                "departements": list(departements),
-            }
-            return Response(data)
-
         except Exception as e:
             import traceback
             traceback.print_exc()
             return Response({"error": str(e)}, status=500)
+
+    def _build_filter_options(self, request):
+        user = request.user
+
+        # 🔐 Déterminer le périmètre du staff
+        if self._is_admin_like(user):
+            qs_centre = Centre.objects.filter(is_active=True)
+        elif is_staff_or_staffread(user):
+            centre_ids = self._staff_centre_ids(user) or []
+            dep_codes = self._staff_departement_codes(user) or []
+
+            q = Q()
+            if centre_ids:
+                q |= Q(id__in=centre_ids)
+            if dep_codes:
+                q |= Q(departement_code__in=dep_codes)
+            qs_centre = Centre.objects.filter(is_active=True).filter(q)
+        else:
+            # Non staff → aucun centre visible
+            qs_centre = Centre.objects.none()
+
+        qs_centre = qs_centre.order_by("nom")
+        qs_type = TypeOffre.objects.filter(is_active=True).order_by("nom")
+        qs_statut = Statut.objects.filter(is_active=True).order_by("nom")
+
+        # 🧠 Extraction des départements visibles
+        departements = (
+            qs_centre.exclude(departement_code="")
+            .values_list("departement_code", flat=True)
+            .distinct()
+            .order_by("departement_code")
+        )
+
+        data = {
+            "centresById": {str(c.id): c.nom for c in qs_centre},
+            "typeOffreById": {str(t.id): t.nom for t in qs_type},
+            "statutById": {str(s.id): s.nom for s in qs_statut},
+            "departements": list(departements),
+        }
+        return data
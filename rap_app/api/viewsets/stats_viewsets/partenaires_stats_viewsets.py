@@ -2,20 +2,106 @@
 from __future__ import annotations
 from ...serializers.base_serializers import EmptySerializer
 
-from collections import OrderedDict
-from typing import Dict, List, Tuple, Optional
+from typing import List, Tuple, Optional
 
-from django.db.models import Q, Count, IntegerField, Value, F, QuerySet
-from django.db.models.functions import Substr
+from django.db.models import Q, Value, F, QuerySet
+from django.db.models.functions import NullIf
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from ...permissions import is_staff_or_staffread
 
-from ....models.appairage import AppairageStatut
+from ....models.appairage import Appairage, AppairageStatut
 from ....models.partenaires import Partenaire
+from ....models.prospection import Prospection
 from ....models.prospection_choices import ProspectionChoices
+from ...stats_engine import Dimension, Metric, StatsQuery
+
+PROS_STATUS_PAIRS = [
+    ("a_faire", ProspectionChoices.STATUT_A_FAIRE),
+    ("en_cours", ProspectionChoices.STATUT_EN_COURS),
+    ("a_relancer", ProspectionChoices.STATUT_A_RELANCER),
+    ("acceptee", ProspectionChoices.STATUT_ACCEPTEE),
+    ("refusee", ProspectionChoices.STATUT_REFUSEE),
+    ("annulee", ProspectionChoices.STATUT_ANNULEE),
+    ("non_renseigne", ProspectionChoices.STATUT_NON_RENSEIGNE),
+]
+APP_STATUS_PAIRS = [
+    ("transmis", AppairageStatut.TRANSMIS),
+    ("en_attente", AppairageStatut.EN_ATTENTE),
+    ("accepte", AppairageStatut.ACCEPTE),
+    ("refuse", AppairageStatut.REFUSE),
+    ("annule", AppairageStatut.ANNULE),
+    ("a_faire", AppairageStatut.A_FAIRE),
+    ("contrat_a_signer", AppairageStatut.CONTRAT_A_SIGNER),
+    ("contrat_en_attente", AppairageStatut.CONTRAT_EN_ATTENTE),
+    ("appairage_ok", AppairageStatut.APPAIRAGE_OK),
+]
+# Clé de sortie des statuts d'appairage : préfixe 'app_' si déjà pris côté prospections (ex: 'a_faire')
+APP_STATUS_KEYS = {
+    key: (f"app_{key}" if key in dict(PROS_STATUS_PAIRS) else key) for key, _ in APP_STATUS_PAIRS
+}
+
+PARTENAIRE_DIMENSIONS = {
+    "type": Dimension("type"),
+    "secteur": Dimension("secteur_activite"),
+    "centre": Dimension(
+        "default_centre_id", columns=("default_centre__nom",),
+        label="default_centre__nom", fallback="Centre #{}",
+    ),
+    "departement": Dimension("departement", expression=NullIf(F("departement_code"), Value(""))),
+    "actions": Dimension("actions"),
+    # Une ligne par partenaire (tops)
+    "partenaire": Dimension("id", columns=("nom",), label="nom"),
+}
+
+
+def _partenaire_stats(pros_q: Q, app_q: Q) -> StatsQuery:
+    """
+    Métriques partenaires (list / grouped / tops) : les filtres de dates portent
+    sur les prospections / appairages liés, d'où une déclaration par requête.
+    """
+    return StatsQuery(
+        metrics={
+            "nb_partenaires": Metric("id", distinct=True),
+            "nb_avec_contact": Metric(
+                "id",
+                distinct=True,
+                filter=(
+                    (Q(contact_nom__isnull=False) & ~Q(contact_nom="")) |
+                    (Q(contact_email__isnull=False) & ~Q(contact_email="")) |
+                    (Q(contact_telephone__isnull=False) & ~Q(contact_telephone=""))
+                ),
+            ),
+            "nb_avec_web": Metric(
+                "id", distinct=True, filter=Q(website__isnull=False) | Q(social_network_url__isnull=False),
+            ),
+            "nb_avec_adresse": Metric(
+                "id",
+                distinct=True,
+                filter=Q(street_name__isnull=False) | Q(zip_code__isnull=False) | Q(city__isnull=False),
+            ),
+            "prospections_total": Metric("prospections__id", distinct=True, filter=pros_q),
+            "appairages_total": Metric("appairages__id", distinct=True, filter=app_q),
+            # formations liées via appairages + prospections
+            "nb_formations_app": Metric(
+                "appairages__formation", distinct=True, filter=app_q & Q(appairages__formation__isnull=False),
+            ),
+            "nb_formations_pros": Metric(
+                "prospections__formation", distinct=True, filter=pros_q & Q(prospections__formation__isnull=False),
+            ),
+            **{
+                key: Metric("prospections__id", distinct=True, filter=pros_q & Q(prospections__statut=val))
+                for key, val in PROS_STATUS_PAIRS
+            },
+            **{
+                APP_STATUS_KEYS[key]: Metric("appairages__id", distinct=True, filter=app_q & Q(appairages__statut=val))
+                for key, val in APP_STATUS_PAIRS
+            },
+        },
+        dimensions=PARTENAIRE_DIMENSIONS,
+    )
 
 
 class PartenaireStatsViewSet(viewsets.ViewSet):
@@ -24,6 +110,8 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
     /api/partenaire-stats/            -> overview (GET list)
     /api/partenaire-stats/grouped/    -> grouped by 'by' (GET)
     /api/partenaire-stats/tops/       -> tops (GET)
+
+    Chaque endpoint = une seule requête (`_partenaire_stats`, GROUPING SETS).
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -42,7 +130,7 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> List[str]:
@@ -86,8 +174,8 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
         Périmètre:
         - admin/superadmin → global
         - staff → union (OR) des centres assignés **OU** des départements,
-                    en considérant: Partenaire.default_centre, Partenaire.zip_code,
-                    Prospections.centre et Appairages.formation.centre.
+                    en considérant: Partenaire.default_centre, Partenaire.departement_code,
+                    Prospections.centre et Appairages.centre (semi-jointures `IN`, sans DISTINCT).
         - candidats/stagiaires → uniquement les partenaires liés à leurs prospections
         - autres → aucun accès
         """
@@ -107,18 +195,16 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
                 return qs.none()
 
             q = Q()
+            q_centre = Q()
             if centre_ids:
                 q |= Q(default_centre_id__in=centre_ids)
-                q |= Q(prospections__centre_id__in=centre_ids)
-                q |= Q(appairages__formation__centre_id__in=centre_ids)
+                q_centre |= Q(centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(zip_code__startswith=code)
-                    q_dep |= Q(prospections__centre__code_postal__startswith=code)
-                    q_dep |= Q(appairages__formation__centre__code_postal__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(departement_code__in=dep_codes)
+                q_centre |= Q(centre__departement_code__in=dep_codes)
+            q |= Q(pk__in=Prospection.objects.filter(q_centre, partenaire__isnull=False).values("partenaire_id"))
+            q |= Q(pk__in=Appairage.objects.filter(q_centre).values("partenaire_id"))
+            return qs.filter(q)
 
         # ✅ Cas candidat / stagiaire : uniquement ses partenaires via prospections
         if hasattr(user, "is_candidat_or_stagiaire") and user.is_candidat_or_stagiaire():
@@ -169,91 +255,22 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
     # ------------------------------
     def list(self, request):
         date_from, date_to = self._date_filters(request)
-        base_qs = self._base_qs(request)
-
-        pros_q = self._mk_pros_filters(date_from, date_to)
-        app_q = self._mk_app_filters(date_from, date_to)
-
-        # KPIs globaux
-        agg = base_qs.aggregate(
-            nb_partenaires=Count("id", distinct=True),
-            nb_avec_contact=Count(
-                "id",
-                distinct=True,
-                filter=(
-                    (Q(contact_nom__isnull=False) & ~Q(contact_nom="")) |
-                    (Q(contact_email__isnull=False) & ~Q(contact_email="")) |
-                    (Q(contact_telephone__isnull=False) & ~Q(contact_telephone=""))
-                ),
-            ),
-            nb_avec_web=Count(
-                "id",
-                distinct=True,
-                filter=Q(website__isnull=False) | Q(social_network_url__isnull=False),
-            ),
-            nb_avec_adresse=Count(
-                "id",
-                distinct=True,
-                filter=Q(street_name__isnull=False) | Q(zip_code__isnull=False) | Q(city__isnull=False),
-            ),
-            prospections_total=Count("prospections", distinct=True, filter=pros_q),
-            appairages_total=Count("appairages", distinct=True, filter=app_q),
-            # formations liées via appairages + prospections
-            nb_formations_app=Count(
-                "appairages__formation",
-                distinct=True,
-                filter=app_q & Q(appairages__formation__isnull=False),
-            ),
-            nb_formations_pros=Count(
-                "prospections__formation",
-                distinct=True,
-                filter=pros_q & Q(prospections__formation__isnull=False),
-            ),
+        stats = _partenaire_stats(
+            self._mk_pros_filters(date_from, date_to), self._mk_app_filters(date_from, date_to)
         )
-
-        nb_formations_liees = (agg.get("nb_formations_app") or 0) + (agg.get("nb_formations_pros") or 0)
-
-        # Détails par statut (prospections)
-        pros_status_map = OrderedDict([
-            ("a_faire", ProspectionChoices.STATUT_A_FAIRE),
-            ("en_cours", ProspectionChoices.STATUT_EN_COURS),
-            ("a_relancer", ProspectionChoices.STATUT_A_RELANCER),
-            ("acceptee", ProspectionChoices.STATUT_ACCEPTEE),
-            ("refusee", ProspectionChoices.STATUT_REFUSEE),
-            ("annulee", ProspectionChoices.STATUT_ANNULEE),
-            ("non_renseigne", ProspectionChoices.STATUT_NON_RENSEIGNE),
-        ])
-        pros_counts: Dict[str, int] = {}
-        for key, val in pros_status_map.items():
-            pros_counts[key] = base_qs.filter(pros_q & Q(prospections__statut=val)).values("prospections__id").distinct().count()
-
-        # Détails par statut (appairages)
-        app_status_map = OrderedDict([
-            ("transmis", AppairageStatut.TRANSMIS),
-            ("en_attente", AppairageStatut.EN_ATTENTE),
-            ("accepte", AppairageStatut.ACCEPTE),
-            ("refuse", AppairageStatut.REFUSE),
-            ("annule", AppairageStatut.ANNULE),
-            ("a_faire", AppairageStatut.A_FAIRE),
-            ("contrat_a_signer", AppairageStatut.CONTRAT_A_SIGNER),
-            ("contrat_en_attente", AppairageStatut.CONTRAT_EN_ATTENTE),
-            ("appairage_ok", AppairageStatut.APPAIRAGE_OK),
-        ])
-        app_counts: Dict[str, int] = {}
-        for key, val in app_status_map.items():
-            app_counts[key] = base_qs.filter(app_q & Q(appairages__statut=val)).values("appairages__id").distinct().count()
+        totals = stats.run(self._base_qs(request)).totals  # KPIs + détails par statut : 1 requête
 
         data = {
             "kpis": {
-                "nb_partenaires": agg.get("nb_partenaires") or 0,
-                "nb_avec_contact": agg.get("nb_avec_contact") or 0,
-                "nb_avec_web": agg.get("nb_avec_web") or 0,
-                "nb_avec_adresse": agg.get("nb_avec_adresse") or 0,
-                "nb_formations_liees": nb_formations_liees,
-                "prospections_total": agg.get("prospections_total") or 0,
-                "appairages_total": agg.get("appairages_total") or 0,
-                "prospections": pros_counts,
-                "appairages": app_counts,
+                "nb_partenaires": totals["nb_partenaires"],
+                "nb_avec_contact": totals["nb_avec_contact"],
+                "nb_avec_web": totals["nb_avec_web"],
+                "nb_avec_adresse": totals["nb_avec_adresse"],
+                "nb_formations_liees": totals["nb_formations_app"] + totals["nb_formations_pros"],
+                "prospections_total": totals["prospections_total"],
+                "appairages_total": totals["appairages_total"],
+                "prospections": {key: totals[key] for key, _ in PROS_STATUS_PAIRS},
+                "appairages": {key: totals[APP_STATUS_KEYS[key]] for key, _ in APP_STATUS_PAIRS},
             }
         }
         return Response(data)
@@ -270,96 +287,16 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
             by = "type"
 
         date_from, date_to = self._date_filters(request)
-        pros_q = self._mk_pros_filters(date_from, date_to)
-        app_q = self._mk_app_filters(date_from, date_to)
-
-        qs = self._base_qs(request)
-
-        # Group fields
-        group_fields: List[str] = []
-        if by == "type":
-            group_fields = ["type"]
-        elif by == "secteur":
-            group_fields = ["secteur_activite"]
-        elif by == "centre":
-            group_fields = ["default_centre_id", "default_centre__nom"]
-        elif by == "departement":
-            qs = qs.annotate(departement=Substr("zip_code", 1, 2))
-            group_fields = ["departement"]
-        elif by == "actions":
-            group_fields = ["actions"]
-
-        # Prospection status annotations
-        pros_status_pairs = [
-            ("a_faire", ProspectionChoices.STATUT_A_FAIRE),
-            ("en_cours", ProspectionChoices.STATUT_EN_COURS),
-            ("a_relancer", ProspectionChoices.STATUT_A_RELANCER),
-            ("acceptee", ProspectionChoices.STATUT_ACCEPTEE),
-            ("refusee", ProspectionChoices.STATUT_REFUSEE),
-            ("annulee", ProspectionChoices.STATUT_ANNULEE),
-            ("non_renseigne", ProspectionChoices.STATUT_NON_RENSEIGNE),
-        ]
-        pros_status_counts = {
-            key: Count("prospections", filter=pros_q & Q(prospections__statut=val), distinct=True)
-            for key, val in pros_status_pairs
-        }
-
-        # Appairage status annotations
-        app_status_pairs = [
-            ("transmis", AppairageStatut.TRANSMIS),
-            ("en_attente", AppairageStatut.EN_ATTENTE),
-            ("accepte", AppairageStatut.ACCEPTE),
-            ("refuse", AppairageStatut.REFUSE),
-            ("annule", AppairageStatut.ANNULE),
-            ("a_faire", AppairageStatut.A_FAIRE),
-            ("contrat_a_signer", AppairageStatut.CONTRAT_A_SIGNER),
-            ("contrat_en_attente", AppairageStatut.CONTRAT_EN_ATTENTE),
-            ("appairage_ok", AppairageStatut.APPAIRAGE_OK),
-        ]
-        app_status_counts_raw = {
-            key: Count("appairages", filter=app_q & Q(appairages__statut=val), distinct=True)
-            for key, val in app_status_pairs
-        }
-
-        # Fusion en évitant les doublons (ex: 'a_faire' existe dans les 2 familles)
-        annot_status = {**pros_status_counts}
-        for k, v in app_status_counts_raw.items():
-            key = k if k not in annot_status else f"app_{k}"
-            annot_status[key] = v
-
-        results = (
-            qs.values(*group_fields)
-            .annotate(
-                nb_partenaires=Count("id", distinct=True),
-                nb_avec_contact=Count(
-                    "id",
-                    distinct=True,
-                    filter=(
-                        (Q(contact_nom__isnull=False) & ~Q(contact_nom="")) |
-                        (Q(contact_email__isnull=False) & ~Q(contact_email="")) |
-                        (Q(contact_telephone__isnull=False) & ~Q(contact_telephone=""))
-                    ),
-                ),
-                nb_avec_web=Count(
-                    "id",
-                    distinct=True,
-                    filter=Q(website__isnull=False) | Q(social_network_url__isnull=False),
-                ),
-                nb_avec_adresse=Count(
-                    "id",
-                    distinct=True,
-                    filter=Q(street_name__isnull=False) | Q(zip_code__isnull=False) | Q(city__isnull=False),
-                ),
-                prospections_total=Count("prospections", distinct=True, filter=pros_q),
-                appairages_total=Count("appairages", distinct=True, filter=app_q),
-                **annot_status,
-            )
-            .order_by(*group_fields)
+        stats = _partenaire_stats(
+            self._mk_pros_filters(date_from, date_to), self._mk_app_filters(date_from, date_to)
         )
+        # Formations liées : compteurs réservés à l'overview
+        only = [name for name in stats.metrics if not name.startswith("nb_formations_")]
+        results = stats.run(self._base_qs(request), [by], only=only).groups[by]
 
         return Response({
             "by": by,
-            "results": list(results),
+            "results": results,
         })
 
     # ------------------------------
@@ -368,36 +305,18 @@ class PartenaireStatsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def tops(self, request):
         date_from, date_to = self._date_filters(request)
-        pros_q = self._mk_pros_filters(date_from, date_to)
-        app_q = self._mk_app_filters(date_from, date_to)
-
-        base_qs = self._base_qs(request)
-
-        # TOP par appairages
-        top_appairages = (
-            base_qs
-            .annotate(appairages_count=Count("appairages", distinct=True, filter=app_q))
-            .filter(appairages_count__gt=0)
-            .values("id", "nom", "appairages_count")
-            .order_by("-appairages_count", "nom")[:10]
+        stats = _partenaire_stats(
+            self._mk_pros_filters(date_from, date_to), self._mk_app_filters(date_from, date_to)
         )
-        top_appairages = [
-            {"id": r["id"], "nom": r["nom"], "count": r["appairages_count"]} for r in top_appairages
-        ]
-
-        # TOP par prospections
-        top_prospections = (
-            base_qs
-            .annotate(prospections_count=Count("prospections", distinct=True, filter=pros_q))
-            .filter(prospections_count__gt=0)
-            .values("id", "nom", "prospections_count")
-            .order_by("-prospections_count", "nom")[:10]
-        )
-        top_prospections = [
-            {"id": r["id"], "nom": r["nom"], "count": r["prospections_count"]} for r in top_prospections
-        ]
+        rows = stats.run(
+            self._base_qs(request), ["partenaire"], only=["appairages_total", "prospections_total"]
+        ).groups["partenaire"]  # les deux tops : 1 requête
+
+        def _top(metric: str):
+            ranked = sorted((r for r in rows if r[metric] > 0), key=lambda r: (-r[metric], r["nom"]))
+            return [{"id": r["id"], "nom": r["nom"], "count": r[metric]} for r in ranked[:10]]
 
         return Response({
-            "top_appairages": top_appairages,
-            "top_prospections": top_prospections,
-        })
\ No newline at end of file
+            "top_appairages": _top("appairages_total"),
+            "top_prospections": _top("prospections_total"),
+        })
@@ -1,7 +1,6 @@
 # rap_app/api/viewsets/prepa_stats_viewset.py
 
-from django.db.models import Sum, F, Value
-from django.db.models.functions import Substr, Coalesce
+from django.db.models import Sum
 from django.utils.timezone import localdate
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -27,6 +26,34 @@ from ....models.prepa import Prepa
 from ...permissions import IsPrepaStaffOrAbove
 from ...paginations import RapAppPagination
 from ...serializers.base_serializers import EmptySerializer
+from ...stats_engine import Dimension, Metric, StatsQuery
+
+
+# Cumuls des séances (grouped / resume) ; les objectifs restent une requête à part
+PREPA_STATS = StatsQuery(
+    metrics={
+        name: Metric(name, agg="sum")
+        for name in (
+            "nb_presents_info",
+            "nb_absents_info",
+            "nb_adhesions",
+            "nb_inscrits_prepa",
+            "nb_presents_prepa",
+            "nb_absents_prepa",
+            "nombre_prescriptions",
+            "nombre_places_ouvertes",
+        )
+    },
+    dimensions={
+        "centre": Dimension("centre_id", columns=("centre__nom",), label="centre__nom"),
+        "departement": Dimension("centre__departement_code"),
+        "type_prepa": Dimension("type_prepa"),
+    },
+)
+GROUPED_METRICS = (
+    "nb_presents_info", "nb_absents_info", "nb_adhesions",
+    "nb_inscrits_prepa", "nb_presents_prepa", "nb_absents_prepa",
+)
 
 
 # ==========================================================
@@ -149,11 +176,10 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
 
             # --- 2) Départements associés (seulement si aucun centre)
             departements = set()
-            if not centre_ids and hasattr(user, "centres") and user.centres.exists():
-                for c in user.centres.all():
-                    cp = getattr(c, "code_postal", "") or ""
-                    if len(cp) >= 2:
-                        departements.add(cp[:2])
+            if not centre_ids and hasattr(user, "centres"):
+                departements = set(
+                    user.centres.exclude(departement_code="").values_list("departement_code", flat=True)
+                )
 
             # --- 3) Filtre centre explicite → priorité
             if centre_param:
@@ -169,7 +195,7 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
 
             # --- 5) Scope fallback : départements
             elif departements:
-                qs = qs.filter(centre__code_postal__startswith=tuple(departements))
+                qs = qs.filter(centre__departement_code__in=departements)
 
             # --- 6) Sinon : aucun centre autorisé
             else:
@@ -251,48 +277,24 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         by = request.query_params.get("by", "centre")
         qs = self._filtered_qs(request)
 
-        # 🧩 Définition du champ de regroupement
-        if by == "centre":
-            qs = qs.annotate(
-                group_key=F("centre__nom"),
-                centre_id_ref=F("centre__id"),
-            )
-            group_fields = ["centre_id_ref", "group_key"]
-
-        elif by == "departement":
-            qs = qs.annotate(
-                group_key=Substr(Coalesce("centre__code_postal", Value("")), 1, 2)
-            )
-            group_fields = ["group_key"]
-
-        elif by == "type_prepa":
-            qs = qs.annotate(group_key=F("type_prepa"))
-            group_fields = ["group_key"]
-
-        else:
+        if by not in PREPA_STATS.dimensions:
             return Response(
                 {"detail": "Paramètre 'by' invalide. Valeurs possibles : centre, departement, type_prepa."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 🧮 Agrégations
-        data = (
-            qs.values(*group_fields)
-            .annotate(
-                nb_presents_info=Sum("nb_presents_info"),
-                nb_absents_info=Sum("nb_absents_info"),
-                nb_adhesions=Sum("nb_adhesions"),
-                nb_inscrits_prepa=Sum("nb_inscrits_prepa"),
-                nb_presents_prepa=Sum("nb_presents_prepa"),
-                nb_absents_prepa=Sum("nb_absents_prepa"),
-            )
-            .order_by("group_key")
-        )
+        # 🧮 Agrégations (une requête)
+        data = PREPA_STATS.run(qs, [by], only=GROUPED_METRICS).groups[by]
+        if by == "centre":
+            # Clé d'affichage = nom du centre (tri alphabétique)
+            for d in data:
+                d["group_key"] = d["centre__nom"]
+            data.sort(key=lambda d: (d["group_key"] is None, d["group_key"] or ""))
 
         results = []
         for d in data:
             key = d.get("group_key") or "—"
-            centre_id = d.get("centre_id_ref")
+            centre_id = d.get("centre_id")
 
             p_info = d["nb_presents_info"] or 0
             a_info = d["nb_absents_info"] or 0
@@ -362,8 +364,7 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         + taux présence IC, ateliers, prescriptions.
         Compatible avec filtres par département, centre, ou les deux.
         """
-        from django.db.models import Sum, Value
-        from django.db.models.functions import Substr, Coalesce
+        from django.db.models import Sum
         from django.utils.timezone import localdate
         from ....models.prepa import ObjectifPrepa, Prepa
         from ...roles import is_admin_like
@@ -386,7 +387,7 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
                 qs = qs.filter(centre__nom__icontains=str(centre_param).strip())
 
         if departement_param:
-            qs = qs.filter(centre__code_postal__startswith=str(departement_param).strip())
+            qs = qs.filter(centre__departement_code=str(departement_param).strip()[:2])
 
         # ------------------------------------------------------
         # 🎯 2) Objectifs accessibles selon le scope
@@ -402,19 +403,16 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
                     centre_ids.append(c.id)
 
             departements = set()
-            if hasattr(user, "centres") and user.centres.exists():
-                for c in user.centres.all():
-                    cp = getattr(c, "code_postal", "") or ""
-                    if len(cp) >= 2:
-                        departements.add(cp[:2])
+            if hasattr(user, "centres"):
+                departements = set(
+                    user.centres.exclude(departement_code="").values_list("departement_code", flat=True)
+                )
 
             objectifs_qs = ObjectifPrepa.objects.filter(annee=annee)
             if centre_ids:
                 objectifs_qs = objectifs_qs.filter(centre_id__in=centre_ids)
             elif departements:
-                objectifs_qs = objectifs_qs.filter(
-                    centre__code_postal__startswith=tuple(departements)
-                )
+                objectifs_qs = objectifs_qs.filter(centre__departement_code__in=departements)
             else:
                 objectifs_qs = ObjectifPrepa.objects.none()
 
@@ -427,14 +425,16 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
 
         elif departement_param:
             objectifs_qs = objectifs_qs.filter(
-                centre__code_postal__startswith=str(departement_param).strip()
+                centre__departement_code=str(departement_param).strip()[:2]
             )
 
         # ------------------------------------------------------
-        # 📊 3) Totaux et Taux Globaux
+        # 📊 3) Totaux et Taux Globaux (+ détails centre / département : 1 requête)
         # ------------------------------------------------------
         objectif_total = objectifs_qs.aggregate(total=Sum("valeur_objectif"))["total"] or 0
-        realise_total = qs.aggregate(total=Sum("nb_presents_prepa"))["total"] or 0
+        stats = PREPA_STATS.run(qs, ["centre", "departement"])
+        totals = stats.totals
+        realise_total = totals["nb_presents_prepa"]
 
         reste_a_faire_total = objectif_total - realise_total
         taux_atteinte_total = (
@@ -445,8 +445,8 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         # ----------------------------------------------
         # 🟦  PRESCRIPTIONS (IC)
         # ----------------------------------------------
-        nb_prescriptions = qs.aggregate(total=Sum("nombre_prescriptions"))["total"] or 0
-        places_ouvertes = qs.aggregate(total=Sum("nombre_places_ouvertes"))["total"] or 0
+        nb_prescriptions = totals["nombre_prescriptions"]
+        places_ouvertes = totals["nombre_places_ouvertes"]
 
         taux_prescription = (
             round(nb_prescriptions / places_ouvertes * 100, 1)
@@ -456,8 +456,8 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         # ----------------------------------------------
         # 🟩  PRÉSENCE INFORMATION COLLECTIVE
         # ----------------------------------------------
-        presents_info = qs.aggregate(total=Sum("nb_presents_info"))["total"] or 0
-        absents_info = qs.aggregate(total=Sum("nb_absents_info"))["total"] or 0
+        presents_info = totals["nb_presents_info"]
+        absents_info = totals["nb_absents_info"]
 
         taux_presence_ic = (
             round(presents_info / (presents_info + absents_info) * 100, 1)
@@ -467,8 +467,8 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         # ----------------------------------------------
         # 🟪  PRÉSENCE ATELIERS PRÉPA
         # ----------------------------------------------
-        presents_ateliers = qs.aggregate(total=Sum("nb_presents_prepa"))["total"] or 0
-        absents_ateliers = qs.aggregate(total=Sum("nb_absents_prepa"))["total"] or 0
+        presents_ateliers = totals["nb_presents_prepa"]
+        absents_ateliers = totals["nb_absents_prepa"]
 
         taux_presence_ateliers = (
             round(presents_ateliers / (presents_ateliers + absents_ateliers) * 100, 1)
@@ -478,32 +478,21 @@ class PrepaStatsViewSet(viewsets.ReadOnlyModelViewSet):
         # ------------------------------------------------------
         # 📌 4) Détail par centre
         # ------------------------------------------------------
-        par_centre_qs = (
-            qs.values("centre__id", "centre__nom")
-            .annotate(total=Sum("nb_presents_prepa"))
-            .order_by("centre__nom")
-        )
         par_centre = [
             {
-                "centre_id": r["centre__id"],
+                "centre_id": r["centre_id"],
                 "centre__nom": r["centre__nom"] or "—",
-                "total": r["total"] or 0,
+                "total": r["nb_presents_prepa"],
             }
-            for r in par_centre_qs
+            for r in sorted(stats.groups["centre"], key=lambda r: (r["centre__nom"] is None, r["centre__nom"] or ""))
         ]
 
         # ------------------------------------------------------
         # 📌 5) Détail par département
         # ------------------------------------------------------
-        par_departement_qs = (
-            qs.annotate(departement=Substr(Coalesce("centre__code_postal", Value("")), 1, 2))
-            .values("departement")
-            .annotate(total=Sum("nb_presents_prepa"))
-            .order_by("departement")
-        )
         par_departement = [
-            {"departement": r["departement"] or "—", "total": r["total"] or 0}
-            for r in par_departement_qs
+            {"departement": r["centre__departement_code"] or "—", "total": r["nb_presents_prepa"]}
+            for r in stats.groups["departement"]
         ]
 
         # ------------------------------------------------------
@@ -5,8 +5,8 @@ from ...serializers.base_serializers import EmptySerializer
 
 from typing import Optional
 
-from django.db.models import Q, Value, Count
-from django.db.models.functions import Coalesce, Substr
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils.dateparse import parse_date
 from django.utils import timezone
 
@@ -18,6 +18,7 @@ from rest_framework.response import Response
 from ...permissions import is_staff_or_staffread
 
 from ....models.prospection_comments import ProspectionComment
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 try:
     from ...permissions import IsOwnerOrStaffOrAbove  # type: ignore
@@ -32,6 +33,39 @@ except Exception:  # pragma: no cover
             return qs
 
 
+def _formation_label(row) -> str:
+    return (
+        f"{row.get('prospection__formation__nom') or '—'} "
+        f"(#{row.get('prospection__formation__num_offre') or '?'}, "
+        f"{row.get('prospection__formation__type_offre__nom') or '?'})"
+    )
+
+
+# Options des selects (grouped) : une requête par dimension
+PROSPECTION_COMMENT_STATS = StatsQuery(
+    metrics={"total": Metric("id")},
+    dimensions={
+        "centre": Dimension(
+            "prospection__centre_id", columns=("prospection__centre__nom",),
+            label="prospection__centre__nom", fallback="Centre #{}",
+        ),
+        "departement": Dimension(
+            "departement",
+            expression=Coalesce(NullIf(F("prospection__centre__departement_code"), Value("")), Value("NA")),
+        ),
+        "formation": Dimension(
+            "prospection__formation_id",
+            columns=(
+                "prospection__formation__nom",
+                "prospection__formation__num_offre",
+                "prospection__formation__type_offre__nom",
+            ),
+            label=_formation_label,
+        ),
+    },
+)
+
+
 class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     serializer_class = EmptySerializer
     """
@@ -43,7 +77,7 @@ class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet
       - date_from=YYYY-MM-DD (sur created_at)
       - date_to=YYYY-MM-DD
       - centre=<id>            (via prospection.centre)
-      - departement=<DD>       (via prospection.centre.code_postal ^ DD)
+      - departement=<DD>       (via prospection.centre.departement_code)
       - formation=<id>         (via prospection.formation)
       - partenaire=<id>        (via prospection.partenaire)
       - owner=<user id>        (via prospection.owner)
@@ -66,7 +100,7 @@ class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> list[str]:
@@ -116,11 +150,8 @@ class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet
             if centre_ids:
                 q |= Q(prospection__centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(prospection__centre__code_postal__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(prospection__centre__departement_code__in=dep_codes)
+            return qs.filter(q)
 
         # ✅ Cas candidat / stagiaire : uniquement ses propres commentaires visibles
         if hasattr(user, "is_candidat_or_stagiaire") and user.is_candidat_or_stagiaire():
@@ -169,7 +200,7 @@ class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet
         if p.get("centre"):
             qs = qs.filter(prospection__centre_id=p.get("centre"))
         if p.get("departement"):
-            qs = qs.filter(prospection__centre__code_postal__startswith=str(p.get("departement"))[:2])
+            qs = qs.filter(prospection__centre__departement_code=str(p.get("departement"))[:2])
         if p.get("formation"):
             qs = qs.filter(prospection__formation_id=p.get("formation"))
         if p.get("partenaire"):
@@ -282,50 +313,7 @@ class ProspectionCommentStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet
         params.pop(by, None)  # on supprime le filtre correspondant
 
         qs = self._apply_filters(self.get_queryset(), params)
-        qs = qs.annotate(
-            departement=Coalesce(Substr("prospection__centre__code_postal", 1, 2), Value("NA"))
-        )
-
-        if by == "centre":
-            group_fields = ["prospection__centre_id", "prospection__centre__nom"]
-        elif by == "formation":
-            group_fields = [
-                "prospection__formation_id",
-                "prospection__formation__nom",
-                "prospection__formation__num_offre",
-                "prospection__formation__type_offre__nom",
-            ]
-        else:  # departement
-            group_fields = ["departement"]
-
-        rows = list(
-            qs.values(*group_fields)
-              .annotate(total=Count("id"))
-              .order_by(*group_fields)
-        )
-
-        results = []
-        for r in rows:
-            if by == "centre":
-                key = r.get("prospection__centre_id")
-                label = r.get("prospection__centre__nom") or (f"Centre #{key}" if key is not None else "—")
-            elif by == "formation":
-                key = r.get("prospection__formation_id")
-                label = (
-                    f"{r.get('prospection__formation__nom') or '—'} "
-                    f"(#{r.get('prospection__formation__num_offre') or '?'}, "
-                    f"{r.get('prospection__formation__type_offre__nom') or '?'})"
-                )
-            else:
-                key = r.get("departement")
-                label = key or "—"
-
-            results.append({
-                **r,
-                "group_key": key,
-                "group_label": label,
-                "total": int(r.get("total") or 0),
-            })
+        results = PROSPECTION_COMMENT_STATS.run(qs, [by]).groups[by]
 
         return Response({
             "group_by": by,
@@ -19,7 +19,7 @@ Filtres (query params, tous optionnels) :
     - date_from=YYYY-MM-DD       (date_prospection >= …)
     - date_to=YYYY-MM-DD         (date_prospection <= …)
     - centre=<id>
-    - departement=<DD>           (sur Centre.code_postal commence par DD)
+    - departement=<DD>           (sur Centre.departement_code, indexé)
     - formation=<id>
     - partenaire=<id>
     - owner=<user_id>
@@ -34,6 +34,8 @@ Notes :
     • KPIs : total, actives, à relancer, acceptées, refusées, annulées, par statut/motif/objectif/moyen,
              + taux_acceptation (% acceptées / total).
     • `group_label` renvoyé pour tous les regroupements.
+    • Chaque endpoint = une seule requête (moteur `stats_engine`, GROUPING SETS) :
+      l'overview calcule KPIs et 5 répartitions en un aller-retour.
     • Quand `by=formation`, les champs suivants sont aussi renvoyés :
         - formation__num_offre
         - formation__centre__nom
@@ -43,9 +45,8 @@ Notes :
 from typing import Literal, Optional
 
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Count, Q, Value, F
-from django.db.models.functions import Coalesce, Substr
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 
@@ -55,6 +56,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from ...permissions import is_staff_or_staffread
+from ...stats_engine import Dimension, Metric, StatsQuery
 
 try:
     # Si dispo, on réutilise vos permissions/mixins
@@ -85,6 +87,79 @@ GroupKey = Literal[
 ]
 
 
+TERMINAUX = [
+    ProspectionChoices.STATUT_REFUSEE,
+    ProspectionChoices.STATUT_ANNULEE,
+]
+
+
+def _owner_label(row) -> str:
+    rid = row.get("owner_id")
+    fullname = f"{(row.get('owner__first_name') or '').strip()} {(row.get('owner__last_name') or '').strip()}".strip()
+    fallback = row.get("owner__email") or row.get("owner__username")
+    return fullname or fallback or (f"Utilisateur #{rid}" if rid is not None else "—")
+
+
+PROSPECTION_DIMENSIONS = {
+    "centre": Dimension("centre_id", columns=("centre__nom",), label="centre__nom", fallback="Centre #{}"),
+    "departement": Dimension(
+        "departement", expression=Coalesce(NullIf(F("centre__departement_code"), Value("")), Value("NA")),
+    ),
+    "owner": Dimension(
+        "owner_id",
+        columns=("owner__first_name", "owner__last_name", "owner__email", "owner__username"),
+        label=_owner_label,
+    ),
+    # ↓↓↓ `formation__num_offre` & `formation__centre__nom` renvoyés avec la clé
+    "formation": Dimension(
+        "formation_id", columns=("formation__nom", "formation__num_offre", "formation__centre__nom"),
+        label="formation__nom", fallback="Formation #{}",
+    ),
+    "partenaire": Dimension(
+        "partenaire_id", columns=("partenaire__nom",), label="partenaire__nom", fallback="Partenaire #{}",
+    ),
+    "statut": Dimension("statut", label=ProspectionChoices.get_statut_labels()),
+    "objectif": Dimension("objectif"),
+    "motif": Dimension("motif"),
+    "type": Dimension("type_prospection"),
+    "moyen_contact": Dimension("moyen_contact"),
+}
+
+# Répartitions de l'overview : clé du payload → dimension
+REPARTITIONS = {
+    "par_statut": "statut",
+    "par_objectif": "objectif",
+    "par_motif": "motif",
+    "par_type": "type",
+    "par_moyen_contact": "moyen_contact",
+}
+
+
+def prospection_stats(today) -> StatsQuery:
+    """Métriques Prospection (la relance dépend du jour) × dimensions déclarées une fois."""
+    par_statut = {
+        "acceptees": ProspectionChoices.STATUT_ACCEPTEE,
+        "refusees": ProspectionChoices.STATUT_REFUSEE,
+        "annulees": ProspectionChoices.STATUT_ANNULEE,
+        "en_cours": ProspectionChoices.STATUT_EN_COURS,
+        "a_faire": ProspectionChoices.STATUT_A_FAIRE,
+        "a_relancer_statut": ProspectionChoices.STATUT_A_RELANCER,
+        "non_renseigne": ProspectionChoices.STATUT_NON_RENSEIGNE,
+    }
+    return StatsQuery(
+        metrics={
+            "total": Metric("id"),
+            "actives": Metric("id", filter=~Q(statut__in=TERMINAUX)),
+            "a_relancer": Metric(
+                "id",
+                filter=Q(relance_prevue__isnull=False, relance_prevue__lte=today) & ~Q(statut__in=TERMINAUX),
+            ),
+            **{name: Metric("id", filter=Q(statut=code)) for name, code in par_statut.items()},
+        },
+        dimensions=PROSPECTION_DIMENSIONS,
+    )
+
+
 class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     serializer_class = EmptySerializer
     """Vue d’agrégats/KPI sur **Prospection** (JSON only)."""
@@ -109,7 +184,7 @@ class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if self._is_admin_like(user):
             return None
         if is_staff_or_staffread(user) and hasattr(user, "centres"):
-            return list(user.centres.values_list("id", flat=True))
+            return user.get_centre_ids()
         return []
 
     def _staff_departement_codes(self, user) -> list[str]:
@@ -166,11 +241,8 @@ class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             if centre_ids:
                 q |= Q(centre_id__in=centre_ids)
             if dep_codes:
-                q_dep = Q()
-                for code in dep_codes:
-                    q_dep |= Q(centre__code_postal__startswith=code)
-                q |= q_dep
-            return qs.filter(q).distinct()
+                q |= Q(centre__departement_code__in=dep_codes)
+            return qs.filter(q)
 
         # ✅ Cas candidat/stagiaire → uniquement ses propres prospections
         if hasattr(user, "is_candidat_or_stagiaire") and user.is_candidat_or_stagiaire():
@@ -220,7 +292,7 @@ class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
         if p.get("centre"):
             qs = qs.filter(centre_id=p.get("centre"))
         if p.get("departement"):
-            qs = qs.filter(centre__code_postal__startswith=str(p.get("departement"))[:2])
+            qs = qs.filter(centre__departement_code=str(p.get("departement"))[:2])
         if p.get("formation"):
             qs = qs.filter(formation_id=p.get("formation"))
         if p.get("partenaire"):
@@ -266,58 +338,27 @@ class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
     # ────────────────────────────────────────────────────────────
     def list(self, request, *args, **kwargs):
         qs = self._apply_common_filters(self.get_queryset())
-        today = timezone.now().date()
-
-        TERMINAUX = [
-            ProspectionChoices.STATUT_REFUSEE,
-            ProspectionChoices.STATUT_ANNULEE,
-        ]
-
-        agg = qs.aggregate(
-            total=Count("id"),
-            actives=Count("id", filter=~Q(statut__in=TERMINAUX)),
-            a_relancer=Count(
-                "id",
-                filter=Q(relance_prevue__isnull=False, relance_prevue__lte=today) & ~Q(statut__in=TERMINAUX),
-            ),
-            acceptees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_ACCEPTEE)),
-            refusees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_REFUSEE)),
-            annulees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_ANNULEE)),
-            en_cours=Count("id", filter=Q(statut=ProspectionChoices.STATUT_EN_COURS)),
-            a_faire=Count("id", filter=Q(statut=ProspectionChoices.STATUT_A_FAIRE)),
-            a_relancer_statut=Count("id", filter=Q(statut=ProspectionChoices.STATUT_A_RELANCER)),
-            non_renseigne=Count("id", filter=Q(statut=ProspectionChoices.STATUT_NON_RENSEIGNE)),
-        )
 
+        # KPIs + 5 répartitions : une seule requête (GROUPING SETS)
+        stats = prospection_stats(timezone.now().date()).run(qs, REPARTITIONS.values())
+        agg = stats.totals
         taux_acceptation = self._pct(agg.get("acceptees"), agg.get("total"))
 
-        # Répartition par statut (clé = code, label = texte)
-        by_statut_qs = qs.values("statut").annotate(count=Count("id")).order_by("statut")
-        statut_labels = ProspectionChoices.get_statut_labels()
-        by_statut = [
-            {
-                "code": r["statut"],
-                "label": statut_labels.get(r["statut"], r["statut"]),
-                "count": r["count"],
-            }
-            for r in by_statut_qs
-        ]
-
-        # Répartitions additionnelles
-        by_objectif = list(qs.values("objectif").annotate(count=Count("id")).order_by("objectif"))
-        by_motif = list(qs.values("motif").annotate(count=Count("id")).order_by("motif"))
-        by_type = list(qs.values("type_prospection").annotate(count=Count("id")).order_by("type_prospection"))
-        by_moyen = list(qs.values("moyen_contact").annotate(count=Count("id")).order_by("moyen_contact"))
+        repartition = {}
+        for name, dimension in REPARTITIONS.items():
+            rows = stats.groups[dimension]
+            if dimension == "statut":
+                # Répartition par statut (clé = code, label = texte)
+                repartition[name] = [
+                    {"code": r["statut"], "label": r["group_label"], "count": r["total"]} for r in rows
+                ]
+            else:
+                key = PROSPECTION_DIMENSIONS[dimension].key
+                repartition[name] = [{key: r[key], "count": r["total"]} for r in rows]
 
         payload = {
-            "kpis": {**{k: int(v or 0) for k, v in agg.items()}, "taux_acceptation": taux_acceptation},
-            "repartition": {
-                "par_statut": by_statut,
-                "par_objectif": by_objectif,
-                "par_motif": by_motif,
-                "par_type": by_type,
-                "par_moyen_contact": by_moyen,
-            },
+            "kpis": {**agg, "taux_acceptation": taux_acceptation},
+            "repartition": repartition,
             "filters_echo": {k: v for k, v in request.query_params.items()},
         }
         return Response(payload)
@@ -333,96 +374,10 @@ class ProspectionStatsViewSet(RestrictToUserOwnedQueryset, GenericViewSet):
             return Response({"detail": "Paramètre 'by' invalide."}, status=400)
 
         qs = self._apply_common_filters(self.get_queryset())
-        today = timezone.now().date()
-        TERMINAUX = [ProspectionChoices.STATUT_REFUSEE, ProspectionChoices.STATUT_ANNULEE]
-
-        # Pré-annot departement
-        qs = qs.annotate(departement=Coalesce(Substr("centre__code_postal", 1, 2), Value("NA")))
-
-        group_fields_map = {
-            "centre": ["centre_id", "centre__nom"],
-            "departement": ["departement"],
-            "owner": ["owner_id", "owner__first_name", "owner__last_name", "owner__email", "owner__username"],
-            # ↓↓↓ Ajout des champs formation__num_offre & formation__centre__nom
-            "formation": ["formation_id", "formation__nom", "formation__num_offre", "formation__centre__nom"],
-            "partenaire": ["partenaire_id", "partenaire__nom"],
-            "statut": ["statut"],
-            "objectif": ["objectif"],
-            "motif": ["motif"],
-            "type": ["type_prospection"],
-        }
-        group_fields = group_fields_map[by]
-
-        rows = list(
-            qs.values(*group_fields).annotate(
-                total=Count("id"),
-                actives=Count("id", filter=~Q(statut__in=TERMINAUX)),
-                a_relancer=Count(
-                    "id",
-                    filter=Q(relance_prevue__isnull=False, relance_prevue__lte=today) & ~Q(statut__in=TERMINAUX),
-                ),
-                acceptees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_ACCEPTEE)),
-                refusees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_REFUSEE)),
-                annulees=Count("id", filter=Q(statut=ProspectionChoices.STATUT_ANNULEE)),
-                en_cours=Count("id", filter=Q(statut=ProspectionChoices.STATUT_EN_COURS)),
-                a_faire=Count("id", filter=Q(statut=ProspectionChoices.STATUT_A_FAIRE)),
-                a_relancer_statut=Count("id", filter=Q(statut=ProspectionChoices.STATUT_A_RELANCER)),
-                non_renseigne=Count("id", filter=Q(statut=ProspectionChoices.STATUT_NON_RENSEIGNE)),
-            ).order_by(*group_fields)
-        )
+        rows = prospection_stats(timezone.now().date()).run(qs, [by]).groups[by]
 
-        # Labels clairs + taux_acceptation par ligne
+        # Taux de transformation par ligne (libellés déjà résolus par le moteur)
         for r in rows:
-            if by == "centre":
-                r["group_key"] = r.get("centre_id")
-                r["group_label"] = (
-                    r.get("centre__nom")
-                    or (f"Centre #{r.get('centre_id')}" if r.get("centre_id") is not None else "—")
-                )
-            elif by == "departement":
-                r["group_key"] = r.get("departement")
-                r["group_label"] = r.get("departement") or "—"
-            elif by == "owner":
-                rid = r.get("owner_id")
-                fname = (r.get("owner__first_name") or "").strip()
-                lname = (r.get("owner__last_name") or "").strip()
-                fullname = f"{fname} {lname}".strip()
-                fallback = r.get("owner__email") or r.get("owner__username")
-                r["group_key"] = rid
-                r["group_label"] = fullname or fallback or (f"Utilisateur #{rid}" if rid is not None else "—")
-            elif by == "formation":
-                r["group_key"] = r.get("formation_id")
-                r["group_label"] = (
-                    r.get("formation__nom")
-                    or (f"Formation #{r.get('formation_id')}" if r.get("formation_id") is not None else "—")
-                )
-                # rien à faire de plus : `formation__num_offre` et `formation__centre__nom`
-                # sont déjà présents dans le payload via .values(...)
-            elif by == "partenaire":
-                r["group_key"] = r.get("partenaire_id")
-                r["group_label"] = (
-                    r.get("partenaire__nom")
-                    or (f"Partenaire #{r.get('partenaire_id')}" if r.get("partenaire_id") is not None else "—")
-                )
-            elif by == "statut":
-                code = r.get("statut")
-                label = ProspectionChoices.get_statut_labels().get(code, code)
-                r["group_key"] = code
-                r["group_label"] = label or (code or "—")
-            elif by == "objectif":
-                code = r.get("objectif")
-                r["group_key"] = code
-                r["group_label"] = code or "—"
-            elif by == "motif":
-                code = r.get("motif")
-                r["group_key"] = code
-                r["group_label"] = code or "—"
-            elif by == "type":
-                code = r.get("type_prospection")
-                r["group_key"] = code
-                r["group_label"] = code or "—"
-
-            # Taux de transformation par ligne
             r["taux_acceptation"] = self._pct(r.get("acceptees"), r.get("total"))
 
-        return Response({"group_by": by, "results": rows})
\ No newline at end of file
+        return Response({"group_by": by, "results": rows})
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+"""
+ViewSet DRF — Statistiques VAE / Jurys
+--------------------------------------
+
+Endpoints :
+    GET /vae-stats/          → entonnoir par statut, durées par statut, jurys mensuels
+
+Filtres (query params, tous optionnels) :
+    - date_from=YYYY-MM-DD   (VAE.created_at >= …)
+    - date_to=YYYY-MM-DD     (VAE.created_at <= …)
+    - centre=<id>
+    - annee=YYYY             (jurys ; défaut : année en cours)
+
+Notes :
+    • Périmètre staff : centres affectés ; admin = global.
+    • Nombre de requêtes constant (3) quel que soit le volume :
+        - entonnoir : un GROUP BY statut ;
+        - durées : une lecture de l'historique avec LEAD() sur la partition
+          de chaque VAE (fin d'un statut = début du suivant, ou aujourd'hui) ;
+        - jurys : un GROUP BY (annee, mois) sur SuiviJury.
+    • Médiane / p75 / p90 calculés sur ces intervalles (rang le plus proche).
+    • Mis en cache par périmètre (invalidé à chaque écriture VAE / historique / jury).
+"""
+
+import math
+import statistics
+from typing import Optional
+
+from django.db.models import F, Window
+from django.db.models.functions import Lead
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.viewsets import GenericViewSet
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from ...serializers.base_serializers import EmptySerializer
+from ...mixins import CachedOptionsMixin
+from ...permissions import IsStaffOrAbove
+from ...roles import is_admin_like, staff_centre_ids
+from ...stats_engine import Dimension, Metric, StatsQuery
+from ....models.jury import SuiviJury
+from ....models.vae import VAE, HistoriqueStatutVAE
+
+# Entonnoir (comptes par statut) et jurys (cumuls par mois) : déclarés une fois
+VAE_STATS = StatsQuery(metrics={"count": Metric("id")}, dimensions={"statut": Dimension("statut")})
+JURY_STATS = StatsQuery(
+    metrics={
+        "objectif": Metric("objectif_jury", agg="sum"),
+        "realises": Metric("jurys_realises", agg="sum"),
+    },
+    dimensions={"mois": Dimension("mois")},
+)
+
+
+def _parse_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(values, pct):
+    """Percentile par rang le plus proche (valeurs déjà triées)."""
+    if not values:
+        return None
+    k = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[k]
+
+
+def _pct(num, den) -> float:
+    return round(num * 100.0 / den, 2) if den else 0.0
+
+
+@extend_schema(tags=["VAE"])
+class VAEStatsViewSet(CachedOptionsMixin, GenericViewSet):
+    """Vue d’agrégats/KPI sur **VAE** et **SuiviJury** (JSON only)."""
+
+    serializer_class = EmptySerializer
+    permission_classes = [IsStaffOrAbove]
+    cache_depends_on = ("VAE", "HistoriqueStatutVAE", "SuiviJury")
+
+    # ────────────────────────────────────────────────────────────
+    # Périmètre & filtres
+    # ────────────────────────────────────────────────────────────
+    def _centre_ids(self, request) -> Optional[list[int]]:
+        """None → global (admin) ; liste → centres autorisés (éventuellement filtrés)."""
+        user = request.user
+        allowed = None if is_admin_like(user) else list(staff_centre_ids(user) or [])
+        centre = _parse_int(request.query_params.get("centre"))
+        if centre is None:
+            return allowed
+        if allowed is not None and centre not in allowed:
+            return []
+        return [centre]
+
+    def _vae_filters(self, request, prefix: str = "") -> dict:
+        filters = {f"{prefix}is_active": True}
+        centre_ids = self._centre_ids(request)
+        if centre_ids is not None:
+            filters[f"{prefix}centre_id__in"] = centre_ids
+        date_from = parse_date(request.query_params.get("date_from") or "")
+        date_to = parse_date(request.query_params.get("date_to") or "")
+        if date_from:
+            filters[f"{prefix}created_at__date__gte"] = date_from
+        if date_to:
+            filters[f"{prefix}created_at__date__lte"] = date_to
+        return filters
+
+    # ────────────────────────────────────────────────────────────
+    # Calculs
+    # ────────────────────────────────────────────────────────────
+    def _funnel(self, request) -> dict:
+        stats = VAE_STATS.run(VAE.objects.filter(**self._vae_filters(request)), ["statut"])
+        counts = {r["statut"]: r["count"] for r in stats.groups["statut"]}
+        total = stats.totals["count"]
+        etapes = [
+            {
+                "statut": code,
+                "libelle": str(label),
+                "count": counts.get(code, 0),
+                "pct": _pct(counts.get(code, 0), total),
+            }
+            for code, label in VAE.STATUT_CHOICES
+        ]
+        return {
+            "total": total,
+            "en_cours": sum(counts.get(s, 0) for s in VAE.STATUTS_EN_COURS),
+            "terminees": counts.get("terminee", 0),
+            "abandonnees": counts.get("abandonnee", 0),
+            "taux_reussite": _pct(counts.get("terminee", 0), sum(counts.get(s, 0) for s in VAE.STATUTS_TERMINES)),
+            "etapes": etapes,
+        }
+
+    def _durees(self, request) -> list[dict]:
+        """Durée (jours) passée dans chaque statut, tous intervalles confondus."""
+        today = timezone.localdate()
+        intervalles = (
+            HistoriqueStatutVAE.objects.filter(is_active=True, **self._vae_filters(request, prefix="vae__"))
+            .annotate(
+                fin=Window(
+                    Lead("date_changement_effectif"),
+                    partition_by=[F("vae_id")],
+                    order_by=[F("date_changement_effectif").asc(), F("created_at").asc(), F("id").asc()],
+                )
+            )
+            .order_by()
+            .values_list("statut", "date_changement_effectif", "fin")
+        )
+
+        par_statut: dict[str, list[int]] = {}
+        en_cours: dict[str, int] = {}
+        for statut, debut, fin in intervalles:
+            par_statut.setdefault(statut, []).append(((fin or today) - debut).days)
+            if fin is None:
+                en_cours[statut] = en_cours.get(statut, 0) + 1
+
+        out = []
+        for code, label in VAE.STATUT_CHOICES:
+            if code in VAE.STATUTS_TERMINES:
+                continue  # statut final : pas de « temps passé »
+            durees = sorted(par_statut.get(code, []))
+            out.append({
+                "statut": code,
+                "libelle": str(label),
+                "intervalles": len(durees),
+                "en_cours": en_cours.get(code, 0),
+                "moyenne_jours": round(statistics.fmean(durees), 1) if durees else None,
+                "mediane_jours": statistics.median(durees) if durees else None,
+                "p75_jours": _percentile(durees, 75),
+                "p90_jours": _percentile(durees, 90),
+            })
+        return out
+
+    def _jurys(self, request) -> dict:
+        annee = _parse_int(request.query_params.get("annee")) or timezone.localdate().year
+        filters = {"is_active": True, "annee": annee}
+        centre_ids = self._centre_ids(request)
+        if centre_ids is not None:
+            filters["centre_id__in"] = centre_ids
+
+        rows = JURY_STATS.run(SuiviJury.objects.filter(**filters), ["mois"]).groups["mois"]
+        par_mois = {r["mois"]: r for r in rows}
+
+        mois = []
+        cumul_objectif = cumul_realises = 0
+        for num, label in SuiviJury.MOIS_CHOICES:
+            r = par_mois.get(num, {})
+            objectif, realises = r.get("objectif") or 0, r.get("realises") or 0
+            cumul_objectif += objectif
+            cumul_realises += realises
+            mois.append({
+                "mois": num,
+                "libelle": str(label),
+                "objectif": objectif,
+                "realises": realises,
+                "ecart": realises - objectif,
+                "pourcentage": _pct(realises, objectif),
+                "cumul_objectif": cumul_objectif,
+                "cumul_realises": cumul_realises,
+                "cumul_pourcentage": _pct(cumul_realises, cumul_objectif),
+            })
+
+        return {
+            "annee": annee,
+            "objectif": cumul_objectif,
+            "realises": cumul_realises,
+            "pourcentage": _pct(cumul_realises, cumul_objectif),
+            "mois": mois,
+        }
+
+    # ────────────────────────────────────────────────────────────
+    # Endpoint
+    # ────────────────────────────────────────────────────────────
+    @extend_schema(
+        summary="📊 Statistiques VAE / jurys",
+        parameters=[
+            OpenApiParameter("date_from", str, description="VAE créées depuis (AAAA-MM-JJ)"),
+            OpenApiParameter("date_to", str, description="VAE créées jusqu’au (AAAA-MM-JJ)"),
+            OpenApiParameter("centre", int, description="Centre"),
+            OpenApiParameter("annee", int, description="Année des jurys (défaut : année en cours)"),
+        ],
+    )
+    def list(self, request):
+        return self.cached_options_response(
+            request,
+            "overview",
+            lambda: {
+                "entonnoir": self._funnel(request),
+                "durees_statut": self._durees(request),
+                "jurys": self._jurys(request),
+            },
+            depends_on=self.cache_depends_on,
+        )
@@ -6,6 +6,7 @@ from rest_framework.decorators import action
 
 from ...models.statut import calculer_couleur_texte, get_default_color, Statut
 from ..serializers.statut_serializers import StatutChoiceSerializer, StatutSerializer
+from ..mixins import ConditionalGetMixin
 from ...api.permissions import IsAdmin, IsStaffOrAbove, ReadOnlyOrAdmin
 
 logger = logging.getLogger("application.statut")
@@ -45,7 +46,7 @@ logger = logging.getLogger("application.statut")
         responses={204: OpenApiResponse(description="Suppression réussie")}
     ),
 )
-class StatutViewSet(viewsets.ModelViewSet):
+class StatutViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     🎯 API REST pour la gestion des statuts de formation.
     Permet la création, consultation, mise à jour et désactivation logique.
@@ -54,6 +55,9 @@ class StatutViewSet(viewsets.ModelViewSet):
     serializer_class = StatutSerializer
     permission_classes = [IsStaffOrAbove]
 
+    # 🔁 GET conditionnel : référentiel rarement modifié
+    conditional_cache_control = "private, max-age=60"
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
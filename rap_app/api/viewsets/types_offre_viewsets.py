@@ -9,6 +9,7 @@ from ...api.serializers.types_offre_serializers import TypeOffreChoiceSerializer
 from ...models.types_offre import TypeOffre
 
 from ...models.logs import LogUtilisateur
+from ..mixins import ConditionalGetMixin
 from ..permissions import ReadWriteAdminReadStaff
 from ..paginations import RapAppPagination
 
@@ -45,7 +46,7 @@ from ..paginations import RapAppPagination
         responses={204: OpenApiResponse(description="Suppression réussie.")},
     ),
 )
-class TypeOffreViewSet(viewsets.ModelViewSet):
+class TypeOffreViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     🎯 ViewSet complet pour les types d'offres.
     CRUD + journalisation + pagination + permissions + Swagger.
@@ -58,6 +59,9 @@ class TypeOffreViewSet(viewsets.ModelViewSet):
     ordering_fields = ["nom", "created_at"]
     search_fields = ["nom", "autre"]
 
+    # 🔁 GET conditionnel : référentiel rarement modifié
+    conditional_cache_control = "private, max-age=60"
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
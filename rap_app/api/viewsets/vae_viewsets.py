@@ -4,7 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from ...models.vae import VAE, HistoriqueStatutVAE
+from ...models.vae import VAE, HistoriqueStatutVAE, annotate_dernier_changement
 from ...models.centres import Centre
 
 # Permissions, pagination, log
@@ -31,6 +31,9 @@ class VAEViewSet(viewsets.ModelViewSet):
     permission_classes = [IsStaffOrAbove]
     pagination_class = RapAppPagination
 
+    def get_queryset(self):
+        return annotate_dernier_changement(super().get_queryset().select_related("centre"))
+
     @extend_schema(summary="Créer une VAE")
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
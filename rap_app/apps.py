@@ -20,5 +20,11 @@ class RapAppConfig(AppConfig):
         import rap_app.signals.statut_signals
         import rap_app.signals.appairage_signals
         import rap_app.signals.candidats_signals
+        import rap_app.signals.users_signals
+        import rap_app.signals.apercus_signals  # miniatures documents / CV
+        import rap_app.signals.cv_texte_signals  # texte intégral des CV
+        import rap_app.signals.blobs_signals  # références des fichiers dédupliqués
+        import rap_app.utils.db  # métriques de connexions DB
+        import rap_app.checks  # cache partagé obligatoire hors dev
         
 
@@ -0,0 +1,30 @@
+# rap_app/checks.py
+
+"""
+✅ Vérifications au démarrage (`manage.py check`, `runserver`, `migrate`…).
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register(Tags.caches)
+def check_cache_partage(app_configs, **kwargs):
+    """
+    Les versions de cache (options, méta, ETag des listes, authentification)
+    doivent être partagées entre workers : avec locmem, chaque processus a les
+    siennes (options périmées, 304 servis à tort).
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend != LOCMEM_BACKEND or getattr(settings, "CACHE_LOCMEM_AUTORISE", False):
+        return []
+    return [
+        Error(
+            "Le cache par défaut est locmem : les versions de cache ne sont pas partagées entre workers.",
+            hint="Définir CACHE_BACKEND=file ou redis (ou CACHE_LOCMEM_AUTORISE=True pour un processus unique).",
+            obj="CACHES['default']",
+            id="rap_app.E001",
+        )
+    ]
@@ -1,4 +1,5 @@
 # app/management/commands/backfill_candidate_users.py
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 from django.contrib.auth.hashers import make_password
 from django.utils.crypto import get_random_string
@@ -9,6 +10,8 @@ from ...signals.candidats_signals import ensure_candidat_record
 
 from ...models.candidat import Candidat
 from ...models.custom_user import CustomUser
+from ...models.logs import LogUtilisateur
+from ...utils.bulk_writer import BulkWriter
 
 class Command(BaseCommand):
     help = "Lie/Crée des CustomUser pour les Candidats sans compte_utilisateur."
@@ -40,6 +43,10 @@ class Command(BaseCommand):
         # Traiter *seulement* les candidats sans user
         qs = Candidat.objects.filter(compte_utilisateur__isnull=True)
 
+        # Trace des liens dans LogUtilisateur, écrite par lots (COPY sous PostgreSQL)
+        journal = BulkWriter(LogUtilisateur)
+        content_type = ContentType.objects.get_for_model(Candidat)
+
         for c in qs.iterator():
             email = (c.email or "").strip().lower()
             if not email:
@@ -95,11 +102,22 @@ class Command(BaseCommand):
                     linked_count += 1
                     self.stdout.write(f"INFO 🔗 Lié candidat {c.id} ↔ user {user.id}")
 
+                journal.add(
+                    LogUtilisateur(
+                        content_type=content_type,
+                        object_id=c.pk,
+                        action=LogUtilisateur.ACTION_UPDATE,
+                        details=f"Compte utilisateur #{user.pk} ({email}) lié — backfill_candidate_users",
+                    )
+                )
+
             except Exception as e:
                 errors += 1
                 self.stdout.write(f"ERROR ❌ Erreur pour le candidat {c.id}: {str(e)}")
                 continue
 
+        journal.flush()
+
         # 🔌 Réactiver le signal
         try:
             post_save.connect(receiver=ensure_candidat_record, sender=CustomUser)
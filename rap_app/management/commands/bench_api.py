@@ -0,0 +1,133 @@
+# rap_app/management/commands/bench_api.py
+import math
+import random
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(values, pct):
+    """Percentile par rang le plus proche (valeurs déjà triées)."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[k]
+
+
+def _parse_mix(raw):
+    """`"/api/a/:3,/api/b/?q=x:1"` → [(chemin, poids)] ; poids 1 si omis."""
+    mix = []
+    for item in (raw or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        path, sep, weight = item.rpartition(":")
+        if not sep or not weight.isdigit():
+            path, weight = item, "1"
+        if int(weight) < 1:
+            raise CommandError(f"Poids invalide dans --mix : {item}")
+        mix.append((path, int(weight)))
+    return mix
+
+
+def _schedule(mix, total, seed=0):
+    """Ordre des requêtes : proportions du mélange respectées, ordre mélangé (reproductible)."""
+    weights = sum(w for _, w in mix)
+    paths = [p for p, w in mix for _ in range(w)]
+    plan = (paths * (total // weights + 1))[:total]
+    random.Random(seed).shuffle(plan)
+    return plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence (p50/p95) d'un endpoint API sur un serveur lancé "
+        "(gunicorn/runserver) et affiche les métriques de connexions DB du worker. "
+        "Ex : comparer DB_CONN_MAX_AGE=0 et DB_CONN_MAX_AGE=60 sur /api/formations/, "
+        "ou les profils WSGI / ASGI sous trafic mixte avec --mix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="URL du serveur")
+        parser.add_argument("--path", default="/api/formations/", help="Endpoint à mesurer")
+        parser.add_argument("--token", required=True, help="Access token JWT (Bearer)")
+        parser.add_argument("-n", "--requests", type=int, default=200, help="Nombre de requêtes")
+        parser.add_argument("-c", "--concurrency", type=int, default=1, help="Requêtes simultanées")
+        parser.add_argument("--warmup", type=int, default=10, help="Requêtes d'échauffement (non mesurées)")
+        parser.add_argument(
+            "--mix",
+            help='Trafic mixte pondéré, remplace --path : "/api/formations/:6,/api/dashboard/:1"',
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        headers = {"Authorization": f"Bearer {options['token']}"}
+        total = options["requests"]
+        mix = _parse_mix(options["mix"]) or [(options["path"], 1)]
+        plan = _schedule(mix, total)
+
+        session = requests.Session()
+        session.headers.update(headers)
+
+        def _call(path):
+            start = time.perf_counter()
+            resp = session.get(f"{base_url}{path}", timeout=60)
+            elapsed = (time.perf_counter() - start) * 1000
+            return path, resp.status_code, elapsed
+
+        for path in _schedule(mix, options["warmup"], seed=1):
+            _call(path)
+
+        before = self._db_metrics(session, base_url)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options["concurrency"])) as pool:
+            results = list(pool.map(_call, plan))
+        wall = time.perf_counter() - started
+        after = self._db_metrics(session, base_url)
+
+        errors = [code for _, code, _ in results if code >= 400]
+        if len(errors) == total:
+            raise CommandError(f"Toutes les requêtes ont échoué (HTTP {errors[0]}).")
+
+        target = f"{base_url}{mix[0][0]}" if len(mix) == 1 else f"{base_url} (mix de {len(mix)} endpoints)"
+        self.stdout.write(f"🎯 {target} — {total} requêtes, concurrence {options['concurrency']}")
+        self._write_timings("⏱️", [ms for _, _, ms in results])
+        if len(mix) > 1:
+            by_path = defaultdict(list)
+            for path, _, ms in results:
+                by_path[path].append(ms)
+            for path, _ in mix:
+                self._write_timings(f"   {path}", by_path[path], f" ({len(by_path[path])} req.)")
+        self.stdout.write(f"🚀 Débit : {total / wall:.1f} req/s — erreurs : {len(errors)}")
+
+        if before and after:
+            opened = after["connections_opened"] - before["connections_opened"]
+            reused = after["connections_reused"] - before["connections_reused"]
+            self.stdout.write(
+                f"🔌 Worker {after['pid']} (CONN_MAX_AGE={after['conn_max_age']}) : "
+                f"{opened} connexion(s) ouverte(s), {reused} réutilisée(s) pendant la mesure"
+            )
+        else:
+            self.stdout.write(self.style.WARNING("⚠️ Métriques DB indisponibles (compte admin requis)."))
+
+    def _write_timings(self, label, values, suffix=""):
+        if not values:
+            return
+        timings = sorted(values)
+        self.stdout.write(
+            f"{label} p50={_percentile(timings, 50):.1f} ms | p95={_percentile(timings, 95):.1f} ms | "
+            f"moyenne={statistics.mean(timings):.1f} ms | max={timings[-1]:.1f} ms{suffix}"
+        )
+
+    def _db_metrics(self, session, base_url):
+        try:
+            resp = session.get(f"{base_url}/api/monitoring/db/", timeout=10)
+            if resp.status_code == 200:
+                return resp.json().get("data")
+        except requests.RequestException:
+            pass
+        return None
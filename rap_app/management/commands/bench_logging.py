@@ -0,0 +1,126 @@
+# rap_app/management/commands/bench_logging.py
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.core.management.base import BaseCommand
+
+from ...utils.logging_utils import JsonFormatter, QueueListenerHandler, RequestIdFilter
+from .bench_api import _percentile
+
+AUDIT_FORMAT = "{asctime} | {levelname} | {module} | {message}"
+
+
+class _Obj:
+    """Objet métier factice : `__str__` non trivial, comme un modèle."""
+
+    pk = 42
+    nom = "BTS Biotechnologies"
+
+    def __str__(self):
+        return f"Formation #{self.pk} – {self.nom}"
+
+
+class _SlowFileHandler(logging.FileHandler):
+    """FileHandler avec latence d'écriture simulée (disque réseau, volume saturé)."""
+
+    latency = 0.0
+
+    def emit(self, record):
+        if self.latency:
+            time.sleep(self.latency)
+        super().emit(record)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût, dans le thread appelant, des logs émis sur le chemin "
+        "d'écriture des modèles : FileHandler synchrones + f-strings (avant) "
+        "contre file d'attente + %-style paresseux (LOGGING actuel)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--records", type=int, default=20000, help="Nombre d'appels mesurés")
+        parser.add_argument(
+            "--io-latency", type=float, default=0.0,
+            help="Latence simulée par écriture disque, en µs (ex. 200 pour un volume réseau)",
+        )
+
+    def handle(self, *args, **options):
+        total = options["records"]
+        _SlowFileHandler.latency = options["io_latency"] / 1_000_000
+        tmp = tempfile.mkdtemp()
+        try:
+            self._report("Synchrone, f-string", self._sync_logger(tmp), total, lazy=False)
+            self._report("File d'attente, %-style", self._queue_logger(tmp), total, lazy=True)
+            self._report("DEBUG désactivé, f-string", self._sync_logger(tmp, "INFO"), total, lazy=False, debug=True)
+            self._report("DEBUG désactivé, %-style", self._sync_logger(tmp, "INFO"), total, lazy=True, debug=True)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    # ────────────────────────────────────────────────────────────
+    # Configurations comparées
+    # ────────────────────────────────────────────────────────────
+    def _targets(self, tmp, prefix):
+        audit = _SlowFileHandler(f"{tmp}/{prefix}_audit.log", encoding="utf-8")
+        audit.setFormatter(logging.Formatter(AUDIT_FORMAT, style="{"))
+        errors = _SlowFileHandler(f"{tmp}/{prefix}_errors.log", encoding="utf-8")
+        errors.setLevel(logging.ERROR)
+        return [audit, errors]
+
+    def _sync_logger(self, tmp, level="DEBUG"):
+        logger = self._logger("bench.sync", level)
+        for handler in self._targets(tmp, "sync"):
+            logger.addHandler(handler)
+        return logger
+
+    def _queue_logger(self, tmp):
+        logger = self._logger("bench.queue", "DEBUG")
+        json_file = RotatingFileHandler(f"{tmp}/app.jsonl", maxBytes=10 * 1024 * 1024, backupCount=1)
+        json_file.setFormatter(JsonFormatter())
+        targets = self._targets(tmp, "queue") + [json_file]
+        for i, handler in enumerate(targets):
+            handler.set_name(f"bench_target_{i}")
+        queue_handler = QueueListenerHandler(targets=[h.name for h in targets])
+        queue_handler.addFilter(RequestIdFilter())
+        logger.addHandler(queue_handler)
+        return logger
+
+    @staticmethod
+    def _logger(name, level):
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = False
+        logger.setLevel(level)
+        return logger
+
+    # ────────────────────────────────────────────────────────────
+    # Mesure
+    # ────────────────────────────────────────────────────────────
+    def _report(self, label, logger, total, *, lazy, debug=False):
+        obj, saturation = _Obj(), 87.5
+        emit = logger.debug if debug else logger.info
+        timings = []
+        started = time.perf_counter()
+        for _ in range(total):
+            t0 = time.perf_counter()
+            if lazy:
+                emit("[Formation] Modifiée : %s (#%s) saturation %s%%", obj, obj.pk, saturation)
+            else:
+                emit(f"[Formation] Modifiée : {obj} (#{obj.pk}) saturation {saturation}%")
+            timings.append((time.perf_counter() - t0) * 1_000_000)
+        wall = time.perf_counter() - started
+
+        for handler in logger.handlers:
+            handler.close()  # file d'attente : vidée ici, hors mesure
+        logger.handlers.clear()
+
+        timings.sort()
+        self.stdout.write(
+            f"🪵 {label:<28} p50={_percentile(timings, 50):6.1f} µs | "
+            f"p95={_percentile(timings, 95):6.1f} µs | moyenne={statistics.mean(timings):6.1f} µs | "
+            f"total={wall * 1000:.0f} ms"
+        )
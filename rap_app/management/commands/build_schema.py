@@ -0,0 +1,33 @@
+# rap_app/management/commands/build_schema.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...api.schema_cache import build_artifacts, code_version, prune_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        "Précalcule le schéma OpenAPI (YAML + JSON, versions gzip) de la version "
+        "courante du code, servi tel quel par /api/schema/. À lancer au déploiement "
+        "(sinon le premier appel après redémarrage le génère)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-old", action="store_true", help="Conserver les artefacts des versions précédentes"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        version = code_version()
+        artifacts = build_artifacts(version)
+        elapsed = time.perf_counter() - started
+        for fmt, artifact in artifacts.items():
+            self.stdout.write(
+                f"📘 {fmt} : {len(artifact.body) / 1024:.0f} Ko ({len(artifact.gzipped) / 1024:.0f} Ko gzip)"
+            )
+        removed = 0 if options["keep_old"] else prune_artifacts(version)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Schéma version {version} généré en {elapsed:.1f} s ({removed} ancien(s) fichier(s) supprimé(s))"
+        ))
@@ -0,0 +1,57 @@
+# rap_app/management/commands/charger_snapshot.py
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from ...services import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Recharge un dossier produit par export_snapshot (COPY FROM STDIN sous "
+        "PostgreSQL) dans une seule transaction, puis recale les séquences. "
+        "Les tables chargées doivent être vides des lignes importées (base neuve "
+        "après migrate, ou lignes supprimées au préalable)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dossier", help="Dossier contenant manifest.json")
+        parser.add_argument(
+            "--modeles", nargs="+", default=None,
+            help="Labels à charger (ex. rap_app.formation) ; défaut : tout le manifeste",
+        )
+
+    def handle(self, *args, **options):
+        dossier = options["dossier"]
+        try:
+            manifeste = snapshots.lire_manifeste(dossier)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Manifeste illisible : {e}")
+
+        entrees = manifeste["modeles"]
+        if options["modeles"]:
+            wanted = {label.lower() for label in options["modeles"]}
+            entrees = [e for e in entrees if e["modele"].lower() in wanted]
+        if not entrees:
+            raise CommandError("Aucun modèle à charger.")
+
+        debut = time.monotonic()
+        total = 0
+        try:
+            # Contraintes de clés étrangères différées (DEFERRABLE) : l'ordre des tables est libre
+            with transaction.atomic():
+                for entree in entrees:
+                    n = snapshots.charger_fichier(dossier, entree)
+                    total += n
+                    self.stdout.write(f"{entree['modele']} : {n} ligne(s)")
+                snapshots.reinitialiser_sequences([apps.get_model(e["modele"]) for e in entrees])
+        except (ValueError, DatabaseError) as e:
+            raise CommandError(f"Chargement annulé : {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshot chargé : {len(entrees)} modèle(s), {total} ligne(s) en {time.monotonic() - debut:.1f} s"
+            )
+        )
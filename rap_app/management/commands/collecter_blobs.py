@@ -0,0 +1,173 @@
+# rap_app/management/commands/collecter_blobs.py
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ...models.blobs import Blob, effacer_fichier_blob, sha256_du_chemin
+from ...models.cvtheque import CVTheque
+from ...models.documents import Document
+from ...utils.blob_storage import BLOB_PREFIX, blob_storage
+
+MODELES = (Document, CVTheque)
+
+
+def _reference(chemin: str) -> bool:
+    return any(model.objects.filter(fichier=chemin).exists() for model in MODELES)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les compteurs de références depuis les champs fichier, puis efface "
+        "les fichiers dédupliqués (blobs/) sans référence depuis plus que le délai de "
+        "grâce, ainsi que leur miniature. --importer déplace d'abord les fichiers "
+        "antérieurs au stockage dédupliqué vers blobs/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours", type=int, default=None,
+            help="Délai de grâce en heures (défaut : BLOB_GC_GRACE_HOURS)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Affiche sans rien effacer")
+        parser.add_argument(
+            "--importer", action="store_true",
+            help="Convertit les fichiers existants (hors blobs/) en blobs dédupliqués",
+        )
+
+    def handle(self, *args, **options):
+        grace = options["grace_hours"]
+        if grace is None:
+            grace = getattr(settings, "BLOB_GC_GRACE_HOURS", 24)
+        limite = timezone.now() - timedelta(hours=grace)
+        dry_run = options["dry_run"]
+
+        if options["importer"]:
+            self._importer(dry_run)
+        self._recompter(dry_run)
+        self._collecter(limite, dry_run)
+
+    # ────────────────────────────────────────────────────────────
+    # Import des fichiers historiques
+    # ────────────────────────────────────────────────────────────
+    def _importer(self, dry_run):
+        for model in MODELES:
+            importes = 0
+            rows = (
+                model.objects.exclude(fichier="")
+                .exclude(fichier__startswith=BLOB_PREFIX)
+                .values_list("pk", "fichier")
+            )
+            for pk, ancien in rows.iterator():
+                if dry_run:
+                    importes += 1
+                    continue
+                try:
+                    with blob_storage.open(ancien, "rb") as fh:
+                        content = File(fh, ancien)
+                        nouveau = blob_storage.save(ancien, content)
+                        sha256 = content.sha256
+                    taille = blob_storage.size(nouveau)
+                except OSError as e:
+                    self.stderr.write(f"{model._meta.label} #{pk} : {e}")
+                    continue
+                with transaction.atomic():
+                    if not model.objects.filter(pk=pk, fichier=ancien).update(fichier=nouveau, sha256=sha256):
+                        continue  # remplacé entre-temps : le blob sera collecté s'il reste orphelin
+                    Blob.objects.acquire(nouveau, sha256=sha256, taille=taille)
+                if not _reference(ancien):
+                    blob_storage.delete(ancien)
+                importes += 1
+            self.stdout.write(f"{model._meta.label} : {importes} fichier(s) importé(s) dans {BLOB_PREFIX}")
+
+    # ────────────────────────────────────────────────────────────
+    # Compteurs de références
+    # ────────────────────────────────────────────────────────────
+    def _recompter(self, dry_run):
+        """
+        Aligne `nb_references` sur les champs `fichier` : les écritures hors
+        signaux (`bulk_create`, `update()`, rechargement d'instantané) posent
+        un chemin sans prendre de référence. Mise à jour conditionnelle à
+        l'ancien compteur : une écriture concurrente l'emporte (corrigé au
+        passage suivant).
+        """
+        comptes = dict(Blob.objects.values_list("chemin", "nb_references"))  # lu avant les références
+        reelles = Counter()
+        for model in MODELES:
+            rows = (
+                model.objects.filter(fichier__startswith=BLOB_PREFIX)
+                .order_by()
+                .values("fichier")
+                .annotate(n=Count("pk"))
+                .values_list("fichier", "n")
+            )
+            for chemin, n in rows:
+                reelles[chemin] += n
+
+        corriges = 0
+        for chemin in set(reelles) | {c for c, n in comptes.items() if n}:
+            reel, compte = reelles[chemin], comptes.get(chemin)
+            if reel == compte:
+                continue
+            corriges += 1
+            if dry_run:
+                continue
+            if compte is None:
+                try:
+                    with transaction.atomic():
+                        Blob.objects.create(
+                            chemin=chemin,
+                            sha256=sha256_du_chemin(chemin),
+                            taille=blob_storage.size(chemin) if blob_storage.exists(chemin) else None,
+                            nb_references=reel,
+                        )
+                except IntegrityError:
+                    corriges -= 1  # créée entre-temps par un téléversement
+                continue
+            Blob.objects.filter(chemin=chemin, nb_references=compte).update(
+                nb_references=reel, orphelin_depuis=None if reel else timezone.now()
+            )
+
+        verbe = "à corriger" if dry_run else "corrigé(s)"
+        self.stdout.write(f"Blobs : {corriges} compteur(s) de références {verbe}")
+
+    # ────────────────────────────────────────────────────────────
+    # Collecte des orphelins
+    # ────────────────────────────────────────────────────────────
+    def _collecter(self, limite, dry_run):
+        limite_ts = limite.timestamp()
+        effaces = octets = 0
+
+        # 1. Blobs dont le compteur est tombé à zéro avant la limite (re-vérifié
+        #    contre les champs `fichier` juste avant l'effacement)
+        for chemin, taille in Blob.objects.orphelins(limite).values_list("chemin", "taille"):
+            if dry_run:
+                effaces, octets = effaces + 1, octets + (taille or 0)
+                continue
+            if Blob.objects.purger(chemin, limite_ts):
+                effaces, octets = effaces + 1, octets + (taille or 0)
+
+        # 2. Fichiers de blobs/ sans ligne Blob (téléversement annulé, copie temporaire)
+        racine = blob_storage.path(BLOB_PREFIX)
+        connus = set(Blob.objects.values_list("chemin", flat=True))
+        for dossier, _, fichiers in os.walk(racine):
+            for nom in fichiers:
+                chemin = os.path.relpath(os.path.join(dossier, nom), blob_storage.location).replace(os.sep, "/")
+                if chemin in connus or _reference(chemin):
+                    continue
+                taille = os.path.getsize(os.path.join(dossier, nom))
+                if dry_run:
+                    if os.path.getmtime(os.path.join(dossier, nom)) < limite_ts:
+                        effaces, octets = effaces + 1, octets + taille
+                    continue
+                if effacer_fichier_blob(chemin, limite_ts, sha256_du_chemin(chemin)):
+                    effaces, octets = effaces + 1, octets + taille
+
+        verbe = "à effacer" if dry_run else "effacé(s)"
+        self.stdout.write(self.style.SUCCESS(f"Blobs : {effaces} fichier(s) {verbe}, {octets / 1024 / 1024:.1f} Mo"))
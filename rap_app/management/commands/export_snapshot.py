@@ -0,0 +1,109 @@
+# rap_app/management/commands/export_snapshot.py
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...services import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte la base (ou le périmètre --centre / --annee) en un fichier compressé "
+        "par modèle + manifest.json, lisible par charger_snapshot. Sous PostgreSQL, "
+        "les modèles sont exportés en parallèle sur un même instantané cohérent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dossier", help="Dossier de destination (créé si besoin)")
+        parser.add_argument(
+            "--centre", type=int, action="append", dest="centres", default=[],
+            help="Id de centre à inclure (répétable) ; défaut : tous",
+        )
+        parser.add_argument("--annee", type=int, default=None, help="Lignes créées cette année seulement")
+        parser.add_argument("--format", choices=snapshots.FORMATS, default="jsonl", dest="fmt")
+        parser.add_argument(
+            "--workers", type=int, default=min(4, os.cpu_count() or 1),
+            help="Processus d'export (PostgreSQL uniquement ; 1 = séquentiel)",
+        )
+        parser.add_argument(
+            "--modeles", nargs="+", default=None,
+            help="Labels à exporter (ex. rap_app.formation rap_app.document) ; défaut : tous",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["fmt"]
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError("Le format parquet nécessite pyarrow (pip install pyarrow).")
+
+        dossier = options["dossier"]
+        os.makedirs(dossier, exist_ok=True)
+        centres, annee = options["centres"] or None, options["annee"]
+        labels = [m._meta.label for m in snapshots.modeles_snapshot(options["modeles"])]
+        if not labels:
+            raise CommandError("Aucun modèle à exporter.")
+
+        debut = time.monotonic()
+        workers = max(1, options["workers"])
+        if connection.vendor == "postgresql" and workers > 1 and len(labels) > 1:
+            entrees = self._export_parallele(labels, dossier, centres, annee, fmt, workers)
+        else:
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                ajouts = snapshots.fermeture(labels, centres, annee)
+                entrees = [
+                    snapshots.exporter_modele(label, dossier, centres, annee, fmt, ajouts=ajouts.get(label))
+                    for label in labels
+                ]
+
+        entrees = [e for e in entrees if e is not None]
+        manifeste = {
+            "version": snapshots.FORMAT_VERSION,
+            "cree_le": timezone.now().isoformat(),
+            "moteur": connection.vendor,
+            "format": fmt,
+            "perimetre": {"centres": centres, "annee": annee},
+            "modeles": entrees,
+        }
+        with open(os.path.join(dossier, "manifest.json"), "w", encoding="utf-8") as fh:
+            json.dump(manifeste, fh, ensure_ascii=False, indent=2)
+
+        lignes = sum(e["lignes"] for e in entrees)
+        octets = sum(e["octets"] for e in entrees)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshot : {len(entrees)} modèle(s), {lignes} ligne(s), "
+                f"{octets / 1024 / 1024:.1f} Mo en {time.monotonic() - debut:.1f} s → {dossier}"
+            )
+        )
+
+    def _export_parallele(self, labels, dossier, centres, annee, fmt, workers):
+        """
+        La transaction principale reste ouverte (REPEATABLE READ) le temps de
+        l'export : son instantané, exporté, est adopté par chaque processus.
+        La fermeture (parents hors périmètre) est calculée sur ce même instantané.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SELECT pg_export_snapshot()")
+                snapshot_id = cursor.fetchone()[0]
+
+            ajouts = snapshots.fermeture(labels, centres, annee)
+            taches = [(label, dossier, centres, annee, fmt, snapshot_id, ajouts.get(label)) for label in labels]
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(taches)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=snapshots.initialiser_processus,
+            ) as pool:
+                return list(pool.map(snapshots.exporter_modele_processus, taches))
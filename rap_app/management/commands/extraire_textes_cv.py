@@ -0,0 +1,52 @@
+# rap_app/management/commands/extraire_textes_cv.py
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...models.cvtheque import CVTheque
+from ...services.cv_texte import extraire_cv, indexer_cv
+
+
+def _extraire(pk):
+    try:
+        return extraire_cv(pk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrait le texte des CV qui ne l'ont pas encore (couche texte PDF, .docx, "
+        "OCR des scans) et met à jour l'index de recherche plein texte (?q=)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Extractions en parallèle")
+        parser.add_argument("--limit", type=int, default=None, help="Nombre max de CV")
+        parser.add_argument(
+            "--vides", action="store_true",
+            help="Retente aussi les CV sans texte exploitable (ex. après installation de Tesseract)",
+        )
+        parser.add_argument(
+            "--reindexer", action="store_true",
+            help="Recalcule seulement le tsvector de tous les CV (changement de CV_RECHERCHE_CONFIG)",
+        )
+
+    def handle(self, *args, **options):
+        if options["reindexer"]:
+            pks = list(CVTheque.objects.values_list("pk", flat=True))
+            for pk in pks:
+                indexer_cv(pk)
+            self.stdout.write(self.style.SUCCESS(f"{len(pks)} CV réindexé(s)"))
+            return
+
+        sources = ["", "vide"] if options["vides"] else [""]
+        pks = list(
+            CVTheque.objects.filter(texte_source__in=sources)
+            .exclude(fichier="")
+            .values_list("pk", flat=True)[: options["limit"]]
+        )
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            ok = sum(pool.map(_extraire, pks))
+        self.stdout.write(self.style.SUCCESS(f"CVThèque : texte extrait pour {ok}/{len(pks)} CV"))
@@ -0,0 +1,54 @@
+# rap_app/management/commands/generer_apercus.py
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from ...models.cvtheque import CVTheque
+from ...models.documents import Document
+from ...services.apercus import EXTENSIONS_SUPPORTEES, generer_apercu
+from ...utils.file_delivery import compute_sha256
+
+
+def _generer(label, pk):
+    try:
+        return generer_apercu(label, pk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule les empreintes manquantes puis génère les miniatures (1re page + "
+        "nombre de pages) des documents et CV qui n'en ont pas encore. "
+        "Les fichiers au contenu identique partagent la même miniature."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Rendus en parallèle")
+        parser.add_argument("--limit", type=int, default=None, help="Nombre max de fichiers par modèle")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        supportes = Q()
+        for ext in EXTENSIONS_SUPPORTEES:
+            supportes |= Q(fichier__iendswith=ext)
+        for model in (Document, CVTheque):
+            label = model._meta.label
+
+            # Empreintes des fichiers antérieurs à leur calcul automatique
+            for obj in model.objects.filter(sha256="").exclude(fichier="").only("pk", "fichier").iterator():
+                try:
+                    model.objects.filter(pk=obj.pk).update(sha256=compute_sha256(obj.fichier))
+                except OSError as e:
+                    self.stderr.write(f"{label} #{obj.pk} : {e}")
+
+            pks = list(
+                model.objects.filter(supportes, apercu="")
+                .exclude(sha256="")
+                .values_list("pk", flat=True)[: options["limit"]]
+            )
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                ok = sum(pool.map(lambda pk: _generer(label, pk), pks))
+            self.stdout.write(self.style.SUCCESS(f"{label} : {ok}/{len(pks)} aperçu(s) généré(s)"))
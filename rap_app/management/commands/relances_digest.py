@@ -0,0 +1,67 @@
+# rap_app/management/commands/relances_digest.py
+import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.relances import digest_relances, format_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie à chaque responsable le récapitulatif de ses relances de prospection "
+        "(du jour et en retard). Une seule requête pour tous les utilisateurs, "
+        "envoi groupé sur une connexion SMTP. À lancer chaque matin (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Date de référence AAAA-MM-JJ (défaut : aujourd'hui)")
+        parser.add_argument("--dry-run", action="store_true", help="Affiche les récapitulatifs sans envoyer")
+        parser.add_argument("--batch-size", type=int, default=100, help="Mails envoyés par lot")
+
+    def handle(self, *args, **options):
+        jour = None
+        if options["date"]:
+            try:
+                jour = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("Date invalide (format attendu : AAAA-MM-JJ).")
+
+        dry_run = options["dry_run"]
+        batch_size = max(1, options["batch_size"])
+        connection = None if dry_run else get_connection()
+        messages, sent, skipped, total_items = [], 0, 0, 0
+
+        for digest in digest_relances(jour):
+            total_items += digest["total"]
+            body = format_digest(digest, jour)
+
+            if dry_run:
+                self.stdout.write(f"── {digest['email'] or '(sans email)'}\n{body}\n")
+                continue
+            if not digest["email"]:
+                skipped += 1
+                continue
+
+            messages.append(
+                EmailMessage(
+                    subject=f"Relances prospection : {digest['total']} à effectuer",
+                    body=body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[digest["email"]],
+                    connection=connection,
+                )
+            )
+            if len(messages) >= batch_size:
+                sent += connection.send_messages(messages) or 0
+                messages = []
+
+        if messages:
+            sent += connection.send_messages(messages) or 0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {total_items} relance(s) — {sent} mail(s) envoyé(s), {skipped} responsable(s) sans email"
+            )
+        )
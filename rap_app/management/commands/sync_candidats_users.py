@@ -1,4 +1,5 @@
 # rap_app/management/commands/sync_candidats_users.py
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.contrib.auth.hashers import make_password
@@ -7,6 +8,8 @@ import logging
 
 from rap_app.models.candidat import Candidat
 from rap_app.models.custom_user import CustomUser
+from rap_app.models.logs import LogUtilisateur
+from rap_app.utils.bulk_writer import BulkWriter
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +17,32 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = "Associer un compte utilisateur à chaque candidat sans compte_utilisateur"
 
+    def _journaliser(self, c, user, details):
+        """Trace du lien dans LogUtilisateur (écrite par lots)."""
+        self.journal.add(
+            LogUtilisateur(
+                content_type=self.content_type,
+                object_id=c.pk,
+                action=LogUtilisateur.ACTION_UPDATE,
+                details=f"{details} : user #{user.pk} ({user.email}) — sync_candidats_users",
+            )
+        )
+
     def handle(self, *args, **options):
         candidats = Candidat.objects.filter(compte_utilisateur__isnull=True)
         total = candidats.count()
-        created, linked, skipped = 0, 0, 0
 
         self.stdout.write(f"🔎 {total} candidats sans compte trouvé(s).")
 
+        self.journal = BulkWriter(LogUtilisateur)
+        self.content_type = ContentType.objects.get_for_model(Candidat)
+        try:
+            self._traiter(candidats, total)
+        finally:
+            self.journal.flush()  # liens déjà commités : leur trace aussi
+
+    def _traiter(self, candidats, total):
+        created, linked, skipped = 0, 0, 0
         for c in candidats:
             email = (c.email or "").strip().lower()
 
@@ -46,6 +68,7 @@ class Command(BaseCommand):
                     continue
 
                 Candidat.objects.filter(pk=c.pk).update(compte_utilisateur=user, email=email)
+                self._journaliser(c, user, "Compte existant lié")
                 linked += 1
                 self.stdout.write(f"🔗 Lié Candidat #{c.pk} ↔ User #{user.pk} ({user.email})")
                 continue
@@ -78,6 +101,7 @@ class Command(BaseCommand):
                 user.save(update_fields=["role"])
 
                 created += 1
+                self._journaliser(c, user, "Compte créé et lié")
                 self.stdout.write(
                     self.style.SUCCESS(f"✅ User #{user.pk} créé et lié à Candidat #{c.pk}")
                 )
@@ -1,28 +1,170 @@
 # myapp/middleware.py
-import threading
+import contextvars
+import random
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .utils import profiling
+from .utils.logging_utils import reset_request_id, set_request_id
+
+# Variable de contexte (et non threading.local) : isolée par requête en WSGI
+# comme en ASGI, propagée dans sync_to_async / async_to_sync.
+# On y stocke la requête : DRF réécrit `request.user` après l'authentification
+# JWT, l'utilisateur lu est donc toujours celui de la vue.
+_current_request = contextvars.ContextVar("rap_app_current_request", default=None)
 
-_thread_locals = threading.local()
 
 def get_current_user():
-    """Récupère l'utilisateur courant stocké dans le thread local."""
-    return getattr(_thread_locals, 'user', None)
+    """Récupère l'utilisateur courant (None si absent ou anonyme)."""
+    request = _current_request.get()
+    user = getattr(request, "user", None)
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user
+
 
 class CurrentUserMiddleware:
     """
-    Middleware qui stocke l'utilisateur actuel dans le thread local
-    pour qu'il soit accessible depuis n'importe où dans le code.
+    Middleware qui expose l'utilisateur de la requête via une variable de
+    contexte, accessible depuis n'importe où dans le code (modèles, signaux).
+
+    - Compatible sync et async (aucun changement de thread imposé en ASGI).
+    - L'authentification JWT de DRF (faite dans la vue) est prise en compte.
+    - La valeur est restaurée en fin de requête (threads WSGI réutilisés).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Identifiant de corrélation des logs : reprend `X-Request-ID` s'il est
+    fourni par le proxy (nginx `$request_id`) et valide, sinon en génère un.
+    Exposé aux logs via `RequestIdFilter` et renvoyé dans la réponse.
     """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _request_id(request):
+        incoming = request.META.get("HTTP_X_REQUEST_ID", "")
+        return incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.request_id = self._request_id(request)
+        token = set_request_id(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = self._request_id(request)
+        token = set_request_id(request.request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+class SQLProfilingMiddleware:
+    """
+    Middleware opt-in (settings.SQL_PROFILING["ENABLED"]) qui mesure, pour
+    chaque requête échantillonnée : nombre de requêtes SQL, temps DB, requêtes
+    dupliquées (N+1) et temps de sérialisation DRF.
+
+    - Résultats exposés dans l'en-tête `Server-Timing` (onglet Réseau du navigateur)
+    - Mesures stockées dans un tampon circulaire et/ou un fichier JSONL
+      (classement via /api/monitoring/sql/)
+
+    Synchrone uniquement (`connection.execute_wrapper` est propre au thread) :
+    en ASGI, Django l'adapte ; à n'activer que ponctuellement. Les threads de
+    travail (tableau de bord concurrent, vues async) s'y rattachent via
+    `profiling.profile_thread()`.
+    """
+
     def __init__(self, get_response):
+        self.config = profiling.get_config()
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        profiling.install_serializer_timing()
         self.get_response = get_response
 
     def __call__(self, request):
-        # Stocke l'utilisateur dans le thread local
-        _thread_locals.user = request.user if hasattr(request, 'user') else None
-        
-        response = self.get_response(request)
-        
-        # Nettoie après la réponse pour éviter les fuites de mémoire
-        if hasattr(_thread_locals, 'user'):
-            del _thread_locals.user
-            
-        return response
\ No newline at end of file
+        if random.random() >= float(self.config["SAMPLE_RATE"]):
+            return self.get_response(request)
+
+        profile = profiling.RequestProfile()
+        token = profiling.activate_profile(profile)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            profiling.deactivate_profile(token)
+        duration = time.perf_counter() - start
+
+        db_ms = profile.db_time * 1000
+        ser_ms = profile.serializer_time * 1000
+        total_ms = duration * 1000
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={db_ms:.1f};desc="{profile.queries} SQL"',
+            f"ser;dur={ser_ms:.1f}",
+            f'dup;desc="{profile.duplicate_queries} dupliquées"',
+            f"total;dur={total_ms:.1f}",
+        ])
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = (match.route or match.view_name) if match else request.path
+        profiling.record({
+            "ts": time.time(),
+            "method": request.method,
+            "endpoint": endpoint,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 2),
+            "queries": profile.queries,
+            "db_ms": round(db_ms, 2),
+            "serializer_ms": round(ser_ms, 2),
+            "duplicates": profile.duplicate_queries,
+            "top_duplicates": profile.top_duplicates(self.config["TOP_FINGERPRINTS"]),
+        })
+        return response
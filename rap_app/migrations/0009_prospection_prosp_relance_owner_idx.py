@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0008_cvtheque_created_at_cvtheque_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prospection',
+            index=models.Index(condition=models.Q(('activite', 'active'), ('relance_prevue__isnull', False), models.Q(('statut__in', ['acceptee', 'refusee', 'annulee']), _negated=True)), fields=['owner', 'relance_prevue'], name='prosp_relance_owner_idx'),
+        ),
+    ]
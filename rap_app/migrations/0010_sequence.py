@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:40
+
+import re
+
+from django.db import migrations, models
+
+
+REFERENCE_RE = re.compile(r"^VAE-(\d{8})-(\w+)-(\d+)$")
+
+
+def seed_vae_sequences(apps, schema_editor):
+    """Initialise les compteurs VAE à partir des références déjà attribuées."""
+    VAE = apps.get_model("rap_app", "VAE")
+    Sequence = apps.get_model("rap_app", "Sequence")
+
+    maxima = {}
+    for reference in VAE.objects.exclude(reference="").values_list("reference", flat=True).iterator():
+        match = REFERENCE_RE.match(reference or "")
+        if match:
+            periode, scope, numero = match.group(1), match.group(2), int(match.group(3))
+            key = (periode, scope)
+            maxima[key] = max(maxima.get(key, 0), numero)
+
+    Sequence.objects.bulk_create(
+        [
+            Sequence(prefix="VAE", periode=periode, scope=scope, last_value=last)
+            for (periode, scope), last in maxima.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0009_prospection_prosp_relance_owner_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=30, verbose_name='Préfixe')),
+                ('periode', models.CharField(blank=True, default='', max_length=20, verbose_name='Période')),
+                ('scope', models.CharField(blank=True, default='', max_length=30, verbose_name='Portée')),
+                ('last_value', models.PositiveBigIntegerField(default=0, verbose_name='Dernière valeur attribuée')),
+            ],
+            options={
+                'verbose_name': 'Séquence de numérotation',
+                'verbose_name_plural': 'Séquences de numérotation',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sequence',
+            constraint=models.UniqueConstraint(fields=('prefix', 'periode', 'scope'), name='sequence_unique_key'),
+        ),
+        migrations.RunPython(seed_vae_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rap_app", "0010_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cvtheque",
+            name="sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Empreinte du contenu (ETag des téléchargements, calculée automatiquement)",
+                max_length=64,
+                verbose_name="Empreinte SHA-256",
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Empreinte du contenu (ETag des téléchargements, calculée automatiquement)",
+                max_length=64,
+                verbose_name="Empreinte SHA-256",
+            ),
+        ),
+    ]
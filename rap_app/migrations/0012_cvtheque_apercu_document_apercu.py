@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rap_app", "0011_cvtheque_sha256_document_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cvtheque",
+            name="apercu",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Miniature de la première page (générée en arrière-plan)",
+                max_length=255,
+                verbose_name="Aperçu",
+            ),
+        ),
+        migrations.AddField(
+            model_name="cvtheque",
+            name="nb_pages",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Nombre de pages"
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="apercu",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Miniature de la première page (générée en arrière-plan)",
+                max_length=255,
+                verbose_name="Aperçu",
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="nb_pages",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Nombre de pages"
+            ),
+        ),
+    ]
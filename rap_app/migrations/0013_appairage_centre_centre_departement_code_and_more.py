@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr, Trim
+
+
+def backfill_scope_columns(apps, schema_editor):
+    """Renseigne les codes département et le centre dénormalisé des appairages."""
+    Centre = apps.get_model("rap_app", "Centre")
+    Partenaire = apps.get_model("rap_app", "Partenaire")
+    Appairage = apps.get_model("rap_app", "Appairage")
+    Formation = apps.get_model("rap_app", "Formation")
+
+    Centre.objects.update(departement_code=Coalesce(Substr(Trim("code_postal"), 1, 2), Value("")))
+    Partenaire.objects.update(departement_code=Coalesce(Substr(Trim("zip_code"), 1, 2), Value("")))
+    Appairage.objects.filter(formation__isnull=False).update(
+        centre_id=Subquery(Formation.objects.filter(pk=OuterRef("formation_id")).values("centre_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0012_cvtheque_apercu_document_apercu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appairage',
+            name='centre',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appairages', to='rap_app.centre'),
+        ),
+        migrations.AddField(
+            model_name='centre',
+            name='departement_code',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='2 premiers chiffres du code postal (maintenu automatiquement, sert au périmètre)', max_length=2, verbose_name='Code département'),
+        ),
+        migrations.AddField(
+            model_name='partenaire',
+            name='departement_code',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='2 premiers chiffres du code postal (maintenu automatiquement)', max_length=2, verbose_name='Code département'),
+        ),
+        migrations.RunPython(backfill_scope_columns, migrations.RunPython.noop),
+    ]
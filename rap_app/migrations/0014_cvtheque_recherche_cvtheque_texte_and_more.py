@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:05
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+INDEX_RECHERCHE = "rap_app_cvtheque_recherche_gin"
+INDEX_TRIGRAMME = "rap_app_cvtheque_texte_trgm"
+
+
+def creer_index_recherche(apps, schema_editor):
+    """
+    PostgreSQL uniquement : index GIN du tsvector, index trigramme sur
+    UPPER(texte) (forme produite par `icontains`) et tsvector initial
+    (titre / mots-clés ; le texte est indexé à son extraction).
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from django.contrib.postgres.search import SearchVector
+
+    CVTheque = apps.get_model("rap_app", "CVTheque")
+    table = schema_editor.quote_name(CVTheque._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_RECHERCHE} ON {table} USING gin (recherche)")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_TRIGRAMME} ON {table} USING gin (UPPER(texte) gin_trgm_ops)"
+    )
+    CVTheque.objects.update(
+        recherche=SearchVector("titre", weight="A", config="french")
+        + SearchVector("mots_cles", weight="B", config="french")
+    )
+
+
+def supprimer_index_recherche(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_TRIGRAMME}")
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_RECHERCHE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0013_appairage_centre_centre_departement_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvtheque',
+            name='recherche',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='Index de recherche'),
+        ),
+        migrations.AddField(
+            model_name='cvtheque',
+            name='texte',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Contenu textuel du fichier (extrait en arrière-plan, sert à la recherche)', verbose_name='Texte extrait'),
+        ),
+        migrations.AddField(
+            model_name='cvtheque',
+            name='texte_source',
+            field=models.CharField(blank=True, choices=[('pdf', 'Couche texte PDF'), ('docx', 'Document Word'), ('ocr', 'OCR (document scanné)'), ('vide', 'Aucun texte exploitable')], default='', editable=False, help_text="Vide tant que l'extraction n'a pas eu lieu", max_length=5, verbose_name='Origine du texte'),
+        ),
+        migrations.RunPython(creer_index_recherche, supprimer_index_recherche),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+import django.core.validators
+from django.db import migrations, models
+import rap_app.models.cvtheque
+import rap_app.models.documents
+import rap_app.utils.blob_storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0014_cvtheque_recherche_cvtheque_texte_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('chemin', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Chemin')),
+                ('sha256', models.CharField(db_index=True, max_length=64, verbose_name='Empreinte SHA-256')),
+                ('taille', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Taille (octets)')),
+                ('mime_type', models.CharField(blank=True, default='', max_length=100, verbose_name='Type MIME')),
+                ('nb_references', models.PositiveIntegerField(default=0, verbose_name='Nombre de références')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('orphelin_depuis', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Sans référence depuis')),
+            ],
+            options={
+                'verbose_name': 'Fichier dédupliqué',
+                'verbose_name_plural': 'Fichiers dédupliqués',
+            },
+        ),
+        migrations.AlterField(
+            model_name='cvtheque',
+            name='fichier',
+            field=models.FileField(help_text='Formats acceptés : PDF, DOC, DOCX (max. 5Mo)', storage=rap_app.utils.blob_storage.get_blob_storage, upload_to=rap_app.models.cvtheque.cv_upload_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])], verbose_name='Fichier'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='fichier',
+            field=models.FileField(help_text='Fichier à téléverser (PDF, image, etc.). Max : 10 Mo', storage=rap_app.utils.blob_storage.get_blob_storage, upload_to=rap_app.models.documents.filepath_for_document, verbose_name='Fichier'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from rap_app.utils.file_delivery import compute_sha256
+
+
+def backfill_sha256(apps, schema_editor):
+    """
+    Empreintes des fichiers antérieurs à leur calcul automatique : sans elles,
+    ni ETag ni miniature. Fichier absent du stockage → ligne laissée telle quelle
+    (rattrapée par la commande `generer_apercus`).
+    """
+    for model_name in ("Document", "CVTheque"):
+        model = apps.get_model("rap_app", model_name)
+        rows = model.objects.filter(sha256="").exclude(fichier="").only("pk", "fichier")
+        for obj in rows.iterator():
+            try:
+                empreinte = compute_sha256(obj.fichier)
+            except OSError:
+                continue
+            model.objects.filter(pk=obj.pk).update(sha256=empreinte)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rap_app', '0015_blob_alter_cvtheque_fichier_alter_document_fichier_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sha256, migrations.RunPython.noop),
+    ]
@@ -22,6 +22,8 @@ from .appairage import Appairage, HistoriqueAppairage
 from .atelier_tre import AtelierTRE
 from .commentaires_appairage import CommentaireAppairage
 from .cerfa_contrats import CerfaContrat
+from .sequences import Sequence
+from .blobs import Blob
 
 __all__ = ['CustomUser']  # Important pour l'importation
 
@@ -1,16 +1,25 @@
+import contextvars
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import logging
 
+from ..utils.bulk_writer import ecritures_groupees, enregistrer
 from .base import BaseModel
+from .centres import Centre
 from .candidat import Candidat, ResultatPlacementChoices
 from .partenaires import Partenaire
 from .formations import Formation
 
 logger = logging.getLogger("application.appairages")
 
+# Valeur initiale inconnue (champ différé au chargement)
+_INCONNU = object()
+
 
 # ───────────────────────────────────────────────
 # MANAGER PERSONNALISÉ
@@ -60,6 +69,11 @@ class Appairage(BaseModel):
         Formation, on_delete=models.CASCADE, related_name="appairages",
         null=True, blank=True
     )
+    # Dénormalisé depuis `formation.centre` (maintenu au save) : périmètre et stats sans jointure
+    centre = models.ForeignKey(
+        Centre, on_delete=models.SET_NULL, related_name="appairages",
+        null=True, blank=True, editable=False, db_index=True,
+    )
 
     date_appairage = models.DateTimeField(default=timezone.now, verbose_name=_("Date de mise en relation"))
 
@@ -138,15 +152,17 @@ class Appairage(BaseModel):
     def archiver_pour_formation(cls, formation, user=None):
         """Archive tous les appairages liés à une formation donnée."""
         apps = cls.objects.filter(formation=formation, activite=AppairageActivite.ACTIF)
-        for app in apps:
-            app.archiver(user=user)
+        with transaction.atomic(), ecritures_groupees():
+            for app in apps:
+                app.archiver(user=user)
 
     @classmethod
     def desarchiver_pour_formation(cls, formation, user=None):
         """Désarchive tous les appairages d’une formation donnée."""
         apps = cls.objects.filter(formation=formation, activite=AppairageActivite.ARCHIVE)
-        for app in apps:
-            app.desarchiver(user=user)
+        with transaction.atomic(), ecritures_groupees():
+            for app in apps:
+                app.desarchiver(user=user)
 
     # ───────────────────────────────────────────────
     # SYNCHRONISATION & SNAPSHOT
@@ -187,100 +203,203 @@ class Appairage(BaseModel):
 
 
 
-    def _last_appairage_for(self, candidat: Candidat):
+    # Champs suivis pour comparer avec l'état chargé (sans relire la ligne)
+    _TRACKED_FIELDS = ("candidat_id", "statut", "retour_partenaire", "date_appairage")
+    # Colonnes utiles au snapshot (pas de jointure)
+    _SNAPSHOT_ONLY = ("id", "candidat_id", "partenaire_id", "statut", "date_appairage", "created_by_id", "updated_by_id")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._remember_initial()
+
+    def _remember_initial(self):
+        # ⚠️ __dict__ : un champ différé (only/defer) est absent et ne déclenche pas de requête
+        self._initial = {f: self.__dict__[f] for f in self._TRACKED_FIELDS if f in self.__dict__}
+        self._initial_formation_id = self.__dict__.get("formation_id", _INCONNU)
+
+    def _sync_centre(self, is_new):
+        """
+        `centre` dénormalisé depuis la formation, sans requête dans le cas courant :
+        relation déjà chargée → lue ; formation inchangée → centre conservé
+        (un changement de centre de la formation est propagé par `Formation.save`) ;
+        sinon une seule colonne relue.
+        """
+        if not self.formation_id:
+            self.centre_id = None
+        elif type(self).formation.is_cached(self):
+            self.centre_id = self.formation.centre_id
+        elif is_new or self._initial_formation_id != self.formation_id:
+            self.centre_id = Formation.objects.filter(pk=self.formation_id).values_list("centre_id", flat=True).first()
+
+    def _original_values(self) -> dict:
+        """Valeurs en base avant modification (relues seulement si un champ suivi était différé)."""
+        if len(self._initial) == len(self._TRACKED_FIELDS):
+            return self._initial
+        return type(self).objects.filter(pk=self.pk).values(*self._TRACKED_FIELDS).first() or {}
+
+    @classmethod
+    def _last_appairage_for(cls, candidat_id):
         """Retourne le dernier appairage du candidat (date puis pk)."""
         return (
-            type(self)
-            .objects.filter(candidat=candidat)
+            cls.objects.filter(candidat_id=candidat_id)
             .order_by("-date_appairage", "-pk")
-            .select_related("partenaire", "created_by", "updated_by")
+            .only(*cls._SNAPSHOT_ONLY)
             .first()
         )
 
-    def _sync_candidat_snapshot(self, candidat: Candidat):
+    @classmethod
+    def _snapshot_values(cls, last) -> dict:
+        """Champs placement du candidat (attnames) dérivés de son dernier appairage."""
+        if last is None:
+            return dict(
+                placement_appairage_id=None,
+                entreprise_placement_id=None,
+                responsable_placement_id=None,
+                resultat_placement=None,
+                date_placement=None,
+                entreprise_validee_id=None,
+                contrat_signe=None,
+                # 🔁 si plus d’appairages → statut remis à "AUTRE"
+                statut=Candidat.StatutCandidat.AUTRE,
+            )
+
+        return dict(
+            placement_appairage_id=last.pk,
+            entreprise_placement_id=(
+                last.partenaire_id if last.statut not in (AppairageStatut.REFUSE, AppairageStatut.ANNULE) else None
+            ),
+            responsable_placement_id=last.created_by_id or last.updated_by_id,
+            resultat_placement=cls._STATUS_TO_RESULTAT.get(last.statut),
+            date_placement=last.date_appairage.date() if last.date_appairage else timezone.now().date(),
+            entreprise_validee_id=last.partenaire_id if last.statut in cls._ACCEPTED_STATUSES else None,
+            contrat_signe=Candidat.ContratSigne.EN_COURS if last.statut in cls._CONTRACT_STATUSES else None,
+            # 🔁 si appairage actif → statut candidat mis à EN_APPAIRAGE
+            statut=Candidat.StatutCandidat.EN_APPAIRAGE,
+        )
+
+    @classmethod
+    def _apply_snapshot(cls, candidat: Candidat, last, user=None):
+        """Écrit sur le candidat les seuls champs du snapshot qui changent."""
+        changed = []
+        for attname, value in cls._snapshot_values(last).items():
+            if getattr(candidat, attname) != value:
+                setattr(candidat, attname, value)
+                changed.append(attname[:-3] if attname.endswith("_id") else attname)
+
+        if not changed:
+            return False
+
+        candidat._snapshot_sync = True
+        try:
+            candidat.save(user=user, update_fields=changed + ["updated_at", "updated_by"])
+        finally:
+            candidat._snapshot_sync = False
+        logger.info(
+            "🔁 Snapshot candidat #%s mis à jour depuis dernier appairage: statut=%s, entreprise=%s, resultat=%s",
+            candidat.pk,
+            candidat.get_statut_display(),
+            candidat.entreprise_placement_id,
+            candidat.resultat_placement,
+        )
+        return True
+
+    @classmethod
+    def refresh_candidat_snapshots(cls, candidat_ids, user=None) -> int:
         """
-        Alimente le candidat depuis son DERNIER appairage
-        et met à jour son statut si nécessaire.
+        Recalcule en lot le snapshot de plusieurs candidats :
+        une requête pour les candidats + leur dernier appairage, une pour les appairages.
+        Retourne le nombre de candidats modifiés.
         """
-        try:
-            if not candidat:
-                return
+        ids = {pk for pk in candidat_ids if pk}
+        if not ids:
+            return 0
 
-            last = self._last_appairage_for(candidat)
-
-            if not last:
-                new_vals = dict(
-                    entreprise_placement=None,
-                    responsable_placement=None,
-                    resultat_placement=None,
-                    date_placement=None,
-                    entreprise_validee=None,
-                    contrat_signe=None,
-                    # 🔁 si plus d’appairages → statut remis à "AUTRE"
-                    statut=Candidat.StatutCandidat.AUTRE,
-                )
-            else:
-                resultat = self._STATUS_TO_RESULTAT.get(last.statut)
-                responsable = getattr(last, "created_by", None) or getattr(last, "updated_by", None)
-                entreprise = (
-                    last.partenaire if last.statut not in (AppairageStatut.REFUSE, AppairageStatut.ANNULE) else None
-                )
-                entreprise_validee = last.partenaire if last.statut in self._ACCEPTED_STATUSES else None
-                contrat = Candidat.ContratSigne.EN_COURS if last.statut in self._CONTRACT_STATUSES else None
-                date_pl = last.date_appairage.date() if last.date_appairage else timezone.now().date()
-
-                new_vals = dict(
-                    entreprise_placement=entreprise,
-                    responsable_placement=responsable,
-                    resultat_placement=resultat,
-                    date_placement=date_pl,
-                    entreprise_validee=entreprise_validee,
-                    contrat_signe=contrat,
-                    # 🔁 si appairage actif → statut candidat mis à EN_APPAIRAGE
-                    statut=Candidat.StatutCandidat.EN_APPAIRAGE,
-                )
+        latest = (
+            cls.objects.filter(candidat=OuterRef("pk"))
+            .order_by("-date_appairage", "-pk")
+            .values("pk")[:1]
+        )
+        candidats = list(Candidat.objects.filter(pk__in=ids).annotate(dernier_appairage_id=Subquery(latest)))
+        lasts = cls.objects.only(*cls._SNAPSHOT_ONLY).in_bulk(
+            [c.dernier_appairage_id for c in candidats if c.dernier_appairage_id]
+        )
 
-            dirty = False
-            for field, value in new_vals.items():
-                if getattr(candidat, field) != value:
-                    setattr(candidat, field, value)
-                    dirty = True
+        updated = 0
+        for candidat in candidats:
+            try:
+                updated += cls._apply_snapshot(candidat, lasts.get(candidat.dernier_appairage_id), user)
+            except Exception:
+                logger.exception("Sync candidat (dernier appairage) impossible (candidat id=%s)", candidat.pk)
+        return updated
 
-            if dirty:
-                user = getattr(self, "_user", None)
-                try:
-                    candidat.save(user=user)
-                except TypeError:
-                    candidat.save()
-                logger.info(
-                    "🔁 Snapshot candidat #%s mis à jour depuis dernier appairage: statut=%s, entreprise=%s, resultat=%s",
-                    candidat.pk,
-                    candidat.get_statut_display(),
-                    getattr(candidat.entreprise_placement, "nom", None),
-                    candidat.resultat_placement,
-                )
+    def _recompute_snapshot(self, candidat: Candidat):
+        """Recalcul complet (requête « dernier appairage ») pour un candidat."""
+        self._apply_snapshot(candidat, self._last_appairage_for(candidat.pk), getattr(self, "_user", None))
+
+    def _sync_after_save(self, original: dict):
+        """
+        Maintien incrémental du snapshot après enregistrement : on compare
+        (date_appairage, pk) de cet appairage au pointeur `placement_appairage`
+        du candidat ; la requête « dernier appairage » n'est faite que si le
+        pointeur est absent ou si cet appairage courant recule dans le temps.
+        """
+        old_candidat_id = original.get("candidat_id")
+        moved = old_candidat_id is not None and old_candidat_id != self.candidat_id
+
+        pending = _pending_snapshots()
+        if pending is not None:
+            pending.add(self.candidat_id)
+            if moved:
+                pending.add(old_candidat_id)
+            return
+
+        try:
+            candidat = self.candidat
+            pointer = candidat.placement_appairage_id
+            user = getattr(self, "_user", None)
+
+            if pointer is None:
+                self._recompute_snapshot(candidat)
+            elif pointer == self.pk:
+                old_date = original.get("date_appairage")
+                if moved or (old_date is not None and self.date_appairage < old_date):
+                    self._recompute_snapshot(candidat)
+                else:
+                    self._apply_snapshot(candidat, self, user)
+            else:
+                current = type(self).objects.filter(pk=pointer).values_list("date_appairage", "pk").first()
+                if current is None or (self.date_appairage, self.pk) > current:
+                    self._apply_snapshot(candidat, self, user)
         except Exception:
             logger.exception(
                 "Sync candidat (dernier appairage) impossible (candidat id=%s)",
-                getattr(candidat, "pk", None),
+                self.candidat_id,
             )
 
+        if moved:
+            # L'ancien candidat ne change que si cet appairage était son courant
+            try:
+                old_cand = Candidat.objects.filter(pk=old_candidat_id, placement_appairage_id=self.pk).first()
+                if old_cand is not None:
+                    self._recompute_snapshot(old_cand)
+            except Exception:
+                logger.exception(
+                    "Sync candidat (dernier appairage) impossible (candidat id=%s)",
+                    old_candidat_id,
+                )
+
     # ──────────────────────────────────────────────────────────────────────
     # Surcharges save/delete
     # ──────────────────────────────────────────────────────────────────────
     def save(self, *args, **kwargs):
         user = kwargs.pop("user", None)
         is_new = self.pk is None
+        original = {} if is_new else self._original_values()
 
-        original = None
-        original_candidat_id = None
-        if not is_new:
-            original = (
-                type(self)
-                .objects.only("id", "candidat_id", "statut", "retour_partenaire")
-                .get(pk=self.pk)
-            )
-            original_candidat_id = original.candidat_id
+        self._sync_centre(is_new)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "formation" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "centre"}
 
         with transaction.atomic():
             if user:
@@ -290,50 +409,94 @@ class Appairage(BaseModel):
 
             if is_new:
                 logger.info("🟢 Appairage créé : %s", self)
-                HistoriqueAppairage.objects.create(
+                enregistrer(HistoriqueAppairage(
                     appairage=self,
                     statut=self.statut,
                     auteur=getattr(self, "_user", None),
                     commentaire="Création de l’appairage",
-                )
-            else:
+                ))
+            elif original:
                 self._log_changes(original)
 
-            self._sync_candidat_snapshot(self.candidat)
-
-            if not is_new and original_candidat_id and original_candidat_id != self.candidat_id:
-                try:
-                    old_cand = Candidat.objects.get(pk=original_candidat_id)
-                    self._sync_candidat_snapshot(old_cand)
-                except Candidat.DoesNotExist:
-                    pass
+            self._sync_after_save(original)
+            self._remember_initial()
 
     def delete(self, *args, **kwargs):
         cand = self.candidat
+        # Seule la suppression du pointeur courant (ou un pointeur absent) impose un recalcul
+        was_current = cand.placement_appairage_id in (None, self.pk)
         with transaction.atomic():
             logger.warning("❌ Suppression appairage : %s", self)
             super().delete(*args, **kwargs)
-            self._sync_candidat_snapshot(cand)
 
-    def _log_changes(self, original):
+            if not was_current:
+                return
+            pending = _pending_snapshots()
+            if pending is not None:
+                pending.add(cand.pk)
+            else:
+                try:
+                    self._recompute_snapshot(cand)
+                except Exception:
+                    logger.exception(
+                        "Sync candidat (dernier appairage) impossible (candidat id=%s)",
+                        cand.pk,
+                    )
+
+    def _log_changes(self, original: dict):
         changements = []
+        labels = dict(AppairageStatut.choices)
 
-        if self.statut != original.statut:
-            changements.append(f"Statut : '{original.get_statut_display()}' → '{self.get_statut_display()}'")
-            HistoriqueAppairage.objects.create(
+        if self.statut != original.get("statut"):
+            ancien = labels.get(original.get("statut"), original.get("statut"))
+            changements.append(f"Statut : '{ancien}' → '{self.get_statut_display()}'")
+            enregistrer(HistoriqueAppairage(
                 appairage=self,
                 statut=self.statut,
                 auteur=getattr(self, "_user", None),
                 commentaire="Changement de statut",
-            )
+            ))
 
-        if self.retour_partenaire != original.retour_partenaire:
+        if self.retour_partenaire != original.get("retour_partenaire"):
             changements.append("Retour partenaire modifié")
 
         if changements:
             logger.info("✏️ Appairage modifié (id=%s) – %s", self.pk, "; ".join(changements))
 
 
+# ───────────────────────────────────────────────
+# RECALCULS GROUPÉS DU SNAPSHOT CANDIDAT
+# ───────────────────────────────────────────────
+
+_snapshot_batch = contextvars.ContextVar("rap_app_snapshot_batch", default=None)
+
+
+def _pending_snapshots():
+    return _snapshot_batch.get()
+
+
+@contextmanager
+def batch_candidat_snapshots(user=None):
+    """
+    Regroupe les mises à jour de snapshot candidat (actions de masse, imports) :
+    dans le bloc, save()/delete() d'un appairage notent seulement le candidat ;
+    un recalcul groupé (`refresh_candidat_snapshots`) a lieu à la sortie.
+    Les blocs imbriqués sont fusionnés dans le bloc englobant.
+    """
+    pending = _pending_snapshots()
+    if pending is not None:
+        yield pending
+        return
+
+    candidat_ids = set()
+    token = _snapshot_batch.set(candidat_ids)
+    try:
+        yield candidat_ids
+    finally:
+        _snapshot_batch.reset(token)
+    Appairage.refresh_candidat_snapshots(candidat_ids, user=user)
+
+
 class HistoriqueAppairage(models.Model):
     appairage = models.ForeignKey(
         Appairage,
@@ -368,22 +531,22 @@ class HistoriqueAppairage(models.Model):
         if self.activite != AppairageActivite.ARCHIVE:
             self.activite = AppairageActivite.ARCHIVE
             self.save(user=user, update_fields=["activite"])
-            HistoriqueAppairage.objects.create(
+            enregistrer(HistoriqueAppairage(
                 appairage=self,
                 statut=self.statut,
                 auteur=user,
                 commentaire="Appairage archivé",
-            )
+            ))
             logger.info("📦 Appairage #%s archivé (%s → %s)", self.pk, self.candidat, self.partenaire)
 
     def desarchiver(self, user=None):
         if self.activite != AppairageActivite.ACTIF:
             self.activite = AppairageActivite.ACTIF
             self.save(user=user, update_fields=["activite"])
-            HistoriqueAppairage.objects.create(
+            enregistrer(HistoriqueAppairage(
                 appairage=self,
                 statut=self.statut,
                 auteur=user,
                 commentaire="Appairage désarchivé",
-            )
+            ))
             logger.info("♻️ Appairage #%s désarchivé (%s → %s)", self.pk, self.candidat, self.partenaire)
@@ -7,6 +7,8 @@ from django.core.cache import cache
 from django.core.exceptions import FieldError, ValidationError
 
 from ..middleware import get_current_user
+from ..utils import refdata
+from ..utils.cache_utils import bump_cache_version_on_commit
 
 logger = logging.getLogger(__name__)
 
@@ -139,7 +141,8 @@ class BaseModel(models.Model):
         """
         👤 Récupère l'utilisateur actuel à partir du contexte.
         
-        Utilise le middleware ThreadLocal pour récupérer l'utilisateur actuel.
+        Lit la requête exposée par `CurrentUserMiddleware` (variable de
+        contexte, sûre en WSGI comme en ASGI ; utilisateur JWT inclus).
         
         Returns:
             User: L'utilisateur actuellement connecté ou None si non disponible
@@ -153,7 +156,7 @@ class BaseModel(models.Model):
             logger.debug("Aucun utilisateur trouvé dans le contexte.")
             return None
         except Exception as e:
-            logger.debug(f"Erreur lors de la récupération de l'utilisateur: {str(e)}")
+            logger.debug("Erreur lors de la récupération de l'utilisateur: %s", e)
             return None
 
     def get_changed_fields(self):
@@ -175,8 +178,9 @@ class BaseModel(models.Model):
                 name = field.name
                 if name in ('created_at', 'updated_at', 'created_by', 'updated_by'):
                     continue
-                old_val = getattr(old, name, None)
-                new_val = getattr(self, name, None)
+                # Clés étrangères comparées par id (attname) : aucun objet lié chargé
+                old_val = getattr(old, field.attname, None)
+                new_val = getattr(self, field.attname, None)
                 if old_val != new_val:
                     changes[name] = (old_val, new_val)
             return changes
@@ -191,7 +195,7 @@ class BaseModel(models.Model):
             message (str): Message à journaliser
         """
         if getattr(settings, 'ENABLE_MODEL_LOGGING', settings.DEBUG):
-            logger.debug(f"[{self.__class__.__name__}] {message}")
+            logger.debug("[%s] %s", self.__class__.__name__, message)
 
     def save(self, *args, **kwargs):
         """
@@ -217,7 +221,7 @@ class BaseModel(models.Model):
                 self.clean()
         except Exception as e:
             model_name = self.__class__.__name__
-            logger.error(f"Erreur de validation pour {model_name} (ID: {self.pk or 'nouveau'}): {e}")
+            logger.error("Erreur de validation pour %s (ID: %s): %s", model_name, self.pk or 'nouveau', e)
             raise
 
         self.log_debug(f"{'Création' if is_new else 'Mise à jour'} par {user}")
@@ -325,7 +329,7 @@ class BaseModel(models.Model):
         except (ValueError, TypeError):
             raise ValueError(f"Identifiant invalide : {id}")
         except cls.DoesNotExist:
-            logger.warning(f"{cls.__name__} avec ID={id} non trouvé")
+            logger.warning("%s avec ID=%s non trouvé", cls.__name__, id)
             raise
 
     def invalidate_caches(self):
@@ -334,9 +338,15 @@ class BaseModel(models.Model):
         
         Cette méthode peut être étendue dans les sous-classes pour
         invalider des caches supplémentaires spécifiques.
+
+        Incrémente aussi la version partagée du modèle (namespace = nom de classe) :
+        les entrées versionnées qui en dépendent (options, méta…) sont invalidées
+        pour tous les workers, une seconde fois au commit de la transaction.
         """
         cache.delete(f"{self.__class__.__name__}_{self.pk}")
         cache.delete(f"{self.__class__.__name__}_list")
+        bump_cache_version_on_commit(self.__class__.__name__)
+        refdata.forget_on_commit(self.__class__.__name__)
 
     @classmethod
     def get_filtered_queryset(cls, **filters):
@@ -352,5 +362,5 @@ class BaseModel(models.Model):
         try:
             return cls.objects.filter(**filters)
         except (FieldError, ValueError) as e:
-            logger.error(f"Erreur de filtrage sur {cls.__name__}: {e}")
+            logger.error("Erreur de filtrage sur %s: %s", cls.__name__, e)
             return cls.objects.none()
\ No newline at end of file
@@ -0,0 +1,134 @@
+# rap_app/models/blobs.py
+
+"""
+🧱 Fichiers adressés par contenu (`blobs/<sha[:2]>/<sha><ext>`) et leurs références.
+
+Un même PDF joint à plusieurs formations ou un CV redéposé n'est stocké
+qu'une fois (cf. `utils/blob_storage.py`). `nb_references` compte les
+`Document` / `CVTheque` qui pointent vers le fichier ; il est maintenu par
+signaux dans la transaction de l'écriture (un rollback l'annule aussi).
+À zéro, `orphelin_depuis` est daté et le fichier est effacé dès le commit
+(`Blob.objects.purger`, données personnelles des CV) ; `manage.py
+collecter_blobs` rattrape ce qui reste et recalcule les compteurs faussés
+par les écritures hors signaux (`bulk_create`, `update()`, rechargement).
+"""
+
+import logging
+import os
+
+from django.apps import apps
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from ..services.apercus import chemin_apercu
+from ..utils.blob_storage import blob_storage
+
+logger = logging.getLogger("application.blobs")
+
+# Modèles dont le champ `fichier` référence un blob
+MODELES_REFERENTS = ("Document", "CVTheque")
+
+
+def modeles_referents():
+    return [apps.get_model("rap_app", nom) for nom in MODELES_REFERENTS]
+
+
+def compter_references(chemin: str) -> int:
+    """Références réelles (lignes dont `fichier` vaut `chemin`), indépendamment du compteur."""
+    return sum(model.objects.filter(fichier=chemin).count() for model in modeles_referents())
+
+
+def sha256_du_chemin(chemin: str) -> str:
+    """`blobs/ab/<sha><ext>` → `<sha>` ("" pour un fichier temporaire `.…tmp`)."""
+    nom = os.path.basename(chemin)
+    return "" if nom.startswith(".") else os.path.splitext(nom)[0]
+
+
+def effacer_fichier_blob(chemin: str, limite_ts: float, sha256: str = "") -> bool:
+    """Efface le fichier s'il n'a pas été (re)téléversé depuis la limite, puis sa miniature orpheline."""
+    try:
+        if os.path.getmtime(blob_storage.path(chemin)) >= limite_ts:
+            return False  # contenu redéposé récemment : la transaction en cours le référencera
+    except FileNotFoundError:
+        return False
+    blob_storage.delete(chemin)
+    if sha256 and not any(model.objects.filter(sha256=sha256).exists() for model in modeles_referents()):
+        apercu = chemin_apercu(sha256)
+        if blob_storage.exists(apercu):
+            blob_storage.delete(apercu)
+    return True
+
+
+class BlobManager(models.Manager):
+    def acquire(self, chemin: str, sha256: str = "", taille=None, mime_type: str = ""):
+        """+1 référence sur `chemin` (ligne créée au premier usage)."""
+        alias = router.db_for_write(self.model)
+        increment = {"nb_references": F("nb_references") + 1, "orphelin_depuis": None}
+        with transaction.atomic(using=alias):
+            if self.using(alias).filter(chemin=chemin).update(**increment):
+                return
+            try:
+                with transaction.atomic(using=alias):
+                    self.using(alias).create(
+                        chemin=chemin,
+                        sha256=sha256,
+                        taille=taille,
+                        mime_type=(mime_type or "")[:100],
+                        nb_references=1,
+                    )
+            except IntegrityError:
+                self.using(alias).filter(chemin=chemin).update(**increment)  # créée entre-temps
+
+    def release(self, chemin: str):
+        """-1 référence ; à zéro, le blob devient orphelin (collecté plus tard)."""
+        self.filter(chemin=chemin, nb_references__gt=0).update(
+            nb_references=F("nb_references") - 1,
+            orphelin_depuis=Case(When(nb_references=1, then=Value(timezone.now())), default=None),
+        )
+
+    def orphelins(self, avant):
+        return self.filter(nb_references=0, orphelin_depuis__lt=avant)
+
+    def purger(self, chemin: str, limite_ts: float) -> bool:
+        """
+        Efface la ligne et le fichier d'un blob à zéro référence. Le compteur
+        est d'abord vérifié contre les champs `fichier` : un chemin posé hors
+        signaux (`update()`, `bulk_create`) remet le compteur à jour au lieu
+        d'effacer un fichier encore utilisé.
+        """
+        alias = router.db_for_write(self.model)
+        with transaction.atomic(using=alias):
+            if not self.using(alias).select_for_update().filter(chemin=chemin, nb_references=0).exists():
+                return False
+            reelles = compter_references(chemin)
+            if reelles:
+                self.using(alias).filter(chemin=chemin).update(nb_references=reelles, orphelin_depuis=None)
+                logger.warning("[Blob] %s : compteur à 0 pour %s référence(s), corrigé", chemin, reelles)
+                return False
+            self.using(alias).filter(chemin=chemin).delete()
+        return effacer_fichier_blob(chemin, limite_ts, sha256_du_chemin(chemin))
+
+
+class Blob(models.Model):
+    """Fichier stocké une seule fois. Ne pas modifier `nb_references` à la main."""
+
+    chemin = models.CharField(max_length=255, primary_key=True, verbose_name=_("Chemin"))
+    sha256 = models.CharField(max_length=64, db_index=True, verbose_name=_("Empreinte SHA-256"))
+    taille = models.PositiveBigIntegerField(null=True, blank=True, verbose_name=_("Taille (octets)"))
+    mime_type = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Type MIME"))
+    nb_references = models.PositiveIntegerField(default=0, verbose_name=_("Nombre de références"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Date de création"))
+    orphelin_depuis = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name=_("Sans référence depuis")
+    )
+
+    objects = BlobManager()
+
+    class Meta:
+        verbose_name = _("Fichier dédupliqué")
+        verbose_name_plural = _("Fichiers dédupliqués")
+
+    def __str__(self):
+        return f"{self.chemin} ({self.nb_references} réf.)"
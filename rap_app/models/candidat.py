@@ -11,6 +11,7 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from ..utils.bulk_writer import enregistrer
 from .custom_user import CustomUser
 from .formations import Formation
 from .base import BaseModel
@@ -495,9 +496,9 @@ class Candidat(BaseModel):
     def clean(self):
         super().clean()
         if not self.nom or not self.prenom:
-            logger.warning(f"⚠️ Candidat incomplet : nom ou prénom manquant (id={self.pk})")
+            logger.warning("⚠️ Candidat incomplet : nom ou prénom manquant (id=%s)", self.pk)
         if self.statut == self.StatutCandidat.AUTRE:
-            logger.info(f"ℹ️ Candidat #{self.pk} a un statut 'autre'")
+            logger.info("ℹ️ Candidat #%s a un statut 'autre'", self.pk)
 
     def save(self, *args, **kwargs):
         """
@@ -543,17 +544,17 @@ class Candidat(BaseModel):
                 changed = any(_is_set(getattr(self, f)) for f in champs_placement)
 
             if changed:
-                HistoriquePlacement.objects.create(
+                enregistrer(HistoriquePlacement(
                     candidat=self,
                     date_placement=self.date_placement or date.today(),
                     entreprise=self.entreprise_placement,
                     resultat=self.resultat_placement or ResultatPlacementChoices.EN_ATTENTE,
                     responsable=self.responsable_placement,
                     commentaire="📌 Historique créé automatiquement à la modification du placement.",
-                )
+                ))
 
     def delete(self, *args, **kwargs):
-        logger.warning(f"❌ Suppression du candidat : {self} (id={self.pk})")
+        logger.warning("❌ Suppression du candidat : %s (id=%s)", self, self.pk)
         user = self.compte_utilisateur
         super().delete(*args, **kwargs)
         if user:
@@ -568,7 +569,7 @@ class Candidat(BaseModel):
             if old != new:
                 changements.append(f"{champ}: '{old}' → '{new}'")
         if changements:
-            logger.info(f"✏️ Candidat modifié (id={self.pk}) – changements : " + "; ".join(changements))
+            logger.info("✏️ Candidat modifié (id=%s) – changements : %s", self.pk, "; ".join(changements))
 
     @property
     def ateliers_effectues(self):
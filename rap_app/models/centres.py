@@ -11,6 +11,18 @@ from .base import BaseModel
 
 logger = logging.getLogger(__name__)
 
+DEPARTEMENT_CODE_LENGTH = 2
+
+
+def departement_code_from_cp(code_postal) -> str:
+    """
+    Clé département indexée : 2 premiers caractères du code postal
+    ("92100" → "92", "97411" → "97", "20000" → "20"). Même découpage que les
+    filtres `departement=` et le périmètre staff.
+    """
+    return (code_postal or "").strip()[:DEPARTEMENT_CODE_LENGTH]
+
+
 class CentreManager(models.Manager):
     """
     Manager personnalisé pour le modèle Centre.
@@ -97,6 +109,15 @@ class Centre(BaseModel):
             RegexValidator(regex=r'^\d{5}$', message="Le code postal doit contenir exactement 5 chiffres")
         ]
     )
+    departement_code = models.CharField(
+        max_length=DEPARTEMENT_CODE_LENGTH,
+        blank=True,
+        default="",
+        db_index=True,
+        editable=False,
+        verbose_name="Code département",
+        help_text="2 premiers chiffres du code postal (maintenu automatiquement, sert au périmètre)",
+    )
     commune = models.CharField(max_length=255, blank=True, null=True)
 
 
@@ -195,7 +216,7 @@ class Centre(BaseModel):
         is_new = self.pk is None
 
         if is_new:
-            logger.info(f"[Centre] Création: {self.nom}")
+            logger.info("[Centre] Création: %s", self.nom)
         else:
             try:
                 old = Centre.objects.get(pk=self.pk)
@@ -205,20 +226,24 @@ class Centre(BaseModel):
                 if old.code_postal != self.code_postal:
                     changes.append(f"code_postal: '{old.code_postal}' → '{self.code_postal}'")
                 if changes:
-                    logger.info(f"[Centre] Modif #{self.pk}: {', '.join(changes)}")
+                    logger.info("[Centre] Modif #%s: %s", self.pk, ', '.join(changes))
             except Centre.DoesNotExist:
-                logger.warning(f"[Centre] Ancienne instance introuvable pour {self.pk}")
+                logger.warning("[Centre] Ancienne instance introuvable pour %s", self.pk)
 
         self.clean()
+        self.departement_code = departement_code_from_cp(self.code_postal)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "code_postal" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "departement_code"}
         super().save(*args, user=user, **kwargs)
-        logger.debug(f"[Centre] Sauvegarde complète de #{self.pk} (user={user})")
+        logger.debug("[Centre] Sauvegarde complète de #%s (user=%s)", self.pk, user)
         self.invalidate_caches()
 
     def delete(self, *args, **kwargs):
         """
         Supprime le centre avec journalisation.
         """
-        logger.warning(f"[Centre] Suppression du centre #{self.pk}: {self.nom}")
+        logger.warning("[Centre] Suppression du centre #%s: %s", self.pk, self.nom)
         self.invalidate_caches()
         return super().delete(*args, **kwargs)
 
@@ -236,12 +261,12 @@ class Centre(BaseModel):
 
     def mark_as_inactive(self):
         """Marque le centre comme inactif (si un champ statut existe)."""
-        logger.warning(f"[Centre] Tentative de désactivation du centre #{self.pk}, mais pas de champ statut")
+        logger.warning("[Centre] Tentative de désactivation du centre #%s, mais pas de champ statut", self.pk)
         return False
 
     def handle_related_update(self, related_object):
         """Gère la mise à jour des objets liés."""
-        logger.info(f"[Centre] Objet lié mis à jour pour le centre {self.nom}: {related_object}")
+        logger.info("[Centre] Objet lié mis à jour pour le centre %s: %s", self.nom, related_object)
         self.invalidate_caches()
 
     @classmethod
@@ -177,7 +177,7 @@ class Commentaire(BaseModel):
             if save:
                 # ✅ Pas d’update_fields ici : on veut forcer un vrai UPDATE SQL
                 super(Commentaire, self).save()
-            logger.info(f"✅ Commentaire #{self.pk} archivé (formation #{self.formation_id})")
+            logger.info("✅ Commentaire #%s archivé (formation #%s)", self.pk, self.formation_id)
 
     def desarchiver(self, save: bool = True):
         """Restaure un commentaire archivé."""
@@ -189,7 +189,7 @@ class Commentaire(BaseModel):
                 self.archived_by = None
             if save:
                 super(Commentaire, self).save()
-            logger.info(f"♻️ Commentaire #{self.pk} désarchivé (formation #{self.formation_id})")
+            logger.info("♻️ Commentaire #%s désarchivé (formation #%s)", self.pk, self.formation_id)
 
 
     # --- Aliases rétro-compatibles ---
@@ -286,8 +286,7 @@ class Commentaire(BaseModel):
         super().save(*args, **kwargs)
 
         logger.debug(
-            f"Commentaire #{self.pk} {'créé' if is_new else 'mis à jour'} "
-            f"pour la formation #{self.formation_id} — sat_form={self.saturation_formation}"
+            "Commentaire #%s %s pour la formation #%s — sat_form=%s", self.pk, 'créé' if is_new else 'mis à jour', self.formation_id, self.saturation_formation
         )
         
     def delete(self, *args, **kwargs):
@@ -315,7 +314,7 @@ class Commentaire(BaseModel):
         if update_formation and formation:
             self.update_formation_static(formation)
             
-        logger.debug(f"Commentaire #{self.pk} supprimé pour la formation #{self.formation_id}")
+        logger.debug("Commentaire #%s supprimé pour la formation #%s", self.pk, self.formation_id)
         
         return result
 
@@ -532,7 +531,7 @@ class Commentaire(BaseModel):
         Returns:
             QuerySet: Liste filtrée de commentaires.
         """
-        logger.debug(f"Chargement des commentaires filtrés")
+        logger.debug("Chargement des commentaires filtrés")
 
         queryset = cls.objects.select_related('formation', 'created_by').order_by(order_by)
         filters = Q()
@@ -545,7 +544,7 @@ class Commentaire(BaseModel):
             filters &= Q(contenu__icontains=search_query)
 
         queryset = queryset.filter(filters)
-        logger.debug(f"{queryset.count()} commentaire(s) trouvé(s)")
+        logger.debug("%s commentaire(s) trouvé(s)", queryset.count())
         return queryset if queryset.exists() else cls.objects.none()
 
     @classmethod
@@ -9,6 +9,8 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.auth.base_user import BaseUserManager
 from django.utils import timezone
 
+from ..utils.cache_utils import bump_cache_version_on_commit, user_cache_namespace
+
 logger = logging.getLogger("rap_app.customuser")
 
 
@@ -127,6 +129,9 @@ class CustomUser(AbstractUser):
     }
     CANDIDATE_ROLES = {ROLE_STAGIAIRE, ROLE_CANDIDAT, ROLE_CANDIDAT_USER}
 
+    # Champs affichés par d'autres ressources (owners, auteurs…) : namespace de cache « CustomUser »
+    DISPLAY_FIELDS = ("username", "first_name", "last_name", "email")
+
     # ----- Champs -----
     email = models.EmailField(
         unique=True,
@@ -201,6 +206,10 @@ class CustomUser(AbstractUser):
         - Normalise les champs texte.
         - ✅ _skip_candidate_sync : empêche la synchro User↔Candidat dans les signaux.
         """
+        # 🔐 Instance reconstruite depuis les claims JWT : incomplète, jamais sauvegardée
+        if self.__dict__.get("_from_token_claims"):
+            raise RuntimeError("Utilisateur issu des claims JWT : rechargez-le depuis la base avant de le sauvegarder.")
+
         is_new = self.pk is None
 
         # 🔹 Flag pour les signaux (lu par les receivers)
@@ -257,7 +266,7 @@ class CustomUser(AbstractUser):
         try:
             self.full_clean()
         except ValidationError as e:
-            logger.error(f"Erreur de validation pour {self.email}: {e}")
+            logger.error("Erreur de validation pour %s: %s", self.email, e)
             raise
 
         # ========================================================
@@ -266,24 +275,45 @@ class CustomUser(AbstractUser):
         try:
             self.full_clean()
         except ValidationError as e:
-            logger.error(f"Erreur de validation pour {self.email}: {e}")
+            logger.error("Erreur de validation pour %s: %s", self.email, e)
             raise
 
         # 🚫 Supprimer le flag avant l'appel à super().save()
         kwargs.pop("_skip_candidate_sync", None)
 
+        affichage_modifie = is_new or self._display_fields_changed(kwargs.get("update_fields"))
+
         # 🧩 Sauvegarde réelle
         super().save(*args, **kwargs)
 
+        # 🔄 Invalide le cache d'authentification (rôle, flags, mot de passe…)
+        self.__dict__.pop("_cached_centre_ids", None)
+        # 🗂️ « CustomUser » : listes qui affichent des utilisateurs (owners, auteurs…) —
+        #    seulement si un champ affiché change (pas pour last_login, rôle, compte candidat…)
+        namespaces = [user_cache_namespace(self.pk)]
+        if affichage_modifie:
+            namespaces.append("CustomUser")
+        bump_cache_version_on_commit(*namespaces)
+
         # 🧹 Nettoyage du flag temporaire (évite qu'il traîne en mémoire)
         if hasattr(self, "_skip_candidate_sync"):
             delattr(self, "_skip_candidate_sync")
 
         # 🧾 Logging clair
         action = "créé" if is_new else "mis à jour"
-        logger.info(f"✅ Utilisateur {action} : {self.email} (rôle : {self.get_role_display()})")
+        logger.info("✅ Utilisateur %s : %s (rôle : %s)", action, self.email, self.get_role_display())
+
 
 
+    def _display_fields_changed(self, update_fields=None) -> bool:
+        """Un des `DISPLAY_FIELDS` change-t-il à cette sauvegarde ? (avant `super().save()`)"""
+        if update_fields is not None:
+            return bool(set(update_fields) & set(self.DISPLAY_FIELDS))
+        charges = [f for f in self.DISPLAY_FIELDS if f not in self.get_deferred_fields()]
+        if not charges:
+            return False
+        avant = type(self)._base_manager.filter(pk=self.pk).values(*charges).first()
+        return avant is None or any(avant[f] != getattr(self, f) for f in charges)
 
     # ============================================================
     # 🔧 Helpers et affichage
@@ -325,6 +355,13 @@ class CustomUser(AbstractUser):
     # 🔍 Centres (portée)
     # ============================================================
     def get_centre_ids(self):
+        """
+        IDs des centres rattachés. Réutilise l'instantané posé par
+        l'authentification JWT en cache (`_cached_centre_ids`) : zéro requête.
+        """
+        cached = self.__dict__.get("_cached_centre_ids")
+        if cached is not None:
+            return list(cached)
         return list(self.centres.values_list("id", flat=True))
     
     @property
@@ -341,7 +378,7 @@ class CustomUser(AbstractUser):
             self.ROLE_PREPA_STAFF,
             self.ROLE_DECLIC_STAFF,
         }:
-            return list(self.centres.values_list("id", flat=True))
+            return self.get_centre_ids()
         return []
 
 
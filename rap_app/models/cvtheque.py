@@ -7,8 +7,11 @@ from django.core.validators import FileExtensionValidator
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from   django.core.exceptions import ValidationError
 from .base import BaseModel
+from ..utils.blob_storage import est_blob, get_blob_storage
+from ..utils.file_delivery import compute_sha256
 
 
 # Configuration du logger
@@ -19,7 +22,7 @@ def cv_upload_path(instance, filename):
     base_name, ext = os.path.splitext(filename)
     safe_name = f"cv_{instance.candidat.id}_{base_name[:50]}{ext}".replace(' ', '_')
     path = f'cvtheque/candidat_{instance.candidat.id}/{safe_name}'
-    logger.debug(f"Génération du chemin de stockage : {path}")
+    logger.debug("Génération du chemin de stockage : %s", path)
     return path
 
 class CVTheque(BaseModel):
@@ -33,6 +36,14 @@ class CVTheque(BaseModel):
         ('AUTRE', 'Autre document'),
     ]
 
+    # Origine du texte extrait (recherche plein texte)
+    TEXTE_SOURCES = [
+        ('pdf', 'Couche texte PDF'),
+        ('docx', 'Document Word'),
+        ('ocr', 'OCR (document scanné)'),
+        ('vide', 'Aucun texte exploitable'),
+    ]
+
     candidat = models.ForeignKey(
         'Candidat',
         on_delete=models.CASCADE,
@@ -49,6 +60,7 @@ class CVTheque(BaseModel):
 
     fichier = models.FileField(
         upload_to=cv_upload_path,
+        storage=get_blob_storage,  # stockage adressé par contenu (dédupliqué)
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])],
         verbose_name=_("Fichier"),
         help_text=_("Formats acceptés : PDF, DOC, DOCX (max. 5Mo)")
@@ -93,6 +105,58 @@ class CVTheque(BaseModel):
         help_text="Date du consentement donné ou retiré."
     )
 
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Empreinte SHA-256"),
+        help_text=_("Empreinte du contenu (ETag des téléchargements, calculée automatiquement)")
+    )
+
+    apercu = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Aperçu"),
+        help_text=_("Miniature de la première page (générée en arrière-plan)")
+    )
+
+    nb_pages = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Nombre de pages")
+    )
+
+    texte = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Texte extrait"),
+        help_text=_("Contenu textuel du fichier (extrait en arrière-plan, sert à la recherche)")
+    )
+
+    texte_source = models.CharField(
+        max_length=5,
+        choices=TEXTE_SOURCES,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Origine du texte"),
+        help_text=_("Vide tant que l'extraction n'a pas eu lieu")
+    )
+
+    # tsvector pondéré titre / mots-clés / texte (PostgreSQL) ; index GIN et
+    # trigramme posés par la migration 0014 (cf. services/cv_texte.py)
+    recherche = SearchVectorField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Index de recherche")
+    )
+
 
     class Meta:
         verbose_name = _("CVthèque")
@@ -112,14 +176,14 @@ class CVTheque(BaseModel):
     def extension(self):
         """Retourne l'extension du fichier"""
         ext = os.path.splitext(self.fichier.name)[1][1:].lower()
-        logger.debug(f"Extension détectée pour le document {self.pk}: {ext}")
+        logger.debug("Extension détectée pour le document %s: %s", self.pk, ext)
         return ext
 
     @property
     def taille(self):
         """Retourne la taille formatée"""
         if not self.fichier:
-            logger.warning(f"Document {self.pk} sans fichier attaché")
+            logger.warning("Document %s sans fichier attaché", self.pk)
             return "0 KB"
             
         try:
@@ -128,18 +192,18 @@ class CVTheque(BaseModel):
                 return f"{size / 1024:.1f} KB"
             return f"{size / (1024 * 1024):.1f} MB"
         except Exception as e:
-            logger.error(f"Erreur lors du calcul de la taille pour le document {self.pk}: {str(e)}")
+            logger.error("Erreur lors du calcul de la taille pour le document %s: %s", self.pk, e)
             return "Taille inconnue"
 
     def get_absolute_url(self):
         url = reverse('cvtheque:detail', kwargs={'pk': self.pk})
-        logger.debug(f"URL absolue générée pour le document {self.pk}: {url}")
+        logger.debug("URL absolue générée pour le document %s: %s", self.pk, url)
         return url
 
     def clean(self):
         """Validation et nettoyage des données"""
         super().clean()
-        logger.info(f"Début du nettoyage pour le document {self.pk or 'nouveau'}")
+        logger.info("Début du nettoyage pour le document %s", self.pk or 'nouveau')
         
         # Validation du titre
         if not self.titre or not self.titre.strip():
@@ -150,12 +214,12 @@ class CVTheque(BaseModel):
         if self.fichier and hasattr(self.fichier, 'size'):
             max_size = 5 * 1024 * 1024  # 5MB
             if self.fichier.size > max_size:
-                logger.warning(f"Fichier trop volumineux ({self.fichier.size} bytes) pour le document {self.pk}")
+                logger.warning("Fichier trop volumineux (%s bytes) pour le document %s", self.fichier.size, self.pk)
                 raise ValidationError({
                     "fichier": "Le fichier ne doit pas dépasser 5 Mo."
                 })
         
-        logger.info(f"Nettoyage terminé pour le document {self.pk or 'nouveau'}")
+        logger.info("Nettoyage terminé pour le document %s", self.pk or 'nouveau')
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -165,11 +229,20 @@ class CVTheque(BaseModel):
         is_new = self.pk is None
         
         try:
-            logger.info(f"Début de la sauvegarde du document {self.pk or 'nouveau'}")
+            logger.info("Début de la sauvegarde du document %s", self.pk or 'nouveau')
+            if self.fichier and (not self.fichier._committed or not self.sha256):
+                try:
+                    empreinte = compute_sha256(self.fichier)
+                except OSError as e:
+                    logger.warning("Empreinte impossible pour %s : %s", self.fichier.name, e)
+                else:
+                    if empreinte != self.sha256:  # nouveau contenu → aperçu et texte à régénérer
+                        self.sha256, self.apercu, self.nb_pages = empreinte, "", None
+                        self.texte, self.texte_source = "", ""
             super().save(*args, **kwargs)
             
             if is_new:
-                logger.info(f"Nouveau document créé: {self} (ID: {self.pk})")
+                logger.info("Nouveau document créé: %s (ID: %s)", self, self.pk)
                 # Exemple d'intégration avec un système d'historique
                 try:
                     from ..signals import document_created
@@ -177,36 +250,37 @@ class CVTheque(BaseModel):
                 except ImportError:
                     pass
             else:
-                logger.debug(f"Document mis à jour: {self.pk}")
+                logger.debug("Document mis à jour: %s", self.pk)
                 
         except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde du document: {str(e)}", exc_info=True)
+            logger.error("Erreur lors de la sauvegarde du document: %s", e, exc_info=True)
             raise
             
-        logger.info(f"Sauvegarde terminée pour le document {self.pk}")
+        logger.info("Sauvegarde terminée pour le document %s", self.pk)
 
     def delete(self, *args, **kwargs):
         """
         Suppression du document avec journalisation
         """
         try:
-            logger.info(f"Début de la suppression du document {self.pk}")
-            file_path = self.fichier.path if self.fichier else None
+            logger.info("Début de la suppression du document %s", self.pk)
+            # Fichier partagé (blob) : libéré par signal, effacé après commit s'il n'est plus référencé
+            file_path = self.fichier.path if self.fichier and not est_blob(self.fichier.name) else None
             
             super().delete(*args, **kwargs)
             
-            logger.info(f"Document supprimé: {self.pk}")
+            logger.info("Document supprimé: %s", self.pk)
             
             # Nettoyage optionnel du fichier physique
             if file_path and os.path.exists(file_path):
                 try:
                     os.remove(file_path)
-                    logger.debug(f"Fichier physique supprimé: {file_path}")
+                    logger.debug("Fichier physique supprimé: %s", file_path)
                 except OSError as e:
-                    logger.error(f"Erreur lors de la suppression du fichier {file_path}: {str(e)}")
+                    logger.error("Erreur lors de la suppression du fichier %s: %s", file_path, e)
                     
         except Exception as e:
-            logger.error(f"Erreur lors de la suppression du document {self.pk}: {str(e)}", exc_info=True)
+            logger.error("Erreur lors de la suppression du document %s: %s", self.pk, e, exc_info=True)
             raise
     # ===========================================
     # 🔎 Infos du candidat
@@ -11,6 +11,8 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.functional import cached_property
 
 from .base import BaseModel
+from ..utils.blob_storage import get_blob_storage
+from ..utils.file_delivery import compute_sha256
 from .formations import Formation
 from .formations import HistoriqueFormation  # nécessaire pour le logging historique
 
@@ -215,6 +217,7 @@ class Document(BaseModel):
 
     fichier = models.FileField(
         upload_to=filepath_for_document,
+        storage=get_blob_storage,  # stockage adressé par contenu (dédupliqué)
         verbose_name=_("Fichier"),
         help_text=_(f"Fichier à téléverser (PDF, image, etc.). Max : {MAX_FILE_SIZE_KB//1024} Mo")
     )
@@ -249,6 +252,31 @@ class Document(BaseModel):
         verbose_name=_("Type MIME"),
         help_text=_("Type MIME détecté automatiquement (ex : application/pdf)")
     )
+
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Empreinte SHA-256"),
+        help_text=_("Empreinte du contenu (ETag des téléchargements, calculée automatiquement)")
+    )
+
+    apercu = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Aperçu"),
+        help_text=_("Miniature de la première page (générée en arrière-plan)")
+    )
+
+    nb_pages = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Nombre de pages")
+    )
     
     # Managers
     objects = models.Manager()
@@ -387,13 +415,11 @@ class Document(BaseModel):
             # Validation de l'extension selon le type
             validate_file_extension(self.fichier, self.type_document)
 
-            # Détection du MIME type
-            try:
-                # self.mime_type = magic.from_buffer(self.fichier.read(2048), mime=True)
-                self.fichier.seek(0)
-            except Exception as e:
-                logger.warning(f"Impossible de détecter le MIME type pour {self.nom_fichier}: {e}")
-                # Ne pas bloquer la validation si la détection échoue
+            # Type MIME détecté pendant le téléversement (premiers octets) :
+            # aucune relecture du fichier ici (cf. utils/blob_storage.py)
+            mime_detecte = getattr(getattr(self.fichier, "_file", None), "mime_sniffed", "")
+            if mime_detecte:
+                self.mime_type = mime_detecte[: self.MAX_MIME_LENGTH]
 
             # Validation de la taille
             try:
@@ -412,7 +438,7 @@ class Document(BaseModel):
         """
         💾 Sauvegarde le document :
         - Validation complète (`clean`)
-        - Calcul taille fichier
+        - Calcul taille fichier et empreinte SHA-256 (si le fichier change)
         - HistoriqueFormation (si nouveau)
         - Log d'ajout
         
@@ -433,6 +459,16 @@ class Document(BaseModel):
         if not self.taille_fichier and self.fichier and hasattr(self.fichier, 'size'):
             self.taille_fichier = max(1, self.fichier.size // 1024)
 
+        # Empreinte du contenu (nouveau fichier ou empreinte manquante)
+        if self.fichier and (not self.fichier._committed or not self.sha256):
+            try:
+                empreinte = compute_sha256(self.fichier)
+            except OSError as e:
+                logger.warning("[Document] Empreinte impossible pour %s : %s", self.fichier.name, e)
+            else:
+                if empreinte != self.sha256:  # nouveau contenu → aperçu à régénérer
+                    self.sha256, self.apercu, self.nb_pages = empreinte, "", None
+
         # Sauvegarder
         super().save(*args, **kwargs)
 
@@ -447,9 +483,9 @@ class Document(BaseModel):
                     commentaire=f"Ajout du document « {self.nom_fichier} »",
                     created_by=self.created_by
                 )
-                logger.info(f"[Document] Document ajouté : {self.nom_fichier} (formation #{self.formation_id})")
+                logger.info("[Document] Document ajouté : %s (formation #%s)", self.nom_fichier, self.formation_id)
             except Exception as e:
-                logger.error(f"[Document] Erreur lors de la création de l'historique : {e}")
+                logger.error("[Document] Erreur lors de la création de l'historique : %s", e)
                 # Ne pas bloquer la sauvegarde si l'historique échoue
     
     def delete(self, *args, **kwargs):
@@ -483,9 +519,9 @@ class Document(BaseModel):
                     commentaire=f"Suppression du document « {nom_fichier} »",
                     created_by=user
                 )
-                logger.info(f"[Document] Document supprimé : {nom_fichier} (formation #{formation.id})")
+                logger.info("[Document] Document supprimé : %s (formation #%s)", nom_fichier, formation.id)
             except Exception as e:
-                logger.error(f"[Document] Erreur lors de la création de l'historique de suppression : {e}")
+                logger.error("[Document] Erreur lors de la création de l'historique de suppression : %s", e)
         
         return result
     
@@ -319,15 +319,15 @@ class Evenement(BaseModel):
         
         # Validation de date ancienne (warning uniquement)
         if self.event_date and self.event_date < today - timezone.timedelta(days=365):
-            logger.warning(f"Date ancienne pour l'événement #{self.pk} : {self.event_date}")
+            logger.warning("Date ancienne pour l'événement #%s : %s", self.pk, self.event_date)
         
         # Validation participants
         if self.participants_reels is not None and self.participants_prevus:
             if self.participants_reels > self.participants_prevus * 1.5:
-                logger.warning(f"Participants réels ({self.participants_reels}) dépassent largement les prévisions ({self.participants_prevus}) pour l'événement #{self.pk}")
+                logger.warning("Participants réels (%s) dépassent largement les prévisions (%s) pour l'événement #%s", self.participants_reels, self.participants_prevus, self.pk)
                 
             if self.participants_reels == 0 and self.get_temporal_status() == self.StatutTemporel.PASSE:
-                logger.warning(f"Événement passé #{self.pk} avec 0 participant réel")
+                logger.warning("Événement passé #%s avec 0 participant réel", self.pk)
 
     # ===== Sauvegarde =====
     def save(self, *args, **kwargs):
@@ -356,7 +356,7 @@ class Evenement(BaseModel):
             
             # Journalisation
             if is_new:
-                logger.info(f"Nouvel événement '{self}' créé (ID: {self.pk}).")
+                logger.info("Nouvel événement '%s' créé (ID: %s).", self, self.pk)
             elif original:
                 self._log_changes(original)
 
@@ -12,6 +12,7 @@ from django.utils import timezone
 
 from typing import Optional, Dict
 
+from ..utils.bulk_writer import enregistrer
 from .base import BaseModel
 from .partenaires import Partenaire
 from .centres import Centre
@@ -567,10 +568,10 @@ class Formation(BaseModel):
             
         # Validation des places
         if self.inscrits_crif > self.prevus_crif and self.prevus_crif > 0:
-            logger.warning(f"Inscrits CRIF ({self.inscrits_crif}) supérieurs aux prévus ({self.prevus_crif}) pour {self.nom}")
+            logger.warning("Inscrits CRIF (%s) supérieurs aux prévus (%s) pour %s", self.inscrits_crif, self.prevus_crif, self.nom)
             
         if self.inscrits_mp > self.prevus_mp and self.prevus_mp > 0:
-            logger.warning(f"Inscrits MP ({self.inscrits_mp}) supérieurs aux prévus ({self.prevus_mp}) pour {self.nom}")
+            logger.warning("Inscrits MP (%s) supérieurs aux prévus (%s) pour %s", self.inscrits_mp, self.prevus_mp, self.nom)
             
         # Validation du nom
         if not self.nom.strip():
@@ -608,12 +609,16 @@ class Formation(BaseModel):
                 self._user = user
 
             if is_new:
-                logger.info(f"[Formation] Créée : {self.nom}")
+                logger.info("[Formation] Créée : %s", self.nom)
             else:
-                logger.info(f"[Formation] Modifiée : {self.nom} (#{self.pk})")
+                logger.info("[Formation] Modifiée : %s (#%s)", self.nom, self.pk)
 
             super().save(*args, **kwargs)
 
+            # 🏢 Centre dénormalisé sur les appairages
+            if original and original.centre_id != self.centre_id:
+                self.appairages.update(centre_id=self.centre_id)
+
             # 🔁 Historique des modifications
             if not skip_history and original:
                 self._create_history_entries(original, user, update_fields)
@@ -759,7 +764,7 @@ class Formation(BaseModel):
                 new_val_str = self._format_field_for_history(field, new_val)
 
                 if not Formation.objects.filter(pk=self.pk).exists():
-                    logger.warning(f"Formation introuvable (ID={self.pk}), historique ignoré pour champ {field}")
+                    logger.warning("Formation introuvable (ID=%s), historique ignoré pour champ %s", self.pk, field)
                     continue
 
                 HistoriqueFormation.objects.create(
@@ -778,10 +783,10 @@ class Formation(BaseModel):
                     }
                 )
 
-                logger.debug(f"[Formation] Historique créé pour {field}: {old_val_str} → {new_val_str}")
+                logger.debug("[Formation] Historique créé pour %s: %s → %s", field, old_val_str, new_val_str)
 
         if not any_change:
-            logger.debug(f"[Formation] Aucun champ modifié pour {self.nom} (ID={self.pk})")
+            logger.debug("[Formation] Aucun champ modifié pour %s (ID=%s)", self.nom, self.pk)
     
     def _format_field_for_history(self, field_name, value):
         """
@@ -1274,7 +1279,7 @@ class Formation(BaseModel):
         if saturations:
             self.saturation = round(sum(saturations) / len(saturations), 2)
             self.save(update_fields=['saturation'])
-            logger.info(f"[Formation] Saturation mise à jour pour {self.nom}: {self.saturation}%")
+            logger.info("[Formation] Saturation mise à jour pour %s: %s%%", self.nom, self.saturation)
             return True
             
         return False
@@ -1365,13 +1370,13 @@ class Formation(BaseModel):
 
         ancien_etat = self.activite
         if ancien_etat == Activite.ARCHIVEE:
-            logger.info(f"[Formation] {self.nom} déjà archivée.")
+            logger.info("[Formation] %s déjà archivée.", self.nom)
             return self
 
         self.activite = Activite.ARCHIVEE
         self.save(update_fields=["activite"], user=user)
 
-        HistoriqueFormation.objects.create(
+        enregistrer(HistoriqueFormation(
             formation=self,
             champ_modifie="activite",
             ancienne_valeur=ancien_etat,
@@ -1379,9 +1384,9 @@ class Formation(BaseModel):
             commentaire=commentaire or "Formation archivée",
             created_by=user,
             action=HistoriqueFormation.ActionType.SUPPRESSION,
-        )
+        ))
 
-        logger.info(f"[Formation] Formation #{self.pk} archivée par {user or 'système'}.")
+        logger.info("[Formation] Formation #%s archivée par %s.", self.pk, user or 'système')
         return self
 
 
@@ -1393,13 +1398,13 @@ class Formation(BaseModel):
 
         ancien_etat = self.activite
         if ancien_etat == Activite.ACTIVE:
-            logger.info(f"[Formation] {self.nom} déjà active.")
+            logger.info("[Formation] %s déjà active.", self.nom)
             return self
 
         self.activite = Activite.ACTIVE
         self.save(update_fields=["activite"], user=user)
 
-        HistoriqueFormation.objects.create(
+        enregistrer(HistoriqueFormation(
             formation=self,
             champ_modifie="activite",
             ancienne_valeur=ancien_etat,
@@ -1407,9 +1412,9 @@ class Formation(BaseModel):
             commentaire=commentaire or "Formation restaurée",
             created_by=user,
             action=HistoriqueFormation.ActionType.AJOUT,
-        )
+        ))
 
-        logger.info(f"[Formation] Formation #{self.pk} restaurée par {user or 'système'}.")
+        logger.info("[Formation] Formation #%s restaurée par %s.", self.pk, user or 'système')
         return self
 
 
@@ -1589,15 +1594,48 @@ class HistoriqueFormation(BaseModel):
             ).exists()
 
             if recent_similar:
-                logger.info(f"[Historique] Doublon ignoré: {self.champ_modifie} pour {self.formation}")
+                logger.info("[Historique] Doublon ignoré: %s pour %s", self.champ_modifie, self.formation)
                 return False
 
         with transaction.atomic():
             super().save(*args, **kwargs)
 
-        logger.info(f"[Historique] {self}")
+        logger.info("[Historique] %s", self)
         return True
 
+    @classmethod
+    def preparer_lot(cls, objs, time_threshold=timezone.timedelta(minutes=5)):
+        """
+        📚 Équivalent groupé des contrôles de `save()` pour `BulkWriter` :
+        formation disparue → `formation=None`, doublons (même formation, champ,
+        auteur et nouvelle valeur depuis `time_threshold`, ou dans le lot) écartés.
+        Deux requêtes quelle que soit la taille du lot.
+        """
+        from rap_app.models import Formation
+
+        formation_ids = {o.formation_id for o in objs if o.formation_id is not None}
+        existantes = set(Formation.objects.filter(pk__in=formation_ids).values_list("pk", flat=True))
+        for o in objs:
+            if o.formation_id is not None and o.formation_id not in existantes:
+                o.formation = None
+
+        deja_vues = set(
+            cls.objects.filter(
+                Q(formation_id__in=existantes) | Q(formation__isnull=True),
+                champ_modifie__in={o.champ_modifie for o in objs},
+                created_at__gte=timezone.now() - time_threshold,
+            ).values_list("formation_id", "champ_modifie", "created_by_id", "nouvelle_valeur")
+        )
+        retenues = []
+        for o in objs:
+            cle = (o.formation_id, o.champ_modifie, o.created_by_id, o.nouvelle_valeur)
+            if cle in deja_vues:
+                logger.info("[Historique] Doublon ignoré: %s pour formation #%s", o.champ_modifie, o.formation_id)
+                continue
+            deja_vues.add(cle)
+            retenues.append(o)
+        return retenues
+
     def to_serializable_dict(self):
         return {
             "id": self.id,
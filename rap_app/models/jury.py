@@ -117,7 +117,7 @@ class SuiviJury(BaseModel, PeriodeMixin):
                     else:
                         self.pourcentage_mensuel = Decimal('0.00')
                 except (ZeroDivisionError, InvalidOperation) as e:
-                    logger.error(f"Erreur calcul pourcentage jury {self}: {str(e)}")
+                    logger.error("Erreur calcul pourcentage jury %s: %s", self, e)
                     self.pourcentage_mensuel = Decimal('0.00')
 
                 is_new = self.pk is None
@@ -133,13 +133,11 @@ class SuiviJury(BaseModel, PeriodeMixin):
 
                 super().save(*args, user=user, **kwargs)
 
-                logger.debug(f"Suivi jury {self.pk} sauvegardé avec succès")
+                logger.debug("Suivi jury %s sauvegardé avec succès", self.pk)
 
         except Exception as e:
             logger.critical(
-                f"Échec sauvegarde suivi jury {getattr(self, 'pk', 'Nouveau')} | "
-                f"Centre: {getattr(self.centre, 'pk', None)} | "
-                f"Erreur: {str(e)}",
+                "Échec sauvegarde suivi jury %s | Centre: %s | Erreur: %s", getattr(self, 'pk', 'Nouveau'), getattr(self.centre, 'pk', None), str(e),
                 exc_info=True
             )
             raise
@@ -122,7 +122,7 @@ class LogUtilisateur(BaseModel):
             )
             return log
         except Exception as e:
-            logger.error(f"Erreur log_action: {e}")
+            logger.error("Erreur log_action: %s", e)
             return None
         
     @classmethod
@@ -150,7 +150,7 @@ class LogUtilisateur(BaseModel):
             
             return log
         except Exception as e:
-            logger.error(f"Erreur log_system_action: {e}")
+            logger.error("Erreur log_system_action: %s", e)
             return None
             
     def to_dict(self) -> Dict[str, Any]:
@@ -8,6 +8,7 @@ from django.db.models import Count, Q
 
 import logging
 from .base import BaseModel
+from .centres import DEPARTEMENT_CODE_LENGTH, departement_code_from_cp
 
 logger = logging.getLogger("application.partenaires")
 
@@ -202,6 +203,16 @@ class Partenaire(BaseModel):
         help_text=_("Code postal à 5 chiffres")
     )
 
+    departement_code = models.CharField(
+        max_length=DEPARTEMENT_CODE_LENGTH,
+        blank=True,
+        default="",
+        db_index=True,
+        editable=False,
+        verbose_name=_("Code département"),
+        help_text=_("2 premiers chiffres du code postal (maintenu automatiquement)")
+    )
+
     city = models.CharField(
         max_length=CITY_MAX_LENGTH,
         blank=True,
@@ -553,7 +564,7 @@ class Partenaire(BaseModel):
             existing = Partenaire.objects.filter(nom__iexact=self.nom).first()
             if existing:
                 logger.info(
-                    f"Réutilisation du partenaire existant : {existing.nom} (ID: {existing.pk})"
+                    "Réutilisation du partenaire existant : %s (ID: %s)", existing.nom, existing.pk
                 )
                 self._was_reused = True  # ✅ ici, après détection
                 # ⚙️ Copie des champs modifiables si besoin
@@ -595,10 +606,14 @@ class Partenaire(BaseModel):
         # 6️⃣ Validation et sauvegarde
         # ────────────────
         self.full_clean()
+        self.departement_code = departement_code_from_cp(self.zip_code)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "zip_code" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "departement_code"}
         super().save(*args, **kwargs)
 
         logger.info(
-            f"{'Création' if is_new else 'Mise à jour'} du partenaire : {self.nom} (ID: {self.pk})"
+            "%s du partenaire : %s (ID: %s)", 'Création' if is_new else 'Mise à jour', self.nom, self.pk
         )
 
     # ─────────────────────────────────────────────────────────────
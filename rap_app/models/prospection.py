@@ -43,6 +43,13 @@ class ProspectionManager(models.Manager):
             .filter(relance_prevue__isnull=False, relance_prevue__lte=date)
         )
 
+    def relances_dues(self, date=None):
+        """
+        Relances échues ou du jour, hors statuts terminaux : même prédicat que
+        l'index partiel `prosp_relance_owner_idx` (owner, relance_prevue).
+        """
+        return self.a_relancer(date).exclude(statut__in=sorted(Prospection.STATUTS_TERMINAUX))
+
     def par_partenaire(self, partenaire_id):
         return self.filter(partenaire_id=partenaire_id).select_related("formation")
 
@@ -170,6 +177,12 @@ class Prospection(BaseModel):
     objects = models.Manager()
     custom = ProspectionManager()
 
+    STATUTS_TERMINAUX = frozenset({
+        ProspectionChoices.STATUT_ACCEPTEE,
+        ProspectionChoices.STATUT_REFUSEE,
+        ProspectionChoices.STATUT_ANNULEE,
+    })
+
     class Meta:
         verbose_name = _("Suivi de prospection")
         verbose_name_plural = _("Suivis de prospections")
@@ -185,6 +198,19 @@ class Prospection(BaseModel):
             models.Index(fields=["motif"]),
             models.Index(fields=["objectif"]),
             models.Index(fields=["moyen_contact"]),
+            # 📅 Liste de relances : prospections actives non terminées avec relance prévue
+            models.Index(
+                fields=["owner", "relance_prevue"],
+                name="prosp_relance_owner_idx",
+                condition=Q(activite="active", relance_prevue__isnull=False)
+                & ~Q(
+                    statut__in=[
+                        ProspectionChoices.STATUT_ACCEPTEE,
+                        ProspectionChoices.STATUT_REFUSEE,
+                        ProspectionChoices.STATUT_ANNULEE,
+                    ]
+                ),
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -227,6 +253,20 @@ class Prospection(BaseModel):
                 {"commentaire": _("Un commentaire est obligatoire pour un refus ou une annulation.")}
             )
 
+    # ------------------- cohérence statut ↔ relance -------------------
+    @classmethod
+    def statut_coherent(cls, statut, relance_prevue):
+        """
+        Statut effectivement enregistré : une relance prévue force « à relancer »
+        (sauf statut terminal), l'absence de relance fait retomber « à relancer »
+        sur « en cours ».
+        """
+        if relance_prevue and statut not in cls.STATUTS_TERMINAUX:
+            return ProspectionChoices.STATUT_A_RELANCER
+        if not relance_prevue and statut == ProspectionChoices.STATUT_A_RELANCER:
+            return ProspectionChoices.STATUT_EN_COURS
+        return statut
+
     # ------------------- synchro centre -------------------
     def sync_centre(self):
         if self.formation_id:
@@ -237,7 +277,7 @@ class Prospection(BaseModel):
     # ------------------- ARCHIVAGE -------------------
     def archiver(self, user=None, resultat=None):
         if self.activite == Prospection.ACTIVITE_ARCHIVEE:
-            logger.info(f"Prospection #{self.pk} déjà archivée.")
+            logger.info("Prospection #%s déjà archivée.", self.pk)
             return
 
         ancienne_activite = self.activite
@@ -278,12 +318,6 @@ class Prospection(BaseModel):
         is_new = self.pk is None
         user = updated_by or getattr(self, "created_by", None)
 
-        TERMINAUX = {
-            ProspectionChoices.STATUT_ACCEPTEE,
-            ProspectionChoices.STATUT_REFUSEE,
-            ProspectionChoices.STATUT_ANNULEE,
-        }
-
         ancien = None
         if not is_new:
             try:
@@ -306,11 +340,7 @@ class Prospection(BaseModel):
 
         old_statut = getattr(ancien, "statut", None)
 
-        # Cohérence statut ↔ relance
-        if self.relance_prevue and self.statut not in TERMINAUX:
-            self.statut = ProspectionChoices.STATUT_A_RELANCER
-        elif not self.relance_prevue and self.statut == ProspectionChoices.STATUT_A_RELANCER:
-            self.statut = ProspectionChoices.STATUT_EN_COURS
+        self.statut = self.statut_coherent(self.statut, self.relance_prevue)
 
         self.full_clean()
 
@@ -345,8 +375,10 @@ class Prospection(BaseModel):
             if changements:
                 username = getattr(user, "username", None) or "inconnu"
                 logger.info(
-                    f"[Prospection #{self.pk}] Changements par {username} : "
-                    + "; ".join(f"{c}: {a}→{b}" for c, (a, b) in changements.items())
+                    "[Prospection #%s] Changements par %s : %s",
+                    self.pk,
+                    username,
+                    "; ".join(f"{c}: {a}→{b}" for c, (a, b) in changements.items()),
                 )
                 for champ, (old, new) in changements.items():
                     self.creer_historique(
@@ -399,8 +431,7 @@ class Prospection(BaseModel):
             )
         except Exception as e:
             logger.warning(
-                f"⚠️ Impossible de créer un historique pour Prospection #{self.pk} "
-                f"({champ_modifie}) : {e}"
+                "⚠️ Impossible de créer un historique pour Prospection #%s (%s) : %s", self.pk, champ_modifie, e
             )
 
 
@@ -508,7 +539,7 @@ class HistoriqueProspection(BaseModel):
         super().clean()
         if self.ancien_statut == self.nouveau_statut:
             logger.warning(
-                f"Historique sans changement de statut pour prospection #{self.prospection_id}"
+                "Historique sans changement de statut pour prospection #%s", self.prospection_id
             )
 
     def save(self, *args, **kwargs):
@@ -0,0 +1,89 @@
+# rap_app/models/sequences.py
+
+"""
+🔢 Compteurs de numérotation lisible (références VAE, etc.).
+
+Un compteur est identifié par (préfixe, période, portée) — par exemple
+("VAE", "20251118", "12") pour les VAE du centre 12 créées ce jour-là.
+L'incrément est un seul `INSERT … ON CONFLICT DO UPDATE … RETURNING` :
+atomique, sans course entre workers et sans balayage des références
+existantes. La ligne reste verrouillée jusqu'à la fin de la transaction
+appelante : en cas de rollback, les numéros ne sont pas perdus.
+"""
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.utils.translation import gettext_lazy as _
+
+
+class SequenceManager(models.Manager):
+    _UPSERT_VENDORS = {"postgresql", "sqlite"}
+
+    def allocate(self, prefix: str, periode: str = "", scope: str = "", count: int = 1) -> range:
+        """
+        Réserve `count` numéros consécutifs et retourne leur plage
+        (ex. `range(4, 7)` → 4, 5, 6). À utiliser pour les créations en masse.
+        """
+        if count < 1:
+            raise ValueError("count doit être ≥ 1")
+
+        alias = router.db_for_write(self.model)
+        connection = connections[alias]
+        if connection.vendor in self._UPSERT_VENDORS:
+            last = self._allocate_upsert(connection, prefix, periode, scope, count)
+        else:
+            last = self._allocate_locked(alias, prefix, periode, scope, count)
+        return range(last - count + 1, last + 1)
+
+    def next_value(self, prefix: str, periode: str = "", scope: str = "") -> int:
+        """Numéro suivant du compteur (créé à la volée s'il n'existe pas)."""
+        return self.allocate(prefix, periode, scope)[0]
+
+    def _allocate_upsert(self, connection, prefix, periode, scope, count):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (prefix, periode, scope, last_value) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (prefix, periode, scope) "
+            f"DO UPDATE SET last_value = {table}.last_value + EXCLUDED.last_value "
+            f"RETURNING last_value"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [prefix, periode, scope, count])
+            return cursor.fetchone()[0]
+
+    def _allocate_locked(self, alias, prefix, periode, scope, count):
+        key = {"prefix": prefix, "periode": periode, "scope": scope}
+        with transaction.atomic(using=alias):
+            qs = self.using(alias).select_for_update().filter(**key)
+            if not qs.exists():
+                try:
+                    with transaction.atomic(using=alias):
+                        self.using(alias).create(**key, last_value=0)
+                except IntegrityError:
+                    pass  # créé entre-temps par un autre worker
+            qs.update(last_value=models.F("last_value") + count)
+            return qs.values_list("last_value", flat=True).get()
+
+
+class Sequence(models.Model):
+    """
+    Compteur nommé. Ne pas modifier `last_value` à la main : passer par
+    `Sequence.objects.allocate()` / `next_value()`.
+    """
+
+    prefix = models.CharField(max_length=30, verbose_name=_("Préfixe"))
+    periode = models.CharField(max_length=20, blank=True, default="", verbose_name=_("Période"))
+    scope = models.CharField(max_length=30, blank=True, default="", verbose_name=_("Portée"))
+    last_value = models.PositiveBigIntegerField(default=0, verbose_name=_("Dernière valeur attribuée"))
+
+    objects = SequenceManager()
+
+    class Meta:
+        verbose_name = _("Séquence de numérotation")
+        verbose_name_plural = _("Séquences de numérotation")
+        constraints = [
+            models.UniqueConstraint(fields=["prefix", "periode", "scope"], name="sequence_unique_key"),
+        ]
+
+    def __str__(self):
+        key = "-".join(p for p in (self.prefix, self.periode, self.scope) if p)
+        return f"{key} → {self.last_value}"
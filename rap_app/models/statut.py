@@ -243,26 +243,17 @@ class Statut(BaseModel):
         super().save(*args, user=user, skip_validation=skip_validation, **kwargs)
 
         logger.info(
-            f"{'🟢 Nouveau statut' if is_new else '📝 Statut modifié'} : "
-            f"{self.get_nom_display()} ({self.couleur})"
+            "%s : %s (%s)", '🟢 Nouveau statut' if is_new else '📝 Statut modifié', self.get_nom_display(), self.couleur
         )
         
     def invalidate_caches(self):
         """
         🔄 Invalide les caches associés à ce statut.
+
+        `BaseModel.invalidate_caches()` incrémente la version partagée "Statut" :
+        toutes les options / méta en cache qui en dépendent sont régénérées.
         """
         super().invalidate_caches()
-        
-        # Invalider les caches spécifiques aux statuts
-        from django.core.cache import cache
-        cache_keys = [
-            f"statut_{self.pk}",
-            f"statut_liste",
-            f"statut_{self.nom}"
-        ]
-        
-        for key in cache_keys:
-            cache.delete(key)
 
     def __str__(self):
         """
@@ -223,7 +223,7 @@ class TypeOffre(BaseModel):
 
             # Logging
             if is_new:
-                logger.info(f"🆕 Création du type d'offre : {self}")
+                logger.info("🆕 Création du type d'offre : %s", self)
             elif old_instance:
                 modifications = []
                 if old_instance.nom != self.nom:
@@ -234,7 +234,7 @@ class TypeOffre(BaseModel):
                     modifications.append(f"couleur: {old_instance.couleur} → {self.couleur}")
 
                 if modifications:
-                    logger.info(f"✏️ Modification du type d'offre #{self.pk} : " + ", ".join(modifications))
+                    logger.info("✏️ Modification du type d'offre #%s : %s", self.pk, ", ".join(modifications))
 
     def assign_default_color(self):
         """
@@ -244,7 +244,7 @@ class TypeOffre(BaseModel):
         # On affecte seulement si aucune couleur personnalisée ou si c'est la couleur grise par défaut
         if not self.couleur or self.couleur == "#6c757d":
             self.couleur = self.COULEURS_PAR_DEFAUT.get(self.nom, "#6c757d")
-            logger.debug(f"Couleur par défaut assignée au type d'offre {self}: {self.couleur}")
+            logger.debug("Couleur par défaut assignée au type d'offre %s: %s", self, self.couleur)
 
     def __str__(self):
         """
@@ -305,7 +305,7 @@ class TypeOffre(BaseModel):
             return '#FFFFFF'  # Texte blanc pour les fonds foncés
         except Exception as e:
             # En cas d'erreur, utiliser du texte blanc par défaut
-            logger.warning(f"Erreur lors du calcul de la luminosité pour {self.couleur}: {str(e)}")
+            logger.warning("Erreur lors du calcul de la luminosité pour %s: %s", self.couleur, e)
             return '#FFFFFF'
     
     def get_badge_html(self):
@@ -358,20 +358,11 @@ class TypeOffre(BaseModel):
     def invalidate_caches(self):
         """
         🔄 Invalide les caches associés à ce type d'offre.
+
+        `BaseModel.invalidate_caches()` incrémente la version partagée "TypeOffre" :
+        toutes les options / méta en cache qui en dépendent sont régénérées.
         """
         super().invalidate_caches()
-        
-        # Invalider les caches spécifiques aux types d'offre
-        from django.core.cache import cache
-        cache_keys = [
-            f"typeoffre_{self.pk}",
-            f"typeoffre_liste",
-            f"typeoffre_{self.nom}",
-            f"formations_par_typeoffre_{self.pk}"
-        ]
-        
-        for key in cache_keys:
-            cache.delete(key)
 
     class Meta:
         verbose_name = "Type d'offre"
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -9,6 +10,7 @@ from datetime import date
 
 from .centres import Centre
 from .base import BaseModel 
+from .sequences import Sequence
 
 # Configuration du logger
 logger = logging.getLogger("application.vae")
@@ -137,24 +139,43 @@ class VAE(BaseModel):
             self.created_at = timezone.now()
 
         if not self.reference:
-            prefix = "VAE"
-            date_str = self.created_at.strftime('%Y%m%d')
-            centre_id = self.centre.id if self.centre_id else "000"
-            existing_refs = VAE.objects.filter(
-                reference__startswith=f"{prefix}-{date_str}-{centre_id}"
-            ).count()
-            self.reference = f"{prefix}-{date_str}-{centre_id}-{existing_refs + 1:03d}"
+            self.attribuer_references([self])
 
         if not skip_validation:
             self.full_clean()
 
         if is_new:
-            logger.info(f"🆕 Création VAE {self.reference} pour centre {self.centre}")
+            logger.info("🆕 Création VAE %s pour centre %s", self.reference, self.centre)
         else:
-            logger.info(f"✏️ Mise à jour VAE {self.reference} - Statut: {self.get_statut_display()}")
+            logger.info("✏️ Mise à jour VAE %s - Statut: %s", self.reference, self.get_statut_display())
 
         super().save(*args, user=user, **kwargs)
 
+    # ------------------- références -------------------
+    REFERENCE_PREFIX = "VAE"
+
+    def _reference_key(self):
+        """(période, portée) du compteur : jour de création et centre."""
+        created_at = self.created_at or timezone.now()
+        return created_at.strftime('%Y%m%d'), str(self.centre_id or "000")
+
+    @classmethod
+    def attribuer_references(cls, vaes):
+        """
+        Attribue `VAE-AAAAMMJJ-centre-NNN` aux VAE sans référence, en réservant
+        une plage de numéros par (jour, centre) : une requête par groupe,
+        utilisable avant un `bulk_create`.
+        """
+        groupes = {}
+        for vae in vaes:
+            if not vae.reference:
+                groupes.setdefault(vae._reference_key(), []).append(vae)
+
+        for (periode, scope), membres in groupes.items():
+            numeros = Sequence.objects.allocate(cls.REFERENCE_PREFIX, periode, scope, count=len(membres))
+            for vae, numero in zip(membres, numeros):
+                vae.reference = f"{cls.REFERENCE_PREFIX}-{periode}-{scope}-{numero:03d}"
+
     def changer_statut(self, nouveau_statut, date_effet=None, commentaire="", user=None):
         if nouveau_statut not in dict(self.STATUT_CHOICES):
             raise ValidationError(f"Statut invalide: {nouveau_statut}")
@@ -169,6 +190,8 @@ class VAE(BaseModel):
             date_changement_effectif=date_effet,
             commentaire=commentaire
         )
+        if hasattr(self, "date_dernier_changement"):
+            self.date_dernier_changement = max(filter(None, (self.date_dernier_changement, date_effet)))
 
     def is_en_cours(self):
         return self.statut in self.STATUTS_EN_COURS
@@ -182,9 +205,13 @@ class VAE(BaseModel):
         ).first()
 
     def duree_statut_actuel(self):
-        dernier_changement = self.dernier_changement_statut()
-        if dernier_changement:
-            return (timezone.now().date() - dernier_changement.date_changement_effectif).days
+        if hasattr(self, "date_dernier_changement"):  # annoté par annotate_dernier_changement()
+            date_changement = self.date_dernier_changement
+        else:
+            dernier_changement = self.dernier_changement_statut()
+            date_changement = dernier_changement.date_changement_effectif if dernier_changement else None
+        if date_changement:
+            return (timezone.now().date() - date_changement).days
         return self.duree_jours
 
     @property
@@ -302,7 +329,7 @@ class HistoriqueStatutVAE(BaseModel):
         if not skip_validation:
             self.full_clean()
         if self.pk is None:
-            logger.info(f"📝 Nouveau statut enregistré pour {self.vae}: {self.get_statut_display()} le {self.date_changement_effectif}")
+            logger.info("📝 Nouveau statut enregistré pour %s: %s le %s", self.vae, self.get_statut_display(), self.date_changement_effectif)
         super().save(*args, user=user, **kwargs)
 
     def invalidate_caches(self):
@@ -330,3 +357,16 @@ class HistoriqueStatutVAE(BaseModel):
             'commentaire': self.commentaire,
         })
         return data
+
+
+def annotate_dernier_changement(queryset):
+    """
+    Annote `date_dernier_changement` sur un queryset de VAE (une sous-requête) :
+    `duree_statut_actuel()` n'interroge plus l'historique VAE par VAE.
+    """
+    dernier = (
+        HistoriqueStatutVAE.objects.filter(vae=OuterRef("pk"))
+        .order_by("-date_changement_effectif", "-created_at")
+        .values("date_changement_effectif")[:1]
+    )
+    return queryset.annotate(date_dernier_changement=Subquery(dernier))
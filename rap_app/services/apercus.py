@@ -0,0 +1,120 @@
+# rap_app/services/apercus.py
+
+"""
+🖼️ Aperçus (miniature de la 1re page + nombre de pages) des documents et CV.
+
+- Rendu PyMuPDF de la première page en JPEG (largeur `APERCU_LARGEUR`).
+- Stockage adressé par contenu : `apercus/<sha[:2]>/<sha>.jpg` — deux fichiers
+  identiques partagent la même miniature, et un fichier déjà rendu n'est
+  jamais recalculé.
+- Rendu hors requête : planifié après commit (`planifier_apercu`) sur un
+  petit pool de threads (`APERCU_WORKERS`), ou en ligne si
+  `APERCU_BACKGROUND=False` (tests, commande `generer_apercus`).
+- Résultat écrit par `queryset.update()` : ni `save()` ni signaux.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+logger = logging.getLogger("application.apercus")
+
+# Formats pris en charge par PyMuPDF (les .doc/.docx n'ont pas d'aperçu)
+EXTENSIONS_SUPPORTEES = {".pdf", ".png", ".jpg", ".jpeg"}
+
+_executor = None
+
+
+def chemin_apercu(sha256: str) -> str:
+    return f"apercus/{sha256[:2]}/{sha256}.jpg"
+
+
+def etag_apercu(sha256: str) -> str:
+    """Empreinte propre à la miniature (distincte de celle du fichier source)."""
+    return hashlib.sha256(f"apercu:{sha256}".encode()).hexdigest()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "APERCU_WORKERS", 2),
+            thread_name_prefix="apercus",
+        )
+    return _executor
+
+
+def rendre_premiere_page(data: bytes, extension: str, largeur: int, image: bool = True):
+    """Retourne (JPEG de la 1re page ou None si `image=False`, nombre de pages)."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=data, filetype=extension.lstrip(".")) as doc:
+        if not image:
+            return None, doc.page_count
+        page = doc[0]
+        zoom = largeur / page.rect.width if page.rect.width else 1
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pix.tobytes("jpg", jpg_quality=80), doc.page_count
+
+
+def generer_apercu(model_label: str, pk: int) -> bool:
+    """
+    Calcule l'aperçu d'un `Document` / `CVTheque` et l'enregistre.
+    Retourne True si l'aperçu est disponible à l'issue de l'appel.
+    """
+    model = apps.get_model(model_label)
+    row = model.objects.filter(pk=pk).values("fichier", "sha256").first()
+    if not row or not row["fichier"] or not row["sha256"]:
+        return False
+
+    extension = os.path.splitext(row["fichier"])[1].lower()
+    if extension not in EXTENSIONS_SUPPORTEES:
+        return False
+
+    chemin = chemin_apercu(row["sha256"])
+    try:
+        deja_rendu = default_storage.exists(chemin)  # même contenu déjà traité
+        with default_storage.open(row["fichier"], "rb") as fh:
+            data = fh.read()
+        image, nb_pages = rendre_premiere_page(
+            data, extension, getattr(settings, "APERCU_LARGEUR", 320), image=not deja_rendu
+        )
+        if image is not None and not default_storage.exists(chemin):
+            default_storage.save(chemin, ContentFile(image))
+    except Exception as e:  # fichier corrompu / protégé : pas d'aperçu
+        logger.warning("[Aperçu] %s #%s : rendu impossible (%s)", model_label, pk, e)
+        return False
+
+    # Le fichier a pu changer entre-temps : on n'écrit que pour la même empreinte
+    model.objects.filter(pk=pk, sha256=row["sha256"]).update(apercu=chemin, nb_pages=nb_pages)
+    return True
+
+
+def _executer(model_label: str, pk: int):
+    """Exécution dans un thread du pool : il ferme ses propres connexions."""
+    try:
+        generer_apercu(model_label, pk)
+    finally:
+        connections.close_all()
+
+
+def planifier_apercu(instance):
+    """
+    À appeler après un `save()` dont le fichier a changé : le rendu démarre
+    une fois la transaction validée, sans bloquer la requête.
+    """
+    if not instance.sha256 or instance.apercu == chemin_apercu(instance.sha256):
+        return
+    label, pk = instance._meta.label, instance.pk
+    if getattr(settings, "APERCU_BACKGROUND", True):
+        transaction.on_commit(lambda: _get_executor().submit(_executer, label, pk))
+    else:
+        transaction.on_commit(partial(generer_apercu, label, pk))
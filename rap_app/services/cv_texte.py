@@ -0,0 +1,249 @@
+# rap_app/services/cv_texte.py
+
+"""
+🔎 Texte intégral des CV (CVThèque) : extraction et indexation.
+
+- Extraction : couche texte PDF (PyMuPDF) ou paragraphes `.docx` ; si la
+  couche texte est quasi vide (scan), OCR Tesseract des premières pages
+  (`CV_OCR_MAX_PAGES`, langues `CV_OCR_LANG`). Les `.doc` binaires ne sont
+  pas lus (`texte_source="vide"`).
+- Texte compacté (espaces fusionnés, tronqué à `CV_TEXTE_MAX_CARACTERES`)
+  puis écrit par `queryset.update()` : ni `save()` ni signaux.
+- Index (PostgreSQL) : `recherche` = tsvector pondéré titre (A) / mots-clés
+  (B) / texte (C), index GIN ; index trigramme sur `UPPER(texte)` pour les
+  sous-chaînes que le tsvector ne couvre pas ("C++", début de mot…).
+  Cf. migration 0014.
+- Hors requête : planifié après commit (`planifier_extraction`) sur un pool
+  dédié (`CV_TEXTE_WORKERS`, l'OCR est coûteux en CPU), ou en ligne si
+  `CV_TEXTE_BACKGROUND=False` (tests, commande `extraire_textes_cv`).
+"""
+
+import html
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F, FloatField, Q, Value
+
+logger = logging.getLogger("application.cvtheque")
+
+EXTENSIONS_SUPPORTEES = {".pdf", ".docx"}
+
+# En dessous (moyenne par page), la couche texte est jugée absente → OCR
+MIN_CARACTERES_PAR_PAGE = 40
+
+# Balises de surlignage : caractères de contrôle remplacés après échappement HTML
+_DEBUT, _FIN = "\x02", "\x03"
+_ESPACES = re.compile(r"\s+")
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "CV_TEXTE_WORKERS", 1),
+            thread_name_prefix="cv_texte",
+        )
+    return _executor
+
+
+def _config() -> str:
+    return getattr(settings, "CV_RECHERCHE_CONFIG", "french")
+
+
+def compacter(texte: str) -> str:
+    texte = _ESPACES.sub(" ", texte.replace("\x00", "")).strip()
+    return texte[: getattr(settings, "CV_TEXTE_MAX_CARACTERES", 50000)]
+
+
+# ────────────────────────────────────────────────────────────
+# 📄 Extraction
+# ────────────────────────────────────────────────────────────
+def _ocr_pdf(doc) -> str:
+    import fitz  # PyMuPDF
+    import pytesseract
+    from PIL import Image
+
+    morceaux = []
+    for page in doc.pages(0, min(doc.page_count, getattr(settings, "CV_OCR_MAX_PAGES", 3))):
+        pix = page.get_pixmap(dpi=getattr(settings, "CV_OCR_DPI", 200), colorspace=fitz.csGRAY, alpha=False)
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        morceaux.append(pytesseract.image_to_string(image, lang=getattr(settings, "CV_OCR_LANG", "fra+eng")))
+    return "\n".join(morceaux)
+
+
+def extraire_texte(data: bytes, extension: str):
+    """Retourne (texte compacté, source) ; source ∈ {"pdf", "docx", "ocr", "vide"}."""
+    if extension == ".docx":
+        import docx
+
+        document = docx.Document(io.BytesIO(data))
+        texte = compacter("\n".join(p.text for p in document.paragraphs))
+        return (texte, "docx") if texte else ("", "vide")
+
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        texte = compacter("\n".join(page.get_text("text") for page in doc))
+        if len(texte) >= MIN_CARACTERES_PAR_PAGE * max(doc.page_count, 1):
+            return texte, "pdf"
+        try:
+            ocr = compacter(_ocr_pdf(doc))
+        except Exception as e:  # binaire tesseract absent, langue non installée…
+            logger.warning("[CVThèque] OCR impossible : %s", e)
+            ocr = ""
+    if len(ocr) > len(texte):
+        return ocr, "ocr"
+    return (texte, "pdf") if texte else ("", "vide")
+
+
+# ────────────────────────────────────────────────────────────
+# 🗂️ Indexation
+# ────────────────────────────────────────────────────────────
+def vecteur_recherche():
+    config = _config()
+    return (
+        SearchVector("titre", weight="A", config=config)
+        + SearchVector("mots_cles", weight="B", config=config)
+        + SearchVector("texte", weight="C", config=config)
+    )
+
+
+def indexer_cv(pk: int, using: str = "default"):
+    """Recalcule le tsvector d'un CV à partir des colonnes en base (PostgreSQL)."""
+    if connections[using].vendor != "postgresql":
+        return
+    model = apps.get_model("rap_app", "CVTheque")
+    model.objects.using(using).filter(pk=pk).update(recherche=vecteur_recherche())
+
+
+def extraire_cv(pk: int) -> bool:
+    """
+    Extrait le texte d'un CV et met son index à jour.
+    Retourne True si du texte a été trouvé.
+    """
+    model = apps.get_model("rap_app", "CVTheque")
+    row = model.objects.filter(pk=pk).values("fichier", "sha256").first()
+    if not row or not row["fichier"]:
+        return False
+
+    extension = os.path.splitext(row["fichier"])[1].lower()
+    if extension in EXTENSIONS_SUPPORTEES:
+        try:
+            with default_storage.open(row["fichier"], "rb") as fh:
+                texte, source = extraire_texte(fh.read(), extension)
+        except Exception as e:  # fichier corrompu / protégé
+            logger.warning("[CVThèque] CV #%s : extraction impossible (%s)", pk, e)
+            texte, source = "", "vide"
+    else:
+        texte, source = "", "vide"
+
+    # Le fichier a pu changer entre-temps : on n'écrit que pour la même empreinte
+    if model.objects.filter(pk=pk, sha256=row["sha256"]).update(texte=texte, texte_source=source):
+        indexer_cv(pk)
+    logger.info("[CVThèque] CV #%s : %s caractère(s) extrait(s) (%s)", pk, len(texte), source)
+    return bool(texte)
+
+
+def _executer(pk: int):
+    """Exécution dans un thread du pool : il ferme ses propres connexions."""
+    try:
+        extraire_cv(pk)
+    finally:
+        connections.close_all()
+
+
+def planifier_extraction(instance, update_fields=None):
+    """
+    À appeler après un `save()` : extraction (fichier nouveau ou modifié) ou
+    simple réindexation (titre / mots-clés) une fois la transaction validée.
+    """
+    if not instance.fichier:
+        return
+    pk = instance.pk
+    if not instance.texte_source:
+        if getattr(settings, "CV_TEXTE_BACKGROUND", True):
+            transaction.on_commit(lambda: _get_executor().submit(_executer, pk))
+        else:
+            transaction.on_commit(partial(extraire_cv, pk))
+    elif update_fields is None or {"titre", "mots_cles"} & set(update_fields):
+        transaction.on_commit(partial(indexer_cv, pk))
+
+
+# ────────────────────────────────────────────────────────────
+# 🔍 Recherche
+# ────────────────────────────────────────────────────────────
+def surligner(fragment: str) -> str:
+    """Échappe le fragment (texte libre du CV) puis pose les balises <mark>."""
+    return html.escape(fragment).replace(_DEBUT, "<mark>").replace(_FIN, "</mark>")
+
+
+def filtrer(queryset, q: str):
+    """
+    Restreint `queryset` aux CV correspondant à `q`, annotés `pertinence`
+    (PostgreSQL : rang tsvector ; sinon None).
+    """
+    sous_chaine = Q(titre__icontains=q) | Q(mots_cles__icontains=q) | Q(texte__icontains=q)
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(sous_chaine).annotate(pertinence=Value(None, output_field=FloatField()))
+
+    query = SearchQuery(q, search_type="websearch", config=_config())
+    return queryset.filter(Q(recherche=query) | sous_chaine).annotate(
+        pertinence=SearchRank(F("recherche"), query, cover_density=True)
+    )
+
+
+def extraits(pks, q: str, using: str = "default") -> dict:
+    """
+    {pk: extrait HTML surligné} pour les seuls CV d'une page de résultats
+    (`ts_headline` relit tout le texte : jamais sur l'ensemble des correspondances).
+    """
+    model = apps.get_model("rap_app", "CVTheque")
+    rows = model.objects.using(using).filter(pk__in=pks)
+    mots = getattr(settings, "CV_EXTRAIT_MOTS", 30)
+
+    if connections[using].vendor == "postgresql":
+        headline = SearchHeadline(
+            "texte",
+            SearchQuery(q, search_type="websearch", config=_config()),
+            config=_config(),
+            start_sel=_DEBUT,
+            stop_sel=_FIN,
+            max_words=mots,
+            min_words=mots // 2,
+            max_fragments=2,
+            fragment_delimiter=" … ",
+        )
+        return {
+            pk: surligner(fragment)
+            for pk, fragment in rows.annotate(extrait=headline).values_list("pk", "extrait")
+            if fragment and _DEBUT in fragment
+        }
+
+    # Autres moteurs : première occurrence de la sous-chaîne, ± quelques mots
+    resultat = {}
+    marge = mots * 4
+    for pk, texte in rows.values_list("pk", "texte"):
+        debut = texte.lower().find(q.lower())
+        if debut < 0:
+            continue
+        fin = debut + len(q)
+        fragment = (
+            ("… " if debut > marge else "")
+            + texte[max(0, debut - marge): debut]
+            + _DEBUT + texte[debut:fin] + _FIN
+            + texte[fin: fin + marge]
+            + (" …" if fin + marge < len(texte) else "")
+        )
+        resultat[pk] = surligner(fragment)
+    return resultat
@@ -0,0 +1,198 @@
+# rap_app/services/prospection_transitions.py
+
+"""
+🔄 Transitions de statut des prospections (action `changer-statut`).
+
+Une transition applique, dans une seule transaction :
+- les champs modifiés + la règle de cohérence statut ↔ relance
+  (`Prospection.statut_coherent`) et la synchro du centre ;
+- un seul UPDATE par prospection (un par groupe de valeurs identiques en lot) ;
+- le commentaire éventuel (fil de discussion) ;
+- une entrée d'historique consolidée (au lieu d'une ligne par champ).
+
+`Prospection.save()` n'est pas appelé : ni relecture `only()`, ni
+`full_clean()` complet, ni historique champ par champ.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from ..models.prospection import HistoriqueProspection, Prospection
+from ..models.prospection_comments import ProspectionComment
+from ..utils.bulk_writer import BulkWriter
+from ..utils.cache_utils import invalidate_model_caches
+
+logger = logging.getLogger("rap_app.prospection")
+
+# Champs modifiables par une transition (noms de champs du modèle)
+CHAMPS_TRANSITION = (
+    "partenaire",
+    "formation",
+    "owner",
+    "date_prospection",
+    "type_prospection",
+    "motif",
+    "statut",
+    "objectif",
+    "relance_prevue",
+    "moyen_contact",
+)
+
+# Colonnes comparées avant / après (noms de colonnes)
+_COLONNES_SUIVIES = (
+    "statut",
+    "type_prospection",
+    "objectif",
+    "motif",
+    "commentaire",
+    "formation_id",
+    "partenaire_id",
+    "centre_id",
+    "owner_id",
+    "date_prospection",
+    "relance_prevue",
+    "moyen_contact",
+)
+
+RESULTAT_PAR_DEFAUT = "Mise à jour via changer-statut"
+
+
+def _preparer(prospection, changes, commentaire):
+    """
+    Applique `changes` en mémoire, valide et retourne
+    (valeurs avant, {colonne: nouvelle valeur} pour les colonnes modifiées).
+    """
+    inconnus = set(changes) - set(CHAMPS_TRANSITION)
+    if inconnus:
+        raise ValueError(f"Champs non modifiables par transition : {', '.join(sorted(inconnus))}")
+
+    avant = {col: getattr(prospection, col) for col in _COLONNES_SUIVIES}
+
+    for champ, valeur in changes.items():
+        setattr(prospection, champ, valeur)
+    if commentaire:
+        prospection.commentaire = commentaire
+
+    prospection.sync_centre()
+    prospection.statut = Prospection.statut_coherent(prospection.statut, prospection.relance_prevue)
+
+    modifies = {col: getattr(prospection, col) for col in _COLONNES_SUIVIES if getattr(prospection, col) != avant[col]}
+
+    # Validation limitée aux champs modifiés + règles métier du modèle
+    prospection.clean_fields(
+        exclude=[f.name for f in Prospection._meta.concrete_fields if f.attname not in modifies]
+    )
+    prospection.clean()
+
+    return avant, modifies
+
+
+def _historique(prospection, avant, modifies, commentaire, user, resultat):
+    """Entrée d'historique consolidée (non enregistrée)."""
+    if "statut" in modifies:
+        champ = "statut"
+    else:
+        champ = ", ".join(c.removesuffix("_id") for c in modifies)[:50] or "commentaire"
+
+    return HistoriqueProspection(
+        prospection_id=prospection.pk,
+        champ_modifie=champ,
+        ancienne_valeur="\n".join(f"{c}: {avant[c] if avant[c] is not None else ''}" for c in modifies),
+        nouvelle_valeur="\n".join(f"{c}: {v if v is not None else ''}" for c, v in modifies.items()),
+        ancien_statut=avant["statut"],
+        nouveau_statut=prospection.statut,
+        type_prospection=prospection.type_prospection,
+        commentaire=commentaire or "",
+        prochain_contact=prospection.relance_prevue,
+        moyen_contact=prospection.moyen_contact,
+        resultat=resultat,
+        created_by=user,
+        updated_by=user,
+    )
+
+
+def _appliquer(prospections, changes, commentaire, user, resultat):
+    maintenant = timezone.now()
+    groupes = defaultdict(list)  # valeurs à écrire → pks
+    historiques, commentaires = [], []
+    erreurs = {}
+
+    for p in prospections:
+        try:
+            avant, modifies = _preparer(p, changes, commentaire)
+        except ValidationError as e:
+            erreurs[p.pk] = e.message_dict if hasattr(e, "error_dict") else e.messages
+            continue
+
+        if modifies:
+            groupes[tuple(sorted(modifies.items()))].append(p.pk)
+            p.updated_at, p.updated_by = maintenant, user
+        if modifies or commentaire:
+            historiques.append(_historique(p, avant, modifies, commentaire, user, resultat))
+        if commentaire:
+            commentaires.append(
+                ProspectionComment(
+                    prospection_id=p.pk,
+                    body=commentaire,
+                    is_internal=False,
+                    created_by=user,
+                    updated_by=user,
+                )
+            )
+
+    if erreurs:
+        if len(prospections) == 1:
+            raise ValidationError(next(iter(erreurs.values())))
+        raise ValidationError({str(pk): msgs for pk, msgs in erreurs.items()})
+
+    with transaction.atomic():
+        for valeurs, pks in groupes.items():
+            Prospection.objects.filter(pk__in=pks).update(**dict(valeurs), updated_at=maintenant, updated_by=user)
+        if commentaires:
+            ProspectionComment.objects.bulk_create(commentaires)
+            invalidate_model_caches(ProspectionComment)
+        if historiques:
+            with BulkWriter(HistoriqueProspection) as writer:
+                writer.extend(historiques)
+        if groupes or commentaires:
+            invalidate_model_caches(Prospection, [p.pk for p in prospections])
+
+    logger.info(
+        "Transition de %d prospection(s) (%d UPDATE) par %s",
+        len(prospections), len(groupes), getattr(user, "username", None) or "inconnu",
+    )
+    return historiques
+
+
+def changer_statut(prospection, changes, *, user=None, commentaire="", resultat=RESULTAT_PAR_DEFAUT):
+    """
+    Applique une transition à une prospection déjà chargée (relations
+    `formation` / `partenaire` idéalement en `select_related`).
+
+    `changes` : {champ: valeur} parmi `CHAMPS_TRANSITION` (instances pour les FK).
+    `commentaire` : renseigne `Prospection.commentaire`, est ajouté au fil
+    de commentaires et repris dans l'historique.
+
+    Lève `django.core.exceptions.ValidationError` si la transition est invalide.
+    L'instance est mise à jour en mémoire (pas de `refresh_from_db()` nécessaire).
+    """
+    historiques = _appliquer([prospection], changes, commentaire, user, resultat)
+    return historiques[0] if historiques else None
+
+
+def changer_statut_lot(queryset, changes, *, user=None, commentaire="", resultat=RESULTAT_PAR_DEFAUT):
+    """
+    Applique la même transition à toutes les prospections de `queryset`
+    (chargées en un SELECT). Tout ou rien : si une prospection est invalide,
+    rien n'est écrit et l'erreur est indexée par id.
+
+    Retourne la liste des prospections mises à jour (en mémoire).
+    """
+    prospections = list(queryset.select_related("formation", "partenaire").order_by("pk"))
+    if prospections:
+        _appliquer(prospections, changes, commentaire, user, resultat)
+    return prospections
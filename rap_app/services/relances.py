@@ -0,0 +1,105 @@
+# rap_app/services/relances.py
+
+"""
+📅 Liste de relances des prospections.
+
+Les relances dues (du jour et en retard) sont lues via
+`Prospection.custom.relances_dues()`, dont le prédicat correspond à l'index
+partiel `prosp_relance_owner_idx` (owner, relance_prevue).
+
+`digest_relances()` produit le récapitulatif quotidien de tous les
+responsables en une seule requête, triée par (owner, relance_prevue) et
+regroupée en mémoire.
+"""
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.utils import timezone
+
+from ..models.prospection import Prospection
+from ..models.prospection_choices import ProspectionChoices
+
+_COLONNES = (
+    "id",
+    "owner_id",
+    "owner__email",
+    "owner__username",
+    "owner__first_name",
+    "owner__last_name",
+    "relance_prevue",
+    "statut",
+    "moyen_contact",
+    "partenaire__nom",
+    "partenaire__contact_telephone",
+    "partenaire__contact_email",
+    "formation__nom",
+)
+
+
+def _item(row, jour):
+    return {
+        "id": row["id"],
+        "relance_prevue": row["relance_prevue"],
+        "jours_retard": (jour - row["relance_prevue"]).days,
+        "statut": row["statut"],
+        "moyen_contact": row["moyen_contact"],
+        "partenaire_nom": row["partenaire__nom"],
+        "partenaire_tel": row["partenaire__contact_telephone"],
+        "partenaire_email": row["partenaire__contact_email"],
+        "formation_nom": row["formation__nom"],
+    }
+
+
+def digest_relances(jour=None, chunk_size=2000):
+    """
+    Génère un récapitulatif par responsable actif :
+    {"owner_id", "email", "nom", "total", "en_retard", "items"}.
+
+    Une seule requête (lue par blocs), aucune boucle de requêtes par utilisateur.
+    """
+    jour = jour or timezone.localdate()
+    rows = (
+        Prospection.custom.relances_dues(jour)
+        .filter(owner__isnull=False, owner__is_active=True)
+        .order_by("owner_id", "relance_prevue", "id")
+        .values(*_COLONNES)
+    )
+
+    for owner_id, groupe in groupby(rows.iterator(chunk_size=chunk_size), key=itemgetter("owner_id")):
+        groupe = list(groupe)
+        first = groupe[0]
+        nom = " ".join(filter(None, (first["owner__first_name"], first["owner__last_name"])))
+        items = [_item(row, jour) for row in groupe]
+        yield {
+            "owner_id": owner_id,
+            "email": first["owner__email"],
+            "nom": nom or first["owner__username"],
+            "total": len(items),
+            "en_retard": sum(1 for i in items if i["jours_retard"] > 0),
+            "items": items,
+        }
+
+
+def format_digest(digest, jour=None) -> str:
+    """Corps texte du mail de relances d'un responsable."""
+    jour = jour or timezone.localdate()
+    statuts = ProspectionChoices.get_statut_labels()
+    lignes = [
+        f"Bonjour {digest['nom']},",
+        "",
+        f"{digest['total']} relance(s) à effectuer au {jour.strftime('%d/%m/%Y')}"
+        f" dont {digest['en_retard']} en retard :",
+        "",
+    ]
+    for item in digest["items"]:
+        retard = f" (retard {item['jours_retard']} j)" if item["jours_retard"] > 0 else ""
+        contact = item["partenaire_tel"] or item["partenaire_email"] or ""
+        lignes.append(
+            f"- {item['relance_prevue'].strftime('%d/%m/%Y')}{retard} — "
+            f"{item['partenaire_nom'] or 'Sans partenaire'}"
+            f"{' / ' + item['formation_nom'] if item['formation_nom'] else ''}"
+            f" [{statuts.get(item['statut'], item['statut'])}]"
+            f"{' — ' + contact if contact else ''}"
+        )
+    return "\n".join(lignes)
@@ -0,0 +1,394 @@
+# rap_app/services/snapshots.py
+
+"""
+📦 Instantanés de données (export / rechargement), complets ou par périmètre.
+
+- Un fichier par modèle : `<app>.<modèle>.jsonl.gz` (une ligne JSON par
+  enregistrement, colonnes SQL) ou `.parquet` (pyarrow, optionnel), plus
+  `manifest.json` (périmètre, colonnes, nombre de lignes, SHA-256).
+- Périmètre centre : chemin de clés étrangères vers `Centre` déduit du
+  modèle (ex. `Document` → `formation__centre_id`). Les référentiels
+  (statuts, types d'offre, partenaires, utilisateurs) sont exportés en
+  entier ; les tables sans lien avec un centre sont exclues d'un export
+  partiel. Année : lignes créées dans l'année (`created_at`).
+- Fermeture : un export partiel ajoute les lignes parentes hors périmètre
+  référencées par une ligne exportée (formation d'une autre année, candidat
+  d'un autre centre inscrit à un atelier…) — chaque clé étrangère du
+  snapshot pointe vers une ligne du snapshot ou d'un référentiel.
+- Types de contenu : exportés par clé naturelle `[app_label, model]`,
+  résolus à nouveau au rechargement (les ids de `django_content_type`
+  diffèrent d'une base à l'autre).
+- Cohérence : sous PostgreSQL, chaque processus du pool adopte l'instantané
+  exporté par la transaction REPEATABLE READ principale
+  (`pg_export_snapshot()` / `SET TRANSACTION SNAPSHOT`, comme `pg_dump -j`).
+- Rechargement : `COPY FROM STDIN` par table (utils/pg_copy.py), sinon
+  INSERT par lots ; les lignes sont écrites telles qu'exportées (ids,
+  dates, sans signaux).
+- Mots de passe : jamais exportés (remplacés par un mot de passe inutilisable).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict, deque
+from datetime import datetime, time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ..utils.pg_copy import copy_rows
+
+FORMAT_VERSION = 2  # 2 : types de contenu par clé naturelle
+FORMATS = ("jsonl", "parquet")
+EXTENSIONS = {"jsonl": ".jsonl.gz", "parquet": ".parquet"}
+
+# Exportés en entier quel que soit le périmètre, jamais traversés pour le déduire
+REFERENTIELS = {"rap_app.Statut", "rap_app.TypeOffre", "rap_app.Partenaire", "rap_app.CustomUser"}
+
+# Jamais exportés : groupes / permissions Django (recréés par migrate), modèle de test
+EXCLUS = {"rap_app.CustomUser_groups", "rap_app.CustomUser_user_permissions", "rap_app.DummyModel"}
+
+# Colonnes remplacées à l'export
+MASQUES = {("rap_app.CustomUser", "password"): "!"}
+
+LOT = 5000
+
+
+class _Encodeur(DjangoJSONEncoder):
+    """Comme DjangoJSONEncoder, sans tronquer les microsecondes."""
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+# ────────────────────────────────────────────────────────────
+# 🧭 Modèles et périmètre
+# ────────────────────────────────────────────────────────────
+def modeles_snapshot(labels=None):
+    """Modèles concrets de rap_app (tables M2M comprises), dans l'ordre de déclaration."""
+    wanted = {label.lower() for label in labels} if labels else None
+    modeles = []
+    for model in apps.get_app_config("rap_app").get_models(include_auto_created=True):
+        label = model._meta.label
+        if label in EXCLUS or model._meta.proxy or not model._meta.managed:
+            continue
+        if wanted is None or label.lower() in wanted:
+            modeles.append(model)
+    return modeles
+
+
+def chemin_centre(model, profondeur: int = 3):
+    """
+    Lookup vers l'id du centre (plus court chemin de clés étrangères), "pk"
+    pour `Centre` lui-même, None si le modèle n'est pas rattaché à un centre.
+    """
+    centre = apps.get_model("rap_app", "Centre")
+    if model is centre:
+        return "pk"
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    file = deque([(model, "", 0)])
+    while file:
+        courant, prefixe, niveau = file.popleft()
+        for field in courant._meta.concrete_fields:
+            cible = field.related_model if field.is_relation else None
+            if cible is None or cible is user_model or cible._meta.label in REFERENTIELS:
+                continue
+            if cible is centre:
+                return f"{prefixe}{field.name}_id"
+            if niveau + 1 < profondeur:
+                file.append((cible, f"{prefixe}{field.name}__", niveau + 1))
+    return None
+
+
+def queryset_perimetre(model, centres=None, annee=None, ajouts=None):
+    """
+    QuerySet des lignes à exporter, ou None si le modèle est hors périmètre.
+    `ajouts` : ids hors périmètre référencés par une ligne exportée (`fermeture`).
+    """
+    qs = model._base_manager.all()
+    if model._meta.label in REFERENTIELS:
+        return qs
+    condition = Q()
+    if centres:
+        chemin = chemin_centre(model)
+        condition = Q(**{f"{chemin}__in": centres}) if chemin else None
+    if condition is not None and annee and any(f.name == "created_at" for f in model._meta.concrete_fields):
+        condition &= Q(created_at__year=annee)
+    if ajouts:
+        if condition is None:
+            condition = Q(pk__in=ajouts)
+        elif condition:  # Q() vide : toutes les lignes, rien à ajouter
+            condition |= Q(pk__in=ajouts)
+    if condition is None:
+        return None
+    return qs.filter(condition).order_by("pk")
+
+
+def _cles_etrangeres(model, labels):
+    """Clés étrangères de `model` vers un modèle du snapshot filtré par périmètre."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.is_relation
+        and field.related_model._meta.label in labels
+        and field.related_model._meta.label not in REFERENTIELS
+    ]
+
+
+def fermeture(labels, centres=None, annee=None) -> dict:
+    """
+    Ids à ajouter par modèle pour qu'un export partiel soit rechargeable :
+    parents (directs ou non) des lignes du périmètre qui n'en font pas partie.
+    Parcours par vagues : seules les lignes nouvellement ajoutées sont relues.
+    À appeler dans la transaction (instantané) de l'export.
+    """
+    if not centres and not annee:
+        return {}
+    labels = set(labels)
+    perimetres = {label: queryset_perimetre(apps.get_model(label), centres, annee) for label in labels}
+    ajouts = defaultdict(set)
+    file = deque((label, qs) for label, qs in perimetres.items() if qs is not None)
+    while file:
+        label, qs = file.popleft()
+        for field in _cles_etrangeres(apps.get_model(label), labels):
+            cible = field.related_model._meta.label
+            ids = set(qs.filter(**{f"{field.attname}__isnull": False}).values_list(field.attname, flat=True).distinct())
+            ids -= ajouts[cible]
+            if ids and perimetres[cible] is not None:
+                ids -= set(perimetres[cible].filter(pk__in=ids).values_list("pk", flat=True))
+            if ids:
+                ajouts[cible] |= ids
+                file.append((cible, field.related_model._base_manager.filter(pk__in=ids)))
+    return {label: sorted(ids) for label, ids in ajouts.items() if ids}
+
+
+def nom_fichier(model, fmt: str) -> str:
+    return f"{model._meta.label_lower}{EXTENSIONS[fmt]}"
+
+
+# ────────────────────────────────────────────────────────────
+# 📤 Export
+# ────────────────────────────────────────────────────────────
+def colonnes_type_contenu(model):
+    """Colonnes clés étrangères vers `ContentType` (exportées par clé naturelle)."""
+    return [f.column for f in model._meta.concrete_fields if f.is_relation and f.related_model is ContentType]
+
+
+def _lignes(model, qs, columns):
+    attnames = [f.attname for f in model._meta.concrete_fields]
+    masques = {i: MASQUES[(model._meta.label, c)] for i, c in enumerate(columns) if (model._meta.label, c) in MASQUES}
+    types = [columns.index(c) for c in colonnes_type_contenu(model)]
+    cles = {pk: [app_label, nom] for pk, app_label, nom in ContentType.objects.values_list("pk", "app_label", "model")} if types else {}
+    for values in qs.values_list(*attnames).iterator(chunk_size=LOT):
+        if masques or types:
+            values = list(values)
+            for i, valeur in masques.items():
+                values[i] = valeur
+            for i in types:
+                values[i] = cles.get(values[i])
+        yield values
+
+
+def _ecrire_jsonl(path, columns, lignes) -> int:
+    total = 0
+    encoder = _Encodeur(ensure_ascii=False, separators=(",", ":"))
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as fh:
+        for values in lignes:
+            fh.write(encoder.encode(dict(zip(columns, values))))
+            fh.write("\n")
+            total += 1
+    return total
+
+
+def _ecrire_parquet(path, columns, lignes) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total, writer, lot = 0, None, []
+
+    def vider():
+        nonlocal writer
+        table = pa.Table.from_pylist([dict(zip(columns, v)) for v in lot])
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+        writer.write_table(table.cast(writer.schema))
+
+    try:
+        for values in lignes:
+            lot.append(values)
+            total += 1
+            if len(lot) >= LOT:
+                vider()
+                lot = []
+        if lot or writer is None:
+            vider()
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def _sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def exporter_modele(
+    label: str, dossier: str, centres=None, annee=None, fmt: str = "jsonl", snapshot_id=None, ajouts=None
+):
+    """
+    Exporte un modèle ; retourne son entrée de manifeste (None si hors périmètre).
+    `snapshot_id` : instantané PostgreSQL à adopter (processus du pool).
+    `ajouts` : ids parents hors périmètre (cf. `fermeture`).
+    """
+    model = apps.get_model(label)
+    qs = queryset_perimetre(model, centres, annee, ajouts)
+    if qs is None:
+        return None
+    columns = [f.column for f in model._meta.concrete_fields]
+    path = os.path.join(dossier, nom_fichier(model, fmt))
+    ecrire = _ecrire_parquet if fmt == "parquet" else _ecrire_jsonl
+
+    with transaction.atomic():
+        if snapshot_id:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", [snapshot_id])
+        lignes = ecrire(path, columns, _lignes(model, qs, columns))
+
+    return {
+        "modele": label,
+        "table": model._meta.db_table,
+        "fichier": os.path.basename(path),
+        "colonnes": columns,
+        "types_contenu": colonnes_type_contenu(model),
+        "lignes": lignes,
+        "ajouts": len(ajouts or ()),
+        "octets": os.path.getsize(path),
+        "sha256": _sha256(path),
+    }
+
+
+def initialiser_processus():
+    """Initialisation d'un processus du pool (démarrage `spawn`)."""
+    import django
+
+    django.setup()
+
+
+def exporter_modele_processus(args):
+    """Point d'entrée du pool : une connexion par processus, fermée à la fin de la tâche."""
+    from django.db import connections
+
+    try:
+        return exporter_modele(*args)
+    finally:
+        connections.close_all()
+
+
+# ────────────────────────────────────────────────────────────
+# 📥 Rechargement
+# ────────────────────────────────────────────────────────────
+def lire_manifeste(dossier: str) -> dict:
+    with open(os.path.join(dossier, "manifest.json"), encoding="utf-8") as fh:
+        manifeste = json.load(fh)
+    if manifeste.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Version de manifeste non prise en charge : {manifeste.get('version')}")
+    return manifeste
+
+
+def _lire_jsonl(path, columns):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            row = json.loads(line)
+            yield [row.get(c) for c in columns]
+
+
+def _lire_parquet(path, columns):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=LOT, columns=columns):
+        yield from zip(*(batch.column(c).to_pylist() for c in columns))
+
+
+def _ids_types_contenu(lignes, indices) -> dict:
+    """
+    Clés naturelles `[app_label, model]` du fichier → ids dans cette base
+    (créés au besoin). Résolues avant le COPY : aucune requête pendant le flux.
+    """
+    cles = {tuple(values[i]) for values in lignes for i in indices if values[i] is not None}
+    return {cle: ContentType.objects.get_or_create(app_label=cle[0], model=cle[1])[0].pk for cle in cles}
+
+
+def charger_fichier(dossier: str, entree: dict) -> int:
+    """Charge un fichier du manifeste dans la base courante ; retourne le nombre de lignes."""
+    model = apps.get_model(entree["modele"])
+    columns = entree["colonnes"]
+    path = os.path.join(dossier, entree["fichier"])
+    if _sha256(path) != entree["sha256"]:
+        raise ValueError(f"{entree['fichier']} : empreinte SHA-256 différente du manifeste")
+    lire = _lire_parquet if path.endswith(".parquet") else _lire_jsonl
+
+    fields = {f.column: f for f in model._meta.concrete_fields}
+    champs = [fields[c] for c in columns]
+    types = [columns.index(c) for c in entree.get("types_contenu", [])]
+    ids_types = _ids_types_contenu(lire(path, columns), types) if types else {}
+
+    def lignes_locales():
+        for values in lire(path, columns):
+            if types:
+                values = list(values)
+                for i in types:
+                    if values[i] is not None:
+                        values[i] = ids_types[tuple(values[i])]
+            yield values
+
+    if connection.vendor == "postgresql":
+        json_idx = [i for i, f in enumerate(champs) if f.get_internal_type() == "JSONField"]
+
+        def lignes():
+            for values in lignes_locales():
+                for i in json_idx:
+                    if values[i] is not None:
+                        values[i] = json.dumps(values[i], ensure_ascii=False)
+                yield values
+
+        return copy_rows(connection, model._meta.db_table, columns, lignes())
+
+    # Autres moteurs : INSERT brut (pas de save() : auto_now et signaux ignorés, comme COPY)
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    total, lot = 0, []
+    with connection.cursor() as cursor:
+        for values in lignes_locales():
+            lot.append([f.get_db_prep_save(f.to_python(v), connection) for f, v in zip(champs, values)])
+            if len(lot) >= LOT:
+                cursor.executemany(sql, lot)
+                total, lot = total + len(lot), []
+        if lot:
+            cursor.executemany(sql, lot)
+            total += len(lot)
+    return total
+
+
+def reinitialiser_sequences(modeles):
+    """Remet les séquences d'identifiants après le plus grand id chargé."""
+    statements = connection.ops.sequence_reset_sql(no_style(), modeles)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,25 @@
+import logging
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from ..models.cvtheque import CVTheque
+from ..models.documents import Document
+from ..services.apercus import planifier_apercu
+
+logger = logging.getLogger("application.apercus")
+
+
+@receiver(post_save, sender=Document, dispatch_uid="rap_app_apercu_document")
+@receiver(post_save, sender=CVTheque, dispatch_uid="rap_app_apercu_cvtheque")
+def planifier_apercu_fichier(sender, instance, raw=False, **kwargs):
+    """
+    🖼️ Après enregistrement d'un document / CV : planifie la miniature de la
+    première page (rendu après commit, hors du cycle de la requête).
+    """
+    if raw:
+        return
+    try:
+        planifier_apercu(instance)
+    except Exception as e:
+        logger.warning("[Signal] Aperçu non planifié pour %s #%s : %s", sender.__name__, instance.pk, e)
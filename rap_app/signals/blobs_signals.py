@@ -0,0 +1,73 @@
+import logging
+import time
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ..models.blobs import Blob
+from ..models.cvtheque import CVTheque
+from ..models.documents import Document
+from ..utils.blob_storage import est_blob
+
+logger = logging.getLogger("application.blobs")
+
+# Un téléversement du même contenu peut avoir posé (ou rafraîchi) le fichier
+# sans avoir encore pris sa référence : un fichier plus récent est laissé à
+# `collecter_blobs`.
+DELAI_TELEVERSEMENT = 10  # secondes
+
+
+def _purger_apres_commit(chemin: str):
+    """🧹 Fichier sans référence effacé dès le commit (CV : données personnelles)."""
+    limite_ts = time.time() - DELAI_TELEVERSEMENT
+    transaction.on_commit(lambda: Blob.objects.purger(chemin, limite_ts), robust=True)
+
+
+@receiver(pre_save, sender=Document, dispatch_uid="rap_app_blob_pre_document")
+@receiver(pre_save, sender=CVTheque, dispatch_uid="rap_app_blob_pre_cvtheque")
+def memoriser_fichier_remplace(sender, instance, raw=False, **kwargs):
+    """
+    🧱 Avant l'écriture d'un nouveau fichier, d'un chemin existant (affectation
+    `doc.fichier = "blobs/…"`) ou d'un retrait : mémorise le chemin remplacé
+    et les métadonnées du téléversement.
+    """
+    update_fields = kwargs.get("update_fields")
+    if raw or (update_fields is not None and "fichier" not in update_fields):
+        return
+    ancien = ""
+    if instance.pk and not instance._state.adding:
+        ancien = sender.objects.filter(pk=instance.pk).values_list("fichier", flat=True).first() or ""
+    if instance.fichier and instance.fichier._committed:
+        if instance.fichier.name != ancien:
+            instance._blob_remplace = (ancien, "", None)
+        return
+    upload = getattr(instance.fichier, "_file", None) if instance.fichier else None
+    instance._blob_remplace = (ancien, getattr(upload, "mime_sniffed", ""), getattr(upload, "size", None))
+
+
+@receiver(post_save, sender=Document, dispatch_uid="rap_app_blob_post_document")
+@receiver(post_save, sender=CVTheque, dispatch_uid="rap_app_blob_post_cvtheque")
+def compter_references(sender, instance, raw=False, **kwargs):
+    """🧱 Référence le nouveau blob et libère l'ancien (même transaction que l'écriture)."""
+    remplace = instance.__dict__.pop("_blob_remplace", None)
+    if raw or remplace is None:
+        return
+    ancien, mime_type, taille = remplace
+    nouveau = instance.fichier.name if instance.fichier else ""
+    if nouveau == ancien:
+        return
+    if est_blob(nouveau):
+        Blob.objects.acquire(nouveau, sha256=instance.sha256, taille=taille, mime_type=mime_type)
+    if est_blob(ancien):
+        Blob.objects.release(ancien)
+        _purger_apres_commit(ancien)
+        logger.info("[Blob] %s libéré par %s #%s", ancien, sender.__name__, instance.pk)
+
+
+@receiver(post_delete, sender=Document, dispatch_uid="rap_app_blob_delete_document")
+@receiver(post_delete, sender=CVTheque, dispatch_uid="rap_app_blob_delete_cvtheque")
+def liberer_reference(sender, instance, **kwargs):
+    if instance.fichier and est_blob(instance.fichier.name):
+        Blob.objects.release(instance.fichier.name)
+        _purger_apres_commit(instance.fichier.name)
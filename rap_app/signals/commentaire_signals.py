@@ -33,7 +33,7 @@ def update_formation_stats_on_save(commentaire: Commentaire):
             if commentaire.saturation is not None:
                 updates['saturation'] = commentaire.saturation
                 logger.info(
-                    f"⚙️ Saturation mise à jour sur formation #{formation.id} → {commentaire.saturation}%"
+                    "⚙️ Saturation mise à jour sur formation #%s → %s%%", formation.id, commentaire.saturation
                 )
             
             # Récupération du dernier commentaire
@@ -51,20 +51,20 @@ def update_formation_stats_on_save(commentaire: Commentaire):
                     ).aggregate(Avg('saturation')).get('saturation__avg')
                 )
                 updates['saturation_moyenne'] = saturation_avg
-                logger.info(f"📊 Saturation moyenne calculée: {saturation_avg}%")
+                logger.info("📊 Saturation moyenne calculée: %s%%", saturation_avg)
             
             # Mise à jour du nombre de commentaires si le champ existe
             if hasattr(formation, 'nb_commentaires'):
                 nb_commentaires = Commentaire.objects.filter(formation=formation).count()
                 updates['nb_commentaires'] = nb_commentaires
-                logger.info(f"🔢 Nombre de commentaires mis à jour: {nb_commentaires}")
+                logger.info("🔢 Nombre de commentaires mis à jour: %s", nb_commentaires)
 
             # Application des mises à jour
             if updates:
                 Formation.objects.filter(id=formation.id).update(**updates)
-                logger.debug(f"✅ Formation #{formation.id} mise à jour suite à post_save")
+                logger.debug("✅ Formation #%s mise à jour suite à post_save", formation.id)
     except Exception as e:
-        logger.error(f"❌ Erreur post_save Commentaire : {e}", exc_info=True)
+        logger.error("❌ Erreur post_save Commentaire : %s", e, exc_info=True)
 
 
 def update_formation_stats_on_delete(commentaire: Commentaire):
@@ -82,7 +82,7 @@ def update_formation_stats_on_delete(commentaire: Commentaire):
             if not formation:
                 return
 
-            logger.info(f"🗑️ Commentaire supprimé, mise à jour formation #{formation.id}")
+            logger.info("🗑️ Commentaire supprimé, mise à jour formation #%s", formation.id)
 
             updates = {}
             
@@ -101,19 +101,19 @@ def update_formation_stats_on_delete(commentaire: Commentaire):
                     ).aggregate(Avg('saturation')).get('saturation__avg')
                 )
                 updates['saturation_moyenne'] = saturation_avg
-                logger.info(f"📊 Saturation moyenne recalculée: {saturation_avg}%")
+                logger.info("📊 Saturation moyenne recalculée: %s%%", saturation_avg)
             
             # Mise à jour du nombre de commentaires si le champ existe
             if hasattr(formation, 'nb_commentaires'):
                 nb_commentaires = Commentaire.objects.filter(formation=formation).count()
                 updates['nb_commentaires'] = nb_commentaires
-                logger.info(f"🔢 Nombre de commentaires mis à jour: {nb_commentaires}")
+                logger.info("🔢 Nombre de commentaires mis à jour: %s", nb_commentaires)
             
             # Application des mises à jour
             Formation.objects.filter(id=formation.id).update(**updates)
-            logger.debug(f"🔁 Statistiques recalculées sur formation #{formation.id}")
+            logger.debug("🔁 Statistiques recalculées sur formation #%s", formation.id)
     except Exception as e:
-        logger.error(f"❌ Erreur post_delete Commentaire : {e}", exc_info=True)
+        logger.error("❌ Erreur post_delete Commentaire : %s", e, exc_info=True)
 
 # ========================
 # 🧩 Signaux
@@ -131,7 +131,7 @@ def commentaire_post_save(sender, instance, created, **kwargs):
         created (bool): True si création, False si modification
     """
     action = "créé" if created else "modifié"
-    logger.debug(f"[Signal] Commentaire #{instance.pk} {action} pour formation #{instance.formation_id}")
+    logger.debug("[Signal] Commentaire #%s %s pour formation #%s", instance.pk, action, instance.formation_id)
     update_formation_stats_on_save(instance)
 
 
@@ -145,5 +145,5 @@ def commentaire_post_delete(sender, instance, **kwargs):
         sender: Classe du modèle envoyant le signal
         instance (Commentaire): Instance du commentaire supprimé
     """
-    logger.debug(f"[Signal] Commentaire #{instance.pk} supprimé de formation #{instance.formation_id}")
+    logger.debug("[Signal] Commentaire #%s supprimé de formation #%s", instance.pk, instance.formation_id)
     update_formation_stats_on_delete(instance)
\ No newline at end of file
@@ -0,0 +1,23 @@
+import logging
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from ..models.cvtheque import CVTheque
+from ..services.cv_texte import planifier_extraction
+
+logger = logging.getLogger("application.cvtheque")
+
+
+@receiver(post_save, sender=CVTheque, dispatch_uid="rap_app_texte_cvtheque")
+def planifier_texte_cv(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    🔎 Après enregistrement d'un CV : planifie l'extraction du texte (fichier
+    nouveau ou modifié) ou la réindexation (titre / mots-clés), après commit.
+    """
+    if raw:
+        return
+    try:
+        planifier_extraction(instance, update_fields)
+    except Exception as e:
+        logger.warning("[Signal] Extraction non planifiée pour CV #%s : %s", instance.pk, e)
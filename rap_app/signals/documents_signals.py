@@ -9,6 +9,7 @@ from django.core.files.storage import default_storage
 
 from ..models.documents import Document
 from ..models.logs import LogUtilisateur
+from ..utils.blob_storage import est_blob
 
 logger = logging.getLogger("rap_app.documents")
 
@@ -38,19 +39,22 @@ def log_and_cleanup_document(sender, instance, **kwargs):
             user=user,
             details=f"Suppression du document : {nom_fichier} (formation #{formation_id})"
         )
-        logger.info(f"[Signal] Log utilisateur enregistré pour la suppression du document #{document_id}")
+        logger.info("[Signal] Log utilisateur enregistré pour la suppression du document #%s", document_id)
     except Exception as e:
-        logger.warning(f"⚠️ Erreur lors du log de suppression du document #{document_id} : {e}")
+        logger.warning("⚠️ Erreur lors du log de suppression du document #%s : %s", document_id, e)
 
-    # ➤ Suppression du fichier physique
-    if instance.fichier and instance.fichier.name:
+    # ➤ Suppression du fichier physique (blob partagé : libéré par blobs_signals,
+    #   effacé après commit une fois sans référence)
+    if instance.fichier and est_blob(instance.fichier.name):
+        pass
+    elif instance.fichier and instance.fichier.name:
         try:
             if default_storage.exists(instance.fichier.name):
                 default_storage.delete(instance.fichier.name)
-                logger.info(f"[Signal] Fichier supprimé physiquement : {instance.fichier.name}")
+                logger.info("[Signal] Fichier supprimé physiquement : %s", instance.fichier.name)
             else:
-                logger.warning(f"[Signal] Fichier introuvable, pas de suppression : {instance.fichier.name}")
+                logger.warning("[Signal] Fichier introuvable, pas de suppression : %s", instance.fichier.name)
         except Exception as e:
-            logger.error(f"❌ Erreur lors de la suppression physique du fichier {instance.fichier.name} : {e}", exc_info=True)
+            logger.error("❌ Erreur lors de la suppression physique du fichier %s : %s", instance.fichier.name, e, exc_info=True)
     else:
-        logger.warning(f"[Signal] Aucun fichier à supprimer pour document #{document_id}")
+        logger.warning("[Signal] Aucun fichier à supprimer pour document #%s", document_id)
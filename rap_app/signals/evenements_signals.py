@@ -8,7 +8,7 @@ from django.apps import apps
 
 from ..models.evenements import Evenement
 from ..models.formations import Formation, HistoriqueFormation
-from ..middleware import get_current_user  # ThreadLocalMiddleware pour récupérer l'utilisateur
+from ..middleware import get_current_user  # utilisateur de la requête (variable de contexte)
 
 logger = logging.getLogger("rap_app.evenements")
 
@@ -48,7 +48,7 @@ def maj_nombre_evenements(formation: Formation, operation: str, user=None):
                 )
 
                 logger.info(
-                    f"🟢 MAJ nombre_evenements pour Formation #{formation.pk} : {ancien_total} → {nouveau_total} ({operation})"
+                    "🟢 MAJ nombre_evenements pour Formation #%s : %s → %s (%s)", formation.pk, ancien_total, nouveau_total, operation
                 )
 
                 HistoriqueFormation.objects.create(
@@ -60,11 +60,11 @@ def maj_nombre_evenements(formation: Formation, operation: str, user=None):
                     created_by=user,
                 )
             else:
-                logger.debug(f"🔵 Aucun changement de nombre_evenements sur Formation #{formation.pk} ({nouveau_total})")
+                logger.debug("🔵 Aucun changement de nombre_evenements sur Formation #%s (%s)", formation.pk, nouveau_total)
 
     except Exception as e:
         logger.error(
-            f"❌ Erreur lors de la MAJ du nombre_evenements pour Formation #{formation.pk} : {str(e)}",
+            "❌ Erreur lors de la MAJ du nombre_evenements pour Formation #%s : %s", formation.pk, str(e),
             exc_info=True
         )
 
@@ -61,7 +61,7 @@ def log_formation_saved(sender, instance, created, **kwargs):
     user_info = f"par {user.get_full_name() or user.username}" if user else "par Système"
 
     logger_formation.info(
-        f"[Signal] Formation {action} : {instance.nom} (ID={instance.pk}) {user_info}"
+        "[Signal] Formation %s : %s (ID=%s) %s", action, instance.nom, instance.pk, user_info
     )
 
     if created:
@@ -75,7 +75,7 @@ def log_formation_saved(sender, instance, created, **kwargs):
                 created_by=user
             )
         except Exception as e:
-            logger_historique.error(f"[Signal] Erreur lors de l’historique de création : {e}", exc_info=True)
+            logger_historique.error("[Signal] Erreur lors de l’historique de création : %s", e, exc_info=True)
 
 
 @receiver(pre_delete, sender=Formation)
@@ -87,7 +87,7 @@ def log_formation_deleted(sender, instance, **kwargs):
     user_info = f"par {user.get_full_name() or user.username}" if user else "par Système"
 
     logger_formation.warning(
-        f"[Signal] Formation supprimée : {instance.nom} (ID={instance.pk}) {user_info}"
+        "[Signal] Formation supprimée : %s (ID=%s) %s", instance.nom, instance.pk, user_info
     )
 
     try:
@@ -109,7 +109,7 @@ def log_formation_deleted(sender, instance, **kwargs):
                 }
             )
     except Exception as e:
-        logger_historique.error(f"[Signal] Erreur lors de l’historique de suppression : {e}", exc_info=True)
+        logger_historique.error("[Signal] Erreur lors de l’historique de suppression : %s", e, exc_info=True)
 
 
 @receiver(post_save, sender=HistoriqueFormation)
@@ -131,14 +131,12 @@ def log_historique_ajout(sender, instance, created, **kwargs):
     user_info = f"par {user.get_full_name() or user.username}" if user else "par Système"
 
     logger_historique.info(
-        f"[Signal] Historique enregistré pour formation #{instance.formation_id} "
-        f"{user_info} – {instance.get_action_display()} du champ '{instance.champ_modifie}' : "
-        f"{ancienne} → {nouvelle}"
+        "[Signal] Historique enregistré pour formation #%s %s – %s du champ '%s' : %s → %s", instance.formation_id, user_info, instance.get_action_display(), instance.champ_modifie, ancienne, nouvelle
     )
 
     if instance.action == 'suppression':
         logger_historique.warning(
-            f"[Signal] Suppression enregistrée pour formation #{instance.formation_id}"
+            "[Signal] Suppression enregistrée pour formation #%s", instance.formation_id
         )
 
 
@@ -155,5 +153,5 @@ def log_historique_suppression(sender, instance, **kwargs):
         return
 
     logger_historique.warning(
-        f"[Signal] Suppression d’un historique (ID={instance.pk}) lié à la formation #{instance.formation_id}"
+        "[Signal] Suppression d’un historique (ID=%s) lié à la formation #%s", instance.pk, instance.formation_id
     )
@@ -37,6 +37,6 @@ def log_suivijury_save(sender, instance, created, **kwargs):
             instance.invalidate_caches()
     except Exception as e:
         logger.warning(
-            f"[Signal] Échec journalisation SuiviJury #{instance.pk} : {e}",
+            "[Signal] Échec journalisation SuiviJury #%s : %s", instance.pk, e,
             exc_info=True,
         )
@@ -95,7 +95,7 @@ def log_save(sender, instance, created, **kwargs):
     except Exception as e:
         # Référence sécurisée à action
         current_action = action if 'action' in locals() else 'inconnue'
-        logger.error(f"Erreur de log ({current_action}): {e}", exc_info=True)
+        logger.error("Erreur de log (%s): %s", current_action, e, exc_info=True)
 
 
 @receiver(post_delete)
@@ -116,7 +116,7 @@ def log_delete(sender, instance, **kwargs):
             details=details
         )
     except Exception as e:
-        logger.error(f"Erreur de log (suppression): {e}", exc_info=True)
+        logger.error("Erreur de log (suppression): %s", e, exc_info=True)
 
 
 def setup_log_signals():
@@ -155,6 +155,6 @@ def setup_log_signals():
             post_save.connect(log_save, sender=model)
             post_delete.connect(log_delete, sender=model)
             
-            logger.info(f"Logs activés pour {model_path}")
+            logger.info("Logs activés pour %s", model_path)
         except Exception as e:
-            logger.error(f"Erreur config logs pour {model_path}: {e}")
\ No newline at end of file
+            logger.error("Erreur config logs pour %s: %s", model_path, e)
\ No newline at end of file
@@ -10,6 +10,7 @@ from django.apps import apps
 from ..models.logs import LogUtilisateur
 from ..models.partenaires import Partenaire
 from ..models.formations import HistoriqueFormation
+from ..utils.bulk_writer import BulkWriter
 
 logger = logging.getLogger("application.partenaires")
 
@@ -42,9 +43,9 @@ def partenaire_pre_save(sender, instance, **kwargs):
         if instance.type == Partenaire.TYPE_ENTREPRISE and instance.nom:
             if not instance.nom.isupper() and not instance.nom.istitle():
                 instance.nom = instance.nom.upper()
-                logger.debug(f"Nom d'entreprise normalisé : {instance.nom}")
+                logger.debug("Nom d'entreprise normalisé : %s", instance.nom)
     except (AttributeError, TypeError) as e:
-        logger.warning(f"Erreur lors de la normalisation du nom : {e}")
+        logger.warning("Erreur lors de la normalisation du nom : %s", e)
 
     # Normalisation de l'email
     try:
@@ -59,9 +60,9 @@ def partenaire_pre_save(sender, instance, **kwargs):
             value = getattr(instance, field, None)
             if value and isinstance(value, str) and not value.startswith(('http://', 'https://')):
                 setattr(instance, field, f"https://{value}")
-                logger.debug(f"URL corrigée pour {field} : {getattr(instance, field)}")
+                logger.debug("URL corrigée pour %s : %s", field, getattr(instance, field))
         except (AttributeError, TypeError) as e:
-            logger.warning(f"Erreur lors de la correction de l'URL pour {field} : {e}")
+            logger.warning("Erreur lors de la correction de l'URL pour %s : %s", field, e)
 
 
 @receiver(post_save, sender=Partenaire)
@@ -89,28 +90,32 @@ def partenaire_post_save(sender, instance, created, **kwargs):
             user=user,
             details=f"{action.capitalize()} du partenaire {instance.nom} (type: {instance.get_type_display()})"
         )
-        logger.info(f"[Signal] Log enregistré pour {action} du partenaire {instance.nom} (ID: {instance.pk})")
+        logger.info("[Signal] Log enregistré pour %s du partenaire %s (ID: %s)", action, instance.nom, instance.pk)
     except Exception as e:
-        logger.error(f"[Signal] Erreur lors du log du partenaire {instance.nom} : {e}", exc_info=True)
+        logger.error("[Signal] Erreur lors du log du partenaire %s : %s", instance.nom, e, exc_info=True)
 
     # Mise à jour des formations liées
     if not created:
         try:
-            formations_liees = instance.formations.all()
-            if formations_liees.exists():
-                with transaction.atomic():
-                    for formation in formations_liees:
-                        HistoriqueFormation.objects.create(
-                            formation=formation,
-                            champ_modifie="partenaire",
-                            ancienne_valeur="",
-                            nouvelle_valeur=instance.nom,
-                            commentaire=f"Partenaire {instance.nom} modifié",
-                            created_by=user
+            formation_ids = list(instance.formations.values_list("pk", flat=True))
+            if formation_ids:
+                auteur = user or HistoriqueFormation.get_current_user()
+                # Anti-doublon de HistoriqueFormation.save() appliqué au lot (HistoriqueFormation.preparer_lot)
+                with transaction.atomic(), BulkWriter(HistoriqueFormation) as writer:
+                    for formation_id in formation_ids:
+                        writer.add(
+                            HistoriqueFormation(
+                                formation_id=formation_id,
+                                champ_modifie="partenaire",
+                                ancienne_valeur="",
+                                nouvelle_valeur=instance.nom,
+                                commentaire=f"Partenaire {instance.nom} modifié",
+                                created_by=auteur,
+                            )
                         )
-                        logger.debug(f"[Signal] Historique mis à jour pour formation {formation.pk}")
+                logger.debug("[Signal] Historique mis à jour pour %d formation(s)", writer.written)
         except Exception as e:
-            logger.error(f"[Signal] Erreur lors de la mise à jour des formations liées : {e}", exc_info=True)
+            logger.error("[Signal] Erreur lors de la mise à jour des formations liées : %s", e, exc_info=True)
 
     # Envoi d'email pour les nouveaux partenaires entreprises
     if created and hasattr(instance, 'type') and instance.type == Partenaire.TYPE_ENTREPRISE:
@@ -135,9 +140,9 @@ def partenaire_post_save(sender, instance, created, **kwargs):
                     recipient_list=[admin_email],
                     fail_silently=True,
                 )
-                logger.info(f"[Signal] Notification envoyée pour nouveau partenaire entreprise : {instance.nom}")
+                logger.info("[Signal] Notification envoyée pour nouveau partenaire entreprise : %s", instance.nom)
         except Exception as e:
-            logger.error(f"[Signal] Erreur lors de l'envoi du mail : {e}", exc_info=True)
+            logger.error("[Signal] Erreur lors de l'envoi du mail : %s", e, exc_info=True)
 
 
 @receiver(post_delete, sender=Partenaire)
@@ -160,7 +165,7 @@ def partenaire_post_delete(sender, instance, **kwargs):
         partenaire_type = getattr(instance, 'get_type_display', lambda: 'Unknown')()
         user = getattr(instance, '_user', None)
     except Exception as e:
-        logger.error(f"[Signal] Erreur lors de la récupération des informations du partenaire supprimé : {e}", exc_info=True)
+        logger.error("[Signal] Erreur lors de la récupération des informations du partenaire supprimé : %s", e, exc_info=True)
         partenaire_id = "Unknown"
         partenaire_nom = "Unknown"
         partenaire_type = "Unknown"
@@ -174,6 +179,6 @@ def partenaire_post_delete(sender, instance, **kwargs):
             user=user,
             details=f"Suppression du partenaire {partenaire_nom} (type: {partenaire_type})"
         )
-        logger.warning(f"[Signal] Partenaire supprimé : {partenaire_nom} (ID: {partenaire_id})")
+        logger.warning("[Signal] Partenaire supprimé : %s (ID: %s)", partenaire_nom, partenaire_id)
     except Exception as e:
-        logger.error(f"[Signal] Erreur lors du log de suppression du partenaire : {e}", exc_info=True)
\ No newline at end of file
+        logger.error("[Signal] Erreur lors du log de suppression du partenaire : %s", e, exc_info=True)
\ No newline at end of file
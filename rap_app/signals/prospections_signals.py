@@ -84,12 +84,12 @@ def log_prospection_save(sender, instance, created, **kwargs):
         )
 
         logger.info(
-            f"[Signal] {action.capitalize()} prospection #{instance.pk} pour partenaire {partenaire_nom}",
+            "[Signal] %s prospection #%s pour partenaire %s", action.capitalize(), instance.pk, partenaire_nom,
             extra={'user': username}
         )
     except Exception as e:
         logger.warning(
-            f"⚠️ Impossible de journaliser prospection #{getattr(instance, 'pk', 'Unknown')} : {e}",
+            "⚠️ Impossible de journaliser prospection #%s : %s", getattr(instance, 'pk', 'Unknown'), e,
             exc_info=True,
             extra={'user': username if 'username' in locals() else 'unknown'}
         )
@@ -117,7 +117,7 @@ def log_historique_prospection_save(sender, instance, created, **kwargs):
                 message += f" (Prochain contact : {prochain})"
 
         logger.info(
-            f"[Signal] Historique ajouté pour prospection #{instance.prospection_id} – {message}",
+            "[Signal] Historique ajouté pour prospection #%s – %s", instance.prospection_id, message,
             extra={'user': username}
         )
 
@@ -129,7 +129,7 @@ def log_historique_prospection_save(sender, instance, created, **kwargs):
         )
     except Exception as e:
         logger.warning(
-            f"⚠️ Impossible de journaliser historique #{getattr(instance, 'pk', 'Unknown')} : {e}",
+            "⚠️ Impossible de journaliser historique #%s : %s", getattr(instance, 'pk', 'Unknown'), e,
             exc_info=True,
             extra={'user': username if 'username' in locals() else 'unknown'}
         )
@@ -160,12 +160,12 @@ def log_prospection_delete(sender, instance, **kwargs):
         )
 
         logger.warning(
-            f"[Signal] Suppression prospection #{instance.pk} pour {partenaire_nom}",
+            "[Signal] Suppression prospection #%s pour %s", instance.pk, partenaire_nom,
             extra={'user': username}
         )
     except Exception as e:
         logger.error(
-            f"⚠️ Erreur lors du log de suppression prospection #{getattr(instance, 'pk', 'Unknown')} : {e}",
+            "⚠️ Erreur lors du log de suppression prospection #%s : %s", getattr(instance, 'pk', 'Unknown'), e,
             exc_info=True,
             extra={'user': username if 'username' in locals() else 'unknown'}
         )
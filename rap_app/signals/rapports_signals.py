@@ -43,6 +43,6 @@ def log_rapport_creation(sender, instance: Rapport, created: bool, **kwargs):
             details=f"{action.capitalize()} du rapport : {instance.nom} ({type_display})"
         )
 
-        logger.info(f"[Signal] {action.capitalize()} du rapport #{instance.pk} : {instance.nom}")
+        logger.info("[Signal] %s du rapport #%s : %s", action.capitalize(), instance.pk, instance.nom)
     except Exception as e:
-        logger.warning(f"⚠️ Erreur lors du signal post_save Rapport : {e}", exc_info=True)
+        logger.warning("⚠️ Erreur lors du signal post_save Rapport : %s", e, exc_info=True)
@@ -71,7 +71,7 @@ def create_vae_status_history(sender, instance, created, **kwargs):
             )
             instance.invalidate_caches()
     except Exception as e:
-        logger.error(f"❌ Erreur dans le signal VAE {getattr(instance, 'reference', instance.pk)} : {e}", exc_info=True)
+        logger.error("❌ Erreur dans le signal VAE %s : %s", getattr(instance, 'reference', instance.pk), e, exc_info=True)
 
 
 # ---------------------------
@@ -96,4 +96,4 @@ def log_suivijury_save(sender, instance, created, **kwargs):
         if hasattr(instance, 'invalidate_caches'):
             instance.invalidate_caches()
     except Exception as e:
-        logger.warning(f"⚠️ [SuiviJury] Erreur de log : {e}", exc_info=True)
+        logger.warning("⚠️ [SuiviJury] Erreur de log : %s", e, exc_info=True)
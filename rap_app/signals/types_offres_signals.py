@@ -38,10 +38,10 @@ def log_type_offre_save(sender, instance, created, **kwargs):
         )
 
         # Log technique
-        logger.info(f"[Signal] {action} du type d'offre #{instance.pk} : {instance.nom}")
+        logger.info("[Signal] %s du type d'offre #%s : %s", action, instance.pk, instance.nom)
 
     except Exception as e:
-        logger.warning(f"[Signal] Échec log utilisateur pour TypeOffre #{instance.pk} : {e}", exc_info=True)
+        logger.warning("[Signal] Échec log utilisateur pour TypeOffre #%s : %s", instance.pk, e, exc_info=True)
 
 
 @receiver(post_delete, sender=TypeOffre)
@@ -62,7 +62,7 @@ def log_type_offre_delete(sender, instance, **kwargs):
             details=f"Suppression du type d'offre : {instance.nom} (ID: {instance.pk})"
         )
 
-        logger.warning(f"[Signal] Suppression du type d'offre #{instance.pk} : {instance.nom}")
+        logger.warning("[Signal] Suppression du type d'offre #%s : %s", instance.pk, instance.nom)
 
     except Exception as e:
-        logger.error(f"[Signal] Échec log suppression TypeOffre #{instance.pk} : {e}", exc_info=True)
+        logger.error("[Signal] Échec log suppression TypeOffre #%s : %s", instance.pk, e, exc_info=True)
@@ -0,0 +1,31 @@
+# rap_app/signals/users_signals.py
+
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from ..models.custom_user import CustomUser
+from ..utils.cache_utils import bump_cache_version_on_commit, user_cache_namespace
+
+
+@receiver(m2m_changed, sender=CustomUser.centres.through)
+def invalidate_user_on_centres_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Centres d'un utilisateur modifiés → son cache d'authentification est périmé."""
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if reverse:
+        # modification depuis Centre.users : instance = centre
+        user_ids = pk_set or []
+        if action == "pre_clear":
+            user_ids = list(instance.users.values_list("pk", flat=True))
+        namespaces = [user_cache_namespace(pk) for pk in user_ids]
+    elif action == "pre_clear":
+        return
+    else:
+        namespaces = [user_cache_namespace(instance.pk)]
+    if namespaces:
+        bump_cache_version_on_commit(*namespaces)
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_on_delete(sender, instance, **kwargs):
+    bump_cache_version_on_commit(user_cache_namespace(instance.pk), "CustomUser")
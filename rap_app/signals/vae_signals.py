@@ -48,7 +48,7 @@ def create_vae_status_history(sender, instance, created, **kwargs):
                 date_changement_effectif=instance.created_at,
                 commentaire=f"Création de la VAE avec statut initial : {instance.get_statut_display()}",
             )
-            logger.info(f"[Signal] Historique initial créé pour VAE {instance.reference}")
+            logger.info("[Signal] Historique initial créé pour VAE %s", instance.reference)
 
             LogUtilisateur.log_action(
                 instance=instance,
@@ -66,7 +66,7 @@ def create_vae_status_history(sender, instance, created, **kwargs):
                             f"{dict(VAE.STATUT_CHOICES).get(instance._old_status)} "
                             f"→ {instance.get_statut_display()}",
             )
-            logger.info(f"[Signal] Changement de statut enregistré pour VAE {instance.reference}")
+            logger.info("[Signal] Changement de statut enregistré pour VAE %s", instance.reference)
 
             LogUtilisateur.log_action(
                 instance=instance,
@@ -81,6 +81,6 @@ def create_vae_status_history(sender, instance, created, **kwargs):
 
     except Exception as e:
         logger.error(
-            f"[Signal] Erreur VAE {getattr(instance, 'reference', instance.pk)} : {e}",
+            "[Signal] Erreur VAE %s : %s", getattr(instance, 'reference', instance.pk), e,
             exc_info=True,
         )
@@ -83,3 +83,15 @@ class CentreModelTest(BaseModelTestSetupMixin):
         pk = centre.pk
         centre.delete()
         self.assertFalse(Centre.objects.filter(pk=pk).exists())
+
+    def test_departement_code_maintenu(self):
+        centre = self.create_instance(Centre, nom="Centre Dep", code_postal="92100")
+        self.assertEqual(Centre.objects.get(pk=centre.pk).departement_code, "92")
+
+        centre.code_postal = "75010"
+        centre.save(update_fields=["code_postal"])
+        self.assertEqual(Centre.objects.get(pk=centre.pk).departement_code, "75")
+
+        centre.code_postal = None
+        centre.save()
+        self.assertEqual(Centre.objects.get(pk=centre.pk).departement_code, "")
@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ...models.appairage import Appairage, AppairageStatut, HistoriqueAppairage, batch_candidat_snapshots
+from ...models.candidat import Candidat, ResultatPlacementChoices
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.formations import Formation
+from ...models.partenaires import Partenaire
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+from ...utils.bulk_writer import BulkWriter, ecritures_groupees
+
+
+class AppairageSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="admin.appairage@example.com",
+            username="admin_appairage",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.candidat = Candidat.objects.create(nom="Durand", prenom="Léa", created_by=self.user)
+        self.p1 = Partenaire.objects.create(nom="Partenaire Un", type="entreprise", created_by=self.user)
+        self.p2 = Partenaire.objects.create(nom="Partenaire Deux", type="entreprise", created_by=self.user)
+        now = timezone.now()
+        self.older = Appairage.objects.create(
+            candidat=self.candidat, partenaire=self.p1, date_appairage=now - timedelta(days=2), created_by=self.user
+        )
+        self.newer = Appairage.objects.create(
+            candidat=self.candidat,
+            partenaire=self.p2,
+            date_appairage=now - timedelta(days=1),
+            statut=AppairageStatut.ACCEPTE,
+            created_by=self.user,
+        )
+
+    def test_pointer_follows_latest_appairage(self):
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.placement_appairage_id, self.newer.pk)
+        self.assertEqual(self.candidat.entreprise_validee_id, self.p2.pk)
+        self.assertEqual(self.candidat.resultat_placement, ResultatPlacementChoices.ADMIS)
+
+    def test_older_appairage_update_leaves_snapshot(self):
+        self.older.statut = AppairageStatut.REFUSE
+        self.older.save(user=self.user)
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.placement_appairage_id, self.newer.pk)
+        self.assertEqual(self.candidat.entreprise_placement_id, self.p2.pk)
+
+    def test_moving_current_back_in_time_recomputes(self):
+        self.newer.date_appairage = timezone.now() - timedelta(days=5)
+        self.newer.save(user=self.user)
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.placement_appairage_id, self.older.pk)
+
+    def test_deleting_current_falls_back_to_previous(self):
+        Appairage.objects.get(pk=self.newer.pk).delete()
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.placement_appairage_id, self.older.pk)
+        self.assertEqual(self.candidat.entreprise_placement_id, self.p1.pk)
+        self.assertIsNone(self.candidat.entreprise_validee_id)
+
+    def test_batch_refreshes_once_on_exit(self):
+        with batch_candidat_snapshots(user=self.user):
+            self.older.date_appairage = timezone.now()
+            self.older.save(user=self.user)
+            self.candidat.refresh_from_db()
+            self.assertEqual(self.candidat.placement_appairage_id, self.newer.pk)
+
+        self.candidat.refresh_from_db()
+        self.assertEqual(self.candidat.placement_appairage_id, self.older.pk)
+
+    def test_historique_groupe_ecrit_a_la_sortie(self):
+        avant = HistoriqueAppairage.objects.count()
+        with ecritures_groupees():
+            for app in (self.older, self.newer):
+                app.archiver(user=self.user)
+                app.statut = AppairageStatut.REFUSE
+                app.save(user=self.user)
+            self.assertEqual(HistoriqueAppairage.objects.count(), avant)  # en attente
+
+        self.assertEqual(HistoriqueAppairage.objects.count(), avant + 2)
+        h = HistoriqueAppairage.objects.filter(appairage=self.newer).latest("date")
+        self.assertEqual((h.statut, h.auteur_id), (AppairageStatut.REFUSE, self.user.pk))
+        self.assertIsNotNone(h.date)  # auto_now_add appliqué hors save()
+
+    def test_bulk_writer_par_lots(self):
+        writer = BulkWriter(HistoriqueAppairage, batch_size=2)
+        for i in range(5):
+            writer.add(HistoriqueAppairage(appairage=self.older, statut=AppairageStatut.A_FAIRE, commentaire=f"#{i}"))
+        self.assertEqual(writer.written, 4)  # deux lots pleins
+        writer.flush()
+        self.assertEqual(writer.written, 5)
+        self.assertEqual(HistoriqueAppairage.objects.filter(commentaire__startswith="#").count(), 5)
+
+
+class AppairageCentreTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="admin.centre@example.com",
+            username="admin_centre",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.centre = Centre.objects.create(nom="Centre Nord", code_postal="59000", created_by=self.user)
+        self.formation = Formation.objects.create(
+            nom="Formation Nord",
+            centre=self.centre,
+            type_offre=TypeOffre.objects.create(nom="crif", created_by=self.user),
+            statut=Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.user),
+            created_by=self.user,
+        )
+        self.partenaire = Partenaire.objects.create(
+            nom="Partenaire Nord", type="entreprise", zip_code="62000", city="Arras", created_by=self.user
+        )
+        self.appairage = Appairage.objects.create(
+            candidat=Candidat.objects.create(nom="Martin", prenom="Paul", created_by=self.user),
+            partenaire=self.partenaire,
+            formation=self.formation,
+            created_by=self.user,
+        )
+
+    def test_centre_et_departement_denormalises(self):
+        self.assertEqual(self.appairage.centre_id, self.centre.pk)
+        self.assertEqual(self.partenaire.departement_code, "62")
+        self.assertTrue(Appairage.objects.filter(centre__departement_code__in=["59"]).exists())
+
+    def test_changement_de_centre_propage(self):
+        autre = Centre.objects.create(nom="Centre Sud", code_postal="13000", created_by=self.user)
+        self.formation.centre = autre
+        self.formation.save(user=self.user)
+        self.appairage.refresh_from_db()
+        self.assertEqual(self.appairage.centre_id, autre.pk)
+
+    def _lectures_formation(self, ctx):
+        table = f'FROM "{Formation._meta.db_table}"'
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and table in q["sql"]]
+
+    def test_centre_sans_relire_la_formation(self):
+        appairage = Appairage.objects.get(pk=self.appairage.pk)  # formation non chargée
+        appairage.retour_partenaire = "Rappel prévu"
+        with CaptureQueriesContext(connection) as ctx:
+            appairage.save(user=self.user)
+        self.assertEqual(self._lectures_formation(ctx), [])
+        self.assertEqual(appairage.centre_id, self.centre.pk)
+
+        autre = Formation.objects.create(
+            nom="Formation Sud",
+            centre=Centre.objects.create(nom="Centre Sud", code_postal="13000", created_by=self.user),
+            type_offre=self.formation.type_offre,
+            statut=self.formation.statut,
+            created_by=self.user,
+        )
+        appairage.formation_id = autre.pk
+        with CaptureQueriesContext(connection) as ctx:
+            appairage.save(user=self.user)
+        self.assertEqual(len(self._lectures_formation(ctx)), 1)  # centre_id seul, formation changée
+        self.assertEqual(appairage.centre_id, autre.centre_id)
@@ -179,3 +179,22 @@ class FormationModelTest(BaseModelTestSetupMixin, TestCase):
         self.assertIn(partenaire1, partenaires)
         self.assertIn(partenaire2, partenaires)
 
+
+    def test_historique_groupe_applique_anti_doublon(self):
+        from ...utils.bulk_writer import ecritures_groupees, enregistrer
+
+        def entree(formation_id):
+            return HistoriqueFormation(
+                formation_id=formation_id, champ_modifie="activite", nouvelle_valeur="archivee",
+                created_by=self.user,
+            )
+
+        enregistrer(entree(self.formation.pk))  # hors bloc : save()
+        avant = HistoriqueFormation.objects.count()
+        with ecritures_groupees():
+            enregistrer(entree(self.formation.pk))  # doublon de la ligne existante
+            enregistrer(entree(999999))  # formation disparue
+            enregistrer(entree(999999))  # doublon dans le lot
+
+        self.assertEqual(HistoriqueFormation.objects.count(), avant + 1)
+        self.assertTrue(HistoriqueFormation.objects.filter(formation__isnull=True, champ_modifie="activite").exists())
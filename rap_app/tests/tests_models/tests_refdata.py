@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ...models.centres import Centre
+from ...models.statut import Statut
+from ...utils import refdata
+
+
+@override_settings(REFDATA_VERSION_CHECK_INTERVAL=0)
+class RefdataCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        refdata.forget(*refdata.LOADERS)
+        self.centre = Centre.objects.create(nom="Centre Réf", code_postal="92100")
+        self.statut = Statut.objects.create(nom=Statut.PLEINE)
+
+    def test_rows_are_immutable_and_complete(self):
+        row = refdata.get_centre(self.centre.pk)
+        self.assertEqual(row["nom"], "Centre Réf")
+        self.assertEqual(row["departement"], "92")
+        with self.assertRaises(TypeError):
+            row["nom"] = "x"
+
+        statut = refdata.get_statut(self.statut.pk)
+        self.assertEqual(statut["libelle"], self.statut.get_nom_display())
+
+    def test_label_map_uses_no_query_once_loaded(self):
+        refdata.get_table("Centre")
+        with self.assertNumQueries(0):
+            labels = refdata.label_map(Centre, [self.centre.pk])
+        self.assertEqual(labels, {self.centre.pk: "Centre Réf"})
+
+    def test_save_refreshes_table(self):
+        refdata.get_centre(self.centre.pk)
+        self.centre.nom = "Centre Renommé"
+        self.centre.save()
+        self.assertEqual(refdata.get_centre(self.centre.pk)["nom"], "Centre Renommé")
+
+    def test_table_reloaded_during_transaction_is_forgotten_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.centre.nom = "Centre Renommé"
+            self.centre.save()
+            refdata.get_table("Centre")  # rechargée avant le commit
+            self.assertIn("Centre", refdata._tables)
+        self.assertNotIn("Centre", refdata._tables)
@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.sequences import Sequence
+from ...models.vae import VAE
+
+
+class SequenceAllocatorTestCase(TestCase):
+    def test_allocate_ranges_are_contiguous(self):
+        self.assertEqual(Sequence.objects.next_value("TEST"), 1)
+        self.assertEqual(list(Sequence.objects.allocate("TEST", count=3)), [2, 3, 4])
+        self.assertEqual(Sequence.objects.next_value("TEST"), 5)
+        self.assertEqual(Sequence.objects.next_value("TEST", "2025", "1"), 1)
+        self.assertEqual(Sequence.objects.get(prefix="TEST", periode="", scope="").last_value, 5)
+
+    def test_allocate_rejects_empty_range(self):
+        with self.assertRaises(ValueError):
+            Sequence.objects.allocate("TEST", count=0)
+
+
+class VAEReferenceTestCase(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="admin.sequence@example.com",
+            username="admin_sequence",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.centre = Centre.objects.create(nom="Centre Séquence", code_postal="75012")
+        self.jour = timezone.now().strftime("%Y%m%d")
+
+    def test_references_follow_counter_per_centre(self):
+        autre = Centre.objects.create(nom="Centre Séquence Bis", code_postal="75013")
+        a = VAE.objects.create(centre=self.centre, created_by=self.user)
+        b = VAE.objects.create(centre=self.centre, created_by=self.user)
+        c = VAE.objects.create(centre=autre, created_by=self.user)
+
+        self.assertEqual(a.reference, f"VAE-{self.jour}-{self.centre.pk}-001")
+        self.assertEqual(b.reference, f"VAE-{self.jour}-{self.centre.pk}-002")
+        self.assertEqual(c.reference, f"VAE-{self.jour}-{autre.pk}-001")
+
+    def test_attribuer_references_reserves_a_range(self):
+        VAE.objects.create(centre=self.centre, created_by=self.user)
+        now = timezone.now()
+        vaes = [VAE(centre=self.centre, created_at=now, created_by=self.user) for _ in range(3)]
+
+        with self.assertNumQueries(1):
+            VAE.attribuer_references(vaes)
+
+        self.assertEqual(
+            [v.reference[-3:] for v in vaes],
+            ["002", "003", "004"],
+        )
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+
+import fitz
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.documents import Document
+from ...models.formations import Formation
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+from ...services.apercus import chemin_apercu, etag_apercu
+
+
+def _pdf(pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+    return doc.tobytes()
+
+
+PDF = _pdf()
+
+
+class DocumentApercuTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, APERCU_BACKGROUND=False, FILE_DELIVERY_BACKEND="")
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = CustomUser.objects.create_user(
+            email="admin.apercu@example.com",
+            username="admin_apercu",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.formation = Formation.objects.create(
+            nom="Formation Aperçu",
+            centre=Centre.objects.create(nom="Centre Aperçu", created_by=self.user),
+            type_offre=TypeOffre.objects.create(nom="crif", created_by=self.user),
+            statut=Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.user),
+            created_by=self.user,
+        )
+
+    def _document(self, nom):
+        with self.captureOnCommitCallbacks(execute=True):
+            doc = Document.objects.create(
+                formation=self.formation,
+                nom_fichier=nom,
+                fichier=SimpleUploadedFile(nom, PDF, content_type="application/pdf"),
+                type_document=Document.PDF,
+                created_by=self.user,
+            )
+        doc.refresh_from_db()
+        return doc
+
+    def test_apercu_genere_apres_commit(self):
+        doc = self._document("programme.pdf")
+        self.assertEqual(doc.nb_pages, 2)
+        self.assertEqual(doc.apercu, chemin_apercu(doc.sha256))
+        self.assertTrue(default_storage.exists(doc.apercu))
+
+        data = self.client.get(reverse("document-detail", args=[doc.pk])).json()["data"]
+        self.assertIn(f"/api/documents/{doc.pk}/thumbnail/?v={etag_apercu(doc.sha256)[:12]}", data["thumbnail"])
+
+        response = self.client.get(reverse("document-thumbnail", args=[doc.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["ETag"], f'"{etag_apercu(doc.sha256)}"')
+        self.assertNotIn(doc.sha256, response["ETag"])  # pas l'ETag du fichier source
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"\xff\xd8"))
+
+    def test_meme_contenu_meme_apercu(self):
+        a = self._document("a.pdf")
+        b = self._document("b.pdf")
+        self.assertEqual(a.apercu, b.apercu)
+
+    def test_pas_d_apercu_sans_rendu(self):
+        doc = Document.objects.create(
+            formation=self.formation,
+            nom_fichier="brouillon.pdf",
+            fichier=SimpleUploadedFile("brouillon.pdf", PDF, content_type="application/pdf"),
+            type_document=Document.PDF,
+            created_by=self.user,
+        )
+        data = self.client.get(reverse("document-detail", args=[doc.pk])).json()["data"]
+        self.assertIsNone(data["thumbnail"])
+        response = self.client.get(reverse("document-thumbnail", args=[doc.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ...api.async_views import dashboard_view, search_view
+from ...middleware import CurrentUserMiddleware, get_current_user
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.documents import Document
+from ...models.formations import Formation
+from ...models.partenaires import Partenaire
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+
+CONTENT = b"%PDF-1.4 " + b"0123456789" * 10
+
+
+class CurrentUserMiddlewareTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="ctx@example.com", username="ctx_user", password="StrongPass123"
+        )
+
+    def test_sync_request_scope(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        seen = []
+        CurrentUserMiddleware(lambda r: seen.append(get_current_user()))(request)
+        self.assertEqual(seen, [self.user])
+        self.assertIsNone(get_current_user())
+
+    async def test_async_request_scope(self):
+        request = AsyncRequestFactory().get("/")
+        request.user = self.user
+        seen = []
+
+        async def get_response(r):
+            seen.append(get_current_user())
+
+        await CurrentUserMiddleware(get_response)(request)
+        self.assertEqual(seen, [self.user])
+        self.assertIsNone(get_current_user())
+
+
+    def test_jwt_user_sets_updated_by_on_save(self):
+        """Sans `save(user=...)` explicite : BaseModel.save() lit l'utilisateur JWT via le middleware."""
+        createur = CustomUser.objects.create_user(
+            email="createur@example.com", username="createur", password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN, is_staff=True,
+        )
+        centre = Centre.objects.create(nom="Centre Contexte", created_by=createur, updated_by=createur)
+        editeur = CustomUser.objects.create_user(
+            email="editeur@example.com", username="editeur", password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN, is_staff=True,
+        )
+        token = RefreshToken.for_user(editeur).access_token
+
+        response = self.client.patch(
+            reverse("centre-detail", args=[centre.pk]), {"nom": "Centre Contexte modifié"},
+            format="json", HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 200)
+        centre.refresh_from_db()
+        self.assertEqual((centre.created_by_id, centre.updated_by_id), (createur.pk, editeur.pk))
+        self.assertIsNone(get_current_user())
+
+
+@override_settings(ASYNC_VIEWS_CONCURRENT=False, DASHBOARD_CONCURRENT=False)
+class AsyncViewsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.async@example.com",
+            username="admin_async",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        Centre.objects.create(nom="Centre Async", code_postal="69001")
+        Partenaire.objects.create(nom="Async Partenaire", type="entreprise", created_by=self.admin)
+
+    def _request(self, path, data=None, user=None):
+        request = AsyncRequestFactory().get(path, data or {})
+        request._force_auth_user = user
+        return request
+
+    async def test_search_matches_sync_view(self):
+        response = await search_view(self._request("/api/search/", {"q": "async"}, self.admin))
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data["centres"]["count"], 1)
+        self.assertEqual(data["partenaires"]["count"], 1)
+
+        direct = await self._sync_get(reverse("search"), {"q": "async"})
+        self.assertEqual(data, direct)
+
+    async def test_search_requires_authentication(self):
+        response = await search_view(self._request("/api/search/", {"q": "async"}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_dashboard_bundle(self):
+        response = await dashboard_view(
+            self._request("/api/dashboard/", {"widgets": "partenaires,centres"}, self.admin)
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = await dashboard_view(self._request("/api/dashboard/", {"widgets": "partenaires"}, self.admin))
+        self.assertEqual(response.status_code, 200)
+        widget = response.data["widgets"]["partenaires"]
+        self.assertEqual(widget["status"], 200)
+        direct = await self._sync_get(reverse("partenaire-stats-list"))
+        self.assertEqual(widget["data"], direct)
+
+    async def _sync_get(self, url, data=None):
+        return await sync_to_async(lambda: self.client.get(url, data or {}).json())()
+
+
+class AsgiDownloadTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, FILE_DELIVERY_BACKEND="")
+        media.enable()
+        self.addCleanup(media.disable)
+
+        user = CustomUser.objects.create_user(
+            email="admin.asgi@example.com",
+            username="admin_asgi",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        formation = Formation.objects.create(
+            nom="Formation ASGI",
+            centre=Centre.objects.create(nom="Centre ASGI", created_by=user),
+            type_offre=TypeOffre.objects.create(nom="crif", created_by=user),
+            statut=Statut.objects.create(nom="non_defini", couleur="#000000", created_by=user),
+            created_by=user,
+        )
+        document = Document.objects.create(
+            formation=formation,
+            nom_fichier="contrat.pdf",
+            fichier=SimpleUploadedFile("contrat.pdf", CONTENT, content_type="application/pdf"),
+            type_document=Document.PDF,
+            created_by=user,
+        )
+        self.url = reverse("document-download", args=[document.pk])
+        self.auth = f"Bearer {RefreshToken.for_user(user).access_token}"
+
+    async def test_streams_with_async_iterator(self):
+        response = await self.async_client.get(self.url, headers={"Authorization": self.auth})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]), CONTENT)
+
+        response = await self.async_client.get(self.url, headers={"Authorization": self.auth, "Range": "bytes=0-8"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]), CONTENT[:9])
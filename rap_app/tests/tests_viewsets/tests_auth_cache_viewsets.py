@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.centre = Centre.objects.create(nom="Centre Auth", code_postal="75013")
+        self.user = CustomUser.objects.create_user(
+            email="staff.auth@example.com",
+            username="staff_auth",
+            password="StrongPass123",
+            role=CustomUser.ROLE_STAFF,
+        )
+        self.user.centres.add(self.centre)
+
+    def _token(self):
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"email": "staff.auth@example.com", "password": "StrongPass123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["access"]
+
+    def _authenticate(self, token):
+        from ...api.authentication import CachedJWTAuthentication
+
+        auth = CachedJWTAuthentication()
+        request = type("Req", (), {"method": "GET", "META": {"HTTP_AUTHORIZATION": f"Bearer {token}"}})()
+        return auth.authenticate(request)[0]
+
+    def test_token_embeds_scope_claims(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken(self._token())
+        self.assertEqual(token["role"], CustomUser.ROLE_STAFF)
+        self.assertEqual(token["centres"], [self.centre.pk])
+        self.assertTrue(token["uv"])
+        # Signé mais pas chiffré : aucune donnée d'identité dans le jeton
+        for claim in ("email", "username", "first_name", "last_name"):
+            self.assertNotIn(claim, token.payload)
+
+    def test_claims_path_defers_identity_fields(self):
+        token = self._token()
+        with override_settings(JWT_TRUST_SCOPE_CLAIMS=True), self.assertNumQueries(0):
+            user = self._authenticate(token)
+            self.assertEqual((user.pk, user.role), (self.user.pk, CustomUser.ROLE_STAFF))
+            self.assertEqual(user.get_centre_ids(), [self.centre.pk])
+        self.assertTrue({"email", "username", "first_name", "last_name"} <= user.get_deferred_fields())
+        with self.assertRaises(RuntimeError):
+            user.save()
+
+    def test_second_authentication_hits_no_database(self):
+        token = self._token()
+        self._authenticate(token)
+        with CaptureQueriesContext(connection) as ctx:
+            user = self._authenticate(token)
+            self.assertEqual(user.get_centre_ids(), [self.centre.pk])
+            self.assertEqual((user.role, user.is_staff, user.is_active), (CustomUser.ROLE_STAFF, False, True))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_centres_change_invalidates_cached_user(self):
+        token = self._token()
+        self._authenticate(token)
+        other = Centre.objects.create(nom="Centre Auth 2", code_postal="75014")
+        self.user.centres.add(other)
+
+        user = self._authenticate(token)
+        self.assertEqual(sorted(user.get_centre_ids()), sorted([self.centre.pk, other.pk]))
+
+    def test_cache_holds_no_password_and_defers_other_fields(self):
+        from ...api.authentication import AUTH_USER_KEY, current_user_version
+
+        token = self._token()
+        self._authenticate(token)
+        payload = cache.get(AUTH_USER_KEY.format(self.user.pk, current_user_version(self.user.pk)))
+        self.assertEqual(set(payload), {"id", "is_active", "role", "is_staff", "is_superuser", "centres"})
+
+        user = self._authenticate(token)
+        self.assertIn("password", user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "staff.auth@example.com")
+
+    def test_deactivation_rejects_cached_user(self):
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+        token = self._token()
+        self._authenticate(token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(token)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.blobs import Blob
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.documents import Document
+from ...models.formations import Formation
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+from ...utils.blob_storage import chemin_blob
+
+PDF = b"%PDF-1.4\n" + b"programme de formation " * 200
+
+
+class BlobStorageTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, APERCU_BACKGROUND=False)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = CustomUser.objects.create_user(
+            email="admin.blob@example.com",
+            username="admin_blob",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        type_offre = TypeOffre.objects.create(nom="crif", created_by=self.user)
+        statut = Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.user)
+        centre = Centre.objects.create(nom="Centre Blob", created_by=self.user)
+        self.formations = [
+            Formation.objects.create(
+                nom=f"Formation Blob {i}", centre=centre, type_offre=type_offre, statut=statut, created_by=self.user
+            )
+            for i in range(2)
+        ]
+
+    def _upload(self, formation, nom, data=PDF):
+        response = self.client.post(
+            reverse("document-list"),
+            {
+                "formation": formation.id,
+                "nom_fichier": nom,
+                "type_document": Document.PDF,
+                "fichier": SimpleUploadedFile(nom, data, content_type="application/octet-stream"),
+            },
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Document.objects.get(pk=response.json()["data"]["id"])
+
+    def _blobs_sur_disque(self):
+        return [f for _, _, files in os.walk(os.path.join(self.media_root, "blobs")) for f in files]
+
+    def test_meme_contenu_stocke_une_fois(self):
+        a = self._upload(self.formations[0], "programme.pdf")
+        b = self._upload(self.formations[1], "programme (copie).pdf")
+
+        sha256 = hashlib.sha256(PDF).hexdigest()
+        self.assertEqual(a.fichier.name, chemin_blob(sha256, ".pdf"))
+        self.assertEqual(b.fichier.name, a.fichier.name)
+        self.assertEqual(a.sha256, sha256)
+        self.assertEqual(a.mime_type, "application/pdf")  # détecté au téléversement
+        self.assertEqual(len(self._blobs_sur_disque()), 1)
+        self.assertEqual(Blob.objects.get(pk=a.fichier.name).nb_references, 2)
+
+        a.delete(skip_history=True)
+        self.assertTrue(default_storage.exists(b.fichier.name))
+        self.assertEqual(Blob.objects.get(pk=b.fichier.name).nb_references, 1)
+
+        b.delete(skip_history=True)
+        blob = Blob.objects.get(pk=b.fichier.name)
+        self.assertEqual(blob.nb_references, 0)
+        self.assertIsNotNone(blob.orphelin_depuis)
+
+        call_command("collecter_blobs", "--grace-hours", "1", stdout=StringIO())
+        self.assertEqual(self._blobs_sur_disque(), [os.path.basename(b.fichier.name)])  # dans le délai
+
+        call_command("collecter_blobs", "--grace-hours", "0", stdout=StringIO())
+        self.assertFalse(Blob.objects.exists())
+        self.assertEqual(self._blobs_sur_disque(), [])
+
+    def test_remplacement_et_import(self):
+        doc = self._upload(self.formations[0], "programme.pdf")
+        ancien = doc.fichier.name
+        doc.fichier = SimpleUploadedFile("programme.pdf", PDF + b"v2")
+        doc.save()
+        self.assertNotEqual(doc.fichier.name, ancien)
+        self.assertEqual(Blob.objects.get(pk=ancien).nb_references, 0)
+        self.assertEqual(Blob.objects.get(pk=doc.fichier.name).nb_references, 1)
+
+        # Fichier antérieur au stockage dédupliqué, même contenu que la v2
+        historique = default_storage.save("formations/documents/pdf/1/ancien.pdf", ContentFile(PDF + b"v2"))
+        Document.objects.filter(pk=doc.pk).update(fichier=historique)
+        Blob.objects.filter(pk=doc.fichier.name).update(nb_references=0)
+        call_command("collecter_blobs", "--importer", "--grace-hours", "0", stdout=StringIO())
+
+        doc.refresh_from_db()
+        self.assertEqual(doc.fichier.name, chemin_blob(doc.sha256, ".pdf"))
+        self.assertFalse(default_storage.exists(historique))
+        self.assertEqual(Blob.objects.get(pk=doc.fichier.name).nb_references, 1)
+        self.assertEqual(self._blobs_sur_disque(), [os.path.basename(doc.fichier.name)])
+
+    def _vieillir(self, chemin):
+        """Recule le mtime du fichier (hors fenêtre d'un téléversement en cours)."""
+        passe = time.time() - 3600
+        os.utime(default_storage.path(chemin), (passe, passe))
+
+    def test_effacement_des_la_derniere_reference(self):
+        a = self._upload(self.formations[0], "programme.pdf")
+        b = self._upload(self.formations[1], "programme (copie).pdf")
+        chemin = a.fichier.name
+        self._vieillir(chemin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete(skip_history=True)
+        self.assertTrue(default_storage.exists(chemin))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete(skip_history=True)
+        self.assertFalse(default_storage.exists(chemin))  # sans attendre collecter_blobs
+        self.assertFalse(Blob.objects.exists())
+
+    def test_references_posees_hors_signaux(self):
+        a = self._upload(self.formations[0], "programme.pdf")
+        b = self._upload(self.formations[1], "autre.pdf", data=PDF + b"autre")
+        chemin, chemin_b = a.fichier.name, b.fichier.name
+        self._vieillir(chemin)
+
+        # Chemin posé par update() : aucune référence prise, celle de b n'est pas libérée
+        Document.objects.filter(pk=b.pk).update(fichier=chemin)
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete(skip_history=True)
+        self.assertTrue(default_storage.exists(chemin))  # compteur à 0 mais encore référencé
+        self.assertEqual(Blob.objects.get(pk=chemin).nb_references, 1)
+
+        call_command("collecter_blobs", "--grace-hours", "0", stdout=StringIO())
+        blob_b = Blob.objects.get(pk=chemin_b)
+        self.assertEqual(blob_b.nb_references, 0)  # recompté : plus aucune ligne ne le référence
+        self.assertIsNotNone(blob_b.orphelin_depuis)
+
+        # Affectation d'un chemin existant via save() : référence prise et ancienne libérée
+        b.refresh_from_db()
+        c = self._upload(self.formations[0], "v3.pdf", data=PDF + b"v3")
+        c.fichier = chemin
+        c.save()
+        self.assertEqual(Blob.objects.get(pk=chemin).nb_references, 2)
+        self.assertEqual(Blob.objects.get(pk=chemin_blob(hashlib.sha256(PDF + b"v3").hexdigest(), ".pdf")).nb_references, 0)
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+from unittest import mock
+
+import fitz
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from ...models.candidat import Candidat
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.cvtheque import CVTheque
+from ...models.formations import Formation
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+
+
+def _pdf(texte=None):
+    doc = fitz.open()
+    page = doc.new_page()
+    if texte:
+        page.insert_textbox(fitz.Rect(72, 72, 540, 770), texte)
+    else:
+        page.draw_rect(fitz.Rect(72, 72, 300, 300), fill=(0, 0, 0))  # « scan » sans couche texte
+    return doc.tobytes()
+
+
+class CVThequeRechercheTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root, APERCU_BACKGROUND=False, CV_TEXTE_BACKGROUND=False
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = CustomUser.objects.create_user(
+            email="admin.cvq@example.com",
+            username="admin_cvq",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        type_offre = TypeOffre.objects.create(nom="crif", created_by=self.admin)
+        statut = Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.admin)
+        self.centres = [Centre.objects.create(nom=f"Centre CV {i}", created_by=self.admin) for i in (1, 2)]
+        self.candidats = [
+            Candidat.objects.create(
+                nom=f"Durand{i}",
+                prenom="Léa",
+                formation=Formation.objects.create(
+                    nom=f"Formation CV {i}", centre=centre, type_offre=type_offre, statut=statut, created_by=self.admin
+                ),
+                created_by=self.admin,
+            )
+            for i, centre in enumerate(self.centres)
+        ]
+
+    def _cv(self, candidat, titre, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            cv = CVTheque.objects.create(
+                candidat=candidat,
+                titre=titre,
+                fichier=SimpleUploadedFile(f"{titre}.pdf", data, content_type="application/pdf"),
+                created_by=self.admin,
+            )
+        cv.refresh_from_db()
+        return cv
+
+    def test_texte_extrait_et_recherche(self):
+        texte = (
+            "Développeuse back-end : Python, Django et PostgreSQL. Cinq ans d'expérience "
+            "en intégration continue <script>alert(1)</script> et en conduite de projets."
+        )
+        cv = self._cv(self.candidats[0], "CV Léa", _pdf(texte))
+        autre = self._cv(self.candidats[1], "CV Hugo", _pdf("Cariste, préparation de commandes, CACES 1 3 5. " * 3))
+        self.assertEqual(cv.texte_source, "pdf")
+        self.assertIn("Django et PostgreSQL", cv.texte)
+
+        staff = CustomUser.objects.create_user(
+            email="staff.cvq@example.com",
+            username="staff_cvq",
+            password="StrongPass123",
+            role=CustomUser.ROLE_STAFF,
+        )
+        staff.centres.add(self.centres[0])
+        self.client.force_authenticate(user=staff)
+
+        results = self.client.get(reverse("cvtheque-list"), {"q": "django"}).json()["data"]["results"]
+        self.assertEqual([r["id"] for r in results], [cv.pk])
+        self.assertIn("<mark>Django</mark>", results[0]["extrait"])
+        self.assertNotIn("<script>", results[0]["extrait"])
+
+        # Périmètre : le CV de l'autre centre n'apparaît pas
+        self.assertEqual(self.client.get(reverse("cvtheque-list"), {"q": "cariste"}).json()["data"]["results"], [])
+        self.client.force_authenticate(user=self.admin)
+        results = self.client.get(reverse("cvtheque-list"), {"q": "cariste"}).json()["data"]["results"]
+        self.assertEqual([r["id"] for r in results], [autre.pk])
+
+    def test_ocr_si_pas_de_couche_texte(self):
+        with mock.patch("pytesseract.image_to_string", return_value="Soudeur TIG / MIG, lecture de plans") as ocr:
+            cv = self._cv(self.candidats[0], "CV scanné", _pdf())
+        ocr.assert_called_once()
+        self.assertEqual(cv.texte_source, "ocr")
+        self.assertEqual(cv.texte, "Soudeur TIG / MIG, lecture de plans")
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from ...api.viewsets.stats_viewsets.dashboard_viewset import WIDGET_ERROR_DETAIL, DashboardViewSet
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.partenaires import Partenaire
+from ...models.prospection import Prospection, ProspectionChoices
+
+
+class DashboardSetupMixin:
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.dashboard@example.com",
+            username="admin_dashboard",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        centre = Centre.objects.create(nom="Centre Dashboard", code_postal="92100")
+        partenaire = Partenaire.objects.create(nom="Gamma", type="entreprise", created_by=self.admin)
+        Prospection.objects.create(
+            partenaire=partenaire,
+            centre=centre,
+            motif=ProspectionChoices.MOTIF_PARTENARIAT,
+            created_by=self.admin,
+        )
+        self.url = reverse("dashboard-list")
+
+
+@override_settings(DASHBOARD_CONCURRENT=False)
+class DashboardTestCase(DashboardSetupMixin, APITestCase):
+    def test_bundle_matches_unit_endpoints(self):
+        response = self.client.get(self.url, {"widgets": "prospections,prospections.grouped", "by": "centre"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        widgets = response.json()["widgets"]
+        self.assertEqual(list(widgets), ["prospections", "prospections.grouped"])
+
+        direct = self.client.get(reverse("prospection-stats-list"), {"by": "centre"}).json()
+        self.assertEqual(widgets["prospections"]["status"], 200)
+        self.assertEqual(widgets["prospections"]["data"], direct)
+        self.assertEqual(widgets["prospections"]["cache"], "miss")
+        self.assertIn("duration_ms", widgets["prospections"])
+
+        grouped = self.client.get(reverse("prospection-stats-grouped"), {"by": "centre"}).json()
+        self.assertEqual(widgets["prospections.grouped"]["data"], grouped)
+
+    def test_cache_hit_and_refresh(self):
+        self.client.get(self.url, {"widgets": "partenaires"})
+        second = self.client.get(self.url, {"widgets": "partenaires"}).json()["widgets"]["partenaires"]
+        self.assertEqual(second["cache"], "hit")
+        forced = self.client.get(self.url, {"widgets": "partenaires", "refresh": "1"}).json()
+        self.assertEqual(forced["widgets"]["partenaires"]["cache"], "bypass")
+
+    def test_unknown_widget(self):
+        response = self.client.get(self.url, {"widgets": "formations.inexistant"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_widget_error_is_not_leaked(self):
+        with mock.patch.object(DashboardViewSet, "_call", side_effect=RuntimeError("SELECT secret FROM t")):
+            with self.assertLogs("application.dashboard", level="ERROR"):
+                widget = self.client.get(self.url, {"widgets": "partenaires"}).json()["widgets"]["partenaires"]
+        self.assertEqual((widget["status"], widget["data"]), (500, {"detail": WIDGET_ERROR_DETAIL}))
+        self.assertEqual(widget["cache"], "off")
+
+
+@override_settings(DASHBOARD_CONCURRENT=True)
+class DashboardConcurrentTestCase(DashboardSetupMixin, APITransactionTestCase):
+    """Widgets exécutés dans le pool : données validées (lues depuis d'autres connexions)."""
+
+    def test_concurrent_bundle_matches_serial(self):
+        widgets = "prospections,partenaires,prospections.grouped"
+        concurrent = self.client.get(self.url, {"widgets": widgets, "by": "centre"}).json()["widgets"]
+        self.assertEqual([w["status"] for w in concurrent.values()], [200, 200, 200])
+
+        with self.settings(DASHBOARD_CONCURRENT=False):
+            serial = self.client.get(self.url, {"widgets": widgets, "by": "centre", "refresh": "1"}).json()["widgets"]
+        for name in serial:
+            self.assertEqual(concurrent[name]["data"], serial[name]["data"])
@@ -0,0 +1,98 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.documents import Document
+from ...models.formations import Formation
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+
+CONTENT = b"%PDF-1.4 " + b"0123456789" * 10
+
+
+class DocumentDownloadTestCase(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, FILE_DELIVERY_BACKEND="")
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = CustomUser.objects.create_user(
+            email="admin.download@example.com",
+            username="admin_download",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        formation = Formation.objects.create(
+            nom="Formation Download",
+            centre=Centre.objects.create(nom="Centre Download", created_by=self.user),
+            type_offre=TypeOffre.objects.create(nom="crif", created_by=self.user),
+            statut=Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.user),
+            created_by=self.user,
+        )
+        self.document = Document.objects.create(
+            formation=formation,
+            nom_fichier="contrat.pdf",
+            fichier=SimpleUploadedFile("contrat.pdf", CONTENT, content_type="application/pdf"),
+            type_document=Document.PDF,
+            created_by=self.user,
+        )
+        self.url = reverse("document-download", args=[self.document.pk])
+
+    def test_hash_stored_and_full_download(self):
+        self.assertEqual(self.document.sha256, hashlib.sha256(CONTENT).hexdigest())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["ETag"], f'"{self.document.sha256}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertEqual(response["Pragma"], "no-cache")
+
+    def test_range_and_conditional(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=9-18")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[9:19])
+        self.assertEqual(response["Content-Range"], f"bytes 9-18/{len(CONTENT)}")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(CONTENT)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        # If-Range périmé → fichier complet
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-3", HTTP_IF_RANGE='"obsolete"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.document.sha256}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_offload_to_front_server(self):
+        with override_settings(FILE_DELIVERY_BACKEND="x-accel", FILE_DELIVERY_ACCEL_PREFIX="/protected-media/"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.document.fichier.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_backfill_sha256_migration(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        Document.objects.filter(pk=self.document.pk).update(sha256="")
+        import_module("rap_app.migrations.0016_backfill_sha256").backfill_sha256(apps, None)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.sha256, hashlib.sha256(CONTENT).hexdigest())
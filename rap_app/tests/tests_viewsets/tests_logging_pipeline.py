@@ -0,0 +1,79 @@
+import json
+import logging
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from ...utils.logging_utils import (
+    JsonFormatter,
+    QueueListenerHandler,
+    RequestIdFilter,
+    reset_request_id,
+    set_request_id,
+)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class QueueListenerHandlerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.target = _ListHandler()
+        self.target.setFormatter(JsonFormatter())
+        self.target.set_name("test_json_target")
+        self.handler = QueueListenerHandler(targets=["test_json_target"])
+        self.handler.addFilter(RequestIdFilter())
+        self.logger = logging.getLogger("rap_app.tests.queue")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_json_lines_with_request_id(self):
+        values = ["avant"]
+        token = set_request_id("req-123")
+        try:
+            self.logger.info("[Formation] Modifiée : %s", values)
+        finally:
+            reset_request_id(token)
+        values[0] = "après"  # le message est rendu dans le thread appelant
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("échec")
+        self.handler.close()  # vide la file
+
+        first, second = (json.loads(line) for line in self.target.lines)
+        self.assertEqual(first["message"], "[Formation] Modifiée : ['avant']")
+        self.assertEqual(first["request_id"], "req-123")
+        self.assertEqual(first["logger"], "rap_app.tests.queue")
+        self.assertEqual(second["request_id"], "-")
+        self.assertIn("ValueError: boom", second["exc"])
+
+
+class LogFileHandlersTestCase(SimpleTestCase):
+    def test_files_are_shared_safely_between_workers(self):
+        """Plusieurs workers : ajout + rotation externe, jamais de renommage par un worker."""
+        from django.conf import settings
+
+        if settings.LOG_ROTATION != "logrotate":
+            self.skipTest("LOG_ROTATION=size (processus unique)")
+        for name in ("file", "audit_file", "json_file"):
+            self.assertEqual(settings.LOGGING["handlers"][name]["class"], "logging.handlers.WatchedFileHandler")
+
+
+class RequestIdMiddlewareTestCase(APITestCase):
+    def test_header_generated_or_propagated(self):
+        url = reverse("roles")
+        generated = self.client.get(url)["X-Request-ID"]
+        self.assertRegex(generated, r"^[0-9a-f]{32}$")
+
+        self.assertEqual(self.client.get(url, HTTP_X_REQUEST_ID="nginx-abc.1")["X-Request-ID"], "nginx-abc.1")
+        self.assertNotEqual(self.client.get(url, HTTP_X_REQUEST_ID="bad id\n")["X-Request-ID"], "bad id\n")
@@ -0,0 +1,135 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...utils.db import reset_connection_metrics, stream_queryset
+from ...utils.profiling import (
+    RequestProfile, activate_profile, build_report, deactivate_profile, fingerprint_sql, profile_thread,
+)
+
+
+class SqlFingerprintTestCase(SimpleTestCase):
+    def test_literals_and_in_lists_are_normalized(self):
+        a = fingerprint_sql("SELECT * FROM t WHERE id = 12 AND nom = 'abc'")
+        b = fingerprint_sql("SELECT *  FROM t WHERE id = 7 AND nom = 'xyz'")
+        self.assertEqual(a, b)
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s)"),
+        )
+
+    def test_report_ranks_by_duplicates(self):
+        entries = [
+            {"method": "GET", "endpoint": "api/candidats/", "duration_ms": 50, "queries": 40, "duplicates": 30},
+            {"method": "GET", "endpoint": "api/centres/", "duration_ms": 200, "queries": 3, "duplicates": 0},
+        ]
+        by_dup = build_report(entries, order_by="duplicates")
+        self.assertEqual(by_dup[0]["endpoint"], "api/candidats/")
+        by_p95 = build_report(entries, order_by="p95")
+        self.assertEqual(by_p95[0]["endpoint"], "api/centres/")
+
+
+class ProfileThreadTestCase(TestCase):
+    def test_worker_thread_queries_are_counted(self):
+        def work():
+            try:
+                with profile_thread(), connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            finally:
+                connection.close()
+
+        profile = RequestProfile()
+        token = activate_profile(profile)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, work) for _ in range(2)]
+                for f in futures:
+                    f.result()
+        finally:
+            deactivate_profile(token)
+        self.assertEqual(profile.queries, 2)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:  # sans profil actif : rien n'est branché
+            pool.submit(work).result()
+        self.assertEqual(profile.queries, 2)
+
+
+class MonitoringViewsTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email="admin.monitoring@example.com",
+            username="admin_monitoring",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.staff = CustomUser.objects.create_user(
+            email="staff.monitoring@example.com",
+            username="staff_monitoring",
+            password="StrongPass123",
+            role=CustomUser.ROLE_STAFF,
+            is_staff=True,
+        )
+
+    def test_db_metrics_admin_only(self):
+        url = reverse("monitoring-db")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.staff)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        reset_connection_metrics()
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["success"])
+        data = response.data["data"]
+        self.assertEqual(
+            set(data),
+            {
+                "connections_opened", "connections_reused", "requests", "pid", "reuse_ratio",
+                "conn_max_age", "conn_health_checks", "server_side_cursors",
+            },
+        )
+        self.assertEqual(data["requests"], 1)  # compteurs remis à zéro juste avant cette requête
+        self.assertIsNotNone(data["reuse_ratio"])
+
+    def test_sql_report_returns_results(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("monitoring-sql"), {"order": "duplicates"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("results", response.data["data"])
+
+
+class StreamQuerysetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Centre.objects.bulk_create([Centre(nom=f"Centre Stream {i:02d}", code_postal="75001") for i in range(23)])
+
+    def _attendus(self):
+        return list(Centre.objects.order_by("-nom").values_list("pk", flat=True))
+
+    def test_server_side_cursor_path(self):
+        qs = Centre.objects.order_by("-nom")
+        with mock.patch.object(type(qs), "iterator", wraps=qs.iterator) as iterator:
+            self.assertEqual([c.pk for c in stream_queryset(qs, chunk_size=5)], self._attendus())
+        iterator.assert_called_once_with(chunk_size=5)
+
+    def test_pgbouncer_path_loads_bounded_chunks_in_order(self):
+        qs = Centre.objects.order_by("-nom")
+        with mock.patch.dict(connection.settings_dict, {"DISABLE_SERVER_SIDE_CURSORS": True}):
+            with CaptureQueriesContext(connection) as ctx:
+                pks = [c.pk for c in stream_queryset(qs, chunk_size=5)]
+        self.assertEqual(pks, self._attendus())
+        self.assertEqual(len(ctx), 1 + 5)  # liste des PK, puis ceil(23 / 5) lots
+        for query in ctx.captured_queries[1:]:
+            lot = query["sql"].split(" IN (")[1].split(")")[0].split(",")
+            self.assertLessEqual(len(lot), 5)
@@ -0,0 +1,155 @@
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...checks import check_cache_partage
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...utils.cache_utils import bump_cache_version_on_commit, get_cache_versions, user_cache_namespace
+
+
+class FormationFiltresCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.options@example.com",
+            username="admin_options",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("formation-filtres")
+
+    def test_second_call_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        second = self.client.get(self.url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_model_save_invalidates_entry(self):
+        etag = self.client.get(self.url)["ETag"]
+        Centre.objects.create(nom="Centre Options", code_postal="75011")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class CacheVersionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_repeated_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            immediate = bump_cache_version_on_commit("Centre")
+            self.assertEqual(get_cache_versions("Centre"), (immediate,))
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertGreater(get_cache_versions("Centre")[0], immediate)
+
+    def test_user_save_invalidates_user_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.create_user(
+                email="owner.options@example.com", username="owner_options", password="StrongPass123",
+            )
+        self.assertNotEqual(get_cache_versions("CustomUser"), (0,))
+
+    def test_only_displayed_fields_invalidate_user_lists(self):
+        user = CustomUser.objects.create_user(
+            email="login.options@example.com", username="login_options", password="StrongPass123",
+        )
+        liste = get_cache_versions("CustomUser")
+        personnel = get_cache_versions(user_cache_namespace(user.pk))
+
+        update_last_login(None, user)  # connexion admin
+        user.role = CustomUser.ROLE_STAFF
+        user.save(update_fields=["role"])
+        user.save()  # aucun champ affiché modifié
+        self.assertEqual(get_cache_versions("CustomUser"), liste)
+        self.assertGreater(get_cache_versions(user_cache_namespace(user.pk))[0], personnel[0])
+
+        user.last_name = "Renommé"
+        user.save()
+        self.assertGreater(get_cache_versions("CustomUser")[0], liste[0])
+        liste = get_cache_versions("CustomUser")
+        user.save(update_fields=["first_name"])
+        self.assertGreater(get_cache_versions("CustomUser")[0], liste[0])
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        CACHE_LOCMEM_AUTORISE=False,
+    )
+    def test_locmem_refused_outside_dev(self):
+        self.assertEqual([e.id for e in check_cache_partage(None)], ["rap_app.E001"])
+        with self.settings(CACHE_LOCMEM_AUTORISE=True):
+            self.assertEqual(check_cache_partage(None), [])
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.etag@example.com",
+            username="admin_etag",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.centre = Centre.objects.create(nom="Centre ETag", code_postal="75012")
+
+    def test_list_returns_304_until_a_row_changes(self):
+        url = reverse("centre-list")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.centre.nom = "Centre ETag renommé"
+        self.centre.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_relies_on_etag_not_if_modified_since(self):
+        url = reverse("centre-detail", args=[self.centre.pk])
+        first = self.client.get(url)
+        self.assertIn("Last-Modified", first)
+
+        # Modification dans la même seconde : Last-Modified inchangé, ETag différent
+        self.centre.nom = "Centre ETag bis"
+        self.centre.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_partenaire_list_is_conditional(self):
+        from ...models.partenaires import Partenaire
+
+        Partenaire.objects.create(nom="Partenaire ETag", default_centre=self.centre, created_by=self.admin)
+        url = reverse("partenaire-list")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.admin.first_name = "Renommé"  # auteur affiché dans la liste
+        self.admin.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
@@ -0,0 +1,102 @@
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...api.serializers.candidat_serializers import CandidatLiteSerializer
+from ...api.serializers.formations_serializers import FormationListSerializer
+from ...api.serializers.prospection_serializers import ProspectionListSerializer
+from ...api.viewsets.prospection_viewsets import annotate_last_visible_comment
+from ...models.candidat import Candidat
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.formations import Formation
+from ...models.partenaires import Partenaire
+from ...models.prospection import Prospection, ProspectionChoices
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+
+
+def as_json(data):
+    return json.loads(json.dumps(data, default=str))
+
+
+class ListProjectionParityTestCase(APITestCase):
+    """Les listes projetées rendent exactement la sortie des serializers."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.projection@example.com",
+            username="admin_projection",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.centre = Centre.objects.create(nom="Centre Projection", code_postal="75013")
+        self.statut = Statut.objects.create(nom="non_defini", couleur="#000000")
+        self.type_offre = TypeOffre.objects.create(nom="poec", couleur="#FF0000")
+        self.formation = Formation.objects.create(
+            nom="Formation Projection",
+            centre=self.centre,
+            statut=self.statut,
+            type_offre=self.type_offre,
+            start_date=timezone.now().date(),
+            end_date=timezone.now().date() + timedelta(days=30),
+            prevus_crif=10,
+            inscrits_crif=4,
+            nombre_candidats=8,
+            created_by=self.admin,
+        )
+        self.partenaire = Partenaire.objects.create(nom="Partenaire Projection", type="entreprise", created_by=self.admin)
+
+    def test_formations_list(self):
+        response = self.client.get(reverse("formation-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        expected = FormationListSerializer(Formation.objects.filter(pk=self.formation.pk), many=True).data
+        self.assertEqual(response.json()["data"]["results"], as_json(expected))
+
+    def test_prospections_list_with_and_without_relations(self):
+        for partenaire, formation in ((self.partenaire, self.formation), (None, None)):
+            Prospection.objects.create(
+                partenaire=partenaire,
+                formation=formation,
+                centre=self.centre if formation else None,
+                owner=self.admin,
+                motif=ProspectionChoices.MOTIF_PARTENARIAT,
+                statut=ProspectionChoices.STATUT_EN_COURS,
+                relance_prevue=timezone.now().date(),
+                created_by=self.admin,
+            )
+
+        response = self.client.get(reverse("prospection-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        qs = annotate_last_visible_comment(Prospection.objects.all(), self.admin).order_by("-date_prospection")
+        expected = ProspectionListSerializer(qs, many=True).data
+        self.assertEqual(response.json()["data"]["results"], as_json(expected))
+        self.assertNotIn("partenaire_nom", response.json()["data"]["results"][0])
+
+    def test_candidats_lite_list(self):
+        Candidat.objects.create(nom="Durand", prenom="Léa", formation=self.formation, created_by=self.admin)
+        Candidat.objects.create(nom="Martin", prenom="Hugo", created_by=self.admin)
+
+        response = self.client.get(reverse("candidat-list"), {"lite": "1", "ordering": "nom"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        expected = CandidatLiteSerializer(Candidat.objects.order_by("nom"), many=True).data
+        self.assertEqual(response.json()["data"]["results"], as_json(expected))
+
+    def test_missing_reference_row_renders_null(self):
+        from ...api.serializers.candidat_serializers import _lite_ref_nom
+        from ...api.serializers.prospection_serializers import _ref_nom
+
+        self.assertIsNone(_ref_nom("Centre", "centre")({"centre": 999999}))
+        self.assertIsNone(_lite_ref_nom("Centre", "formation__centre")({"formation": 1, "formation__centre": 999999}))
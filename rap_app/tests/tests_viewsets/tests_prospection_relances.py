@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.custom_user import CustomUser
+from ...models.partenaires import Partenaire
+from ...models.prospection import Prospection, ProspectionChoices
+from ...services.relances import digest_relances
+
+
+class RelancesWorklistTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email="admin.relances@example.com",
+            username="admin_relances",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.other = CustomUser.objects.create_user(
+            email="staff.relances@example.com",
+            username="staff_relances",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        partenaire = Partenaire.objects.create(nom="Partenaire Relance", type="entreprise", created_by=self.admin)
+        today = timezone.localdate()
+
+        def make(owner, days, statut=ProspectionChoices.STATUT_EN_COURS):
+            return Prospection.objects.create(
+                partenaire=partenaire,
+                owner=owner,
+                motif=ProspectionChoices.MOTIF_PARTENARIAT,
+                statut=statut,
+                relance_prevue=today + timedelta(days=days),
+                created_by=self.admin,
+            )
+
+        self.overdue = [make(self.admin, -3), make(self.admin, -1), make(self.admin, 0)]
+        make(self.admin, 5)  # future
+        accepted = make(self.admin, -2)
+        Prospection.objects.filter(pk=accepted.pk).update(statut=ProspectionChoices.STATUT_ACCEPTEE)
+        make(self.other, -1)
+
+    def test_endpoint_cursor_pagination(self):
+        url = reverse("prospection-relances")
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()["data"]
+        self.assertEqual([r["id"] for r in data["results"]], [p.pk for p in self.overdue[:2]])
+        self.assertEqual(data["results"][0]["jours_retard"], 3)
+        self.assertEqual(data["results"][0]["partenaire_nom"], "Partenaire Relance")
+
+        second = self.client.get(data["next"]).json()["data"]
+        self.assertEqual([r["id"] for r in second["results"]], [self.overdue[2].pk])
+        self.assertIsNone(second["next"])
+
+        response = self.client.get(url, {"horizon": 7})
+        self.assertEqual(len(response.json()["data"]["results"]), 4)
+
+    def test_digest_single_query(self):
+        with self.assertNumQueries(1):
+            digests = list(digest_relances())
+        by_owner = {d["owner_id"]: d for d in digests}
+        self.assertEqual(by_owner[self.admin.pk]["total"], 3)
+        self.assertEqual(by_owner[self.admin.pk]["en_retard"], 2)
+        self.assertEqual(by_owner[self.other.pk]["total"], 1)
+
+    def test_digest_command_sends_one_mail_per_owner(self):
+        call_command("relances_digest", stdout=StringIO())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [self.admin.email, self.other.email])
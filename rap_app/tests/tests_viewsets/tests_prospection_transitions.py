@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.formations import Formation
+from ...models.partenaires import Partenaire
+from ...models.prospection import HistoriqueProspection, Prospection, ProspectionChoices
+from ...models.prospection_comments import ProspectionComment
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+
+
+class ProspectionTransitionTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email="admin.transition@example.com",
+            username="admin_transition",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        centre = Centre.objects.create(nom="Centre Transition", code_postal="75011")
+        self.formation = Formation.objects.create(
+            nom="Formation Transition",
+            centre=centre,
+            statut=Statut.objects.create(nom="non_defini", couleur="#000000"),
+            type_offre=TypeOffre.objects.create(nom="poec", couleur="#FF0000"),
+            start_date=timezone.now().date(),
+            end_date=timezone.now().date() + timedelta(days=30),
+            created_by=self.admin,
+        )
+        partenaire = Partenaire.objects.create(nom="Partenaire Transition", type="entreprise", created_by=self.admin)
+        self.prospections = [
+            Prospection.objects.create(
+                partenaire=partenaire,
+                formation=self.formation,
+                owner=self.admin,
+                motif=ProspectionChoices.MOTIF_PARTENARIAT,
+                statut=ProspectionChoices.STATUT_EN_COURS,
+                created_by=self.admin,
+            )
+            for _ in range(3)
+        ]
+        HistoriqueProspection.objects.all().delete()
+
+    def test_changer_statut_single_history_entry(self):
+        p = self.prospections[0]
+        relance = timezone.now().date() + timedelta(days=7)
+        response = self.client.post(
+            reverse("prospection-changer-statut", args=[p.pk]),
+            {"statut": ProspectionChoices.STATUT_EN_COURS, "prochain_contact": relance.isoformat(),
+             "moyen_contact": ProspectionChoices.MOYEN_EMAIL, "commentaire": "Rappeler mardi"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(response.json()["data"]["statut"], ProspectionChoices.STATUT_A_RELANCER)
+
+        p.refresh_from_db()
+        self.assertEqual(p.statut, ProspectionChoices.STATUT_A_RELANCER)
+        self.assertEqual(p.relance_prevue, relance)
+        self.assertEqual(p.moyen_contact, ProspectionChoices.MOYEN_EMAIL)
+        self.assertEqual(p.commentaire, "Rappeler mardi")
+        self.assertEqual(p.updated_by, self.admin)
+
+        historiques = HistoriqueProspection.objects.filter(prospection=p)
+        self.assertEqual(historiques.count(), 1)
+        h = historiques.get()
+        self.assertEqual((h.champ_modifie, h.ancien_statut, h.nouveau_statut),
+                         ("statut", ProspectionChoices.STATUT_EN_COURS, ProspectionChoices.STATUT_A_RELANCER))
+        self.assertEqual(h.prochain_contact, relance)
+        self.assertEqual(ProspectionComment.objects.filter(prospection=p, body="Rappeler mardi").count(), 1)
+
+    def test_changer_statut_refus_sans_commentaire(self):
+        p = self.prospections[0]
+        Prospection.objects.filter(pk=p.pk).update(commentaire="")
+        response = self.client.post(
+            reverse("prospection-changer-statut", args=[p.pk]),
+            {"statut": ProspectionChoices.STATUT_REFUSEE},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        p.refresh_from_db()
+        self.assertEqual(p.statut, ProspectionChoices.STATUT_EN_COURS)
+        self.assertFalse(HistoriqueProspection.objects.exists())
+
+    def test_changer_statut_lot(self):
+        ids = [p.pk for p in self.prospections[:2]]
+        response = self.client.post(
+            reverse("prospection-changer-statut-lot"),
+            {"ids": ids + [999999], "statut": ProspectionChoices.STATUT_ACCEPTEE, "commentaire": "Signé"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(response.json()["data"], {"updated": ids, "not_found": [999999]})
+
+        self.assertEqual(
+            set(Prospection.objects.filter(statut=ProspectionChoices.STATUT_ACCEPTEE).values_list("pk", flat=True)),
+            set(ids),
+        )
+        self.assertEqual(HistoriqueProspection.objects.filter(prospection_id__in=ids).count(), 2)
+        self.assertEqual(ProspectionComment.objects.filter(body="Signé").count(), 2)
+        self.assertEqual(Prospection.objects.get(pk=self.prospections[2].pk).statut, ProspectionChoices.STATUT_EN_COURS)
@@ -0,0 +1,59 @@
+import gzip
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ...api import schema_cache
+
+SCHEMA = {"openapi": "3.0.3", "info": {"title": "Rap_app", "version": "1.0.0"}, "paths": {}}
+
+
+class CachedSchemaViewTestCase(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        overrides = override_settings(SCHEMA_CACHE_DIR=self.cache_dir, SCHEMA_CODE_VERSION="v1")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self._reset()
+        self.addCleanup(self._reset)
+        patcher = mock.patch.object(schema_cache, "generate_schema", return_value=SCHEMA)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _reset():
+        schema_cache._artifacts.clear()
+        schema_cache._code_version = None
+
+    def test_generated_once_then_revalidated(self):
+        url = reverse("schema")
+        first = self.client.get(url, {"format": "json"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["info"]["title"], "Rap_app")
+        self.assertEqual(first["ETag"], '"v1-json"')
+
+        self.client.get(url)  # YAML par défaut, même génération
+        self.assertEqual(self.generate.call_count, 1)
+
+        cached = self.client.get(url, {"format": "json"}, HTTP_IF_NONE_MATCH='"v1-json"')
+        self.assertEqual(cached.status_code, 304)
+
+        zipped = self.client.get(url, {"format": "json"}, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(zipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(zipped.content), first.content)
+
+    def test_artifacts_shared_and_versioned(self):
+        schema_cache.get_artifact("yaml")
+        self._reset()  # autre worker : relit les fichiers, sans régénérer
+        schema_cache.get_artifact("yaml")
+        self.assertEqual(self.generate.call_count, 1)
+
+        with override_settings(SCHEMA_CODE_VERSION="v2"):
+            self._reset()
+            self.assertEqual(schema_cache.get_artifact("json").etag, '"v2-json"')
+            self.assertEqual(self.generate.call_count, 2)
+            self.assertEqual(schema_cache.prune_artifacts(), 4)
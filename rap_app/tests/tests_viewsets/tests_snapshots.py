@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ...models.atelier_tre import AtelierTRE
+from ...models.candidat import Candidat
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.documents import Document
+from ...models.formations import Formation
+from ...models.logs import LogUtilisateur
+from ...models.statut import Statut
+from ...models.types_offre import TypeOffre
+from ...services.snapshots import chemin_centre
+from ...utils.pg_copy import copy_value
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier, ignore_errors=True)
+
+        self.user = CustomUser.objects.create_user(
+            email="admin.snapshot@example.com",
+            username="admin_snapshot",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        type_offre = TypeOffre.objects.create(nom="crif", created_by=self.user)
+        statut = Statut.objects.create(nom="non_defini", couleur="#000000", created_by=self.user)
+        self.centres = [Centre.objects.create(nom=f"Centre Snapshot {i}", created_by=self.user) for i in range(2)]
+        self.formations = [
+            Formation.objects.create(
+                nom=f"Formation Snapshot {i}\tavec\\tabulation", centre=centre,
+                type_offre=type_offre, statut=statut, created_by=self.user,
+            )
+            for i, centre in enumerate(self.centres)
+        ]
+
+    def _lignes(self, fichier):
+        with gzip.open(os.path.join(self.dossier, fichier), "rt", encoding="utf-8") as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_chemin_centre(self):
+        self.assertEqual(chemin_centre(Centre), "pk")
+        self.assertEqual(chemin_centre(Formation), "centre_id")
+        self.assertEqual(chemin_centre(Document), "formation__centre_id")
+
+    def test_copy_value(self):
+        self.assertEqual(copy_value(None), "\\N")
+        self.assertEqual(copy_value(True), "t")
+        self.assertEqual(copy_value("a\tb\\c\n"), "a\\tb\\\\c\\n")
+        self.assertEqual(copy_value({"k": 1}), '{"k": 1}')
+
+    def test_export_centre_puis_rechargement(self):
+        centre = self.centres[0]
+        call_command("export_snapshot", self.dossier, "--centre", str(centre.pk), "--workers", "1", stdout=StringIO())
+
+        with open(os.path.join(self.dossier, "manifest.json"), encoding="utf-8") as fh:
+            manifeste = json.load(fh)
+        self.assertEqual(manifeste["perimetre"]["centres"], [centre.pk])
+        fichiers = {e["modele"]: e["fichier"] for e in manifeste["modeles"]}
+        self.assertNotIn("rap_app.LogUtilisateur", fichiers)  # sans lien avec un centre
+
+        formations = self._lignes(fichiers["rap_app.Formation"])
+        self.assertEqual([f["id"] for f in formations], [self.formations[0].pk])
+        self.assertEqual([c["id"] for c in self._lignes(fichiers["rap_app.Centre"])], [centre.pk])
+        users = self._lignes(fichiers["rap_app.CustomUser"])  # référentiel : exporté en entier
+        self.assertEqual([u["password"] for u in users], ["!"])
+
+        origine = Formation.objects.filter(pk=self.formations[0].pk).values("id", "nom", "created_at", "centre_id")[0]
+        Formation.objects.filter(pk=origine["id"]).delete()
+        call_command("charger_snapshot", self.dossier, "--modeles", "rap_app.formation", stdout=StringIO())
+
+        recharge = Formation.objects.filter(pk=origine["id"]).values("id", "nom", "created_at", "centre_id")[0]
+        self.assertEqual(recharge, origine)
+
+    def _manifeste(self):
+        with open(os.path.join(self.dossier, "manifest.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def test_export_partiel_inclut_les_parents(self):
+        # Candidat du centre 1 inscrit à un atelier du centre 0
+        candidat = Candidat.objects.create(nom="Parent", prenom="Hors", formation=self.formations[1])
+        atelier = AtelierTRE.objects.create(type_atelier="atelier_1", centre=self.centres[0])
+        atelier.candidats.add(candidat)
+        call_command("export_snapshot", self.dossier, "--centre", str(self.centres[0].pk), "--workers", "1", stdout=StringIO())
+
+        entrees = {e["modele"]: e for e in self._manifeste()["modeles"]}
+        ids = lambda label: [r["id"] for r in self._lignes(entrees[label]["fichier"])]  # noqa: E731
+        self.assertEqual(ids("rap_app.Candidat"), [candidat.pk])
+        # Fermeture transitive : atelier → candidat → formation → centre
+        self.assertEqual(ids("rap_app.Formation"), [f.pk for f in self.formations])
+        self.assertEqual(ids("rap_app.Centre"), [c.pk for c in self.centres])
+        self.assertEqual(entrees["rap_app.Centre"]["ajouts"], 1)
+
+    def test_rechargement_complet_et_types_de_contenu(self):
+        candidat = Candidat.objects.create(nom="Reload", prenom="Test", formation=self.formations[0])
+        atelier = AtelierTRE.objects.create(type_atelier="atelier_2", centre=self.centres[1])
+        atelier.candidats.add(candidat)
+        type_archive = ContentType.objects.create(app_label="rap_app", model="archive_snapshot")
+        LogUtilisateur.objects.create(content_type=type_archive, object_id=7, action=LogUtilisateur.ACTION_EXPORT)
+
+        modeles = [Centre, Formation, Candidat, AtelierTRE, AtelierTRE.candidats.through, LogUtilisateur]
+        call_command("export_snapshot", self.dossier, "--workers", "1", stdout=StringIO())
+        fichiers = {e["modele"]: e["fichier"] for e in self._manifeste()["modeles"]}
+        logs = self._lignes(fichiers["rap_app.LogUtilisateur"])
+        self.assertIn(["rap_app", "archive_snapshot"], [log["content_type_id"] for log in logs])
+
+        origine = {m: list(m._base_manager.order_by("pk").values()) for m in modeles}
+        with connection.cursor() as cursor:  # sans signaux ni cascades : contraintes vérifiées au commit
+            for model in reversed(modeles):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        ContentType.objects.filter(pk=type_archive.pk).delete()
+        ContentType.objects.clear_cache()
+
+        call_command(
+            "charger_snapshot", self.dossier, "--modeles", *[m._meta.label for m in modeles], stdout=StringIO()
+        )
+
+        recree = ContentType.objects.get(app_label="rap_app", model="archive_snapshot")
+        self.assertNotEqual(recree.pk, type_archive.pk)
+        for model in modeles:
+            with self.subTest(modele=model._meta.label):
+                recharge = list(model._base_manager.order_by("pk").values())
+                if model is LogUtilisateur:
+                    for row in origine[model]:
+                        if row["content_type_id"] == type_archive.pk:
+                            row["content_type_id"] = recree.pk
+                self.assertEqual(recharge, origine[model])
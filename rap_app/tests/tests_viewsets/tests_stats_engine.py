@@ -0,0 +1,190 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...api.stats_engine import Dimension, Metric, StatsQuery
+from ...models.appairage import Appairage, AppairageStatut
+from ...models.atelier_tre import AtelierTRE, AtelierTREPresence, PresenceStatut
+from ...models.candidat import Candidat
+from ...models.centres import Centre
+from ...models.commentaires import Commentaire
+from ...models.custom_user import CustomUser
+from ...models.formations import Formation
+from ...models.partenaires import Partenaire
+from ...models.prospection import Prospection, ProspectionChoices
+
+
+class StatsEngineTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email="admin.statsengine@example.com",
+            username="admin_statsengine",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.centre = Centre.objects.create(nom="Centre Stats", code_postal="92100")
+        self.p1 = Partenaire.objects.create(nom="Alpha", type="entreprise", created_by=self.admin)
+        self.p2 = Partenaire.objects.create(nom="Beta", type="entreprise", created_by=self.admin)
+        today = timezone.localdate()
+        rows = [
+            (self.p1, ProspectionChoices.STATUT_ACCEPTEE, self.centre),
+            (self.p1, ProspectionChoices.STATUT_EN_COURS, self.centre),
+            (self.p1, ProspectionChoices.STATUT_REFUSEE, None),
+            (self.p2, ProspectionChoices.STATUT_EN_COURS, None),
+        ]
+        for partenaire, statut, centre in rows:
+            p = Prospection.objects.create(
+                partenaire=partenaire,
+                motif=ProspectionChoices.MOTIF_PARTENARIAT,
+                relance_prevue=today - timedelta(days=1),
+                created_by=self.admin,
+            )
+            Prospection.objects.filter(pk=p.pk).update(statut=statut, centre=centre)
+
+    def test_engine_single_query(self):
+        engine = StatsQuery(
+            metrics={
+                "total": Metric(),
+                "partenaires": Metric("partenaire", distinct=True),
+                "acceptees": Metric(filter=Q(statut=ProspectionChoices.STATUT_ACCEPTEE)),
+            },
+            dimensions={
+                "partenaire": Dimension("partenaire_id", columns=("partenaire__nom",), label="partenaire__nom"),
+                "centre": Dimension("centre_id", label="centre__nom", columns=("centre__nom",), fallback="Centre #{}"),
+            },
+        )
+        with self.assertNumQueries(1):
+            result = engine.run(Prospection.objects.all(), ["partenaire", "centre"])
+
+        self.assertEqual(result.totals, {"total": 4, "partenaires": 2, "acceptees": 1})
+        self.assertEqual(
+            [(r["group_label"], r["total"]) for r in result.top("partenaire", "total")],
+            [("Alpha", 3), ("Beta", 1)],
+        )
+        centres = {r["group_key"]: r for r in result.groups["centre"]}
+        self.assertEqual(centres[self.centre.pk]["acceptees"], 1)
+        self.assertEqual(centres[None]["group_label"], "—")
+
+        empty = engine.run(Prospection.objects.none(), ["centre"])
+        self.assertEqual(empty.totals["total"], 0)
+        self.assertEqual(empty.groups["centre"], [])
+
+    def test_prospection_overview_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("prospection-stats-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["kpis"]["total"], 4)
+        self.assertEqual(data["kpis"]["a_relancer"], 3)
+        self.assertEqual(data["kpis"]["taux_acceptation"], 25.0)
+        par_statut = {r["code"]: r["count"] for r in data["repartition"]["par_statut"]}
+        self.assertEqual(par_statut[ProspectionChoices.STATUT_EN_COURS], 2)
+
+        grouped = self.client.get(reverse("prospection-stats-grouped"), {"by": "partenaire"}).json()
+        self.assertEqual([r["group_label"] for r in grouped["results"]], ["Alpha", "Beta"])
+
+    def test_avg_min_max(self):
+        engine = StatsQuery(
+            metrics={
+                "moyenne": Metric("centre", agg="avg"),
+                "mini": Metric("centre", agg="min"),
+                "maxi": Metric("centre", agg="max"),
+            },
+            dimensions={"partenaire": Dimension("partenaire_id")},
+        )
+        result = engine.run(Prospection.objects.all(), ["partenaire"])
+        self.assertEqual(result.totals["moyenne"], float(self.centre.pk))
+        self.assertEqual(result.totals["mini"], self.centre.pk)
+        beta = next(r for r in result.groups["partenaire"] if r["group_key"] == self.p2.pk)
+        self.assertIsNone(beta["moyenne"])  # aucun centre : pas de valeur (≠ 0)
+        self.assertIsNone(engine.run(Prospection.objects.none()).totals["maxi"])
+
+    @skipUnless(connection.vendor == "postgresql", "GROUPING SETS : PostgreSQL uniquement")
+    def test_grouping_sets_sql(self):
+        engine = StatsQuery(
+            metrics={"total": Metric()},
+            dimensions={"partenaire": Dimension("partenaire_id"), "statut": Dimension("statut")},
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            result = engine.run(Prospection.objects.all(), ["partenaire", "statut"])
+        self.assertEqual(len(ctx), 1)
+        self.assertIn("GROUPING SETS", ctx[0]["sql"])
+        self.assertEqual(result.totals["total"], 4)
+        self.assertEqual(sum(r["total"] for r in result.groups["statut"]), 4)
+
+
+class StatsEngineFanOutTestCase(APITestCase):
+    """Jointures démultipliantes (candidats × appairages, candidats × présences)."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email="admin.fanout@example.com",
+            username="admin_fanout",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.centre = Centre.objects.create(nom="Centre Fan", code_postal="92100")
+        today = timezone.localdate()
+        self.formation = Formation.objects.create(
+            nom="Formation Fan", centre=self.centre,
+            start_date=today - timedelta(days=10), end_date=today + timedelta(days=10),
+            prevus_crif=10, prevus_mp=5, inscrits_crif=4, inscrits_mp=1,
+        )
+        partenaire = Partenaire.objects.create(nom="Fan SA", type="entreprise", created_by=self.admin)
+        self.candidats = [
+            Candidat.objects.create(nom=f"Cand{i}", prenom="Test", formation=self.formation) for i in range(3)
+        ]
+        for candidat in self.candidats[:2]:
+            Appairage.objects.create(
+                candidat=candidat, partenaire=partenaire, formation=self.formation, statut=AppairageStatut.TRANSMIS,
+            )
+        atelier = AtelierTRE.objects.create(type_atelier="atelier_1", centre=self.centre)
+        atelier.candidats.set(self.candidats)
+        for candidat, statut in zip(self.candidats, (PresenceStatut.PRESENT, PresenceStatut.PRESENT, PresenceStatut.ABSENT)):
+            AtelierTREPresence.objects.create(atelier=atelier, candidat=candidat, statut=statut)
+        Commentaire.objects.create(formation=self.formation, contenu="Saturé", saturation=80, created_by=self.admin)
+
+    def test_formation_sums_counted_once_per_formation(self):
+        with self.assertNumQueries(1):
+            overview = self.client.get(reverse("formation-stats-list")).json()["kpis"]
+        self.assertEqual(overview["total_places"], 15)
+        self.assertEqual(overview["candidats"]["nb_candidats"], 3)
+        self.assertEqual(overview["appairages"]["total"], 2)
+
+        grouped = self.client.get(reverse("formation-stats-grouped"), {"by": "centre"}).json()["results"]
+        self.assertEqual(len(grouped), 1)
+        # 3 candidats × 2 appairages par formation : sans dédoublonnage, 90 places
+        self.assertEqual(grouped[0]["total_places"], 15)
+        self.assertEqual(grouped[0]["total_inscrits"], 5)
+        self.assertEqual(grouped[0]["group_label"], "Centre Fan")
+
+    def test_atelier_presences_not_multiplied_by_candidats(self):
+        with self.assertNumQueries(1):
+            kpis = self.client.get(reverse("ateliertre-stats-list")).json()["kpis"]
+        self.assertEqual(kpis["presences"], {"inconnu": 0, "present": 2, "absent": 1, "excuse": 0})
+
+        row = self.client.get(reverse("ateliertre-stats-grouped"), {"by": "centre"}).json()["results"][0]
+        self.assertEqual((row["present"], row["absent"], row["presences_total"]), (2, 1, 3))
+        self.assertEqual(row["taux_presence"], 66.7)
+
+    def test_overviews_single_query(self):
+        for name in ("partenaire-stats-list", "commentaire-stats-list", "candidat-stats-list"):
+            with self.subTest(name=name), self.assertNumQueries(1):
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        commentaires = self.client.get(reverse("commentaire-stats-list")).json()["kpis"]
+        self.assertEqual((commentaires["avg_saturation"], commentaires["max_saturation"]), (80.0, 80))
+        partenaires = self.client.get(reverse("partenaire-stats-list")).json()["kpis"]
+        self.assertEqual(partenaires["appairages"]["transmis"], 2)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ...models.centres import Centre
+from ...models.custom_user import CustomUser
+from ...models.jury import SuiviJury
+from ...models.vae import VAE, HistoriqueStatutVAE
+
+
+class VAEStatsViewSetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email="admin.vaestats@example.com",
+            username="admin_vaestats",
+            password="StrongPass123",
+            role=CustomUser.ROLE_ADMIN,
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.centre = Centre.objects.create(nom="Centre VAE", code_postal="75010")
+        today = timezone.localdate()
+
+        self.vaes = [VAE.objects.create(centre=self.centre, statut=s, created_by=self.admin)
+                     for s in ("dossier", "jury", "terminee")]
+        VAE.objects.update(created_at=timezone.now() - timedelta(days=60))
+        HistoriqueStatutVAE.objects.all().delete()  # historique de création (signal)
+
+        # info : 10 j pour les trois ; dossier : 40 j (en cours), 10 j puis 20 j
+        rows = []
+        for i, vae in enumerate(self.vaes):
+            rows.append(HistoriqueStatutVAE(vae=vae, statut="info", date_changement_effectif=today - timedelta(days=50)))
+            rows.append(HistoriqueStatutVAE(vae=vae, statut="dossier",
+                                            date_changement_effectif=today - timedelta(days=40)))
+            if i > 0:
+                rows.append(HistoriqueStatutVAE(vae=vae, statut=vae.statut,
+                                                date_changement_effectif=today - timedelta(days=40 - 10 * i)))
+        HistoriqueStatutVAE.objects.bulk_create(rows)
+
+        SuiviJury.objects.create(centre=self.centre, annee=today.year, mois=1, objectif_jury=4, jurys_realises=3)
+        SuiviJury.objects.create(centre=self.centre, annee=today.year, mois=2, objectif_jury=4, jurys_realises=5)
+
+    def test_overview(self):
+        url = reverse("vae-stats-list")
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+
+        funnel = data["entonnoir"]
+        self.assertEqual(funnel["total"], 3)
+        self.assertEqual(funnel["en_cours"], 2)
+        self.assertEqual(funnel["terminees"], 1)
+
+        durees = {d["statut"]: d for d in data["durees_statut"]}
+        self.assertEqual(durees["info"]["intervalles"], 3)
+        self.assertEqual(durees["info"]["mediane_jours"], 10)
+        self.assertEqual(durees["dossier"]["mediane_jours"], 20)
+        self.assertEqual(durees["dossier"]["p90_jours"], 40)
+        self.assertEqual(durees["dossier"]["en_cours"], 1)
+
+        jurys = data["jurys"]
+        self.assertEqual((jurys["objectif"], jurys["realises"]), (8, 8))
+        self.assertEqual(jurys["mois"][0]["pourcentage"], 75.0)
+        self.assertEqual(jurys["mois"][1]["cumul_pourcentage"], 100.0)
+
+        # Deuxième appel servi par le cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+    def test_centre_hors_perimetre(self):
+        autre = Centre.objects.create(nom="Autre", code_postal="13001")
+        response = self.client.get(reverse("vae-stats-list"), {"centre": autre.pk})
+        self.assertEqual(response.json()["entonnoir"]["total"], 0)
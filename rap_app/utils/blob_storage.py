@@ -0,0 +1,139 @@
+# rap_app/utils/blob_storage.py
+
+"""
+🧱 Stockage adressé par contenu des documents et CV.
+
+- Téléversement : `HashingMemoryFileUploadHandler` / `HashingTemporaryFileUploadHandler`
+  (FILE_UPLOAD_HANDLERS) calculent l'empreinte SHA-256 et détectent le type
+  MIME (premiers octets, libmagic) pendant la réception des blocs : le
+  fichier n'est jamais relu pour `Document.clean()` ni pour l'empreinte.
+- `BlobStorage` : un fichier = `blobs/<sha[:2]>/<sha><ext>`, quel que soit
+  le `upload_to` du champ. Un contenu déjà présent n'est pas réécrit
+  (déduplication immédiate) ; écriture atomique sinon.
+- Références : table `Blob` (compteur maintenu par signaux, cf.
+  `models/blobs.py`) ; les blobs orphelins sont effacés par
+  `manage.py collecter_blobs` après un délai de grâce.
+"""
+
+import hashlib
+import os
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+from .file_delivery import CHUNK_SIZE
+
+BLOB_PREFIX = "blobs/"
+
+# Octets lus en tête de fichier pour la détection MIME
+SNIFF_BYTES = 2048
+
+
+def est_blob(name: str) -> bool:
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def chemin_blob(sha256: str, extension: str) -> str:
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256}{extension.lower()}"
+
+
+def sniff_mime(head: bytes) -> str:
+    """Type MIME d'après les premiers octets ("" si libmagic est indisponible)."""
+    if not head:
+        return ""
+    try:
+        import magic
+
+        return magic.from_buffer(head, mime=True) or ""
+    except Exception:
+        return ""
+
+
+# ────────────────────────────────────────────────────────────
+# 📥 Téléversement : empreinte + taille + MIME en une passe
+# ────────────────────────────────────────────────────────────
+class _HashingMixin:
+    """
+    Pose `sha256` et `mime_sniffed` sur le fichier produit par le handler
+    (la taille est déjà connue : `UploadedFile.size`).
+    """
+
+    def new_file(self, *args, **kwargs):
+        self._digest = hashlib.sha256()
+        self._head = b""
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self._digest.update(raw_data)
+        if len(self._head) < SNIFF_BYTES:
+            self._head += raw_data[: SNIFF_BYTES - len(self._head)]
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self._digest.hexdigest()
+            uploaded.mime_sniffed = sniff_mime(self._head)
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def empreinte_contenu(content, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 de `content` : reprise de l'empreinte calculée au téléversement, sinon lecture par blocs."""
+    sha256 = getattr(content, "sha256", None)
+    if sha256:
+        return sha256
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks(chunk_size):
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    content.sha256 = digest.hexdigest()
+    return content.sha256
+
+
+# ────────────────────────────────────────────────────────────
+# 🧱 Stockage
+# ────────────────────────────────────────────────────────────
+class BlobStorage(FileSystemStorage):
+    """
+    Même emplacement que le stockage par défaut (MEDIA_ROOT) : les chemins
+    `blobs/…` restent lisibles par `default_storage`, nginx (X-Accel) et les
+    services d'aperçu / d'extraction.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            from django.core.files import File
+
+            content = File(content, name)
+        blob = chemin_blob(empreinte_contenu(content), os.path.splitext(name)[1])
+        if self.exists(blob):
+            # Déjà stocké : rien à écrire. Le mtime rafraîchi protège le blob
+            # d'une collecte concurrente (délai de grâce, cf. collecter_blobs).
+            now = time.time()
+            os.utime(self.path(blob), (now, now))
+            return blob
+        tmp = super()._save(f"{os.path.dirname(blob)}/.{os.getpid()}.{os.path.basename(blob)}.tmp", content)
+        os.replace(self.path(tmp), self.path(blob))  # écriture concurrente du même contenu : idempotent
+        return blob
+
+
+blob_storage = BlobStorage()
+
+
+def get_blob_storage():
+    """Stockage des champs `fichier` de Document / CVTheque (callable : migrations stables)."""
+    return blob_storage
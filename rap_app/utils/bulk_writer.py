@@ -0,0 +1,146 @@
+# rap_app/utils/bulk_writer.py
+
+"""
+📚 Écriture en masse de lignes d'historique / de journal.
+
+`BulkWriter` accumule des instances non sauvegardées et les écrit par lots :
+`COPY FROM STDIN` sous PostgreSQL (utils/pg_copy.py) dès que le lot est
+assez gros, `bulk_create` sinon (petits lots, autres moteurs).
+
+Comme `bulk_create` : ni `save()` ni signaux (les caches versionnés du
+modèle sont invalidés à chaque lot). Un modèle dont `save()` filtre ou
+corrige les lignes (anti-doublon…) en fournit l'équivalent groupé via la
+méthode de classe `preparer_lot(objs)`, appelée avant chaque lot. Les valeurs par défaut et
+`auto_now(_add)` sont appliquées ; après un COPY, les instances n'ont pas
+de `pk` (les lignes existent en base, mais ne sont pas relues).
+
+    with BulkWriter(HistoriqueFormation) as writer:
+        for formation in formations:
+            writer.add(HistoriqueFormation(formation=formation, ...))
+
+Pour du code appelé ligne à ligne (méthodes `archiver()`, `save()`…),
+`enregistrer(obj)` écrit tout de suite, sauf dans un bloc
+`ecritures_groupees()` (actions de masse, imports) où la ligne rejoint le
+lot de son modèle, écrit à la sortie du bloc.
+"""
+
+import contextvars
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, router
+
+from .cache_utils import invalidate_model_caches
+from .pg_copy import copy_rows
+
+
+class BulkWriter:
+    def __init__(self, model, batch_size=None, using=None):
+        self.model = model
+        self.batch_size = batch_size or getattr(settings, "BULK_WRITE_BATCH_SIZE", 5000)
+        self.copy_min_rows = getattr(settings, "BULK_COPY_MIN_ROWS", 200)
+        self.using = using or router.db_for_write(model)
+        self.written = 0
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._pending = []  # la transaction englobante est annulée de toute façon
+
+    def add(self, obj):
+        self._pending.append(obj)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, objs):
+        for obj in objs:
+            self.add(obj)
+
+    def flush(self) -> int:
+        """Écrit le lot en attente ; retourne le nombre de lignes écrites."""
+        objs, self._pending = self._pending, []
+        preparer = getattr(self.model, "preparer_lot", None)
+        if objs and preparer is not None:
+            objs = preparer(objs)
+        if not objs:
+            return 0
+        connection = connections[self.using]
+        if connection.vendor == "postgresql" and len(objs) >= self.copy_min_rows:
+            n = self._copy(connection, objs)
+        else:
+            n = len(self.model._base_manager.using(self.using).bulk_create(objs))
+        self.written += n
+        invalidate_model_caches(self.model, using=self.using)
+        return n
+
+    def _copy(self, connection, objs) -> int:
+        fields = [f for f in self.model._meta.concrete_fields if not (f.primary_key and f.auto_created)]
+        json_fields = {f.attname for f in fields if f.get_internal_type() == "JSONField"}
+
+        def valeur(field, obj):
+            value = field.pre_save(obj, add=True)  # auto_now(_add), valeurs par défaut déjà posées
+            if field.attname in json_fields:
+                return None if value is None else json.dumps(value, cls=field.encoder, ensure_ascii=False)
+            return field.get_db_prep_save(value, connection)
+
+        rows = ([valeur(f, obj) for f in fields] for obj in objs)
+        return copy_rows(connection, self.model._meta.db_table, [f.column for f in fields], rows)
+
+
+# ───────────────────────────────────────────────
+# LOTS DIFFÉRÉS (actions de masse)
+# ───────────────────────────────────────────────
+
+_groupe = contextvars.ContextVar("rap_app_ecritures_groupees", default=None)
+
+
+@contextmanager
+def ecritures_groupees():
+    """
+    Dans le bloc, `enregistrer()` met les lignes en attente (un `BulkWriter`
+    par modèle) ; elles sont écrites à la sortie. À ouvrir dans une
+    transaction. Les blocs imbriqués sont fusionnés dans le bloc englobant.
+    """
+    writers = _groupe.get()
+    if writers is not None:
+        yield writers
+        return
+
+    writers = {}
+    token = _groupe.set(writers)
+    try:
+        yield writers
+        for writer in writers.values():
+            writer.flush()
+    finally:
+        _groupe.reset(token)
+
+
+def enregistrer(obj):
+    """
+    Crée `obj` (`save()`), ou le met en attente dans un bloc
+    `ecritures_groupees()` : `created_by` / `updated_by` et `clean()` y sont
+    appliqués comme dans `BaseModel.save()`, le reste du `save()` du modèle
+    par son `preparer_lot()` éventuel.
+    """
+    writers = _groupe.get()
+    if writers is None:
+        obj.save(force_insert=True)
+        return obj
+    obj.clean()
+    user = obj.get_current_user() if hasattr(obj, "get_current_user") else None
+    if user:
+        if obj.created_by_id is None:
+            obj.created_by = user
+        obj.updated_by = user
+    model = type(obj)
+    if model not in writers:
+        writers[model] = BulkWriter(model)
+    writers[model].add(obj)
+    return obj
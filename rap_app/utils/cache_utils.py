@@ -0,0 +1,121 @@
+# rap_app/utils/cache_utils.py
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "rap_app:version:{}"
+DEFAULT_OPTIONS_TIMEOUT = 600
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🔢 Versions de cache partagées (invalidation par « namespace »)
+# ─────────────────────────────────────────────────────────────────────────────
+def get_cache_versions(*namespaces) -> tuple:
+    """
+    Retourne la version courante de chaque namespace (un seul aller-retour cache).
+    Un namespace jamais invalidé vaut 0.
+    """
+    keys = [VERSION_KEY.format(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    return tuple(found.get(k, 0) for k in keys)
+
+
+def bump_cache_version(*namespaces):
+    """
+    Invalide toutes les entrées dépendant de ces namespaces.
+
+    La version est un horodatage (ns) plutôt qu'un compteur : pas besoin
+    d'incrément atomique et une clé évincée ne peut pas « revenir en arrière ».
+    """
+    version = time.time_ns()
+    cache.set_many({VERSION_KEY.format(ns): version for ns in namespaces}, timeout=None)
+    return version
+
+
+def bump_cache_version_on_commit(*namespaces, using=None):
+    """
+    `bump_cache_version()` tout de suite, puis à nouveau au commit de la
+    transaction en cours (s'il y en a une).
+
+    Entre les deux, un autre worker peut reconstruire une entrée à partir des
+    données encore non validées (il lit l'ancien état) : le second
+    incrément l'écarte. Retourne la version posée immédiatement.
+    """
+    version = bump_cache_version(*namespaces)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_cache_version(*namespaces), using=using)
+    return version
+
+
+def invalidate_model_caches(model, pks=(), using=None):
+    """
+    Équivalent groupé de `BaseModel.invalidate_caches()` pour les écritures
+    qui ne passent pas par `save()` (`.update()`, `bulk_create`, actions admin…).
+    """
+    from . import refdata
+
+    name = model.__name__
+    cache.delete_many([f"{name}_{pk}" for pk in pks] + [f"{name}_list"])
+    bump_cache_version_on_commit(name, using=using)
+    refdata.forget_on_commit(name, using=using)
+
+
+def user_cache_namespace(user_id) -> str:
+    """Namespace de version propre à un utilisateur (profil, rôle, centres)."""
+    return f"CustomUser:{user_id}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 👤 Périmètre utilisateur
+# ─────────────────────────────────────────────────────────────────────────────
+def user_scope_key(user, per_user: bool = False) -> str:
+    """
+    Clé de périmètre partagée entre utilisateurs qui voient les mêmes données :
+      - admin/superadmin        → "global"
+      - staff / staff_read      → "staff:<ids centres triés>"
+      - autres (ou per_user)    → "user:<id>"
+    """
+    from ..api.roles import is_admin_like, is_staff_or_staffread, staff_centre_ids
+
+    if not user or not getattr(user, "is_authenticated", False):
+        return "anonymous"
+    if per_user:
+        return f"user:{user.pk}"
+    if is_admin_like(user):
+        return "global"
+    if is_staff_or_staffread(user):
+        ids = sorted(staff_centre_ids(user) or [])
+        return f"staff:{','.join(map(str, ids))}"
+    return f"user:{user.pk}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🗂️ Options / méta (listes déroulantes)
+# ─────────────────────────────────────────────────────────────────────────────
+def options_cache_timeout() -> int:
+    return int(getattr(settings, "OPTIONS_CACHE_TIMEOUT", DEFAULT_OPTIONS_TIMEOUT))
+
+
+def build_cache_key(name: str, depends_on, scope: str, params=None) -> str:
+    """
+    Construit une clé versionnée : toute invalidation d'un namespace de
+    `depends_on` change la clé (les anciennes entrées expirent seules).
+    """
+    versions = get_cache_versions(*depends_on)
+    raw = repr((name, tuple(depends_on), versions, scope, params or ()))
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"rap_app:opts:{name}:{digest}"
+
+
+def get_or_build(key: str, builder, timeout=None):
+    """Retourne (data, hit) en construisant et mettant en cache si absent."""
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    data = builder()
+    cache.set(key, data, timeout if timeout is not None else options_cache_timeout())
+    return data, False
@@ -0,0 +1,97 @@
+# rap_app/utils/db.py
+
+import os
+import threading
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 📊 Métriques de connexions (par worker / processus)
+# ─────────────────────────────────────────────────────────────────────────────
+_lock = threading.Lock()
+_metrics = {
+    "connections_opened": 0,
+    "connections_reused": 0,
+    "requests": 0,
+}
+
+
+@receiver(connection_created, dispatch_uid="rap_app_db_metrics_connection_created")
+def _on_connection_created(sender, connection, **kwargs):
+    """Compte chaque nouvelle connexion physique ouverte vers la base."""
+    with _lock:
+        _metrics["connections_opened"] += 1
+
+
+@receiver(request_started, dispatch_uid="rap_app_db_metrics_request_started")
+def _on_request_started(sender, **kwargs):
+    """
+    Une connexion encore ouverte au début d'une requête est une connexion réutilisée
+    (CONN_MAX_AGE > 0). Django ferme les connexions expirées juste avant ce signal.
+    """
+    reused = connections["default"].connection is not None
+    with _lock:
+        _metrics["requests"] += 1
+        if reused:
+            _metrics["connections_reused"] += 1
+
+
+def get_connection_metrics() -> dict:
+    """
+    Retourne un instantané des compteurs du worker courant :
+      - connections_opened : connexions physiques ouvertes depuis le démarrage
+      - connections_reused : requêtes ayant réutilisé une connexion persistante
+      - requests           : requêtes HTTP traitées
+      - reuse_ratio        : part des requêtes servies sans nouveau handshake
+    """
+    with _lock:
+        data = dict(_metrics)
+    db = connections["default"].settings_dict
+    data["pid"] = os.getpid()
+    data["reuse_ratio"] = round(data["connections_reused"] / data["requests"], 3) if data["requests"] else None
+    data["conn_max_age"] = db.get("CONN_MAX_AGE")
+    data["conn_health_checks"] = db.get("CONN_HEALTH_CHECKS")
+    data["server_side_cursors"] = not db.get("DISABLE_SERVER_SIDE_CURSORS", False)
+    return data
+
+
+def reset_connection_metrics():
+    """Remet les compteurs à zéro (benchmarks)."""
+    with _lock:
+        for key in _metrics:
+            _metrics[key] = 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🚿 Itération mémoire-constante pour les exports
+# ─────────────────────────────────────────────────────────────────────────────
+def server_side_cursors_enabled(using: str = "default") -> bool:
+    return not connections[using].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS", False)
+
+
+def stream_queryset(qs, chunk_size: int = 500):
+    """
+    Parcourt un queryset par lots sans le charger entièrement en mémoire.
+
+    - Curseurs serveur disponibles (connexion directe) → `iterator(chunk_size)`.
+    - pgbouncer en mode transaction (DISABLE_SERVER_SIDE_CURSORS) : on lit d'abord
+      la liste ordonnée des PK (légère), puis on charge les objets lot par lot
+      en conservant l'ordre et les `select_related` du queryset d'origine.
+    """
+    if server_side_cursors_enabled(qs.db):
+        yield from qs.iterator(chunk_size=chunk_size)
+        return
+
+    pks = list(qs.values_list("pk", flat=True))
+    base = qs.order_by()
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        by_pk = {obj.pk: obj for obj in base.filter(pk__in=chunk)}
+        for pk in chunk:
+            obj = by_pk.get(pk)
+            if obj is not None:
+                yield obj
@@ -0,0 +1,206 @@
+# rap_app/utils/file_delivery.py
+
+"""
+📤 Livraison des fichiers protégés (documents, CV).
+
+Django contrôle l'accès puis, selon `FILE_DELIVERY_BACKEND` :
+  - "x-accel"    → réponse vide + `X-Accel-Redirect` (nginx sert le fichier
+                   depuis une location `internal`) ;
+  - "x-sendfile" → réponse vide + `X-Sendfile` (Apache mod_xsendfile, lighttpd) ;
+  - ""           → repli Python : streaming par blocs avec support `Range`
+                   (une seule plage), `ETag` / `If-None-Match` et `If-Range`.
+
+L'ETag est dérivé de l'empreinte SHA-256 stockée en base : aucun accès disque
+pour répondre 304 ou valider un `If-Range` (reprise de téléchargement).
+Documents et CV restent `no-store` (données personnelles : rien dans les
+caches navigateur ou partagés) ; seules les miniatures versionnées sont
+mises en cache.
+
+En ASGI, le repli Python diffuse via un itérateur asynchrone (lectures dans un
+thread de l'exécuteur) : la boucle d'événements n'est pas bloquée et aucun
+thread n'est occupé entre deux blocs pendant un téléchargement lent.
+"""
+
+import hashlib
+import mimetypes
+import re
+import urllib.parse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+
+CHUNK_SIZE = 64 * 1024
+
+# Fichiers protégés (documents, CV) : jamais conservés par un cache
+PROTECTED_CACHE_CONTROL = "no-cache, no-store, must-revalidate"
+
+# Ressources adressées par contenu (URL versionnée par l'empreinte) : immuables
+THUMBNAIL_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def compute_sha256(fieldfile, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Empreinte SHA-256 d'un fichier (lecture par blocs, mémoire constante).
+    Fichier téléversé : empreinte reprise du handler d'upload si elle existe,
+    et mémorisée sur le fichier pour le stockage (cf. utils/blob_storage.py).
+    """
+    upload = None if fieldfile._committed else fieldfile.file
+    if getattr(upload, "sha256", None):
+        return upload.sha256
+    digest = hashlib.sha256()
+    fieldfile.open("rb")
+    try:
+        for chunk in fieldfile.chunks(chunk_size):
+            digest.update(chunk)
+    finally:
+        if fieldfile._committed:
+            fieldfile.close()
+        else:
+            fieldfile.seek(0)  # fichier téléversé : il sera relu par le storage
+    if upload is not None:
+        upload.sha256 = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    return f"{disposition}; filename*=UTF-8''{urllib.parse.quote(filename)}"
+
+
+def _parse_range(header: str, size: int):
+    """
+    Retourne (début, fin) inclusifs, None si l'en-tête est absent / ignoré
+    (multi-plages, syntaxe invalide) ou "unsatisfiable" si hors du fichier.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:  # suffixe : les N derniers octets
+        length = int(end)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def _iter_range(storage, name: str, start: int, length: int, chunk_size: int = CHUNK_SIZE):
+    fh = storage.open(name, "rb")
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fh.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fh.close()
+
+
+async def _aiter_range(storage, name: str, start: int, length: int, chunk_size: int = CHUNK_SIZE):
+    """Variante ASGI de `_iter_range` : chaque accès disque passe par l'exécuteur."""
+    fh = await sync_to_async(storage.open, thread_sensitive=False)(name, "rb")
+    read = sync_to_async(fh.read, thread_sensitive=False)
+    try:
+        await sync_to_async(fh.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            data = await read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        await sync_to_async(fh.close, thread_sensitive=False)()
+
+
+def _is_asgi(request) -> bool:
+    """Requête servie par le handler ASGI (Request DRF ou HttpRequest)."""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+def _offload(storage, name: str, backend: str, content_type: str):
+    """Réponse vide : le serveur frontal lit le fichier et gère lui-même `Range`."""
+    response = HttpResponse(content_type=content_type)
+    if backend == "x-accel":
+        prefix = getattr(settings, "FILE_DELIVERY_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + urllib.parse.quote(name)
+    else:
+        response["X-Sendfile"] = storage.path(name)
+    return response
+
+
+def serve_file(request, fieldfile, *, filename: str, content_type: str = None,
+               disposition: str = "attachment", sha256: str = "",
+               cache_control: str = PROTECTED_CACHE_CONTROL):
+    """
+    Réponse HTTP pour `fieldfile` (FieldFile d'un FileField ou nom relatif
+    dans le stockage par défaut), après contrôle d'accès par l'appelant.
+    Lève FileNotFoundError si le fichier est absent du stockage (repli Python
+    uniquement).
+    """
+    if isinstance(fieldfile, str):
+        storage, name = default_storage, fieldfile
+    else:
+        storage, name = fieldfile.storage, fieldfile.name
+    etag = f'"{sha256}"' if sha256 else None
+    headers = {"Cache-Control": cache_control}
+    if "no-store" in cache_control:
+        headers["Pragma"] = "no-cache"  # clients HTTP/1.0
+    if etag:
+        headers["ETag"] = etag
+
+    if etag and etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponse(status=304)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+    backend = (getattr(settings, "FILE_DELIVERY_BACKEND", "") or "").lower()
+
+    if backend in ("x-accel", "x-sendfile"):
+        response = _offload(storage, name, backend, content_type)
+    else:
+        size = storage.size(name)
+        iter_range = _aiter_range if _is_asgi(request) else _iter_range
+        byte_range = _parse_range(request.META.get("HTTP_RANGE", ""), size)
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if byte_range and if_range and if_range != etag:
+            byte_range = None  # fichier modifié depuis : on renvoie tout
+
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                iter_range(storage, name, start, length), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(length)
+        else:
+            response = StreamingHttpResponse(
+                iter_range(storage, name, 0, size), content_type=content_type
+            )
+            response["Content-Length"] = str(size)
+        response["Accept-Ranges"] = "bytes"
+
+    response["Content-Disposition"] = _content_disposition(disposition, filename)
+    for key, value in headers.items():
+        response[key] = value
+    return response
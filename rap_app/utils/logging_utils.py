@@ -1,6 +1,165 @@
 # utils/logging_utils.py
+"""
+🪵 Journalisation non bloquante.
+
+- `QueueListenerHandler` : le thread appelant ne fait que formater le message
+  (`%`-style, paresseux) et l'empiler ; l'horodatage, le formatage final et
+  l'écriture disque / console se font dans un thread dédié (`QueueListener`).
+- `JsonFormatter` : une ligne JSON par enregistrement (logs/app.jsonl).
+- `RequestIdFilter` : ajoute `request_id` (posé par `RequestIdMiddleware`)
+  pour corréler les lignes d'une même requête.
+
+Configuration : `LOGGING` dans settings (LOG_ASYNC, LOG_ROTATION, LOG_MAX_BYTES, LOG_BACKUP_COUNT).
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
 from django.apps import apps
 
+_request_id = contextvars.ContextVar("rap_app_request_id", default=None)
+
+
 def skip_logging_during_migration() -> bool:
     return not apps.ready or 'migrate' in sys.argv or 'makemigrations' in sys.argv
+
+
+# ────────────────────────────────────────────────────────────
+# 🔗 Identifiant de requête
+# ────────────────────────────────────────────────────────────
+def get_request_id():
+    return _request_id.get()
+
+
+def set_request_id(value):
+    """Définit l'identifiant de la requête courante ; retourne le jeton de restauration."""
+    return _request_id.set(value)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Ajoute `record.request_id` ("-" hors requête) ; ne filtre rien."""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get() or "-"
+        return True
+
+
+# ────────────────────────────────────────────────────────────
+# 🧾 Lignes JSON
+# ────────────────────────────────────────────────────────────
+class JsonFormatter(logging.Formatter):
+    """Un objet JSON par ligne : ts, level, logger, message, request_id, module, line…"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+# ────────────────────────────────────────────────────────────
+# 🚚 File d'attente + thread d'écriture
+# ────────────────────────────────────────────────────────────
+def _handler_by_name(name):
+    getter = getattr(logging, "getHandlerByName", None)  # Python ≥ 3.12
+    return getter(name) if getter else logging._handlers.get(name)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Handler `dictConfig` qui délègue à d'autres handlers nommés via un
+    `QueueListener` (démarré au premier enregistrement, puis après un fork).
+
+    `targets` : noms des handlers cibles déclarés dans LOGGING (pas
+    `handlers`, que `dictConfig` ≥ 3.12 interprète pour ses propres files).
+    Une cible pas encore créée lève "not configured yet" : `dictConfig`
+    reporte alors ce handler après les autres.
+    `queue_size` : au-delà, les enregistrements sont abandonnés (compteur
+    `dropped`) plutôt que de bloquer la requête.
+    """
+
+    def __init__(self, targets=(), queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(queue_size))
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self.dropped = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.targets = []  # références fortes : le registre des noms est faible
+        for name in targets:
+            handler = _handler_by_name(name)
+            if handler is None:
+                raise ValueError(f"target {name!r} not configured yet")
+            self.targets.append(handler)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Après un fork, le thread du parent n'existe plus : nouveau listener
+            self.listener = QueueListener(
+                self.queue, *self.targets, respect_handler_level=self.respect_handler_level
+            )
+            self.listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        listener, self.listener, self._pid = self.listener, None, None
+        if listener is not None and listener._thread is not None:
+            listener.stop()  # vide la file avant de rendre la main
+
+    def prepare(self, record):
+        """
+        Seul travail fait dans le thread appelant : rendre le message (les
+        arguments sont lus maintenant, pas dans le thread d'écriture) et la
+        trace d'exception. Horodatage et formatage des handlers → listener.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
@@ -0,0 +1,74 @@
+# rap_app/utils/pg_copy.py
+
+"""
+🚚 Écriture en masse via `COPY … FROM STDIN` (PostgreSQL).
+
+Les lignes sont encodées au format texte de COPY (tabulations, `\\N` pour
+NULL) et lues par le serveur depuis un flux alimenté à la demande : une
+seule commande pour N lignes, mémoire constante.
+"""
+
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+# Séquences d'échappement du format texte de COPY
+_ECHAPPEMENTS = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_value(value) -> str:
+    """Valeur Python → champ du format texte de COPY."""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date, time)):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = format(value, "f")
+    return str(value).translate(_ECHAPPEMENTS)
+
+
+class _FluxLignes(io.RawIOBase):
+    """Fichier en lecture seule alimenté par un itérable de lignes (bytes)."""
+
+    def __init__(self, lignes):
+        self._lignes = iter(lignes)
+        self._reste = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._reste:
+            try:
+                self._reste = next(self._lignes)
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self._reste))
+        buffer[:n], self._reste = self._reste[:n], self._reste[n:]
+        return n
+
+
+def copy_rows(connection, table: str, columns, rows) -> int:
+    """
+    Insère `rows` (itérable de séquences alignées sur `columns`) dans `table`
+    par un seul `COPY FROM STDIN`. Retourne le nombre de lignes envoyées.
+    """
+    qn = connection.ops.quote_name
+    compteur = [0]
+
+    def lignes():
+        for row in rows:
+            compteur[0] += 1
+            yield ("\t".join(copy_value(v) for v in row) + "\n").encode("utf-8")
+
+    sql = f"COPY {qn(table)} ({', '.join(qn(c) for c in columns)}) FROM STDIN"
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, io.BufferedReader(_FluxLignes(lignes()), buffer_size=256 * 1024))
+    return compteur[0]
@@ -0,0 +1,255 @@
+# rap_app/utils/profiling.py
+
+"""
+🔬 Profilage SQL par requête (opt-in via settings.SQL_PROFILING).
+
+- Mesure le nombre de requêtes SQL, le temps DB cumulé et repère les
+  requêtes répétées (même empreinte SQL → suspicion de N+1).
+- Mesure le temps passé dans `serializer.data` (sérialisation DRF).
+- Échantillonne les résultats dans un tampon circulaire (par worker) et,
+  optionnellement, dans un fichier JSONL partagé par tous les workers.
+- `connection.execute_wrapper` est propre au thread : le code qui exécute
+  des requêtes dans un thread de travail (tableau de bord, vues async)
+  l'entoure de `profile_thread()` pour qu'elles soient comptées.
+"""
+
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 1.0,
+    "BUFFER_SIZE": 2000,
+    "LOG_FILE": "",
+    "TOP_FINGERPRINTS": 5,
+}
+
+_current_profile = contextvars.ContextVar("rap_app_sql_profile", default=None)
+_buffer_lock = threading.Lock()
+_file_lock = threading.Lock()
+_buffer = None
+
+
+def get_config() -> dict:
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "SQL_PROFILING", {}) or {})
+    return conf
+
+
+def get_buffer() -> deque:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = deque(maxlen=int(get_config()["BUFFER_SIZE"]))
+    return _buffer
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🧬 Empreintes SQL
+# ─────────────────────────────────────────────────────────────────────────────
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_RE_SPACES = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Normalise une requête SQL pour regrouper les requêtes « identiques à la
+    valeur près » : littéraux → ?, listes IN (...) repliées, espaces compactés.
+    """
+    sql = _RE_STRING.sub("?", sql or "")
+    sql = _RE_NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _RE_IN_LIST.sub("IN (...)", sql)
+    return _RE_SPACES.sub(" ", sql).strip()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 📒 Profil d'une requête HTTP
+# ─────────────────────────────────────────────────────────────────────────────
+class RequestProfile:
+    __slots__ = ("queries", "db_time", "serializer_time", "fingerprints", "_serializer_depth", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.fingerprints = Counter()
+        self._serializer_depth = 0
+        self._lock = threading.Lock()  # plusieurs threads de travail par requête
+
+    def __call__(self, execute, sql, params, many, context):
+        """`connection.execute_wrapper` : chronomètre chaque requête SQL."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            fingerprint = fingerprint_sql(sql)
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                self.fingerprints[fingerprint] += 1
+
+    @property
+    def duplicate_queries(self) -> int:
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def top_duplicates(self, limit: int):
+        return [
+            {"sql": fp[:300], "count": n}
+            for fp, n in self.fingerprints.most_common(limit)
+            if n > 1
+        ]
+
+
+def activate_profile(profile):
+    return _current_profile.set(profile)
+
+
+def deactivate_profile(token):
+    _current_profile.reset(token)
+
+
+@contextmanager
+def profile_thread():
+    """
+    Dans un thread de travail exécuté avec le contexte de la requête
+    (`contextvars.copy_context().run`, `sync_to_async`) : branche le profil
+    courant sur la connexion de ce thread. Sans profil actif, ne fait rien.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    with connection.execute_wrapper(profile):
+        yield
+
+
+def record(entry: dict):
+    """Ajoute une mesure au tampon mémoire et au fichier JSONL éventuel."""
+    get_buffer().append(entry)
+    log_file = get_config()["LOG_FILE"]
+    if not log_file:
+        return
+    try:
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with _file_lock, open(log_file, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    except OSError as exc:
+        logger.warning("Profilage SQL : écriture impossible dans %s (%s)", log_file, exc)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ⏱️ Temps de sérialisation DRF
+# ─────────────────────────────────────────────────────────────────────────────
+def _timed_data_property(prop):
+    def fget(serializer):
+        profile = _current_profile.get()
+        if profile is None or profile._serializer_depth:
+            return prop.fget(serializer)
+        profile._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return prop.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile._serializer_depth -= 1
+
+    fget._rap_app_profiled = True
+    return property(fget)
+
+
+def install_serializer_timing():
+    """
+    Enveloppe `Serializer.data` / `ListSerializer.data` pour mesurer la
+    sérialisation de premier niveau. N'est installé que si le profilage est actif.
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__.get("data")
+        if isinstance(prop, property) and not getattr(prop.fget, "_rap_app_profiled", False):
+            cls.data = _timed_data_property(prop)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 📈 Rapport par endpoint
+# ─────────────────────────────────────────────────────────────────────────────
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def load_entries(source: str = "memory", limit: int = 20000) -> list:
+    """Retourne les mesures du tampon (`memory`) ou du fichier JSONL (`file`)."""
+    if source != "file":
+        return list(get_buffer())
+    log_file = get_config()["LOG_FILE"]
+    if not log_file:
+        return []
+    try:
+        with open(log_file, encoding="utf-8") as fh:
+            lines = deque(fh, maxlen=limit)
+    except OSError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def build_report(entries, order_by: str = "p95", limit: int = 50) -> list:
+    """
+    Agrège les mesures par endpoint (méthode + route) :
+    nombre d'appels, p50/p95 de la durée totale, moyenne de requêtes SQL,
+    temps DB / sérialisation moyens, doublons (max et moyenne).
+    """
+    groups = defaultdict(list)
+    for e in entries:
+        groups[(e.get("method"), e.get("endpoint"))].append(e)
+
+    rows = []
+    for (method, endpoint), items in groups.items():
+        durations = sorted(i.get("duration_ms", 0) for i in items)
+        n = len(items)
+        dup_max = max(i.get("duplicates", 0) for i in items)
+        worst = max(items, key=lambda i: i.get("duplicates", 0))
+        rows.append({
+            "method": method,
+            "endpoint": endpoint,
+            "calls": n,
+            "p50_ms": round(_percentile(durations, 50), 1),
+            "p95_ms": round(_percentile(durations, 95), 1),
+            "avg_queries": round(sum(i.get("queries", 0) for i in items) / n, 1),
+            "avg_db_ms": round(sum(i.get("db_ms", 0) for i in items) / n, 1),
+            "avg_serializer_ms": round(sum(i.get("serializer_ms", 0) for i in items) / n, 1),
+            "duplicates_max": dup_max,
+            "duplicates_avg": round(sum(i.get("duplicates", 0) for i in items) / n, 1),
+            "top_duplicates": worst.get("top_duplicates", []),
+        })
+
+    key = {
+        "duplicates": lambda r: (r["duplicates_max"], r["p95_ms"]),
+        "queries": lambda r: (r["avg_queries"], r["p95_ms"]),
+    }.get(order_by, lambda r: (r["p95_ms"], r["duplicates_max"]))
+    rows.sort(key=key, reverse=True)
+    return rows[:limit]
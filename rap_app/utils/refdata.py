@@ -0,0 +1,155 @@
+# rap_app/utils/refdata.py
+
+"""
+📚 Cache local au processus des référentiels Centre / Statut / TypeOffre.
+
+- Chaque table est chargée en une requête : id → dict immuable
+  (nom, libellé, couleur, code postal / département).
+- La version partagée du modèle (`BaseModel.invalidate_caches()` →
+  `bump_cache_version("<Modèle>")`) est relue au plus une fois par
+  `REFDATA_VERSION_CHECK_INTERVAL` secondes ; la table est rechargée
+  paresseusement quand elle change (autre worker compris).
+- Les écritures du processus courant l'oublient immédiatement, puis à
+  nouveau au commit (`forget_on_commit`) : une table rechargée pendant la
+  transaction ne garde pas l'état d'avant.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache_utils import get_cache_versions
+
+DEFAULT_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_tables = {}  # nom du modèle → (version, vérifiée_à, mapping)
+
+
+def _load_centres():
+    from ..models.centres import Centre
+
+    for c in Centre.objects.only("id", "nom", "code_postal").order_by():
+        yield {
+            "id": c.id,
+            "nom": c.nom,
+            "libelle": c.nom,
+            "code_postal": c.code_postal,
+            "departement": c.departement,
+        }
+
+
+def _load_statuts():
+    from ..models.statut import Statut
+
+    for s in Statut.objects.only("id", "nom", "couleur", "description_autre").order_by():
+        yield {
+            "id": s.id,
+            "nom": s.nom,
+            "libelle": s.get_nom_display(),
+            "couleur": s.couleur,
+        }
+
+
+def _load_types_offre():
+    from ..models.types_offre import TypeOffre
+
+    for t in TypeOffre.objects.only("id", "nom", "autre", "couleur").order_by():
+        yield {
+            "id": t.id,
+            "nom": t.nom,
+            "libelle": str(t),
+            "couleur": t.couleur,
+        }
+
+
+LOADERS = {
+    "Centre": _load_centres,
+    "Statut": _load_statuts,
+    "TypeOffre": _load_types_offre,
+}
+
+
+def _check_interval() -> float:
+    return float(getattr(settings, "REFDATA_VERSION_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL))
+
+
+def get_table(name: str):
+    """Retourne le mapping immuable id → ligne du référentiel `name`."""
+    now = time.monotonic()
+    entry = _tables.get(name)
+    if entry is not None and now - entry[1] < _check_interval():
+        return entry[2]
+
+    version = get_cache_versions(name)[0]
+    if entry is not None and entry[0] == version:
+        _tables[name] = (version, now, entry[2])
+        return entry[2]
+
+    with _lock:
+        entry = _tables.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[2]
+        mapping = MappingProxyType({row["id"]: MappingProxyType(row) for row in LOADERS[name]()})
+        _tables[name] = (version, now, mapping)
+        return mapping
+
+
+def forget(*names):
+    """Oublie les tables locales (appelé après une écriture dans ce processus)."""
+    for name in names:
+        _tables.pop(name, None)
+
+
+def forget_on_commit(*names, using=None):
+    """`forget()` tout de suite et au commit de la transaction en cours."""
+    forget(*names)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: forget(*names), using=using)
+
+
+def lookup(name: str, pk):
+    """
+    Ligne `pk` du référentiel `name` ; recharge une fois la table si la ligne
+    est inconnue (créée à l'instant par un autre worker).
+    """
+    if pk is None:
+        return None
+    row = get_table(name).get(pk)
+    if row is None:
+        forget(name)
+        row = get_table(name).get(pk)
+    return row
+
+
+def get_centre(pk):
+    return get_table("Centre").get(pk) if pk is not None else None
+
+
+def get_statut(pk):
+    return get_table("Statut").get(pk) if pk is not None else None
+
+
+def get_type_offre(pk):
+    return get_table("TypeOffre").get(pk) if pk is not None else None
+
+
+def label_map(model, ids, field: str = "nom"):
+    """
+    {pk: libellé} pour un modèle référentiel, sans requête ; None si le modèle
+    n'est pas géré ici (l'appelant retombe sur sa requête habituelle).
+    """
+    name = getattr(model, "__name__", "")
+    if name not in LOADERS:
+        return None
+    table = get_table(name)
+    out = {}
+    for pk in ids:
+        row = table.get(pk)
+        if row is None:
+            return None  # ligne inconnue (créée à l'instant ailleurs) → requête
+        out[pk] = row[field] or f"{name} #{pk}"
+    return out
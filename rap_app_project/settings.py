@@ -159,6 +159,8 @@ JAZZMIN_UI_TWEAKS = {
 # MIDDLEWARE
 # ==========
 MIDDLEWARE = [
+    # Identifiant de corrélation des logs (X-Request-ID), en tête de chaîne
+    "rap_app.middleware.RequestIdMiddleware",
     "django.middleware.security.SecurityMiddleware",
     # WhiteNoise doit être juste après SecurityMiddleware
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -169,6 +171,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Utilisateur courant en variable de contexte (modèles / signaux, WSGI et ASGI)
+    "rap_app.middleware.CurrentUserMiddleware",
+    # Profilage SQL opt-in (inactif si SQL_PROFILING["ENABLED"] est faux)
+    "rap_app.middleware.SQLProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -206,7 +212,15 @@ AUTH_USER_MODEL = "rap_app.CustomUser"
 # DB_PASSWORD=...
 # DB_HOST=localhost
 # DB_PORT=5432
+#
+# Profil connexions (optionnel) :
+# DB_CONN_MAX_AGE=60          # secondes ; 0 = une connexion par requête
+# DB_CONN_HEALTH_CHECKS=True  # vérifie une connexion persistante avant réutilisation
+# DB_CONNECT_TIMEOUT=5
+# DB_POOL_MODE=direct         # direct | pgbouncer (pooling "transaction")
 # ==========
+DB_POOL_MODE = config("DB_POOL_MODE", default="direct").lower()
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -215,17 +229,70 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),
         "HOST": config("DB_HOST", default="localhost"),
         "PORT": config("DB_PORT", default="5432"),
+        # Connexions persistantes : évite un handshake TCP + auth à chaque requête
+        "CONN_MAX_AGE": int(config("DB_CONN_MAX_AGE", default="60")),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default="True").lower() == "true",
+        # pgbouncer en mode transaction : les curseurs serveur (nommés) ne survivent
+        # pas d'une transaction à l'autre → désactivés (voir utils/db.stream_queryset)
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL_MODE == "pgbouncer",
+        "OPTIONS": {
+            "connect_timeout": int(config("DB_CONNECT_TIMEOUT", default="5")),
+        },
         # Optionnel :
         # "ATOMIC_REQUESTS": True,
     }
 }
 
+# ==========
+# CACHE
+# ==========
+# CACHE_BACKEND=locmem   # locmem (défaut, propre à chaque worker) | file | redis
+# CACHE_LOCATION=        # dossier (file) ou URL redis://... (redis)
+#
+# ⚠️ En production (plusieurs workers gunicorn), utiliser `file` ou `redis` :
+# l'invalidation des caches versionnés (options, méta…) doit être partagée.
+# `redis` nécessite le client Python `redis` (requirements.txt).
+# ==========
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem").lower()
+if CACHE_BACKEND == "redis":
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        from django.core.exceptions import ImproperlyConfigured
+
+        raise ImproperlyConfigured(
+            "CACHE_BACKEND=redis nécessite le paquet `redis` (pip install -r requirements.txt)."
+        )
+_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS.get(CACHE_BACKEND, _CACHE_BACKENDS["locmem"]),
+        "LOCATION": config(
+            "CACHE_LOCATION",
+            default=str(BASE_DIR / "cache") if CACHE_BACKEND == "file" else "",
+        ),
+        "TIMEOUT": 300,
+    }
+}
+
+# Cache locmem toléré (un seul processus : dev, tests). Sinon `manage.py check`
+# échoue : versions de cache / ETag propres à chaque worker (rap_app.E001)
+CACHE_LOCMEM_AUTORISE = config("CACHE_LOCMEM_AUTORISE", default=str(DEBUG)).lower() == "true"
+
+# Durée de vie des réponses « options / méta » (listes déroulantes) en secondes
+OPTIONS_CACHE_TIMEOUT = int(config("OPTIONS_CACHE_TIMEOUT", default="600"))
+
 # ==========
 # DRF
 # ==========
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT + utilisateur en cache versionné (zéro requête sur le chemin chaud)
+        "rap_app.api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -233,11 +300,12 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     # En prod on ne sert que JSON ; en dev on garde le Browsable API
+    # (FastJSONRenderer = orjson si installé, sortie identique à JSONRenderer)
     "DEFAULT_RENDERER_CLASSES": (
-        ["rest_framework.renderers.JSONRenderer"]
+        ["rap_app.api.renderers.FastJSONRenderer"]
         if not DEBUG
         else [
-            "rest_framework.renderers.JSONRenderer",
+            "rap_app.api.renderers.FastJSONRenderer",
             "rest_framework.renderers.BrowsableAPIRenderer",
         ]
     ),
@@ -266,6 +334,12 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
 
+# Durée (s) du cache utilisateur de l'authentification JWT (invalidé à chaque
+# save() du compte ou modification de ses centres)
+AUTH_USER_CACHE_TIMEOUT = int(config("AUTH_USER_CACHE_TIMEOUT", default="60"))
+# Lecture (GET/HEAD/OPTIONS) servie depuis les claims signés du jeton (rôle, centres)
+JWT_TRUST_SCOPE_CLAIMS = config("JWT_TRUST_SCOPE_CLAIMS", default="False").lower() == "true"
+
 # ==========
 # SPECTACULAR
 # ==========
@@ -299,6 +373,12 @@ SPECTACULAR_SETTINGS = {
     "GENERIC_ADDITIONAL_PROPERTIES": None,
 }
 
+# /api/schema/ : artefacts précalculés (manage.py build_schema), un jeu par
+# version du code. SCHEMA_CODE_VERSION (ex. `git rev-parse HEAD`) évite le
+# calcul de l'empreinte des sources au démarrage.
+SCHEMA_CODE_VERSION = config("SCHEMA_CODE_VERSION", default="")
+SCHEMA_CACHE_DIR = config("SCHEMA_CACHE_DIR", default=str(BASE_DIR / "cache" / "openapi"))
+
 # ==========
 # CSRF / CORS
 # .env :
@@ -369,6 +449,58 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Téléversements : empreinte SHA-256 + type MIME calculés pendant la réception
+# (stockage dédupliqué des documents / CV, cf. rap_app/utils/blob_storage.py)
+FILE_UPLOAD_HANDLERS = [
+    "rap_app.utils.blob_storage.HashingMemoryFileUploadHandler",
+    "rap_app.utils.blob_storage.HashingTemporaryFileUploadHandler",
+]
+# Délai avant effacement d'un fichier dédupliqué sans référence (collecter_blobs)
+BLOB_GC_GRACE_HOURS = int(config("BLOB_GC_GRACE_HOURS", default="24"))
+
+# Téléchargements protégés (documents, CV) : Django autorise, le serveur frontal
+# transfère. "x-accel" (nginx) | "x-sendfile" (Apache/lighttpd) | "" = streaming
+# Python (Range + ETag), par défaut car sans configuration serveur.
+FILE_DELIVERY_BACKEND = config("FILE_DELIVERY_BACKEND", default="")
+# Location nginx `internal` qui pointe sur MEDIA_ROOT (mode x-accel)
+FILE_DELIVERY_ACCEL_PREFIX = config("FILE_DELIVERY_ACCEL_PREFIX", default="/protected-media/")
+
+# Miniatures (1re page) des documents / CV : rendu après commit sur un pool de
+# threads par worker ; APERCU_BACKGROUND=False → rendu en ligne (tests).
+APERCU_BACKGROUND = config("APERCU_BACKGROUND", default="True").lower() == "true"
+APERCU_WORKERS = int(config("APERCU_WORKERS", default="2"))
+APERCU_LARGEUR = int(config("APERCU_LARGEUR", default="320"))
+
+# Texte intégral des CV (recherche ?q= de la CVThèque) : extraction après commit
+# sur un pool dédié (OCR Tesseract si la couche texte PDF est vide) ;
+# CV_TEXTE_BACKGROUND=False → extraction en ligne (tests).
+CV_TEXTE_BACKGROUND = config("CV_TEXTE_BACKGROUND", default="True").lower() == "true"
+CV_TEXTE_WORKERS = int(config("CV_TEXTE_WORKERS", default="1"))
+CV_TEXTE_MAX_CARACTERES = int(config("CV_TEXTE_MAX_CARACTERES", default="50000"))
+CV_OCR_LANG = config("CV_OCR_LANG", default="fra+eng")
+CV_OCR_MAX_PAGES = int(config("CV_OCR_MAX_PAGES", default="3"))
+# Configuration de recherche PostgreSQL (racinisation du tsvector)
+CV_RECHERCHE_CONFIG = config("CV_RECHERCHE_CONFIG", default="french")
+
+# /api/dashboard/ : widgets de stats exécutés en série par défaut (mesuré plus
+# rapide que le pool, cf. DEPLOY) ; DASHBOARD_CONCURRENT=True → pool de threads
+# (1 connexion DB par thread), si bench_api le confirme. Cache par widget (s).
+DASHBOARD_CONCURRENT = config("DASHBOARD_CONCURRENT", default="False").lower() == "true"
+DASHBOARD_WORKERS = int(config("DASHBOARD_WORKERS", default="4"))
+DASHBOARD_CACHE_TIMEOUT = int(config("DASHBOARD_CACHE_TIMEOUT", default="60"))
+
+# Profil ASGI (uvicorn) : /api/search/ et /api/dashboard/ servis par des vues
+# async (rap_app/api/async_views.py). Sans effet en WSGI : laisser à False.
+ASYNC_VIEWS = config("ASYNC_VIEWS", default="False").lower() == "true"
+# Sous-requêtes des vues async en parallèle (1 connexion DB par thread)
+ASYNC_VIEWS_CONCURRENT = config("ASYNC_VIEWS_CONCURRENT", default="True").lower() == "true"
+
+# Historiques / journaux écrits en masse (utils/bulk_writer.py) : lots de
+# BULK_WRITE_BATCH_SIZE lignes, via COPY FROM STDIN (PostgreSQL) à partir de
+# BULK_COPY_MIN_ROWS lignes, bulk_create en dessous.
+BULK_WRITE_BATCH_SIZE = int(config("BULK_WRITE_BATCH_SIZE", default="5000"))
+BULK_COPY_MIN_ROWS = int(config("BULK_COPY_MIN_ROWS", default="200"))
+
 # ==========
 # AUTH / REDIRECTS
 # ==========
@@ -416,48 +548,108 @@ LOG_SANITIZATION_WARNINGS = True
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 Path(LOG_DIR).mkdir(exist_ok=True)
 
+# Écritures hors du thread de la requête (QueueHandler → QueueListener) ;
+# LOG_ASYNC=False → handlers appelés directement (débogage).
+LOG_ASYNC = config("LOG_ASYNC", default="True").lower() == "true"
+# Rotation des fichiers :
+#   logrotate (défaut) → WatchedFileHandler : plusieurs workers gunicorn écrivent
+#                        en ajout dans le même fichier, rotation externe (logrotate)
+#   size               → RotatingFileHandler : un seul processus (runserver) ;
+#                        avec plusieurs workers, chacun renommerait les fichiers des autres
+LOG_ROTATION = config("LOG_ROTATION", default="logrotate").lower()
+LOG_MAX_BYTES = int(config("LOG_MAX_BYTES", default=str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(config("LOG_BACKUP_COUNT", default="5"))
+
+
+def _log_file(filename, level, formatter):
+    handler = {
+        "level": level,
+        "class": "logging.handlers.WatchedFileHandler",
+        "filename": os.path.join(LOG_DIR, filename),
+        "encoding": "utf-8",
+        "delay": True,
+        "formatter": formatter,
+        "filters": ["request_id"],
+    }
+    if LOG_ROTATION == "size":
+        handler.update(
+            {"class": "logging.handlers.RotatingFileHandler", "maxBytes": LOG_MAX_BYTES, "backupCount": LOG_BACKUP_COUNT}
+        )
+    return handler
+
+
+# Handlers de chaque logger (en mode async : une file par route, même destination)
+_LOG_ROUTES = {
+    "django": ["file", "console", "json_file"],
+    "rap_app": ["file", "console", "audit_file", "json_file"],
+    "rap_app.audit": ["audit_file", "json_file"],
+    "rap_app.candidats": ["console", "audit_file", "json_file"],
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "rap_app.utils.logging_utils.RequestIdFilter"},
+    },
     "formatters": {
         "verbose": {
-            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
+            "format": "{levelname} {asctime} {module} {process:d} {thread:d} [{request_id}] {message}",
             "style": "{",
         },
         "simple": {"format": "{levelname} {message}", "style": "{"},
         "audit": {
-            "format": "{asctime} | {levelname} | {module} | {message}",
+            "format": "{asctime} | {levelname} | {module} | {request_id} | {message}",
             "style": "{",
         },
+        "json": {"()": "rap_app.utils.logging_utils.JsonFormatter"},
     },
     "handlers": {
-        "file": {
-            "level": "ERROR",
-            "class": "logging.FileHandler",
-            "filename": os.path.join(LOG_DIR, "errors.log"),
-            "formatter": "verbose",
-        },
+        "file": _log_file("errors.log", "ERROR", "verbose"),
         "console": {"level": "INFO", "class": "logging.StreamHandler", "formatter": "simple"},
-        "audit_file": {
-            "level": "INFO",
-            "class": "logging.FileHandler",
-            "filename": os.path.join(LOG_DIR, "audit.log"),
-            "formatter": "audit",
-        },
+        "audit_file": _log_file("audit.log", "INFO", "audit"),
+        # Lignes JSON corrélées par request_id (ingestion Loki / ELK / jq)
+        "json_file": _log_file("app.jsonl", "INFO", "json"),
     },
     "loggers": {
-        "django": {"handlers": ["file", "console"], "level": "INFO", "propagate": True},
-        "rap_app": {"handlers": ["file", "console", "audit_file"], "level": "INFO", "propagate": True},
-        "rap_app.audit": {"handlers": ["audit_file"], "level": "INFO", "propagate": False},
-        "rap_app.candidats": {
-            "handlers": ["console", "audit_file"],
-            "level": "DEBUG",
-            "propagate": False,
-        },
+        "django": {"level": "INFO", "propagate": True},
+        "rap_app": {"level": "INFO", "propagate": True},
+        "rap_app.audit": {"level": "INFO", "propagate": False},
+        "rap_app.candidats": {"level": "DEBUG", "propagate": False},
         # "django.db.backends": {"handlers": ["console"], "level": "INFO", "propagate": False},
     },
 }
 
+for _name, _targets in _LOG_ROUTES.items():
+    if LOG_ASYNC:
+        _queue = f"queue_{_name.replace('.', '_')}"
+        LOGGING["handlers"][_queue] = {
+            "class": "rap_app.utils.logging_utils.QueueListenerHandler",
+            "targets": _targets,
+            "filters": ["request_id"],
+        }
+        LOGGING["loggers"][_name]["handlers"] = [_queue]
+    else:
+        LOGGING["loggers"][_name]["handlers"] = _targets
+
+# ==========
+# PROFILAGE SQL (opt-in)
+# .env :
+# SQL_PROFILING_ENABLED=True
+# SQL_PROFILING_SAMPLE_RATE=0.1   # part des requêtes mesurées
+# SQL_PROFILING_LOG_FILE=True     # écrit aussi logs/sql_profile.jsonl (tous workers)
+# ==========
+SQL_PROFILING = {
+    "ENABLED": config("SQL_PROFILING_ENABLED", default="False").lower() == "true",
+    "SAMPLE_RATE": float(config("SQL_PROFILING_SAMPLE_RATE", default="1.0")),
+    "BUFFER_SIZE": int(config("SQL_PROFILING_BUFFER_SIZE", default="2000")),
+    "LOG_FILE": (
+        os.path.join(LOG_DIR, "sql_profile.jsonl")
+        if config("SQL_PROFILING_LOG_FILE", default="False").lower() == "true"
+        else ""
+    ),
+}
+
 # ==========
 # MODEL LOGGING SWITCH
 # ==========
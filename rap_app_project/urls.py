@@ -4,17 +4,19 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
 
+from rap_app.api.schema_cache import CachedSchemaView
+
 urlpatterns = [
     # --- Django Admin ---
     path('admin/', admin.site.urls),
 
     # --- API Schema & Docs (toujours AVANT /api/) ---
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # Schéma précalculé par version du code (ETag + gzip), cf. build_schema
+    path('api/schema/', CachedSchemaView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 